@@ -1,7 +1,18 @@
 import os
 import subprocess
+import tempfile
 from dataclasses import dataclass
+from typing import Optional
 
+from app.daas.adapter.adapter_transfer import (
+    ProgressCallback,
+    TransferEntry,
+    TransferResult,
+    get_confirmed_names,
+    get_extract_command,
+    get_transfer_root,
+    write_tar_stream,
+)
 from app.qweb.logging.logging import LogTarget, Loggable
 
 
@@ -73,28 +84,52 @@ class SshAdapter(Loggable):
             self._log_error(f"{str(ex)} -> {args}", 1)
             raise OSError("Ssh execution failed for unknown reason!") from ex
 
+    def tar_upload_call(
+        self,
+        entries: list[TransferEntry],
+        windows: bool,
+        progress: Optional[ProgressCallback] = None,
+    ) -> TransferResult:
+        """
+        Copies many files as a single tar stream over one ssh channel.
+
+        The remote tar creates missing folders and applies permissions
+        while extracting, so the whole batch takes a single round trip.
+        """
+        root = get_transfer_root(entries)
+        args = get_extract_command(root, windows)
+        full_command = [*self.__get_ssh_command(), args]
+        # pylint: disable=broad-exception-caught
+        try:
+            with tempfile.TemporaryFile() as out, tempfile.TemporaryFile() as err:
+                with subprocess.Popen(
+                    full_command, stdin=subprocess.PIPE, stdout=out, stderr=err
+                ) as process:
+                    assert process.stdin is not None
+                    try:
+                        files = write_tar_stream(entries, root, process.stdin, progress)
+                    finally:
+                        process.stdin.close()
+                    code = process.wait()
+                out.seek(0)
+                err.seek(0)
+                std_out = out.read().decode(errors="replace").strip()
+                std_err = err.read().decode(errors="replace").strip()
+        except Exception as exe:
+            self._log_error(f"{str(exe)} -> {args}", -1)
+            return TransferResult(-1, "", f"Exception raised: {exe}")
+
+        confirmed = get_confirmed_names(std_out, std_err)
+        for item in files:
+            item.confirmed = code == 0 and item.name in confirmed
+        self._print_result(f"{args} ({len(files)} files)", code, "", std_err)
+        return TransferResult(code, std_out, std_err, files)
+
     def ssh_call(self, args: str) -> tuple[int, str, str]:
         """
         Spawns a process with given arguments
         """
-        full_command = [
-            "ssh",
-            "-o",
-            f"ConnectTimeout={self.config.sshopt_timeout}",
-            "-o",
-            f"StrictHostKeyChecking={self.config.sshopt_strictcheck}",
-            "-o",
-            "UserKnownHostsFile=/dev/null",
-            "-o",
-            f"NoHostAuthenticationForLocalhost={self.config.sshopt_nohostauth}",
-            "-o",
-            "LogLevel=quiet",
-            "-p",
-            f"{self.config.sshport}",
-            f"{self.config.sshuser}@{self.config.sshhost}",
-            args,
-            "&",
-        ]
+        full_command = [*self.__get_ssh_command(), args, "&"]
         # self.__log_info(f"SSHARGS: {full_command}")
         # pylint: disable=broad-exception-caught
         try:
@@ -129,6 +164,24 @@ class SshAdapter(Loggable):
             self._log_error(msg, -1)
             return -1, "", f"Exception raised: {exe}"
 
+    def __get_ssh_command(self) -> list[str]:
+        return [
+            "ssh",
+            "-o",
+            f"ConnectTimeout={self.config.sshopt_timeout}",
+            "-o",
+            f"StrictHostKeyChecking={self.config.sshopt_strictcheck}",
+            "-o",
+            "UserKnownHostsFile=/dev/null",
+            "-o",
+            f"NoHostAuthenticationForLocalhost={self.config.sshopt_nohostauth}",
+            "-o",
+            "LogLevel=quiet",
+            "-p",
+            f"{self.config.sshport}",
+            f"{self.config.sshuser}@{self.config.sshhost}",
+        ]
+
     def _print_result(self, args, code, str_out, str_err):
         msg = ""
         if self.config.logcmd:
@@ -0,0 +1,188 @@
+"""Batch transfer of files as a single tar stream"""
+
+import io
+import os
+import posixpath
+import tarfile
+import time
+from dataclasses import dataclass, field
+from typing import IO, Callable, Optional
+
+TRANSFER_MODE_FILE = 0o644
+TRANSFER_MODE_EXEC = 0o755
+TRANSFER_MODE_DIR = 0o755
+
+
+@dataclass
+class TransferEntry:
+    """A local file and its destination within the instance"""
+
+    src: str
+    dst: str
+    mode: int = TRANSFER_MODE_FILE
+
+
+@dataclass
+class TransferProgress:
+    """Progress of a single file within a batch transfer"""
+
+    name: str
+    index: int
+    count: int
+    size: int
+    sent: int = 0
+    done: bool = False
+    confirmed: bool = False
+
+    def tojson(self) -> dict:
+        """Returns progress as json"""
+        return {
+            "name": self.name,
+            "size": self.size,
+            "sent": self.sent,
+            "done": self.done,
+            "confirmed": self.confirmed,
+        }
+
+
+@dataclass
+class TransferResult:
+    """Result of a batch transfer"""
+
+    code: int
+    std_out: str
+    std_err: str
+    files: list[TransferProgress] = field(default_factory=list)
+
+    @property
+    def succeeded(self) -> bool:
+        """True if all files were sent and extracted"""
+        return self.code == 0 and all(item.confirmed for item in self.files)
+
+    def tojson(self) -> dict:
+        """Returns result as json"""
+        return {
+            "code": self.code,
+            "files": [item.tojson() for item in self.files],
+        }
+
+
+ProgressCallback = Callable[[TransferProgress], None]
+
+
+def normalize_remote_path(path: str) -> str:
+    """Returns remote path with forward slashes"""
+    return path.replace("\\", "/")
+
+
+def get_transfer_root(entries: list[TransferEntry]) -> str:
+    """Returns the deepest remote folder containing all destinations"""
+    folders = [
+        posixpath.dirname(normalize_remote_path(entry.dst)) for entry in entries
+    ]
+    if len(folders) == 0:
+        raise ValueError("No files to transfer")
+    return posixpath.commonpath(folders)
+
+
+def get_extract_command(root: str, windows: bool) -> str:
+    """
+    Returns the remote command creating root and extracting stdin into it
+    """
+    if windows:
+        native = root.replace("/", "\\")
+        return f'mkdir "{native}" 2>nul & tar -xvf - -C "{root}"'
+    return f"mkdir -p '{root}' && tar -xvpf - -C '{root}'"
+
+
+def get_confirmed_names(std_out: str, std_err: str) -> set[str]:
+    """
+    Returns names reported as extracted by verbose tar
+
+    GNU tar lists names on stdout, bsdtar (Windows) prefixes them with
+    'x ' on stderr.
+    """
+    names = set()
+    for line in std_out.splitlines():
+        names.add(line.strip().rstrip("/"))
+    for line in std_err.splitlines():
+        if line.startswith("x "):
+            names.add(line[2:].strip().rstrip("/"))
+    return names
+
+
+def write_tar_stream(
+    entries: list[TransferEntry],
+    root: str,
+    stream: IO[bytes],
+    progress: Optional[ProgressCallback] = None,
+) -> list[TransferProgress]:
+    """
+    Writes entries as a tar stream relative to root.
+
+    Missing folders are added as entries of their own, so the receiving
+    tar creates them and applies all permissions in the same pass.
+    """
+    items = []
+    folders: set[str] = set()
+    mtime = int(time.time())
+    with tarfile.open(fileobj=stream, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+        for index, entry in enumerate(entries):
+            name = posixpath.relpath(normalize_remote_path(entry.dst), root)
+            for folder in _get_parent_folders(name):
+                if folder not in folders:
+                    folders.add(folder)
+                    tar.addfile(_create_folder_info(folder, mtime))
+            item = TransferProgress(
+                name, index, len(entries), os.path.getsize(entry.src)
+            )
+            info = tarfile.TarInfo(name)
+            info.size = item.size
+            info.mode = entry.mode
+            info.mtime = mtime
+            with open(entry.src, "rb", buffering=0) as file:
+                tar.addfile(info, _ProgressReader(file, item, progress))
+            item.done = True
+            if progress is not None:
+                progress(item)
+            items.append(item)
+    return items
+
+
+def _get_parent_folders(name: str) -> list[str]:
+    folders: list[str] = []
+    folder = posixpath.dirname(name)
+    while folder not in ("", "."):
+        folders.insert(0, folder)
+        folder = posixpath.dirname(folder)
+    return folders
+
+
+def _create_folder_info(name: str, mtime: int) -> tarfile.TarInfo:
+    info = tarfile.TarInfo(name)
+    info.type = tarfile.DIRTYPE
+    info.mode = TRANSFER_MODE_DIR
+    info.mtime = mtime
+    return info
+
+
+class _ProgressReader(io.BufferedReader):
+    """Counts bytes read by tarfile and reports them per chunk"""
+
+    def __init__(
+        self,
+        file: io.RawIOBase,
+        item: TransferProgress,
+        progress: Optional[ProgressCallback],
+    ):
+        super().__init__(file)
+        self.item = item
+        self.progress = progress
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        """Reads from file and updates progress"""
+        data = super().read(size)
+        self.item.sent += len(data)
+        if self.progress is not None and len(data) > 0:
+            self.progress(self.item)
+        return data
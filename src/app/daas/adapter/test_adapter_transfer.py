@@ -0,0 +1,71 @@
+"""Test batch transfer of files as tar stream."""
+
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from .adapter_transfer import (
+    TRANSFER_MODE_EXEC,
+    TransferEntry,
+    get_confirmed_names,
+    get_extract_command,
+    get_transfer_root,
+    write_tar_stream,
+)
+
+
+@pytest.mark.skipif(shutil.which("tar") is None, reason="tar not available")
+def test_tar_stream_extracts_in_one_pass(tmp_path):
+    """Folders, contents and modes arrive within a single tar invocation."""
+    local = tmp_path / "local"
+    local.mkdir()
+    (local / "setup.sh").write_bytes(b"#!/bin/sh\necho setup\n")
+    (local / "data.bin").write_bytes(os.urandom(100000))
+    remote = tmp_path / "remote"
+    entries = [
+        TransferEntry(str(local / "setup.sh"), f"{remote}/tmp/setup.sh"),
+        TransferEntry(str(local / "data.bin"), f"{remote}/tmp/app/data.bin"),
+        TransferEntry(
+            str(local / "setup.sh"), f"{remote}/env/run.sh", TRANSFER_MODE_EXEC
+        ),
+    ]
+    root = get_transfer_root(entries)
+    assert root == str(remote)
+    assert get_transfer_root([TransferEntry("x", "C:\\Users\\root\\daas\\a")]) == (
+        "C:/Users/root/daas"
+    )
+
+    updates = []
+    with subprocess.Popen(
+        ["sh", "-c", get_extract_command(root, False)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    ) as process:
+        assert process.stdin is not None
+        items = write_tar_stream(
+            entries, root, process.stdin, lambda item: updates.append(item.sent)
+        )
+        process.stdin.close()
+        assert process.stdout is not None and process.stderr is not None
+        std_out = process.stdout.read().decode()
+        std_err = process.stderr.read().decode()
+        assert process.wait() == 0
+
+    assert [item.name for item in items] == [
+        "tmp/setup.sh",
+        "tmp/app/data.bin",
+        "env/run.sh",
+    ]
+    assert all(item.done and item.sent == item.size for item in items)
+    assert len(updates) > len(items)
+    confirmed = get_confirmed_names(std_out, std_err)
+    assert {item.name for item in items} <= confirmed
+    assert (remote / "tmp/app/data.bin").read_bytes() == (
+        local / "data.bin"
+    ).read_bytes()
+    assert os.access(remote / "env/run.sh", os.X_OK)
+    assert not os.access(remote / "tmp/setup.sh", os.X_OK)
+    assert get_confirmed_names("", "x tmp/a\nwarning\n") == {"tmp/a"}
@@ -78,11 +78,15 @@ class ConfigSections(Enum):
     HOST_DNS = "host_dns"
     HOST_SSH = "host_ssh"
     INFO_SYS = "sys"
+    INFO_SAMPLER = "sampler"
+    INFO_SNAPSHOTS = "snapshots"
+    INFO_RECONCILE = "reconcile"
     VM_API = "vm_api"
     VM_REST = "vm_rest"
     VM_HTTP = "vm_http"
     CONTAINER_REQUEST = "container_request"
     CONTAINER_SERVICES = "service_containers"
     FILES_STORE = "filestore"
+    FILES_USAGE = "usage"
     CEPH_STORE = "cephstore"
     CEPH_DAASFS = "cephstore.daasfs"
@@ -3,3 +3,7 @@
 
 class ObjectProcessingError(Exception):
     """Provides details on object errors"""
+
+
+class RessourceLimitError(ObjectProcessingError):
+    """Raised when demand of an object exceeds the ressource limits"""
@@ -561,6 +561,70 @@ class RessourceInfo(DaaSEntity):
         )
 
 
+@dataclass
+class RessourceAggregate:
+    """Ressources of objects summed up per owner and object type"""
+
+    id_owner: int
+    object_type: str
+    amount: int
+    cpus: int
+    memory: int
+    disk: int
+
+
+@ORMModelDomain(ORMMappingType.TaskJournal)
+@dataclass
+class TaskJournalEntry(DaaSEntity):
+    """Progress of a multi-step task, written ahead of each step"""
+
+    id: str
+    """Id of the scheduled task."""
+
+    tasktype: str
+    """Type of the scheduled task."""
+
+    id_owner: int
+    """Owner of the task."""
+
+    id_object: str
+    """Object the task works on."""
+
+    id_instance: str
+    """Instance the task works on."""
+
+    state: str
+    """Journal state: running, done, failed or compensated."""
+
+    step: str
+    """Last completed step."""
+
+    steps_done: list
+    """All completed steps in order."""
+
+    args: dict
+    """Serializable task arguments required to resume."""
+
+    data: dict
+    """Results of completed steps required to resume."""
+
+    reason: str
+    """Reason of failure or compensation."""
+
+    created_at: str
+    """When the task was started."""
+
+    updated_at: str
+    """When the journal was last written."""
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__qualname__}"
+            f"(id={self.id},type={self.tasktype},state={self.state},"
+            f"step={self.step})"
+        )
+
+
 @dataclass(kw_only=True)
 class AccessToken:
     """
@@ -2,11 +2,13 @@
 Docker facade
 """
 
+import asyncio
 import time
 import os
 import json
 import ast
 from dataclasses import dataclass
+from functools import partial
 from typing import Iterator, Optional
 import docker
 import docker.errors
@@ -14,8 +16,11 @@ import docker.models
 from docker.models.containers import Container
 from docker.models.images import Image
 
+from app.qweb.common.qweb_tools import get_service
 from app.qweb.logging.logging import LogTarget, Loggable
+from app.qweb.service.service_context import ServiceComponent
 from app.qweb.service.service_runtime import get_qweb_runtime
+from app.qweb.service.service_tasks import QwebTaskManager
 
 
 @dataclass
@@ -319,9 +324,23 @@ class DockerRequest(Loggable):
         if self.docker is None:
             return result
         contlist = self.docker.containers.list()
-        for cont in contlist:
-            info = self.__create_container_info(cont, include_stats)
-            result.append(info)
+        if include_stats is False:
+            return [self.__create_container_info(cont) for cont in contlist]
+
+        # Stats block for a sampling interval per container
+        taskman = await get_service(ServiceComponent.TASK, QwebTaskManager)
+        bulk = await taskman.run_bulk(
+            [
+                partial(asyncio.to_thread, self.__create_container_info, cont, True)
+                for cont in contlist
+            ]
+        )
+        for cont, item in zip(contlist, bulk.items):
+            if item.success:
+                result.append(item.result)
+            else:
+                self._log_error(f"Container stats failed for {cont.name}: {item.error}")
+                result.append(self.__create_container_info(cont))
         return result
 
     async def docker_container_logs(self, name: str) -> tuple[int, str, str]:
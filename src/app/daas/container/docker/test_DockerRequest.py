@@ -0,0 +1,71 @@
+"""Test reading container stats as a bounded batch."""
+
+import asyncio
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+from app.daas.container.docker.DockerRequest import (
+    DockerRequest,
+    DockerRequestConfig,
+    DockerServicesConfig,
+)
+from app.qweb.common.config import QwebBulkConfig
+from app.qweb.service.service_tasks import QwebTaskManager
+
+
+class _FakeContainer:
+    def __init__(self, name: str, inflight: list, lock: threading.Lock):
+        self.name = name
+        self.id = name
+        self.status = "running"
+        self.image = SimpleNamespace(attrs={}, tags=[name])
+        self.inflight = inflight
+        self.lock = lock
+
+    def stats(self, stream: bool) -> dict:
+        assert stream is False
+        with self.lock:
+            self.inflight[0] += 1
+            self.inflight[1] = max(self.inflight)
+        time.sleep(0.02)
+        with self.lock:
+            self.inflight[0] -= 1
+        if self.name == "broken":
+            raise ValueError("no stats")
+        return {
+            "cpu_stats": {"online_cpus": 1},
+            "memory_stats": {},
+            "blkio_stats": {},
+            "networks": {},
+        }
+
+
+def test_container_stats_are_read_bounded(monkeypatch):
+    """Stats of many containers are read with the bulk in-flight limit."""
+    inflight = [0, 0]
+    lock = threading.Lock()
+    names = [f"c{index}" for index in range(9)] + ["broken"]
+    containers = [_FakeContainer(name, inflight, lock) for name in names]
+    client = SimpleNamespace(containers=SimpleNamespace(list=lambda: containers))
+    monkeypatch.setattr(DockerRequest, "_DockerRequest__connect", lambda _: client)
+
+    async def scenario():
+        manager = QwebTaskManager(cfg_bulk=QwebBulkConfig(max_inflight=3))
+
+        async def get_service(*_):
+            return manager
+
+        module = sys.modules[DockerRequest.__module__]
+        monkeypatch.setattr(module, "get_service", get_service)
+        request = DockerRequest(
+            DockerRequestConfig("", 0, False), DockerServicesConfig([])
+        )
+        return await request.docker_container_list(True)
+
+    infos = asyncio.run(scenario())
+    assert inflight[1] == 3
+    assert [info.name for info in infos] == names
+    assert infos[0].stats_cpu == {"online_cpus": 1}
+    assert infos[-1].stats_raw == {}
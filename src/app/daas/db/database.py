@@ -19,6 +19,7 @@ from app.daas.db.db_repos import (
     InstanceRepository,
     LimitRepository,
     ObjectRepository,
+    TaskJournalRepository,
 )
 
 DEFAULT_ADMIN_ID = 5
@@ -32,6 +33,7 @@ class Database(
     EnvironmentRepository,
     ObjectRepository,
     InstanceRepository,
+    TaskJournalRepository,
 ):
     """
     A wrapper for database operations.
@@ -1,8 +1,9 @@
 """Database api"""
 
-from typing import Optional, Type
-from sqlalchemy import Column, Engine, Table, TextClause, text
-from sqlalchemy.orm import Query, Session
+from contextlib import nullcontext
+from typing import Any, Optional, Type
+from sqlalchemy import Column, Engine, Executable, Table, TextClause, text, update
+from sqlalchemy.orm import Query, Session, selectinload
 from sqlalchemy.schema import MetaData
 from app.daas.common.model import DaaSEntity
 from app.daas.db.db_model import (
@@ -13,8 +14,24 @@ from app.daas.db.db_model import (
     create_orm,
 )
 from app.daas.db.db_mappings import TableEntityMapping
+from app.qweb.common.metrics import METRICS
 from app.qweb.logging.logging import LogTarget, Loggable
 
+DB_QUERIES = METRICS.counter(
+    "daas_db_queries_total", "Database operations", ("operation", "table")
+)
+DB_DURATION = METRICS.histogram(
+    "daas_db_query_duration_seconds", "Database operation latency", ("operation",)
+)
+
+
+def measured(operation: str, table: str) -> Any:
+    """Counts an operation and times the enclosed block"""
+    if METRICS.enabled is False:
+        return nullcontext()
+    DB_QUERIES.labels(operation, table).inc()
+    return DB_DURATION.labels(operation).time()
+
 
 class DatabaseApiBase(Loggable):
     """Baseclass for Database api"""
@@ -109,13 +126,22 @@ class DatabaseApi(DatabaseApiBase):
         self,
         mapping: Type,
         filter: Optional[TextClause] = None,
+        preload: Optional[list[str]] = None,
     ) -> Optional[Query]:
-        """Query the session by using specified mapping"""
+        """
+        Query the session by using specified mapping
+
+        Relationships named in preload are fetched with one additional
+        query each instead of lazily per row.
+        """
         if self.session is None:
             return None
         qresult = self.session.query(mapping)
         if filter is not None:
             qresult = qresult.filter(filter)
+        if preload is not None and len(preload) > 0:
+            options = [selectinload(getattr(mapping, name)) for name in preload]
+            qresult = qresult.options(*options)
         return qresult
 
     async def db_session_upsert(self, model: DaaSEntity) -> bool:
@@ -123,11 +149,40 @@ class DatabaseApi(DatabaseApiBase):
         orm = await self.model_to_orm(model)
         if orm is not None and self.session is not None:
             self._log_info(f"SQL (Upsert) {orm}")
-            self.session.merge(orm)
-            self.session.commit()
+            with measured("upsert", getattr(orm, "__tablename__", "")):
+                self.session.merge(orm)
+                self.session.commit()
             return True
         return False
 
+    async def db_session_update_many(
+        self, tablename: Tablenames, rows: list[dict]
+    ) -> int:
+        """
+        Updates rows by primary key within a single transaction
+
+        Every row holds the primary key and the columns to write, rows
+        with the same columns are sent as one executemany statement.
+        """
+        if self.session is None or len(rows) == 0:
+            return 0
+        mapping: Optional[Type[object]] = await self.get_mapping_orm(tablename.value)
+        if mapping is None:
+            return 0
+        self._log_info(f"SQL (Update) {tablename} rows={len(rows)}")
+        with measured("update", tablename.value):
+            self.session.execute(update(mapping), rows)
+            self.session.commit()
+        return len(rows)
+
+    async def db_session_execute(self, statement: Executable) -> list[tuple]:
+        """Executes a statement and returns all rows"""
+        if self.session is None:
+            return []
+        self._log_info(f"SQL (Execute) {statement}")
+        with measured("execute", ""):
+            return [tuple(row) for row in self.session.execute(statement)]
+
     async def db_session_delete(self, model: DaaSEntity) -> bool:
         """Delete specified domain object"""
         if self.session is None:
@@ -143,11 +198,12 @@ class DatabaseApi(DatabaseApiBase):
             self._log_error(f"Column {col} not contained in {model.get_data()}")
             return False
 
-        entity = self.session.query(mapping).filter(pk == data[col]).first()
-        if entity:
-            self._log_info(f"SQL (Delete) {entity}")
-            self.session.delete(entity)
-            self.session.commit()
+        with measured("delete", tab.name):
+            entity = self.session.query(mapping).filter(pk == data[col]).first()
+            if entity:
+                self._log_info(f"SQL (Delete) {entity}")
+                self.session.delete(entity)
+                self.session.commit()
         return True
 
     async def db_session_select_all(self, tablename: Tablenames) -> list[ORMEntity]:
@@ -174,17 +230,21 @@ class DatabaseApi(DatabaseApiBase):
         return await self.db_session_select_one(tablename, flt)
 
     async def db_session_select(
-        self, tablename: Tablenames, filter: Optional[TextClause] = None
+        self,
+        tablename: Tablenames,
+        filter: Optional[TextClause] = None,
+        preload: Optional[list[str]] = None,
     ) -> list[ORMEntity]:
         """Select from specified table"""
         mapping: Optional[Type[object]] = await self.get_mapping_orm(tablename.value)
         if mapping is None:
             return []
         self._log_info(f"SQL (Select) {tablename}")
-        qresult = await self.db_session_query(mapping, filter)
+        qresult = await self.db_session_query(mapping, filter, preload)
         if qresult is None:
             return []
-        return [x for x in qresult if isinstance(x, ORMEntity)]
+        with measured("select", tablename.value):
+            return [x for x in qresult if isinstance(x, ORMEntity)]
 
     async def get_table(self, name: str) -> Optional[Table]:
         """Returns associated table object if available"""
@@ -19,6 +19,7 @@ class ORMMappingType(Enum):
     Instance = TableMapping(7, "instances")
     GuacamoleConnection = TableMapping(8, "guacamole_connections")
     Limit = TableMapping(9, "limits")
+    TaskJournal = TableMapping(10, "task_journal")
 
     @property
     def id(self):
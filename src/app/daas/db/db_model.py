@@ -26,6 +26,7 @@ class Tablenames(Enum):
     Env = "environments"
     Inst = "instances"
     Limit = "limits"
+    Journal = "task_journal"
 
 
 class Colnames(Enum):
@@ -43,6 +44,8 @@ class Colnames(Enum):
     Owner = "id_owner"
     Host = "host"
     ViewerToken = "viewer_token"
+    State = "state"
+    Updated = "updated_at"
 
 
 class JsonType(TypeDecorator):
@@ -295,6 +298,25 @@ class ORMLimit(ORMEntity):
     dsk_max: Mapped[int] = mapped_column(BigInteger)
 
 
+@ORMModelPersistance(ORMMappingType.TaskJournal)
+class ORMTaskJournal(ORMEntity):
+    __tablename__ = "task_journal"
+
+    id: Mapped[str] = mapped_column(String(128), primary_key=True)
+    tasktype: Mapped[str] = mapped_column(String(64))
+    id_owner: Mapped[int] = mapped_column()
+    id_object: Mapped[str] = mapped_column(String(128))
+    id_instance: Mapped[str] = mapped_column(String(128))
+    state: Mapped[str] = mapped_column(String(32))
+    step: Mapped[str] = mapped_column(String(64))
+    steps_done: Mapped[JsonType] = mapped_column(JsonType)
+    args: Mapped[JsonType] = mapped_column(JsonType)
+    data: Mapped[JsonType] = mapped_column(JsonType)
+    reason: Mapped[str] = mapped_column(String(256))
+    created_at: Mapped[str] = mapped_column(String(32))
+    updated_at: Mapped[str] = mapped_column(String(32))
+
+
 def create_model(orm: ORMEntity) -> Optional[DaaSEntity]:
     """Converts orm object to model object"""
 
@@ -1,7 +1,8 @@
 """Repository components reflecting database tables"""
 
-from typing import Optional, TypeVar, Type
-from sqlalchemy import TextClause, text
+from typing import Callable, Optional, TypeVar, Type
+from sqlalchemy import FromClause, TextClause, bindparam, func, join, select, text
+from sqlalchemy.orm import InstrumentedAttribute
 from app.daas.common.enums import BackendName
 from app.daas.common.model import (
     Application,
@@ -10,11 +11,19 @@ from app.daas.common.model import (
     Environment,
     File,
     GuacamoleConnection,
+    RessourceAggregate,
     RessourceInfo,
+    TaskJournalEntry,
 )
 from app.daas.db.db_api import DatabaseApi
 from app.daas.db.db_manager import DatabaseManager
-from app.daas.db.db_model import Colnames, ORMEntity, ORMObject, Tablenames
+from app.daas.db.db_model import (
+    Colnames,
+    ORMEntity,
+    ORMInstance,
+    ORMObject,
+    Tablenames,
+)
 from app.daas.objects.object_application import ApplicationObject
 from app.daas.objects.object_instance import InstanceObject
 from app.plugins.core.db.db_backend import DatabaseBackend
@@ -22,11 +31,14 @@ from app.qweb.logging.logging import LogTarget, Loggable
 from app.qweb.service.service_runtime import get_qweb_runtime
 
 T = TypeVar("T", bound="DaaSEntity")
+RepositoryChange = Callable[[Tablenames, str, Optional[DaaSEntity]], None]
 
 
 class RepositoryBase(Loggable):
     """Grants access to a certain part of teh database"""
 
+    listeners: list[RepositoryChange] = []
+
     def __init__(self):
         Loggable.__init__(self, LogTarget.DB)
         self.dbman = None
@@ -40,6 +52,26 @@ class RepositoryBase(Loggable):
             return dbase.component
         raise ValueError("DatabaseManager not available")
 
+    @classmethod
+    def subscribe_changes(cls, callback: RepositoryChange) -> Callable[[], None]:
+        """
+        Subscribes to written and removed rows, returns unsubscribe
+
+        The callback receives table, id and the written model, which is
+        None for removed rows.
+        """
+        cls.listeners.append(callback)
+        return lambda: cls.listeners.remove(callback)
+
+    def _notify_change(
+        self, table: Tablenames, id_pk: str, model: Optional[DaaSEntity]
+    ):
+        for callback in list(self.listeners):
+            try:
+                callback(table, id_pk, model)
+            except Exception as exe:
+                self._log_error(f"Change listener failed: {table.value} ({exe})")
+
     async def _get_config(self, name: str) -> dict:
         runtime = get_qweb_runtime()
         return runtime._read_toml_file(name)
@@ -73,10 +105,13 @@ class RepositoryBase(Loggable):
         return await api.db_session_upsert(model)
 
     async def _select(
-        self, name: Tablenames, filter: Optional[TextClause] = None
+        self,
+        name: Tablenames,
+        filter: Optional[TextClause] = None,
+        preload: Optional[list[str]] = None,
     ) -> list[ORMEntity]:
         api = await self._get_api()
-        return await api.db_session_select(name, filter)
+        return await api.db_session_select(name, filter, preload)
 
     async def _select_all(self, name: Tablenames) -> list[ORMEntity]:
         api = await self._get_api()
@@ -98,6 +133,35 @@ class RepositoryBase(Loggable):
         api = await self._get_api()
         return await api.db_session_delete(orm) if orm is not None else False
 
+    async def _aggregate(
+        self,
+        source: FromClause,
+        owner: InstrumentedAttribute[int],
+        id_owner: Optional[int] = None,
+    ) -> list[RessourceAggregate]:
+        """
+        Sums up ressources of objects in source per owner and object type
+
+        Without id_owner the ressources of all owners are summed up.
+        """
+        statement = (
+            select(
+                owner,
+                ORMObject.object_type,
+                func.count(),
+                func.coalesce(func.sum(ORMObject.hw_cpus), 0),
+                func.coalesce(func.sum(ORMObject.hw_memory), 0),
+                func.coalesce(func.sum(ORMObject.hw_disksize), 0),
+            )
+            .select_from(source)
+            .group_by(owner, ORMObject.object_type)
+        )
+        if id_owner is not None:
+            statement = statement.where(owner == id_owner)
+        api = await self._get_api()
+        rows = await api.db_session_execute(statement)
+        return [RessourceAggregate(*row) for row in rows]
+
     async def _get_filter_id(self, identifier: int | str) -> TextClause:
         return await self._get_filter_column(Colnames.Id, identifier)
 
@@ -113,6 +177,13 @@ class RepositoryBase(Loggable):
         filter = await self._get_filter_statement(col, val)
         return await self._get_filter_str(filter)
 
+    async def _get_filter_in(
+        self, col: Colnames, values: list[int] | list[str]
+    ) -> TextClause:
+        return text(f"{col.value} IN :values").bindparams(
+            bindparam("values", value=values, expanding=True)
+        )
+
     async def _get_filter_statement(self, col: Colnames, value: int | str) -> str:
         if isinstance(value, int):
             return f"{col.value} = {value}"
@@ -217,6 +288,46 @@ class LimitRepository(RepositoryBase):
         return await self._to_model_list(selected, RessourceInfo)
 
 
+class TaskJournalRepository(RepositoryBase):
+    """Grants access to task journal table"""
+
+    async def save_journal_entry(self, model: TaskJournalEntry) -> bool:
+        """Insert or update journal entry"""
+        return await self._upsert(model)
+
+    async def delete_journal_entry(self, id_task: str) -> bool:
+        """Remove journal entry"""
+        filter = await self._get_filter_id(id_task)
+        orm = await self._select_one(Tablenames.Journal, filter)
+        model = await self._to_model(orm, TaskJournalEntry)
+        return await self._delete(model)
+
+    async def get_journal_entry(self, id_task: str) -> Optional[TaskJournalEntry]:
+        """Fetch journal entry by task id"""
+        filter = await self._get_filter_id(id_task)
+        orm = await self._select_one(Tablenames.Journal, filter)
+        return await self._to_model(orm, TaskJournalEntry)
+
+    async def prune_journal_entries(self, before: str) -> int:
+        """Remove finished journal entries last updated before timestamp"""
+        filter = text(
+            f"{Colnames.State.value} != :state AND {Colnames.Updated.value} < :before"
+        ).bindparams(state="running", before=before)
+        selected = await self._select(Tablenames.Journal, filter)
+        removed = 0
+        for model in await self._to_model_list(selected, TaskJournalEntry):
+            removed += await self._delete(model)
+        return removed
+
+    async def get_journal_entries_by_state(
+        self, state: str
+    ) -> list[TaskJournalEntry]:
+        """Fetch journal entries in given state"""
+        filter = await self._get_filter_column(Colnames.State, state)
+        selected = await self._select(Tablenames.Journal, filter)
+        return await self._to_model_list(selected, TaskJournalEntry)
+
+
 class ApplicationRepository(RepositoryBase):
     """Grants access to application table"""
 
@@ -300,6 +411,16 @@ class ConnectionRepository(RepositoryBase):
         selected = await self._select_one(Tablenames.Con, filter)
         return await self._to_model(selected, GuacamoleConnection)
 
+    async def get_guacamole_connections(
+        self, ids: list[str]
+    ) -> list[GuacamoleConnection]:
+        """Fetch connections by a list of ids"""
+        if len(ids) == 0:
+            return []
+        filter = await self._get_filter_in(Colnames.Id, ids)
+        selected = await self._select(Tablenames.Con, filter)
+        return await self._to_model_list(selected, GuacamoleConnection)
+
     async def all_connections(self) -> list[GuacamoleConnection]:
         """Fetch all available connections"""
         selected = await self._select_all(Tablenames.Con)
@@ -351,6 +472,16 @@ class EnvironmentRepository(RepositoryBase):
         ormlist = await api.db_session_select(Tablenames.Env, filter)
         return await self._to_model_list(ormlist, Environment)
 
+    async def get_environments_by_objects(
+        self, obj_ids: list[str]
+    ) -> list[Environment]:
+        """Fetch environments of a list of objects"""
+        if len(obj_ids) == 0:
+            return []
+        filter = await self._get_filter_in(Colnames.ObjectId, obj_ids)
+        selected = await self._select(Tablenames.Env, filter)
+        return await self._to_model_list(selected, Environment)
+
     async def get_environment_by_name(
         self, obj_id: str, name: str
     ) -> Optional[Environment]:
@@ -369,6 +500,16 @@ class EnvironmentRepository(RepositoryBase):
         orm = await api.db_session_select_one(Tablenames.Env, filter)
         return await self._to_model(orm, Environment)
 
+    async def get_environments_by_backend_ids(
+        self, backend_ids: list[str]
+    ) -> list[Environment]:
+        """Fetch environments of a list of backend ids"""
+        if len(backend_ids) == 0:
+            return []
+        filter = await self._get_filter_in(Colnames.BackendId, backend_ids)
+        selected = await self._select(Tablenames.Env, filter)
+        return await self._to_model_list(selected, Environment)
+
     async def all_environments(self) -> list[Environment]:
         """Fetch all available envs"""
         selected = await self._select_all(Tablenames.Env)
@@ -393,11 +534,26 @@ class ObjectRepository(RepositoryBase):
 
     async def create_daas_object(self, model: DaasObject) -> bool:
         """Create object"""
-        return await self._upsert(model)
+        return await self.__upsert_accounted(model)
 
     async def update_daas_object(self, model: DaasObject) -> bool:
         """Update object"""
-        return await self._upsert(model)
+        return await self.__upsert_accounted(model)
+
+    async def update_daas_objects(
+        self, models: list[DaasObject], columns: list[str]
+    ) -> int:
+        """Writes columns of several objects in a single batch"""
+        rows = [
+            {"id": model.id, **{col: getattr(model, col) for col in columns}}
+            for model in models
+        ]
+        api = await self._get_api()
+        updated = await api.db_session_update_many(Tablenames.Obj, rows)
+        if updated > 0:
+            for model in models:
+                self._notify_change(Tablenames.Obj, model.id, model)
+        return updated
 
     async def get_daas_object(self, id_pk: str) -> Optional[DaasObject]:
         """Fetch object by id"""
@@ -427,6 +583,22 @@ class ObjectRepository(RepositoryBase):
         orm = await api.db_session_select_one(Tablenames.Obj, filter)
         return await self.__convert_by_object_type(orm)
 
+    async def get_daas_objects_by_ids(self, ids: list[str]) -> list[DaasObject]:
+        """Fetch objects by a list of ids"""
+        return await self.__select_in(Colnames.Id, ids)
+
+    async def get_daas_objects_by_docker_ids(
+        self, docker_ids: list[str]
+    ) -> list[DaasObject]:
+        """Fetch objects by a list of docker ids"""
+        return await self.__select_in(Colnames.DockerId, docker_ids)
+
+    async def get_daas_objects_by_proxmox_ids(
+        self, proxmox_ids: list[int]
+    ) -> list[DaasObject]:
+        """Fetch objects by a list of proxmox ids"""
+        return await self.__select_in(Colnames.ProxmoxId, proxmox_ids)
+
     async def get_daas_objects_by_owner(self, id_owner: int) -> list[DaasObject]:
         """Fetch all objects"""
         filter = await self._get_filter_owner(id_owner)
@@ -453,7 +625,16 @@ class ObjectRepository(RepositoryBase):
         filter = await self._get_filter_id(obj.id)
         orm = await self._select_one(Tablenames.Obj, filter)
         model = await self.__convert_by_object_type(orm)
-        return await self._delete(model)
+        deleted = await self._delete(model)
+        if deleted:
+            self._notify_change(Tablenames.Obj, obj.id, None)
+        return deleted
+
+    async def aggregate_daas_objects(
+        self, id_owner: Optional[int] = None
+    ) -> list[RessourceAggregate]:
+        """Sums up ressources of objects, of all or a single owner"""
+        return await self._aggregate(ORMObject.__table__, ORMObject.id_owner, id_owner)
 
     async def suggest_vmid(self) -> int:
         """
@@ -475,6 +656,22 @@ class ObjectRepository(RepositoryBase):
         self._log_info("Not enough proxmox ids left")
         return -1
 
+    async def __upsert_accounted(self, model: DaasObject) -> bool:
+        upserted = await self._upsert(model)
+        if upserted:
+            self._notify_change(Tablenames.Obj, model.id, model)
+        return upserted
+
+    async def __select_in(
+        self, col: Colnames, values: list[int] | list[str]
+    ) -> list[DaasObject]:
+        if len(values) == 0:
+            return []
+        filter = await self._get_filter_in(col, values)
+        ormlist = await self._select(Tablenames.Obj, filter)
+        converted = await self.__convert_by_object_types(ormlist)
+        return [obj for obj in converted if obj is not None]
+
     async def __convert_by_object_type(self, orm: ORMEntity) -> Optional[DaasObject]:
         from app.daas.objects.object_container import ContainerObject
         from app.daas.objects.object_machine import MachineObject
@@ -504,13 +701,13 @@ class InstanceRepository(RepositoryBase):
 
     async def create_instance(self, model: InstanceObject) -> bool:
         """Create instance"""
-        return await self._upsert(model)
+        return await self.__upsert_accounted(model)
 
     async def update_instance(self, model: InstanceObject) -> bool:
         """Update instance"""
 
         model.app = await self._to_orm(model.app, ORMObject)
-        return await self._upsert(model)
+        return await self.__upsert_accounted(model)
 
     async def all_instances(self) -> list[InstanceObject]:
         """Fetch all available instances"""
@@ -553,11 +750,17 @@ class InstanceRepository(RepositoryBase):
 
     async def get_instances_by_owner(self, id_owner: int = 0) -> list[InstanceObject]:
         """Fetch all instances by owner id"""
-        api = await self._get_api()
         flt = await self._get_filter_owner(id_owner)
-        ormlist = await api.db_session_select(Tablenames.Inst, flt)
+        ormlist = await self._select(Tablenames.Inst, flt, ["app", "env"])
         return await self._to_model_list(ormlist, InstanceObject)
 
+    async def aggregate_instances(
+        self, id_owner: Optional[int] = None
+    ) -> list[RessourceAggregate]:
+        """Sums up ressources of the objects of instances, of all or a single owner"""
+        source = join(ORMInstance, ORMObject, ORMInstance.id_app == ORMObject.id)
+        return await self._aggregate(source, ORMInstance.id_owner, id_owner)
+
     async def get_instance_by_adr(self, adr: str) -> Optional[InstanceObject]:
         """Fetch all instances by ip address"""
         api = await self._get_api()
@@ -580,4 +783,13 @@ class InstanceRepository(RepositoryBase):
         filter = await self._get_filter_id(instance.id)
         orm = await self._select_one(Tablenames.Inst, filter)
         model = await self._to_model(orm, InstanceObject)
-        return await self._delete(model)
+        deleted = await self._delete(model)
+        if deleted:
+            self._notify_change(Tablenames.Inst, instance.id, None)
+        return deleted
+
+    async def __upsert_accounted(self, model: InstanceObject) -> bool:
+        upserted = await self._upsert(model)
+        if upserted:
+            self._notify_change(Tablenames.Inst, model.id, model)
+        return upserted
@@ -0,0 +1,114 @@
+"""
+Benchmark heartbeat processing of the receiver.
+
+Simulates many guests sending heartbeats and delivers them through an
+in-process broker stand-in to `HeartbeatReceiver.on_heartbeat`. Each run
+compares legacy json messages, single binary messages and batches from
+node relays, measuring the receiver's CPU time only:
+
+```
+python3 -m app.daas.messaging.qmsg.bench_heartbeat -g 10000 -r 5 -b 256 4096
+```
+"""
+
+import argparse
+import json
+import time
+from dataclasses import dataclass
+from app.daas.messaging.qmsg.common.qmsg_model import (
+    HeartbeatMessage,
+    encode_heartbeat_json,
+    encode_heartbeats,
+)
+from app.daas.messaging.qmsg.receiver.qmsg_heartbeat_receiver import (
+    HeartbeatReceiver,
+    HeartbeatReceiverConfig,
+)
+
+
+class NullOwner:
+    """Receiver owner ignoring all notifications"""
+
+    def handle_heartbeat(self, _):
+        """Ignores heartbeat"""
+
+    def handle_client_online(self, _):
+        """Ignores online transition"""
+
+    def handle_client_offline(self, _):
+        """Ignores offline transition"""
+
+
+@dataclass
+class BrokerStandIn:
+    """Delivers message bodies to the receiver like a consumer channel"""
+
+    receiver: HeartbeatReceiver
+    messages: int = 0
+    volume: int = 0
+
+    def deliver(self, body: bytes):
+        """Delivers a single message"""
+        self.messages += 1
+        self.volume += len(body)
+        self.receiver.on_heartbeat(self, self, self, body)  # type: ignore
+
+
+def _create_guests(count: int) -> list[HeartbeatMessage]:
+    now = time.time()
+    return [
+        HeartbeatMessage(now, f"guest-{index:05d}", f"10.0.{index >> 8}.{index & 255}")
+        for index in range(count)
+    ]
+
+
+def _encode(mode: str, guests: list[HeartbeatMessage], batch: int) -> list[bytes]:
+    if mode == "json":
+        return [encode_heartbeat_json(msg) for msg in guests]
+    if mode == "binary":
+        return [encode_heartbeats([msg]) for msg in guests]
+    return [
+        encode_heartbeats(guests[start : start + batch])
+        for start in range(0, len(guests), batch)
+    ]
+
+
+def bench_mode(mode: str, guests: int, rounds: int, batch: int = 1) -> dict:
+    """Delivers rounds of heartbeats of all guests to a fresh receiver"""
+    receiver = HeartbeatReceiver(NullOwner(), HeartbeatReceiverConfig())
+    broker = BrokerStandIn(receiver)
+    bodies = _encode(mode, _create_guests(guests), batch)
+    started = time.process_time()
+    for _ in range(rounds):
+        for body in bodies:
+            broker.deliver(body)
+    cpu = time.process_time() - started
+    return {
+        "mode": mode if mode != "relay" else f"relay-{batch}",
+        "messages": broker.messages,
+        "bytes": broker.volume,
+        "cpu_ms": round(cpu * 1000, 1),
+        "cpu_us_per_heartbeat": round(cpu * 1e6 / (guests * rounds), 2),
+        "online": len(receiver.presence.get_online_hosts()),
+    }
+
+
+def bench(guests: int, rounds: int, batches: list[int]) -> list[dict]:
+    """Runs all benchmark modes"""
+    results = [bench_mode("json", guests, rounds), bench_mode("binary", guests, rounds)]
+    for batch in batches:
+        results.append(bench_mode("relay", guests, rounds, batch))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-g", "--guests", type=int, default=10000)
+    parser.add_argument("-r", "--rounds", type=int, default=5)
+    parser.add_argument("-b", "--batches", type=int, nargs="+", default=[256, 4096])
+    args = parser.parse_args()
+    print(json.dumps(bench(args.guests, args.rounds, args.batches), indent=2))
+
+
+if __name__ == "__main__":
+    main()
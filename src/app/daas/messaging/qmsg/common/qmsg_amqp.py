@@ -0,0 +1,84 @@
+"""
+Asyncio based connections to RabbitMQ.
+
+Wraps the callbacks of pika's AsyncioConnection into awaitables, so
+consumers and publishers run on the event loop without extra threads.
+Pending operations fail as soon as the connection is lost.
+"""
+
+import asyncio
+from typing import Any, Callable, Optional
+import pika
+from pika.adapters.asyncio_connection import AsyncioConnection
+import pika.channel
+import pika.exceptions
+from app.qweb.logging.logging import LogTarget, Loggable
+
+
+class AsyncAmqpClient(Loggable):
+    """Base of clients using an AsyncioConnection"""
+
+    def __init__(self, rabbitmq_host: str) -> None:
+        Loggable.__init__(self, LogTarget.QMSG)
+        self.rabbitmq_host = rabbitmq_host
+        self.connection: Optional[AsyncioConnection] = None
+        self.channel: Optional[pika.channel.Channel] = None
+        self.closed: Optional[asyncio.Future] = None
+        self.pending: set[asyncio.Future] = set()
+
+    async def _open_connection(self) -> AsyncioConnection:
+        loop = asyncio.get_running_loop()
+        opened = self._create_pending()
+        self.closed = loop.create_future()
+
+        def on_error(_, exe: Any):
+            if not isinstance(exe, BaseException):
+                exe = pika.exceptions.AMQPConnectionError(exe)
+            self._fail_pending(exe)
+
+        AsyncioConnection(
+            pika.ConnectionParameters(host=self.rabbitmq_host),
+            on_open_callback=lambda conn: self._settle(opened, conn),
+            on_open_error_callback=on_error,
+            on_close_callback=self._on_connection_closed,
+            custom_ioloop=loop,
+        )
+        return await opened
+
+    async def _open_channel(self, connection: AsyncioConnection):
+        opened = self._create_pending()
+        connection.channel(on_open_callback=lambda chan: self._settle(opened, chan))
+        channel: pika.channel.Channel = await opened
+        channel.add_on_close_callback(self._on_channel_closed)
+        return channel
+
+    async def _call(self, method: Callable, **kwargs) -> Any:
+        done = self._create_pending()
+        method(callback=lambda frame: self._settle(done, frame), **kwargs)
+        return await done
+
+    def _create_pending(self) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+        return future
+
+    def _settle(self, future: asyncio.Future, result: Any):
+        if not future.done():
+            future.set_result(result)
+
+    def _fail_pending(self, exe: BaseException):
+        for future in list(self.pending):
+            if not future.done():
+                future.set_exception(exe)
+
+    def _on_channel_closed(self, _, reason: Exception):
+        self._log_info(f"Channel closed: {reason}")
+        if self.connection is not None and self.connection.is_open:
+            self.connection.close()
+
+    def _on_connection_closed(self, _, reason: Exception):
+        self._log_info(f"Connection closed: {reason}")
+        self._fail_pending(pika.exceptions.AMQPConnectionError(reason))
+        if self.closed is not None and not self.closed.done():
+            self.closed.set_result(reason)
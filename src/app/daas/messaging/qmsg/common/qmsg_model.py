@@ -1,6 +1,15 @@
 """Definitions for qmsg data exchange"""
 
-from dataclasses import dataclass
+import json
+import socket
+import struct
+from dataclasses import asdict, dataclass
+
+HEARTBEAT_MAGIC = b"HB"
+HEARTBEAT_VERSION = 1
+HEARTBEAT_HEADER = struct.Struct("!2sBH")
+HEARTBEAT_ENTRY = struct.Struct("!dB")
+HEARTBEAT_ENTRY_IPV4 = struct.Struct("!dB4sB")
 
 
 @dataclass
@@ -12,6 +21,77 @@ class HeartbeatMessage:
     ip_address: str
 
 
+def encode_heartbeats(messages: list[HeartbeatMessage]) -> bytes:
+    """
+    Encodes heartbeats into a compact binary batch.
+
+    Layout: magic, version, count, then per heartbeat the timestamp, the
+    address family (4, 6 or 0 for plain text), the address and the name
+    prefixed by its length.
+    """
+    if len(messages) > 0xFFFF:
+        raise ValueError(f"Too many heartbeats in batch: {len(messages)}")
+    parts = [HEARTBEAT_HEADER.pack(HEARTBEAT_MAGIC, HEARTBEAT_VERSION, len(messages))]
+    for msg in messages:
+        family, packed = _pack_address(msg.ip_address)
+        name = msg.name.encode()[:255]
+        parts.append(HEARTBEAT_ENTRY.pack(msg.timestamp, family))
+        parts.append(packed)
+        parts.append(bytes([len(name)]) + name)
+    return b"".join(parts)
+
+
+def decode_heartbeats(body: bytes) -> list[HeartbeatMessage]:
+    """Decodes binary heartbeat batches and legacy json heartbeats"""
+    if not body.startswith(HEARTBEAT_MAGIC):
+        return [HeartbeatMessage(**json.loads(body.decode()))]
+    _, version, count = HEARTBEAT_HEADER.unpack_from(body)
+    if version != HEARTBEAT_VERSION:
+        raise ValueError(f"Unsupported heartbeat version: {version}")
+    offset = HEARTBEAT_HEADER.size
+    messages = []
+    for _ in range(count):
+        if body[offset + HEARTBEAT_ENTRY.size - 1] == 4:
+            timestamp, _, packed, length = HEARTBEAT_ENTRY_IPV4.unpack_from(
+                body, offset
+            )
+            offset += HEARTBEAT_ENTRY_IPV4.size
+            name = body[offset : offset + length].decode()
+            offset += length
+            adr = socket.inet_ntop(socket.AF_INET, packed)
+            messages.append(HeartbeatMessage(timestamp, name, adr))
+            continue
+        timestamp, family = HEARTBEAT_ENTRY.unpack_from(body, offset)
+        offset += HEARTBEAT_ENTRY.size
+        if family == 6:
+            adr = socket.inet_ntop(socket.AF_INET6, body[offset : offset + 16])
+            offset += 16
+        else:
+            length = body[offset]
+            adr = body[offset + 1 : offset + 1 + length].decode()
+            offset += 1 + length
+        length = body[offset]
+        name = body[offset + 1 : offset + 1 + length].decode()
+        offset += 1 + length
+        messages.append(HeartbeatMessage(timestamp, name, adr))
+    return messages
+
+
+def _pack_address(adr: str) -> tuple[int, bytes]:
+    for family, inet in ((4, socket.AF_INET), (6, socket.AF_INET6)):
+        try:
+            return family, socket.inet_pton(inet, adr)
+        except OSError:
+            pass
+    packed = adr.encode()[:255]
+    return 0, bytes([len(packed)]) + packed
+
+
+def encode_heartbeat_json(msg: HeartbeatMessage) -> bytes:
+    """Encodes heartbeat as legacy json"""
+    return json.dumps(asdict(msg)).encode()
+
+
 @dataclass
 class RpcRequest:
     """Model for rpc messages"""
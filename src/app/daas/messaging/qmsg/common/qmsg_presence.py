@@ -0,0 +1,211 @@
+"""
+Tracks presence of hosts sending heartbeats.
+
+Every heartbeat schedules the expiry of its host in a timer wheel, so
+expiring hosts only touches hosts due in the current slots instead of
+sweeping all hosts. Subscribers are notified about online and offline
+transitions. For every host the interval between heartbeats is tracked
+to report jitter. Hosts offline for longer than the retention are
+pruned in order of their expiry.
+"""
+
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+from app.qweb.logging.logging import LogTarget, Loggable
+
+PresenceCallback = Callable[[str, bool], None]
+
+
+@dataclass
+class HostPresence:
+    """Presence and heartbeat statistics of a host"""
+
+    host: str
+    online: bool = False
+    first_seen: float = 0
+    last_seen: float = 0
+    beats: int = 0
+    intervals: int = 0
+    interval_mean: float = 0
+    interval_m2: float = 0
+    interval_max: float = 0
+
+    def add_interval(self, interval: float):
+        """Adds interval to running statistics"""
+        self.intervals += 1
+        delta = interval - self.interval_mean
+        self.interval_mean += delta / self.intervals
+        self.interval_m2 += delta * (interval - self.interval_mean)
+        self.interval_max = max(self.interval_max, interval)
+
+    @property
+    def jitter(self) -> float:
+        """Standard deviation of heartbeat intervals in seconds"""
+        if self.intervals < 2:
+            return 0
+        return math.sqrt(self.interval_m2 / (self.intervals - 1))
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {
+            "host": self.host,
+            "online": self.online,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "beats": self.beats,
+            "interval_mean_ms": round(self.interval_mean * 1000, 1),
+            "interval_max_ms": round(self.interval_max * 1000, 1),
+            "jitter_ms": round(self.jitter * 1000, 1),
+        }
+
+
+class TimerWheel:
+    """Hashed timer wheel with lazy removal of rescheduled keys"""
+
+    def __init__(self, tick: float, span: float):
+        self.tick = tick
+        self.slots: list[set[str]] = [set() for _ in range(math.ceil(span / tick) + 2)]
+        self.deadlines: dict[str, float] = {}
+        self.current: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
+
+    def schedule(self, key: str, deadline: float):
+        """Schedules or reschedules expiry of key"""
+        self.deadlines[key] = deadline
+        self.slots[self._slot(deadline)].add(key)
+
+    def cancel(self, key: str):
+        """Cancels expiry of key"""
+        self.deadlines.pop(key, None)
+
+    def advance(self, now: float) -> list[str]:
+        """Returns keys expired until now"""
+        target = int(now // self.tick)
+        start = target if self.current is None else self.current
+        start = max(start, target - len(self.slots) + 1)
+        self.current = target
+        expired = []
+        for index in range(start, target + 1):
+            slot = self.slots[index % len(self.slots)]
+            for key in list(slot):
+                deadline = self.deadlines.get(key)
+                if deadline is None or self._slot(deadline) != index % len(self.slots):
+                    slot.discard(key)
+                elif deadline <= now:
+                    slot.discard(key)
+                    del self.deadlines[key]
+                    expired.append(key)
+        return expired
+
+    def _slot(self, deadline: float) -> int:
+        return int(deadline // self.tick) % len(self.slots)
+
+
+class PresenceTracker(Loggable):
+    """Online state of hosts based on heartbeats"""
+
+    def __init__(self, timeout: float, tick: float = 1, retention: float = 300):
+        Loggable.__init__(self, LogTarget.QMSG)
+        self.timeout = timeout
+        self.tick = max(tick, 0.01)
+        self.retention = retention
+        self.hosts: dict[str, HostPresence] = {}
+        self.offline: OrderedDict[str, float] = OrderedDict()
+        self.wheel = TimerWheel(self.tick, timeout)
+        self.subscribers: list[PresenceCallback] = []
+
+    def subscribe(self, callback: PresenceCallback) -> Callable[[], None]:
+        """Subscribes to online and offline transitions, returns unsubscribe"""
+        self.subscribers.append(callback)
+        return lambda: self.subscribers.remove(callback)
+
+    def heartbeat(self, host: str, now: Optional[float] = None) -> HostPresence:
+        """Records heartbeat of host"""
+        now = time.time() if now is None else now
+        presence = self.hosts.get(host)
+        if presence is None:
+            presence = HostPresence(host, first_seen=now)
+            self.hosts[host] = presence
+        elif presence.online:
+            presence.add_interval(now - presence.last_seen)
+        presence.last_seen = now
+        presence.beats += 1
+        self.offline.pop(host, None)
+        self.wheel.schedule(host, now + self.timeout)
+        if presence.online is False:
+            presence.online = True
+            self._publish(host, True)
+        return presence
+
+    def expire(self, now: Optional[float] = None) -> list[str]:
+        """Marks hosts without recent heartbeat as offline"""
+        now = time.time() if now is None else now
+        expired = self.wheel.advance(now)
+        for host in expired:
+            presence = self.hosts.get(host)
+            if presence is not None and presence.online:
+                presence.online = False
+                self.offline[host] = now
+                self._publish(host, False)
+        return expired
+
+    def prune(self, now: Optional[float] = None) -> list[str]:
+        """Removes hosts offline for longer than the retention"""
+        now = time.time() if now is None else now
+        pruned = []
+        while self.offline:
+            host, since = next(iter(self.offline.items()))
+            if now - since < self.retention:
+                break
+            self.remove(host)
+            pruned.append(host)
+        return pruned
+
+    def remove(self, host: str):
+        """Forgets host without notifying subscribers"""
+        self.hosts.pop(host, None)
+        self.offline.pop(host, None)
+        self.wheel.cancel(host)
+
+    def is_online(self, host: str, now: Optional[float] = None) -> bool:
+        """Checks if host is online"""
+        presence = self.hosts.get(host)
+        if presence is None or presence.online is False:
+            return False
+        now = time.time() if now is None else now
+        return now - presence.last_seen < self.timeout
+
+    def get_online_states(self, hosts: Iterable[str]) -> dict[str, bool]:
+        """Returns online state of many hosts at once"""
+        now = time.time()
+        return {host: self.is_online(host, now) for host in hosts}
+
+    def get_online_hosts(self) -> list[str]:
+        """Returns hosts currently online"""
+        now = time.time()
+        return [host for host in self.hosts if self.is_online(host, now)]
+
+    def get_presence(self, host: str) -> Optional[HostPresence]:
+        """Returns presence of host"""
+        return self.hosts.get(host)
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {
+            "hosts": len(self.hosts),
+            "online": len(self.get_online_hosts()),
+            "scheduled": len(self.wheel),
+            "subscribers": len(self.subscribers),
+        }
+
+    def _publish(self, host: str, online: bool):
+        for callback in list(self.subscribers):
+            try:
+                callback(host, online)
+            except Exception as exe:
+                self._log_error(f"Presence subscriber failed: {host} ({exe})")
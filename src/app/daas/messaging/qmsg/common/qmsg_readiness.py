@@ -0,0 +1,129 @@
+"""
+Notifies waiters about instances becoming online or offline.
+
+Heartbeats and backend state changes report the state of a host via
+`notify`, which may be called from any thread. Waiters block on an
+`asyncio.Event` per host and state, so waiting for a boot costs nothing
+until the host reports in. A probe is polled with exponential backoff as
+fallback for hosts which do not send heartbeats. Reported states are only
+trusted while they are fresh, older states are verified by the probe.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+from app.qweb.logging.logging import LogTarget, Loggable
+
+ReadinessProbe = Callable[[], Awaitable[bool]]
+
+
+class ReadinessNotifier(Loggable):
+    """Tracks online state of hosts and wakes up waiters"""
+
+    def __init__(
+        self,
+        backoff_min_ms: int = 500,
+        backoff_max_ms: int = 8000,
+        fresh_ms: int = 1000,
+    ):
+        Loggable.__init__(self, LogTarget.QMSG)
+        self.backoff_min = backoff_min_ms / 1000
+        self.backoff_max = max(backoff_max_ms, backoff_min_ms) / 1000
+        self.fresh = fresh_ms / 1000
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.states: dict[str, bool] = {}
+        self.updated: dict[str, float] = {}
+        self.events: dict[tuple[str, bool], asyncio.Event] = {}
+        self.waiting: dict[tuple[str, bool], int] = {}
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Binds the event loop used for notifications from other threads"""
+        self.loop = loop
+
+    def notify(self, host: str, online: bool):
+        """Reports state of host, safe to call from any thread"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if self.loop is not None and running is not self.loop:
+            self.loop.call_soon_threadsafe(self._set_state, host, online)
+        else:
+            self._set_state(host, online)
+
+    def forget(self, host: str):
+        """Removes state of host without waiters"""
+        self.states.pop(host, None)
+        self.updated.pop(host, None)
+        for online in (True, False):
+            if self.waiting.get((host, online), 0) == 0:
+                self.events.pop((host, online), None)
+
+    def get_state(self, host: str) -> Optional[bool]:
+        """Returns last reported state of host"""
+        return self.states.get(host)
+
+    async def wait(
+        self,
+        host: str,
+        online: bool,
+        probe: Optional[ReadinessProbe] = None,
+        timeout: float = 0,
+    ) -> bool:
+        """
+        Waits until host reports given state, returns False on timeout.
+
+        The probe is called once upfront and then with exponential backoff
+        between notifications. A timeout of 0 waits forever.
+        """
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+        event = self.events.setdefault((host, online), asyncio.Event())
+        if self.states.get(host) is online:
+            if time.monotonic() - self.updated.get(host, 0) <= self.fresh:
+                return True
+            # only a new report or the probe may confirm a stale state
+            event.clear()
+        if probe is not None and await probe() is online:
+            return True
+        key = (host, online)
+        self.waiting[key] = self.waiting.get(key, 0) + 1
+        try:
+            return await self._wait_event(event, online, probe, timeout)
+        finally:
+            self.waiting[key] -= 1
+            if self.waiting[key] == 0:
+                self.waiting.pop(key)
+
+    async def _wait_event(
+        self,
+        event: asyncio.Event,
+        online: bool,
+        probe: Optional[ReadinessProbe],
+        timeout: float,
+    ) -> bool:
+        deadline = time.monotonic() + timeout if timeout > 0 else 0
+        delay = self.backoff_min
+        while True:
+            wait_for = delay if probe is not None else None
+            if deadline > 0:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_for = remaining if wait_for is None else min(wait_for, remaining)
+            try:
+                await asyncio.wait_for(event.wait(), wait_for)
+                return True
+            except asyncio.TimeoutError:
+                pass
+            if probe is not None and await probe() is online:
+                return True
+            delay = min(delay * 2, self.backoff_max)
+
+    def _set_state(self, host: str, online: bool):
+        if self.states.get(host) is not online:
+            self._log_info(f"Host {'online' if online else 'offline'}: {host}")
+        self.states[host] = online
+        self.updated[host] = time.monotonic()
+        self.events.setdefault((host, online), asyncio.Event()).set()
+        self.events.setdefault((host, not online), asyncio.Event()).clear()
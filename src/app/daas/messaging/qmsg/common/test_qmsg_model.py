@@ -0,0 +1,53 @@
+"""Test encoding of heartbeat messages."""
+
+import asyncio
+
+import pytest
+
+from app.daas.messaging.qmsg.sender.qmsg_heartbeat_relay import (
+    HeartbeatRelay,
+    HeartbeatRelayConfig,
+)
+from .qmsg_model import (
+    HeartbeatMessage,
+    decode_heartbeats,
+    encode_heartbeat_json,
+    encode_heartbeats,
+)
+
+
+def test_heartbeat_encoding_and_relay():
+    """Binary batches round trip, json stays readable, relays batch hosts."""
+    messages = [
+        HeartbeatMessage(1.5, "guest-1", "192.168.223.11"),
+        HeartbeatMessage(2.5, "guest-2", "fe80::1"),
+        HeartbeatMessage(3.5, "", "not-an-ip"),
+    ]
+    body = encode_heartbeats(messages)
+    assert decode_heartbeats(body) == messages
+    assert decode_heartbeats(encode_heartbeat_json(messages[0])) == messages[:1]
+    with pytest.raises(ValueError):
+        decode_heartbeats(b"HB\x09" + body[3:])
+
+    published: list[bytes] = []
+
+    async def publish(data: bytes):
+        published.append(data)
+
+    async def scenario() -> int:
+        relay = HeartbeatRelay(HeartbeatRelayConfig(max_batch=2), publish)
+        for msg in [*messages, HeartbeatMessage(4.5, "guest-1", "192.168.223.11")]:
+            relay.datagram_received(encode_heartbeats([msg]), ("127.0.0.1", 0))
+        relay.datagram_received(b"HB", ("127.0.0.1", 0))
+        batches = await relay.flush()
+        assert relay.tojson() == {
+            "pending": 0,
+            "received": 4,
+            "published": 3,
+            "batches": 2,
+        }
+        return batches
+
+    assert asyncio.run(scenario()) == 2
+    relayed = [msg for data in published for msg in decode_heartbeats(data)]
+    assert sorted(msg.timestamp for msg in relayed) == [2.5, 3.5, 4.5]
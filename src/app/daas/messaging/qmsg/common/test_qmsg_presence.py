@@ -0,0 +1,49 @@
+"""Test presence tracking of heartbeat hosts."""
+
+from .qmsg_presence import PresenceTracker
+
+
+def test_transitions_expiry_and_jitter():
+    """Hosts go offline after the timeout and report interval jitter."""
+    events = []
+    tracker = PresenceTracker(timeout=2, tick=0.5)
+    unsubscribe = tracker.subscribe(lambda host, online: events.append((host, online)))
+
+    for now in (100.0, 101.0, 102.2):
+        tracker.heartbeat("a", now)
+    tracker.heartbeat("b", 100.0)
+    assert tracker.expire(101.9) == []
+    assert tracker.expire(102.1) == ["b"]
+    assert tracker.get_online_states(["a", "b", "c"]) == {
+        "a": False,
+        "b": False,
+        "c": False,
+    }
+    assert tracker.is_online("a", 103.0)
+    assert tracker.expire(104.3) == ["a"]
+
+    tracker.heartbeat("b", 110.0)
+    unsubscribe()
+    tracker.heartbeat("a", 110.0)
+    assert events == [("a", True), ("b", True), ("b", False), ("a", False), ("b", True)]
+
+    presence = tracker.get_presence("a")
+    assert presence is not None and presence.beats == 4
+    assert presence.intervals == 2 and round(presence.interval_max, 3) == 1.2
+    assert round(presence.jitter, 3) == 0.141
+
+
+def test_offline_hosts_are_pruned():
+    """Hosts offline for longer than the retention are forgotten."""
+    tracker = PresenceTracker(timeout=2, tick=0.5, retention=10)
+    for host in ("a", "b", "c"):
+        tracker.heartbeat(host, 100.0)
+    tracker.heartbeat("c", 101.5)
+    assert tracker.expire(101.0) == []
+    assert sorted(tracker.expire(102.5)) == ["a", "b"]
+    tracker.heartbeat("b", 106.0)
+    assert tracker.expire(107.5) == ["c"]
+    assert tracker.prune(112.0) == []
+    assert tracker.prune(112.5) == ["a"]
+    assert tracker.prune(200.0) == ["c"]
+    assert list(tracker.hosts) == ["b"]
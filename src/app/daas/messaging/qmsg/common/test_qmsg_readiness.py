@@ -0,0 +1,53 @@
+"""Test readiness notifications of hosts."""
+
+import asyncio
+import threading
+
+from .qmsg_readiness import ReadinessNotifier
+
+
+def test_notify_probe_and_timeout():
+    """Waiters wake on notifications from threads or fall back to probes."""
+    probes = []
+
+    async def probe() -> bool:
+        probes.append(len(probes))
+        return len(probes) > 3
+
+    async def scenario():
+        notifier = ReadinessNotifier(backoff_min_ms=10, backoff_max_ms=40)
+        notifier.bind(asyncio.get_running_loop())
+        waiter = asyncio.create_task(notifier.wait("10.0.0.1", True))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        thread = threading.Thread(target=notifier.notify, args=("10.0.0.1", True))
+        thread.start()
+        thread.join()
+        assert await asyncio.wait_for(waiter, 1)
+
+        assert await notifier.wait("10.0.0.2", True, probe)
+        assert not await notifier.wait("10.0.0.1", False, timeout=0.05)
+        notifier.notify("10.0.0.1", False)
+        assert await notifier.wait("10.0.0.1", False, timeout=0.05)
+        return notifier.get_state("10.0.0.1")
+
+    assert asyncio.run(scenario()) is False
+    assert len(probes) == 4
+
+
+def test_stale_state_is_verified():
+    """A state reported long ago does not end a wait without a new report."""
+
+    async def offline() -> bool:
+        return False
+
+    async def scenario():
+        notifier = ReadinessNotifier(backoff_min_ms=10, fresh_ms=20)
+        notifier.notify("10.0.0.1", True)
+        assert await notifier.wait("10.0.0.1", True, timeout=0.01)
+        await asyncio.sleep(0.03)
+        stale = await notifier.wait("10.0.0.1", True, offline, timeout=0.05)
+        notifier.forget("10.0.0.1")
+        return stale, notifier.get_state("10.0.0.1"), len(notifier.events)
+
+    assert asyncio.run(scenario()) == (False, None, 0)
@@ -17,7 +17,12 @@ from app.daas.messaging.qmsg.common.qmsg_model import (
     RpcRequest,
     RpcResponse,
 )
+from app.daas.messaging.qmsg.sender.qmsg_heartbeat_relay import (
+    HeartbeatRelay,
+    HeartbeatRelayConfig,
+)
 from app.daas.messaging.qmsg.sender.qmsg_rpc_sender import RpcSender, RpcSenderConfig
+from app.daas.messaging.qmsg.common.qmsg_readiness import ReadinessNotifier
 from app.daas.messaging.qmsg.common.qmsg_tools import QMessageTools
 from app.qweb.logging.logging import LogTarget, Loggable
 
@@ -32,11 +37,20 @@ class QHubConfigBackend:
     rabbitmq_host: str = "10.23.42.7"
     host_timeout: int = 5
     cleanup_time: int = 5
+    host_retention: int = 300
     reconnect_time_client: int = 5
     reconnect_time_server: int = 5
     wait_time_ms: int = 100
     wait_time_total_ms: int = 30000
     log_heartbeats: bool = True
+    readiness_backoff_min_ms: int = 500
+    readiness_backoff_max_ms: int = 8000
+    readiness_fresh_ms: int = 1000
+    relay_enabled: bool = False
+    relay_listen_host: str = "0.0.0.0"
+    relay_port: int = 5673
+    relay_flush_interval_ms: int = 500
+    relay_max_batch: int = 4096
     log_topic: str = "daas.adapter.qmsg"
 
 
@@ -66,6 +80,7 @@ class QHubBackend(Loggable):
             reconnect_time=self.config_hub.reconnect_time_server,
             cleanup_sleep_time=self.config_hub.cleanup_time,
             host_timeout=self.config_hub.host_timeout,
+            host_retention=self.config_hub.host_retention,
             log_topic=self.config_hub.log_topic,
         )
 
@@ -77,6 +92,22 @@ class QHubBackend(Loggable):
         else:
             self.logger = logging.getLogger(self.config_hub.log_topic)
         self.heartbeat_receiver = HeartbeatReceiver(self, self.cfg_receiver)
+        self.heartbeat_relay: Optional[HeartbeatRelay] = None
+        if self.config_hub.relay_enabled:
+            self.heartbeat_relay = HeartbeatRelay(
+                HeartbeatRelayConfig(
+                    listen_host=self.config_hub.relay_listen_host,
+                    listen_port=self.config_hub.relay_port,
+                    rabbitmq_host=self.config_hub.rabbitmq_host,
+                    flush_interval_ms=self.config_hub.relay_flush_interval_ms,
+                    max_batch=self.config_hub.relay_max_batch,
+                )
+            )
+        self.readiness = ReadinessNotifier(
+            self.config_hub.readiness_backoff_min_ms,
+            self.config_hub.readiness_backoff_max_ms,
+            self.config_hub.readiness_fresh_ms,
+        )
         self.task_heartbeat_listener: Optional[asyncio.Task] = None
         self.task_heartbeat_cleanup: Optional[asyncio.Task] = None
         self.tasks_rpc: list[tuple] = []
@@ -111,10 +142,12 @@ class QHubBackend(Loggable):
     def handle_client_online(self, client_id: str):
         """called on client heartbeat"""
         self._log_info(f"Client online: {client_id}")
+        self.readiness.notify(client_id, True)
 
     def handle_client_offline(self, client_id: str):
         """called on client heartbeat"""
         self._log_info(f"Client offline: {client_id}")
+        self.readiness.notify(client_id, False)
 
     def setup_logger(self, log_topic: str) -> logging.Logger:
         """
@@ -139,6 +172,7 @@ class QHubBackend(Loggable):
         If the listener is already running, this function does nothing.
         """
         if self.task_heartbeat_listener is None or self.task_heartbeat_listener.done():
+            self.readiness.bind(asyncio.get_running_loop())
             await self.heartbeat_receiver.connect()
             self.task_heartbeat_listener = asyncio.create_task(
                 self.heartbeat_receiver.start_listening()
@@ -148,12 +182,23 @@ class QHubBackend(Loggable):
             )
             self._log_info("HeartbeatServer task started.")
 
+    async def start_heartbeat_relay(self) -> None:
+        """
+        Start the HeartbeatRelay batching heartbeats of local guests, if enabled.
+        """
+        if self.heartbeat_relay is not None and self.heartbeat_relay.transport is None:
+            try:
+                await self.heartbeat_relay.start()
+            except OSError as exe:
+                self._log_error(f"HeartbeatRelay not started: {exe}")
+
     async def start(self) -> None:
         """
         Start the QHubServer, including the HeartbeatServer listener and RpcServer.
         """
         self._log_info("Starting QHubServer")
         await self.start_heartbeat_listener()
+        await self.start_heartbeat_relay()
         self._log_info("QHubServer started.")
 
     async def stop(self) -> None:
@@ -163,6 +208,9 @@ class QHubBackend(Loggable):
         for _, rpc_client in self.tasks_rpc:
             rpc_client.waiting = False
 
+        if self.heartbeat_relay is not None:
+            await self.heartbeat_relay.stop()
+
         await self.heartbeat_receiver.disconnect()
         if self.task_heartbeat_cleanup is not None:
             self._log_info("Stopping Cleanup task.")
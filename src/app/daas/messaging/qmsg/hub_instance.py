@@ -11,6 +11,7 @@ import threading
 import logging
 from typing import Optional
 from ProxyControl import ProxyControl
+from ProxyAgent import ProxyAgent
 from sender.qmsg_heartbeat_sender import (
     HeartbeatSenderConfig,
     HeartbeatSender,
@@ -32,6 +33,10 @@ class QHubConfigInstance:
     reconnect_time_server: int = 5
     force_name: str = ""
     force_ip: str = ""
+    heartbeat_encoding: str = "json"
+    relay_host: str = ""
+    relay_port: int = 5673
+    agent_port: int = 5680
     log_topic: str = "daas.inst"
 
 
@@ -52,6 +57,9 @@ class QHubInstance:
             reconnect_time=self.config_hub.reconnect_time_client,
             force_name=self.config_hub.force_name,
             force_ip=self.config_hub.force_ip,
+            encoding=self.config_hub.heartbeat_encoding,
+            relay_host=self.config_hub.relay_host,
+            relay_port=self.config_hub.relay_port,
             log_topic=self.config_hub.log_topic,
         )
         self.cfg_server = RpcReceiverConfig(
@@ -62,6 +70,9 @@ class QHubInstance:
             log_topic=self.config_hub.log_topic,
         )
         self.proxy = ProxyControl()
+        self.agent: Optional[ProxyAgent] = None
+        if self.config_hub.agent_port > 0:
+            self.agent = ProxyAgent(self.proxy, port=self.config_hub.agent_port)
         self.tools = QMessageTools()
         self.name = self.config_hub.force_name
         if self.name == "":
@@ -115,20 +126,9 @@ class QHubInstance:
             request.request_cmd,
             request.request_args,
         )
-        rtype = request.request_type
-        args = request.request_args
-        if rtype == "app":
-            return self.proxy.execute_app(request.request_cmd, args)
-        if rtype == "cmd":
-            return self.proxy.execute_cmd(request.request_cmd, args)
-        if rtype == "action":
-            return self.proxy.execute_action(request.request_cmd, args)
-        if rtype == "resolution":
-            return self.proxy.execute_resolution(request.request_cmd, args)
-        if rtype == "ospackage":
-            return self.proxy.execute_ospackage(request.request_cmd, args)
-        if rtype == "filesystem":
-            return self.proxy.execute_filesystem(request.request_cmd, args)
+        return self.proxy.execute(
+            request.request_type, request.request_cmd, request.request_args
+        )
 
     def handle_request(self, request: RpcRequest) -> RpcResponse:
         """called on rpc request"""
@@ -175,6 +175,18 @@ class QHubInstance:
         """
         await self.start_heartbeat_sender()
         await self.start_rpc_server()
+        self.start_agent()
+
+    def start_agent(self) -> None:
+        """
+        Start the ProxyAgent serving local CommandProxy invocations.
+        """
+        if self.agent is not None and self.agent.server is None:
+            try:
+                self.agent.start()
+                self.logger.info("ProxyAgent started on port %s", self.agent.address[1])
+            except OSError as exe:
+                self.logger.error("ProxyAgent not started: %s", exe)
 
     async def stop(self) -> None:
         """
@@ -187,3 +199,7 @@ class QHubInstance:
         if self.task_rpc_server is not None:
             self.rpc_server.stop()
             self.logger.info("RpcServer task stopped.")
+
+        if self.agent is not None:
+            self.agent.stop()
+            self.logger.info("ProxyAgent stopped.")
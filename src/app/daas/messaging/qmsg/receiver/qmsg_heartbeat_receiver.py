@@ -4,18 +4,17 @@ heartbeat signals to/from RabbitMQ. It also includes the HeartbeatServerConfig d
 for server configuration.
 """
 
-import json
 import asyncio
+import struct
 import time
-from typing import Optional
 from dataclasses import dataclass
 import pika
-from pika.adapters.blocking_connection import BlockingChannel
 import pika.exceptions
 import pika.channel
 import pika.spec
-from app.daas.messaging.qmsg.common.qmsg_model import HeartbeatMessage
-from app.qweb.logging.logging import LogTarget, Loggable
+from app.daas.messaging.qmsg.common.qmsg_amqp import AsyncAmqpClient
+from app.daas.messaging.qmsg.common.qmsg_model import decode_heartbeats
+from app.daas.messaging.qmsg.common.qmsg_presence import PresenceTracker
 
 
 @dataclass
@@ -30,11 +29,12 @@ class HeartbeatReceiverConfig:
     routing_key: str = "instance.heartbeat"
     cleanup_sleep_time: int = 5
     host_timeout: int = 5
+    host_retention: int = 300
     reconnect_time: int = 5
     log_topic: str = "HeartbeatServer"
 
 
-class HeartbeatReceiver(Loggable):
+class HeartbeatReceiver(AsyncAmqpClient):
     """
     The HeartbeatServer class manages the connection to RabbitMQ and handles the
     sending and receiving of heartbeat signals.
@@ -44,7 +44,7 @@ class HeartbeatReceiver(Loggable):
         """
         Initialize the HeartbeatServer with the provided configuration.
         """
-        Loggable.__init__(self, LogTarget.QMSG)
+        AsyncAmqpClient.__init__(self, config.rabbitmq_host)
         if owner is None:
             raise ValueError("Owner cannot be None")
 
@@ -52,9 +52,12 @@ class HeartbeatReceiver(Loggable):
         self.listening = False
         self.reconnecting = True
         self.config: HeartbeatReceiverConfig = config
-        self.connection: Optional[pika.BlockingConnection] = None
-        self.channel: Optional[BlockingChannel] = None
-        self.hosts: dict[str, float] = {}
+        self.presence = PresenceTracker(
+            self.config.host_timeout,
+            self.config.cleanup_sleep_time,
+            self.config.host_retention,
+        )
+        self.presence.subscribe(self._on_presence)
 
     async def connect(self) -> None:
         """
@@ -62,21 +65,16 @@ class HeartbeatReceiver(Loggable):
         """
         while self.reconnecting is True:
             try:
-                self.connection = pika.BlockingConnection(
-                    pika.ConnectionParameters(host=self.config.rabbitmq_host)
+                self.connection = await self._open_connection()
+                self.channel = await self._open_channel(self.connection)
+                await self._call(
+                    self.channel.exchange_declare,
+                    exchange=self.config.exchange_name,
+                    exchange_type="topic",
                 )
-                if self.connection is not None:
-                    self.channel = self.connection.channel()
-                    if self.channel is not None:
-                        self.channel.exchange_declare(
-                            exchange=self.config.exchange_name,
-                            exchange_type="topic",
-                        )
-                        self._log_info(
-                            f"Connected to RabbitMQ at {self.config.rabbitmq_host}"
-                        )
-                        break
-            except pika.exceptions.AMQPConnectionError as e:
+                self._log_info(f"Connected to RabbitMQ at {self.config.rabbitmq_host}")
+                break
+            except pika.exceptions.AMQPError as e:
                 self._log_info(
                     (
                         "Connection failed, retrying in "
@@ -87,21 +85,20 @@ class HeartbeatReceiver(Loggable):
 
     async def disconnect(self) -> None:
         """
-        Establish a connection to RabbitMQ. If the connection fails, retry after a delay.
+        Close the connection to RabbitMQ and stop reconnecting.
         """
         self.reconnecting = False
-        if self.connection:
+        if self.connection is not None:
             try:
                 self.connection.close()
+            except pika.exceptions.ConnectionWrongStateError as exe:
+                self._log_error(f"ConnectionError: {exe}")
             except pika.exceptions.StreamLostError as exe:
                 self._log_error(f"StreamLostError: {exe}")
-            except pika.exceptions.ChannelWrongStateError as exe:
-                self._log_error(f"ChannelError: {exe}")
 
     def reset_heartbeat(self, ip_addr: str):
         """Resets heartbeat for a given host"""
-        if ip_addr in self.hosts:
-            del self.hosts[ip_addr]
+        self.presence.remove(ip_addr)
 
     def on_heartbeat(
         self,
@@ -111,74 +108,69 @@ class HeartbeatReceiver(Loggable):
         body: bytes,
     ) -> None:
         """
-        Handle a received heartbeat message by updating the list of active hosts.
+        Handle received heartbeats by updating the presence of their hosts.
+
+        Bodies are binary batches, e.g. from a node relay, or legacy json.
         """
         if channel is not None and method is not None and properties is not None:
-            raw_dict = json.loads(body.decode())
-            msg = HeartbeatMessage(**raw_dict)
-            if msg.ip_address not in self.hosts:
-                self.owner.handle_client_online(msg.ip_address)
-            self.hosts[msg.ip_address] = time.time()
-            self.owner.handle_heartbeat(msg)
+            try:
+                messages = decode_heartbeats(body)
+            except (ValueError, TypeError, IndexError, struct.error) as exe:
+                self._log_error(f"Invalid heartbeat message: {exe}")
+                return
+            now = time.time()
+            for msg in messages:
+                self.presence.heartbeat(msg.ip_address, now)
+                self.owner.handle_heartbeat(msg)
 
     async def start_listening(self) -> None:
         """
         Start listening for heartbeat messages from RabbitMQ.
+
+        Messages are consumed on the event loop. If the connection is lost,
+        it is reestablished until `disconnect` is called.
         """
-        if self.channel is not None:
-            result = self.channel.queue_declare(queue="", exclusive=True)
-            queue_name = result.method.queue
-            self.channel.queue_bind(
-                exchange=self.config.exchange_name,
-                queue=queue_name,
-                routing_key=self.config.routing_key,
-            )
-            self.channel.basic_consume(
-                queue=queue_name,
-                on_message_callback=self.on_heartbeat,
-                auto_ack=True,
-            )
-            self._log_info("Waiting for heartbeat messages...")
-            self.listening = True
-            loop = asyncio.get_event_loop()
-            try:
-                task = loop.run_in_executor(None, self.channel.start_consuming)
-                await task
-            except asyncio.CancelledError:
-                self._log_info("HeartbeatReceiver-listener cancelled")
+        try:
+            while self.reconnecting:
+                if self.channel is None or self.channel.is_closed:
+                    await self.connect()
+                if self.channel is None or self.closed is None:
+                    break
+                try:
+                    await self._consume(self.channel)
+                    await self.closed
+                except pika.exceptions.AMQPError as exe:
+                    self._log_error(f"HeartbeatReceiver-listener failed: {exe}")
+                self.listening = False
+                self.channel = None
+                if self.reconnecting:
+                    await asyncio.sleep(self.config.reconnect_time)
+        except asyncio.CancelledError:
+            self._log_info("HeartbeatReceiver-listener cancelled")
+        self.listening = False
 
     async def start_cleanup_task(self) -> None:
         """
-        Start a periodic task to clean up inactive hosts.
+        Start a periodic task to expire inactive hosts and prune hosts
+        offline for longer than the retention.
         """
         try:
             while self.reconnecting:
-                await asyncio.sleep(0)
-                current_time = time.time()
-                inactive_hosts = [
-                    host
-                    for host, last_seen in self.hosts.items()
-                    if current_time - last_seen > self.config.host_timeout
-                ]
-                for host in inactive_hosts:
+                for host in self.presence.expire():
                     self._log_info(f"Removing inactive host: {host}")
-                    del self.hosts[host]
-                    self.owner.handle_client_offline(host)
-                await asyncio.sleep(self.config.cleanup_sleep_time)
+                for host in self.presence.prune():
+                    self._log_info(f"Pruning offline host: {host}")
+                await asyncio.sleep(self.presence.tick)
         except asyncio.CancelledError:
             self._log_info("HeartbeatReceiver-cleanup cancelled")
 
     def is_online(self, ip_address: str) -> bool:
         """Checks if host is online"""
+        return self.presence.is_online(ip_address)
 
-        current_time = time.time()
-        if ip_address in self.hosts:
-            last_seen = self.hosts[ip_address]
-            diff = current_time - last_seen
-            if diff < self.config.host_timeout:
-                return True
-
-        return False
+    def get_online_states(self, ip_addresses: list[str]) -> dict[str, bool]:
+        """Checks if hosts are online"""
+        return self.presence.get_online_states(ip_addresses)
 
     async def get_available_hosts(self) -> list:
         """
@@ -186,4 +178,31 @@ class HeartbeatReceiver(Loggable):
 
         :return: A list of active host IDs.
         """
-        return list(self.hosts.keys())
+        return self.presence.get_online_hosts()
+
+    def _on_presence(self, host: str, online: bool):
+        if online:
+            self.owner.handle_client_online(host)
+        else:
+            self.owner.handle_client_offline(host)
+
+    async def _consume(self, channel: pika.channel.Channel):
+        frame = await self._call(channel.queue_declare, queue="", exclusive=True)
+        queue_name = frame.method.queue
+        await self._call(
+            channel.queue_bind,
+            exchange=self.config.exchange_name,
+            queue=queue_name,
+            routing_key=self.config.routing_key,
+        )
+        channel.basic_consume(
+            queue=queue_name,
+            on_message_callback=self.on_heartbeat,
+            auto_ack=True,
+        )
+        self._log_info("Waiting for heartbeat messages...")
+        self.listening = True
+
+    def _on_connection_closed(self, connection, reason: Exception):
+        self.listening = False
+        super()._on_connection_closed(connection, reason)
@@ -0,0 +1,153 @@
+"""
+This module defines the HeartbeatRelay class, which runs on a node and
+forwards heartbeats of its local guests as batches.
+
+Guests send binary heartbeat datagrams to the relay instead of opening a
+connection to RabbitMQ for every heartbeat. The relay keeps the latest
+heartbeat per host and publishes all of them as a single message on
+every flush. Batches are published on the event loop through an
+AsyncioConnection.
+"""
+
+import asyncio
+import struct
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+import pika.exceptions
+from app.daas.messaging.qmsg.common.qmsg_amqp import AsyncAmqpClient
+from app.daas.messaging.qmsg.common.qmsg_model import (
+    HeartbeatMessage,
+    decode_heartbeats,
+    encode_heartbeats,
+)
+
+PublishHandler = Callable[[bytes], Awaitable[None]]
+
+
+@dataclass
+class HeartbeatRelayConfig:
+    """
+    Configuration dataclass for HeartbeatRelay.
+    Holds the listening address, RabbitMQ connection details and batch limits.
+    """
+
+    listen_host: str = "0.0.0.0"
+    listen_port: int = 5673
+    rabbitmq_host: str = "localhost"
+    exchange_name: str = "heartbeat"
+    routing_key: str = "instance.heartbeat"
+    flush_interval_ms: int = 500
+    max_batch: int = 4096
+
+
+class HeartbeatRelay(asyncio.DatagramProtocol, AsyncAmqpClient):
+    """
+    The HeartbeatRelay class receives heartbeat datagrams and publishes them
+    in batches to the heartbeat exchange.
+    """
+
+    def __init__(
+        self, config: HeartbeatRelayConfig, publish: Optional[PublishHandler] = None
+    ) -> None:
+        AsyncAmqpClient.__init__(self, config.rabbitmq_host)
+        self.config = config
+        self.publish = publish if publish is not None else self._publish_amqp
+        self.heartbeats: dict[str, HeartbeatMessage] = {}
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.task_flush: Optional[asyncio.Task] = None
+        self.received = 0
+        self.published = 0
+        self.batches = 0
+
+    def datagram_received(self, data: bytes, addr: tuple) -> None:
+        """
+        Handle a heartbeat datagram by keeping the latest heartbeat per host.
+        """
+        try:
+            messages = decode_heartbeats(data)
+        except (ValueError, TypeError, IndexError, struct.error) as exe:
+            self._log_error(f"Invalid heartbeat from {addr}: {exe}")
+            return
+        for msg in messages:
+            self.heartbeats[msg.ip_address] = msg
+        self.received += len(messages)
+
+    async def flush(self) -> int:
+        """
+        Publish pending heartbeats in batches, returns the number of batches.
+        """
+        messages = list(self.heartbeats.values())
+        self.heartbeats = {}
+        batches = 0
+        limit = max(1, min(self.config.max_batch, 0xFFFF))
+        for start in range(0, len(messages), limit):
+            chunk = messages[start : start + limit]
+            try:
+                await self.publish(encode_heartbeats(chunk))
+            except pika.exceptions.AMQPError as exe:
+                self._log_error(f"Failed to publish heartbeats: {exe}")
+                self.channel = None
+                continue
+            self.published += len(chunk)
+            batches += 1
+        self.batches += batches
+        return batches
+
+    async def start(self) -> None:
+        """
+        Start listening for datagrams and flushing periodically.
+        """
+        loop = asyncio.get_running_loop()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: self,
+            local_addr=(self.config.listen_host, self.config.listen_port),
+        )
+        self.task_flush = asyncio.create_task(self._run_flush())
+        self._log_info(
+            f"HeartbeatRelay listening on "
+            f"{self.config.listen_host}:{self.config.listen_port}"
+        )
+
+    async def stop(self) -> None:
+        """
+        Stop the relay and publish remaining heartbeats.
+        """
+        if self.transport is not None:
+            self.transport.close()
+        if self.task_flush is not None:
+            self.task_flush.cancel()
+            await asyncio.gather(self.task_flush, return_exceptions=True)
+        await self.flush()
+        if self.connection is not None and self.connection.is_open:
+            self.connection.close()
+        self.connection = None
+        self.channel = None
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {
+            "pending": len(self.heartbeats),
+            "received": self.received,
+            "published": self.published,
+            "batches": self.batches,
+        }
+
+    async def _run_flush(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.flush_interval_ms / 1000)
+            await self.flush()
+
+    async def _publish_amqp(self, body: bytes) -> None:
+        if self.channel is None or self.channel.is_closed:
+            self.connection = await self._open_connection()
+            self.channel = await self._open_channel(self.connection)
+            await self._call(
+                self.channel.exchange_declare,
+                exchange=self.config.exchange_name,
+                exchange_type="topic",
+            )
+        self.channel.basic_publish(
+            exchange=self.config.exchange_name,
+            routing_key=self.config.routing_key,
+            body=body,
+        )
@@ -3,16 +3,20 @@ This module defines the HeartbeatSender class, which sends periodic heartbeat si
 to indicate that the client is online.
 """
 
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass
 from datetime import datetime
-import json
+import socket
 import time
 import asyncio
 import logging
 import pika
 from typing import Optional
 
-from common.qmsg_model import HeartbeatMessage
+from common.qmsg_model import (
+    HeartbeatMessage,
+    encode_heartbeat_json,
+    encode_heartbeats,
+)
 from common.qmsg_tools import QMessageTools
 
 
@@ -30,6 +34,9 @@ class HeartbeatSenderConfig:
     reconnect_time: int = 5
     force_name: str = ""
     force_ip: str = ""
+    encoding: str = "json"
+    relay_host: str = ""
+    relay_port: int = 5673
     log_topic: str = "HeartbeatServer"
 
 
@@ -86,10 +93,39 @@ class HeartbeatSender:
                 )
                 time.sleep(self.config.reconnect_time)
 
+    def encode_heartbeat(self, message: HeartbeatMessage) -> bytes:
+        """
+        Encode a heartbeat message, json unless binary is configured.
+        """
+        if self.config.encoding == "binary":
+            return encode_heartbeats([message])
+        return encode_heartbeat_json(message)
+
+    def send_heartbeat_relay(self) -> None:
+        """
+        Send heartbeat datagrams to the node relay, which batches them.
+        """
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            while True:
+                message = HeartbeatMessage(
+                    datetime.now().timestamp(), self.name, self.ip_address
+                )
+                try:
+                    sock.sendto(
+                        encode_heartbeats([message]),
+                        (self.config.relay_host, self.config.relay_port),
+                    )
+                except OSError as exe:
+                    self.__log_error(f"Failed to send heartbeat to relay: {exe}")
+                time.sleep(self.config.heartbeat_timeout)
+
     def send_heartbeat(self) -> None:
         """
         Send a heartbeat message to the RabbitMQ exchange. This method is called periodically.
         """
+        if self.config.relay_host != "":
+            self.send_heartbeat_relay()
+            return
         while True:
             if self.connection is not None:
                 self.connection.close()
@@ -103,7 +139,7 @@ class HeartbeatSender:
                     self.channel.basic_publish(
                         exchange=self.config.exchange_name,
                         routing_key=self.config.routing_key,
-                        body=json.dumps(asdict(message)),
+                        body=self.encode_heartbeat(message),
                     )
             except pika.exceptions.AMQPConnectionError as exe:
                 self.__log_error(
@@ -119,7 +155,8 @@ class HeartbeatSender:
         Start the HeartbeatSender as an asynchronous task.
         """
         if self.task is None or self.task.done():
-            self.connect()
+            if self.config.relay_host == "":
+                self.connect()
             self.task = asyncio.create_task(asyncio.to_thread(self.send_heartbeat))
             self.__log_info("HeartbeatSender task started.")
 
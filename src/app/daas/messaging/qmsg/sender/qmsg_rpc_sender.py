@@ -13,6 +13,14 @@ import uuid
 import pika
 
 from app.daas.messaging.qmsg.common.qmsg_model import RpcRequest, RpcResponse
+from app.qweb.common.metrics import METRICS
+
+RPC_CALLS = METRICS.counter(
+    "daas_rpc_calls_total", "Rpc requests sent to instances", ("type", "outcome")
+)
+RPC_DURATION = METRICS.histogram(
+    "daas_rpc_duration_seconds", "Rpc roundtrip latency", ("type",)
+)
 
 
 @dataclass
@@ -83,11 +91,25 @@ class RpcSender:
         """
         self.__log_info(f"Create RpcRequest thread for {msg}")
         self.thread = threading.Thread(
-            target=self.__call_rpc_method, args=[queue_name, msg]
+            target=self.__call_rpc_measured, args=[queue_name, msg]
         )
         self.thread.start()
         return self.thread
 
+    def __call_rpc_measured(self, queue_name: str, msg: RpcRequest) -> Optional[str]:
+        """
+        Send an RPC request and account its outcome and latency.
+        """
+        started = time.perf_counter()
+        response = self.__call_rpc_method(queue_name, msg)
+        if METRICS.enabled:
+            outcome = "response" if response is not None else "no_response"
+            RPC_CALLS.labels(msg.request_type, outcome).inc()
+            RPC_DURATION.labels(msg.request_type).observe(
+                time.perf_counter() - started
+            )
+        return response
+
     def __call_rpc_method(self, queue_name: str, msg: RpcRequest) -> Optional[str]:
         """
         Send an RPC request to the specified queue.
@@ -23,16 +23,22 @@ class ContainerBase(DaasBaseObject):
         keep_connections: bool = False,
     ) -> Optional[InstanceObject]:
         """Start the application."""
-        assert await self.verify_demand(userid)
         api = await get_backend_component(BackendName.CONTAINER, DockerRequest)
         tag = await self.get_container_tag()
-        if await self.start_prepare(keep_connections):
-            code, _, _ = await api.docker_container_start(
-                self.id_docker, tag, self.hw_cpus, self.hw_memory * 1024, False, [], []
-            )
-            if code == 0:
-                if await self.start_finalize(userid, True, object_mode=object_mode):
-                    return await self._return_connected_instance(connect)
+        async with self.reserve_demand(userid):
+            if await self.start_prepare(keep_connections):
+                code, _, _ = await api.docker_container_start(
+                    self.id_docker,
+                    tag,
+                    self.hw_cpus,
+                    self.hw_memory * 1024,
+                    False,
+                    [],
+                    [],
+                )
+                if code == 0:
+                    if await self.start_finalize(userid, True, object_mode=object_mode):
+                        return await self._return_connected_instance(connect)
         return None
 
     async def stop(self, instance: InstanceObject, force: bool) -> bool:
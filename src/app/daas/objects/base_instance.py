@@ -6,6 +6,11 @@ from typing import Optional
 from nest_asyncio import asyncio
 from quart.utils import run_sync
 from app.daas.adapter.adapter_ssh import SshAdapter, SshAdapterConfig
+from app.daas.adapter.adapter_transfer import (
+    ProgressCallback,
+    TransferEntry,
+    TransferResult,
+)
 from app.daas.common.enums import BackendName
 from app.daas.common.model import GuacamoleConnection, Instance
 from app.daas.messaging.qmsg.common.qmsg_model import RpcRequest, RpcResponse
@@ -81,6 +86,24 @@ class InstanceObjectBase(Instance):
             self._log_error(f"Unknown test method: {method}", 1)
         return False
 
+    async def wait_online_state(self, online: bool, timeout: float = 0) -> bool:
+        """Waits until instance reports given online state"""
+        qmsg = await self.get_backend()
+        readiness = qmsg.component.readiness
+        return await readiness.wait(
+            self.host, online, self.check_online_state, timeout
+        )
+
+    async def notify_online_state(self, online: bool):
+        """Reports online state of instance, e.g. on backend state changes"""
+        qmsg = await self.get_backend()
+        qmsg.component.readiness.notify(self.host, online)
+
+    async def forget_online_state(self):
+        """Drops the reported online state, e.g. when the instance is removed"""
+        qmsg = await self.get_backend()
+        qmsg.component.readiness.forget(self.host)
+
     async def _invoke_instance(
         self,
         adr: str,
@@ -230,6 +253,17 @@ class InstanceObjectBase(Instance):
         code, str_out, str_err = await run_sync(adapter.scp_upload_call)(src, dst)
         return code, str_out, str_err
 
+    async def _invoke_tar_upload(
+        self,
+        adr: str,
+        entries: list[TransferEntry],
+        windows: bool,
+        progress: Optional[ProgressCallback] = None,
+    ) -> TransferResult:
+        """Invoke a batch upload as tar stream via ssh"""
+        adapter = await self.create_adapter(adr)
+        return await run_sync(adapter.tar_upload_call)(entries, windows, progress)
+
     async def _invoke_local_cmd(
         self, cmd: str, args: list[str]
     ) -> tuple[int, str, str]:
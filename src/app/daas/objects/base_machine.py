@@ -32,13 +32,14 @@ class MachineBase(DaasBaseObject):
         keep_connections: bool = False,
     ) -> Optional[InstanceObject]:
         """Start the application."""
-        assert await self.verify_demand(userid)
         api = await get_backend_component(BackendName.VM, ApiProxmox)
-        if await self.start_prepare(keep_connections):
-            response, _ = await api.prox_vmstart(api.config_prox.node, self.id_proxmox)
-            if response is not None and response.status == 200:
-                if await self.start_finalize(userid, True, object_mode=object_mode):
-                    return await self._return_connected_instance(connect)
+        async with self.reserve_demand(userid):
+            if await self.start_prepare(keep_connections):
+                node = api.config_prox.node
+                response, _ = await api.prox_vmstart(node, self.id_proxmox)
+                if response is not None and response.status == 200:
+                    if await self.start_finalize(userid, True, object_mode=object_mode):
+                        return await self._return_connected_instance(connect)
         return None
 
     async def stop(self, instance: InstanceObject, force: bool) -> bool:
@@ -1,11 +1,13 @@
 """Base app on top of DaasObject"""
 
 from abc import abstractmethod
+from contextlib import asynccontextmanager
 import secrets
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import AsyncIterator, Optional
 from app.daas.common.enums import BackendName
+from app.daas.common.errors import RessourceLimitError
 from app.daas.common.model import DaasObject, Environment, RessourceInfo
 from app.daas.container.docker.DockerRequest import DockerRequest
 from app.daas.objects.object_instance import InstanceObject
@@ -19,6 +21,7 @@ from app.qweb.common.qweb_tools import (
 )
 from app.qweb.processing.processor import QwebResult
 from app.qweb.service.service_context import ServiceComponent
+from app.qweb.service.service_scheduler import CURRENT_TASK
 from app.qweb.service.service_tasks import QwebTaskManager, ScheduledTask
 
 # Globals
@@ -63,7 +66,19 @@ class DaasBaseObject(DaasObject):
     async def baseimage_status(self) -> QwebResult:
         return QwebResult(200, await self.status())
 
-    async def verify_demand(self, userid: int) -> bool:
+    @asynccontextmanager
+    async def reserve_demand(
+        self, userid: int, priority: int = 0
+    ) -> AsyncIterator[str]:
+        """
+        Reserves ressources for the object while starting, creating or cloning
+
+        Every call reserves under its own key, so users starting the same
+        object do not share a reservation. The reservation is released when
+        leaving the context, a landed object or instance is accounted by
+        then. Scheduled tasks wait for capacity, requests fail right away.
+        Raises RessourceLimitError if the demand is not admitted.
+        """
         from app.daas.resources.limits.ressource_limits import RessourceLimits
 
         limits = await get_backend_component(BackendName.LIMITS, RessourceLimits)
@@ -82,7 +97,14 @@ class DaasBaseObject(DaasObject):
             self.hw_memory,
             self.hw_disksize,
         )
-        return await limits.verify_demand(userid, info)
+        key = f"{self.id}:{secrets.token_urlsafe(8)}"
+        timeout = None if CURRENT_TASK.get() != "" else 0.0
+        if not await limits.admit_demand(userid, info, key, priority, timeout):
+            raise RessourceLimitError(f"Ressource limits exceeded for {self.id}")
+        try:
+            yield key
+        finally:
+            limits.release_demand(key)
 
     async def status(self) -> dict:
         """Returns status information"""
@@ -176,8 +198,10 @@ class DaasBaseObject(DaasObject):
         from app.daas.db.database import Database
 
         await self._kill_object_tasks()
+        await instance.notify_online_state(False)
         dbase = await get_database(Database)
         await dbase.delete_instance(instance)
+        await instance.forget_online_state()
         self.object_mode = "stopped"
         self.object_mode_extended = "stopped"
         await dbase.update_daas_object(self)
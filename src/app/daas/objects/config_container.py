@@ -104,13 +104,9 @@ class ContainerConfigBase(ContainerEnvironmentBase):
             )
         await self.set_extended_mode("Upload installers")
         if len(files) > 0 and instance is not None:
-            for file in files:
-                self._log_info(f"Filecopy: {file.id}")
-                # filename, norm_folder, False
-                await instance.inst_vminvoke_upload(
-                    file.localpath, self.is_windows(), False
-                )
-                await store.upload_file_to_instance(file, instance)
+            self._log_info(f"Filecopy: {[file.id for file in files]}")
+            copied = await store.upload_files_to_instance(files, instance)
+            self._log_info(f"Filecopy done: {copied}")
         await self.set_extended_mode("Installers uploaded")
         self._log_info(f"Executing tasks: {tasks}")
         tasks = self.object_tasks
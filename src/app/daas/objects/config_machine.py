@@ -83,11 +83,12 @@ class MachineConfigBase(MachineEnvironmentBase):
         self._log_info("Copy installers:")
         await self.set_extended_mode("Upload installers")
         if len(files) > 0 and instance is not None:
-            for file in files:
-                self._log_info(f"Filecopy: {file.id}")
-                await instance.inst_vminvoke_upload(
-                    file.localpath, self.is_windows(), False, file.name
-                )
+            self._log_info(f"Filecopy: {[file.id for file in files]}")
+            ret = await instance.inst_vminvoke_upload_batch(
+                [(file.localpath, file.name) for file in files]
+            )
+            if ret.response_code != 200:
+                self._log_error(f"Filecopy failed: {ret.response_data}")
         await self.set_extended_mode("Installers uploaded")
         return True
 
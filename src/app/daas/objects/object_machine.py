@@ -30,14 +30,14 @@ class MachineObject(MachineConfigBase):
         )
 
     async def baseimage_clone(self, oldid: str, args: dict) -> QwebResult:
-        assert await self.verify_demand(args["id_owner"])
-        code, str_out, str_err = await self.clone(oldid, args)
+        async with self.reserve_demand(args["id_owner"]):
+            code, str_out, str_err = await self.clone(oldid, args)
         status = 200 if code == 0 else 400
         return QwebResult(status, {}, code, f"{str_out}{str_err}")
 
     async def baseimage_create(self, args: dict) -> QwebResult:
-        assert await self.verify_demand(args["id_owner"])
-        code, str_out, str_err = await self.create(args)
+        async with self.reserve_demand(args["id_owner"]):
+            code, str_out, str_err = await self.create(args)
         status = 200 if code == 0 else 400
         return QwebResult(status, {}, code, f"{str_out}{str_err}")
 
@@ -85,8 +85,8 @@ class MachineObject(MachineConfigBase):
         args: dict = {},
     ) -> Optional[InstanceObject]:
         """Starts environment instance"""
-        assert await self.verify_demand(userid)
-        inst = await self.env_start(env, userid, connect, object_mode, args)
+        async with self.reserve_demand(userid):
+            inst = await self.env_start(env, userid, connect, object_mode, args)
         if inst is not None:
             return await self._return_connected_instance(connect)
         return None
@@ -101,10 +101,10 @@ class MachineObject(MachineConfigBase):
     ) -> Optional[InstanceObject]:
         """Runs environment instance"""
 
-        assert await self.verify_demand(userid)
-        inst = await self._get_db_instance(env)
-        if inst is None:
-            inst = await self.env_start(env, userid, connect, object_mode, args)
+        async with self.reserve_demand(userid):
+            inst = await self._get_db_instance(env)
+            if inst is None:
+                inst = await self.env_start(env, userid, connect, object_mode, args)
         if inst is not None:
             if object_mode != "":
                 self.object_mode = "run-app"
@@ -2,6 +2,13 @@
 
 import os
 from dataclasses import dataclass
+from typing import Optional
+from app.daas.adapter.adapter_transfer import (
+    TRANSFER_MODE_EXEC,
+    TRANSFER_MODE_FILE,
+    ProgressCallback,
+    TransferEntry,
+)
 from app.daas.common.enums import BackendName
 from app.daas.objects.base_instance import InstanceObjectBase
 
@@ -47,27 +54,48 @@ class InstancePhase(InstanceObjectBase):
         self, src: str, win: bool, run: bool, filename: str = ""
     ) -> QwebResult:
         """Invokes a (blocking) upload command"""
-        store = await get_backend_component(BackendName.FILE, Filestore)
         win = await self.needs_pstools()
-        dst = await store.get_filename_instance(src, win, "tmp")
-        path = os.path.dirname(dst)
-        if filename != "":
-            dst = f"{path}/{filename}"
-        if win:
-            await self._run_ssh("mkdir", f'"{path}"')
-        else:
-            await self._run_ssh("mkdir", f"-p {path}")
-
-        uploaded = await self._run_upload(src, dst)
-        if run:
+        mode = TRANSFER_MODE_EXEC if run else TRANSFER_MODE_FILE
+        entry = await self._get_upload_entry(src, win, filename, mode)
+        uploaded = await self._run_upload_batch([entry], win)
+        if run and uploaded.response_code == 200:
             if win:
-                return await self._run_inst("cmd", dst, "")
-            else:
-                await self._run_ssh("/usr/bin/chmod", f"a+x {dst}")
-                return await self._run_inst("cmd", "/usr/bin/xterm", f"-e {dst}")
-
+                return await self._run_inst("cmd", entry.dst, "")
+            return await self._run_inst("cmd", "/usr/bin/xterm", f"-e {entry.dst}")
         return uploaded
 
+    async def inst_vminvoke_upload_batch(
+        self,
+        files: list[tuple[str, str]],
+        progress: Optional[ProgressCallback] = None,
+    ) -> QwebResult:
+        """
+        Invokes a (blocking) upload of many files as a single tar stream.
+
+        Files are given as tuples of local file and optional remote name,
+        the result lists the transfer state of every file.
+        """
+        win = await self.needs_pstools()
+        entries = [
+            await self._get_upload_entry(src, win, filename, TRANSFER_MODE_FILE)
+            for src, filename in files
+        ]
+        return await self._run_upload_batch(entries, win, progress)
+
+    async def inst_vminvoke_upload_entries(
+        self,
+        entries: list[TransferEntry],
+        progress: Optional[ProgressCallback] = None,
+    ) -> QwebResult:
+        """
+        Invokes a (blocking) upload of files to their destinations.
+
+        All entries are sent as a single tar stream, the result lists the
+        transfer state of every entry.
+        """
+        win = await self.needs_pstools()
+        return await self._run_upload_batch(entries, win, progress)
+
     async def inst_vminvoke_filesystem(
         self, cmd: str, cpub: bool, cshared: bool, cuser: bool
     ) -> QwebResult:
@@ -98,6 +126,28 @@ class InstancePhase(InstanceObjectBase):
             return QwebResult(200, {}, 0, f"{msg}{err}")
         return QwebResult(400, {}, 1, "Error on invoke_upload()")
 
+    async def _run_upload_batch(
+        self,
+        entries: list[TransferEntry],
+        win: bool,
+        progress: Optional[ProgressCallback] = None,
+    ) -> QwebResult:
+        if len(entries) == 0:
+            return QwebResult(200, {"code": 0, "files": []}, 0, "")
+        result = await self._invoke_tar_upload(self.host, entries, win, progress)
+        if result.succeeded:
+            return QwebResult(200, result.tojson(), 0, result.std_err)
+        return QwebResult(400, result.tojson(), 1, "Error on invoke_upload_batch()")
+
+    async def _get_upload_entry(
+        self, src: str, win: bool, filename: str, mode: int
+    ) -> TransferEntry:
+        store = await get_backend_component(BackendName.FILE, Filestore)
+        dst = await store.get_filename_instance(src, win, "tmp")
+        if filename != "":
+            dst = f"{os.path.dirname(dst)}/{filename}"
+        return TransferEntry(src, dst, mode)
+
     async def _run_inst(self, ctype: str, cmd: str, args: str) -> QwebResult:
         strargs = f"{cmd} {args}"
         pstools = await self.needs_pstools()
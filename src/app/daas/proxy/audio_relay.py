@@ -0,0 +1,152 @@
+"""Asynchronous audio relay for microphone streams"""
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+from app.qweb.logging.logging import LogTarget, Loggable
+
+AUDIO_UNDERRUN_MS = 100
+"""
+Waiting longer than this for the next frame counts as an underrun.
+"""
+
+
+@dataclass
+class AudioStreamStats:
+    """Counts audio stream stats"""
+
+    frames_received: int = 0
+    frames_written: int = 0
+    frames_dropped: int = 0
+    bytes_written: int = 0
+    underruns: int = 0
+    restarts: int = 0
+    latency_last_ms: float = 0
+    latency_avg_ms: float = 0
+    latency_max_ms: float = 0
+
+    def add_latency(self, latency_ms: float):
+        """Adds latency of a written frame"""
+        self.latency_last_ms = latency_ms
+        self.latency_max_ms = max(self.latency_max_ms, latency_ms)
+        self.latency_avg_ms += (latency_ms - self.latency_avg_ms) / max(
+            self.frames_written, 1
+        )
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return asdict(self)
+
+
+class AudioRelay(Loggable):
+    """
+    Relays audio frames to a `pacat` subprocess.
+
+    Frames are pushed into a bounded jitter buffer and written by a
+    dedicated task, so a slow sink never blocks the event loop. When the
+    buffer is full the oldest frame is dropped to keep latency bounded.
+    The subprocess outlives single websocket connections and is only
+    terminated after being detached for the configured linger time.
+    """
+
+    def __init__(self, cmd: list[str], buffer_frames: int, linger_s: int):
+        Loggable.__init__(self, LogTarget.PROXY)
+        self.cmd = cmd
+        self.linger_s = linger_s
+        self.stats = AudioStreamStats()
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.buffer: asyncio.Queue[tuple[float, bytes]] = asyncio.Queue(
+            maxsize=max(buffer_frames, 1)
+        )
+        self.attached = 0
+        self._task_writer: Optional[asyncio.Task] = None
+        self._task_release: Optional[asyncio.Task] = None
+
+    def is_running(self) -> bool:
+        """Checks whether the subprocess is alive"""
+        return self.process is not None and self.process.returncode is None
+
+    async def attach(self):
+        """Attaches a client and (re)starts the subprocess if necessary"""
+        self.attached += 1
+        if self._task_release is not None:
+            self._task_release.cancel()
+            self._task_release = None
+        if self.is_running() is False:
+            if self.process is not None:
+                self.stats.restarts += 1
+            self.process = await asyncio.create_subprocess_exec(
+                *self.cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        if self._task_writer is None or self._task_writer.done():
+            self._task_writer = asyncio.create_task(self._write_frames())
+
+    def detach(self):
+        """Detaches a client and schedules the release of the subprocess"""
+        self.attached = max(self.attached - 1, 0)
+        if self.attached == 0 and self._task_release is None:
+            self._task_release = asyncio.create_task(self._release_later())
+
+    def push(self, data: bytes) -> bool:
+        """Queues frame without blocking, returns False if a frame was dropped"""
+        self.stats.frames_received += 1
+        dropped = False
+        if self.buffer.full():
+            self.buffer.get_nowait()
+            self.stats.frames_dropped += 1
+            dropped = True
+        self.buffer.put_nowait((time.monotonic(), data))
+        return dropped is False
+
+    async def stop(self):
+        """Stops writer and terminates subprocess"""
+        for task in (self._task_writer, self._task_release):
+            if task is not None and task is not asyncio.current_task():
+                task.cancel()
+        self._task_writer = None
+        self._task_release = None
+        while self.buffer.empty() is False:
+            self.buffer.get_nowait()
+        if self.is_running() and self.process is not None:
+            if self.process.stdin is not None:
+                self.process.stdin.close()
+            self.process.terminate()
+            await self.process.wait()
+
+    async def _release_later(self):
+        await asyncio.sleep(self.linger_s)
+        if self.attached == 0:
+            self._log_info("Releasing unused audio relay")
+            await self.stop()
+
+    async def _write_frames(self):
+        while self.is_running() and self.process is not None:
+            waited = time.monotonic()
+            queued_at, data = await self.buffer.get()
+            now = time.monotonic()
+            if self.attached > 0 and (now - waited) * 1000 > AUDIO_UNDERRUN_MS:
+                self.stats.underruns += 1
+            stdin = self.process.stdin
+            if stdin is None:
+                break
+            try:
+                stdin.write(data)
+                await stdin.drain()
+            except (BrokenPipeError, ConnectionResetError) as exe:
+                self._log_error(f"Audio sink closed: {exe}")
+                break
+            self.stats.frames_written += 1
+            self.stats.bytes_written += len(data)
+            self.stats.add_latency((time.monotonic() - queued_at) * 1000)
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {
+            "running": self.is_running(),
+            "attached": self.attached,
+            "buffered": self.buffer.qsize(),
+            "stats": self.stats.tojson(),
+        }
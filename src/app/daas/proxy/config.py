@@ -68,3 +68,62 @@ class ViewerConfig:
     """
     Use reconnect instead of reload where possible
     """
+
+    history_max_closed: int = 1000
+    """
+    Maximum number of closed connections kept in the registry history
+    """
+
+    history_retention_s: int = 86400
+    """
+    Maximum age of closed connections kept in the registry history in seconds
+    """
+
+    idle_timeout_s: int = 0
+    """
+    Closes sessions without user input after this many seconds (0 disables)
+    """
+
+    idle_hard_limit_s: int = 0
+    """
+    Closes sessions after this many seconds regardless of input (0 disables)
+    """
+
+    idle_keepalive_s: int = 5
+    """
+    Interval of idle checks and keepalive nops sent on silent sessions
+    """
+
+    idle_action: str = "close"
+    """
+    Action on expired sessions: `close` only closes the tunnel, `disconnect`
+    also removes the viewer connection, which requires a new connect by the
+    user. Both keep the instance running and free no capacity, the instance
+    is only reported as idle to the ressource limits. `stop` stops the
+    instance and frees its ressources.
+    """
+
+    record_path: str = ""
+    """
+    Folder to record proxied instruction streams to (empty disables)
+    """
+
+    workers: int = 0
+    """
+    Number of proxy worker processes owning guacd sockets (0 proxies in-process)
+    """
+
+    workers_socket_dir: str = "/tmp/daas-proxy"
+    """
+    Folder for the unix sockets of the proxy workers
+    """
+
+    workers_vnodes: int = 64
+    """
+    Virtual nodes per worker on the consistent hash ring
+    """
+
+    workers_stats_ms: int = 1000
+    """
+    Interval in which workers report session statistics
+    """
@@ -4,8 +4,7 @@ from __future__ import annotations
 
 import asyncio
 from datetime import datetime
-import subprocess
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import timedelta
 import functools
 from typing import Optional, Protocol, TypeAlias
@@ -14,8 +13,15 @@ from quart import Websocket
 from websockets import WebSocketClientProtocol
 from app.daas.common.enums import BackendName
 from app.daas.common.model import GuacamoleConnection, Instance
+from app.daas.proxy.audio_relay import AudioRelay
+from app.daas.proxy.recorder import (
+    DIRECTION_CLIENT,
+    DIRECTION_GUACD,
+    SessionRecorder,
+)
 from app.daas.proxy.streams import (
     GuacamoleSocketStream,
+    GuacamoleSocketWorker,
     GuacamoleSocketWs,
     GuacamoleSocket,
 )
@@ -30,8 +36,10 @@ from app.qweb.logging.logging import LogTarget, Loggable
 socket_tuples: dict[str, SocketTuple] = {}
 logger = Loggable(LogTarget.PROXY)
 GUACAMOLE_ENCODING = "utf-8"
-TIMEOUT_DELAY = 1.2
 COLLECT_STATS = True
+# clipboard sync and display resizes are sent by the client without user action
+OPCODES_USER_INPUT = frozenset(("key", "mouse", "touch"))
+STATUS_CLIENT_TIMEOUT = "776"
 OPCODE_INTERNAL = ""
 """
 Used by the Guacamole JavaScript client.
@@ -67,6 +75,17 @@ class ReconnectHandler(Protocol):
         """
 
 
+class IdleHandler(Protocol):
+    """An IdleHandler is invoked when a session is closed due to inactivity"""
+
+    async def on_idle(self, *, id_instance: str, connid: str, reason: str) -> None:
+        """
+        Reports a session closed by the idle engine.
+
+        The reason is either `idle` or `limit` for the hard session limit.
+        """
+
+
 class WebsocketStats:
     """Counts socket stats"""
 
@@ -179,6 +198,15 @@ class WebsocketStats:
             f"({self.bytes_per_second/1024 /1024:4.1f}MB/s),"
         )
 
+    @classmethod
+    def fromjson(cls, data: dict) -> WebsocketStats:
+        """Creates stats object from json"""
+        stats = cls()
+        for key, val in data.items():
+            if hasattr(stats, key):
+                setattr(stats, key, val)
+        return stats
+
     def tojson(self) -> dict:
         """Returns shorthand string"""
         return {
@@ -210,12 +238,20 @@ class SocketTuple:
     id: str
     id_instance: str
     id_owner: int
-    server_socket: GuacamoleSocketStream | WebSocketClientProtocol | subprocess.Popen
+    server_socket: (
+        GuacamoleSocketStream
+        | GuacamoleSocketWorker
+        | WebSocketClientProtocol
+        | AudioRelay
+    )
     client_socket: GuacamoleSocketWs | Websocket
     connection: GuacamoleConnection
     last_seen_guacd: datetime
     last_seen_client: datetime
     stats: WebsocketStats
+    last_input: datetime = field(default_factory=datetime.now)
+    created_at: datetime = field(default_factory=datetime.now)
+    closed_reason: str = ""
 
     def tojson(self):
         """Converts object to json"""
@@ -224,15 +260,25 @@ class SocketTuple:
             "id_instance": self.id_instance,
             "last_seen_guacd": self.last_seen_guacd,
             "last_seen_client": self.last_seen_client,
+            "last_input": self.last_input,
             "stats": self.stats.tojson(),
         }
 
 
-async def new_guacd_connection() -> GuacamoleSocketStream:
-    """Create a new connection to guacd."""
+async def new_guacd_connection(
+    key: str = "",
+) -> GuacamoleSocketStream | GuacamoleSocketWorker:
+    """
+    Create a new connection to guacd.
+
+    In worker mode the connection is owned by the proxy worker selected
+    by the key.
+    """
     from app.daas.proxy.proxy_registry import ProxyRegistry
 
     reg = await get_backend_component(BackendName.PROXY, ProxyRegistry)
+    if reg.workers is not None:
+        return await reg.workers.connect(key)
     connstring = reg.config.guacd
     host, port = connstring.split(":")  # no IPv6 support, lol
     guacd_reader, guacd_writer = await asyncio.open_connection(host, port)
@@ -246,6 +292,7 @@ async def proxy_guacamole_ws(
     connection: GuacamoleConnection,
     *,
     resize_handler: Optional[ResizeHandler],
+    idle_handler: Optional[IdleHandler] = None,
     # reconnect_handler: Optional[ReconnectHandler],
 ):
     """Create a Guacamole tunnel from the client WebSocket to guacd."""
@@ -257,7 +304,7 @@ async def proxy_guacamole_ws(
     client_conf = ClientConfiguration.from_params(client_ws.args)
     # __log_info(f" PROXY:   0 -> Connecting instance {client_conf} with client conf")
     client_socket = GuacamoleSocketWs(client_ws)
-    guacd_socket: GuacamoleSocketStream = await new_guacd_connection()
+    guacd_socket = await new_guacd_connection(str(connection.id))
     # __log_info(f" PROXY:   0 -> Create guacd-socket: {guacd_socket}")
 
     connid = await perform_guacd_handshake(
@@ -269,6 +316,8 @@ async def proxy_guacamole_ws(
     )
 
     if not connid:
+        if isinstance(guacd_socket, GuacamoleSocketWorker) and reg.workers:
+            await reg.workers.release(guacd_socket)
         return "connection failed", 500
 
     _log_info(f" PROXY:   0 -> Adding {connid}")
@@ -285,6 +334,14 @@ async def proxy_guacamole_ws(
     )
     reg.add_connection(info)
     socket_tuples[connid] = info
+    recorder = None
+    if reg.config.record_path != "" and reg.workers is None:
+        recorder = SessionRecorder(reg.config.record_path, connid)
+    if isinstance(guacd_socket, GuacamoleSocketWorker):
+        # statistics of the guacd stream are collected by the worker
+        guacd_socket.on_stats = lambda data: info.stats.add(
+            WebsocketStats.fromjson(data)
+        )
 
     # handshake with the client
     await client_socket.send(OPCODE_INTERNAL, connid)
@@ -292,94 +349,77 @@ async def proxy_guacamole_ws(
 
     async def forward_client_to_guacd() -> None:
         """Handle messages from the client."""
-
-        # select potential message handlers
-        middlewares = [
-            _handle_errors(client_socket=client_socket),
-            _handle_ping(client_socket=client_socket),
-            _handle_ignore_internal,
-        ]
-
-        if resize_handler:
-            middlewares.append(_handle_size_message(resize_handler=resize_handler))
-
-        handle_message = _assemble_middlewares(
-            *middlewares,
-            default=_forward_message(socket=guacd_socket),
+        handle_message = _client_message_handler(
+            client_socket, guacd_socket, info, resize_handler
         )
-
-        while True:
-            try:
-                this_tuple = socket_tuples[connid]
-                diff = abs(datetime.now() - this_tuple.last_seen_guacd)
-                if diff > timedelta(seconds=TIMEOUT_DELAY):
-                    _log_info(f"GUAC DIFF EXCEEDED: {diff}")
-                    # raise asyncio.CancelledError()  # must re-raise
-                opcode, *args = await client_socket.receive()
-                await handle_message(opcode, tuple(args))
-                if COLLECT_STATS is True:
-                    info.stats.add_opcode_guacd_to_client(opcode, args)
-                this_tuple.last_seen_client = datetime.now()
-                if opcode == "error":
-                    _log_info(f"Error raised on guacd loop -> {opcode} {args}")
-            except asyncio.CancelledError:
-                _log_info("Cancelled error on client_socket")
-                await guacd_socket.send("disconnect", "Error received", "599")
-                await guacd_socket.send("error", "Error received", "599")
-                task_guacd.cancel("client has disconnected")
-                task_client.cancel("client has disconnected")
-                reg.disconnect_connection(connid)
-                # if connid in socket_tuples:
-                #     __log_info(f"Removing {connid}")
-                #     socket_tuples.pop(connid)
-                raise asyncio.CancelledError()  # must re-raise
+        try:
+            await _pump_client_to_guacd(client_socket, handle_message, info, recorder)
+        except asyncio.CancelledError:
+            _log_info("Cancelled error on client_socket")
+            await guacd_socket.send("disconnect", "Error received", "599")
+            await guacd_socket.send("error", "Error received", "599")
+            task_guacd.cancel("client has disconnected")
+            task_client.cancel("client has disconnected")
+            reg.disconnect_connection(info.id_instance, info.id)
+            raise asyncio.CancelledError()  # must re-raise
 
     async def forward_guacd_to_client():
+        """Handle messages from the server."""
+        try:
+            await _pump_guacd_to_client(guacd_socket, client_socket, info, recorder)
+        except (asyncio.CancelledError, ValueError):
+            _log_info("Cancelled error on guacd_socket")
+            await client_socket.send("disconnect", "Error received", "599")
+            await client_socket.send("error", "Error received", "599")
+            task_guacd.cancel("server has disconnected")
+            task_client.cancel("server has disconnected")
+            reg.disconnect_connection(info.id_instance, info.id)
+            # path_arr = (await client_socket.get_path()).split("/")
+            # if reconnect_handler is not None and len(path_arr) == 4:
+            #     await reconnect_handler.on_reconnect(
+            #         id_instance=path_arr[2], token=path_arr[3]
+            #     )
+            raise asyncio.CancelledError()  # must re-raise
+
+    async def watch_idle_session():
         """
-        Handle messages from the server.
+        Sends keepalives and enforces idle and hard session limits.
 
-        In principle they could be forwarded without any parsing,
-        but the client might expect to always receive full messages.
-        This is in line with the Guacamole Java proxy.
+        A `nop` is only sent when guacd has been silent for a full keepalive
+        interval, so busy sessions do not receive any extra traffic.
         """
+        cfg = reg.config
+        interval = max(cfg.idle_keepalive_s, 1)
+        limit_idle = timedelta(seconds=cfg.idle_timeout_s)
+        limit_hard = timedelta(seconds=cfg.idle_hard_limit_s)
+        keepalive = timedelta(seconds=interval)
         while True:
-            try:
-                this_tuple = socket_tuples[connid]
-                diff = abs(datetime.now() - this_tuple.last_seen_guacd)
-                if diff > timedelta(seconds=TIMEOUT_DELAY):
-                    _log_info(f"GUAC DIFF EXCEEDED: {diff}")
-                    # raise asyncio.CancelledError()  # must re-raise
-                opcode, *args = await guacd_socket.receive()
-                if COLLECT_STATS is True:
-                    info.stats.add_opcode_client_to_guacd(opcode, args)
-                await client_socket.send(opcode, *args)
-                this_tuple.last_seen_guacd = datetime.now()
-                if opcode == "error":
-                    _log_info(f"Error raised on guacd loop -> {opcode} {args}")
-
-            except (asyncio.CancelledError, ValueError):
-                _log_info("Cancelled error on guacd_socket")
-                await client_socket.send("disconnect", "Error received", "599")
-                await client_socket.send("error", "Error received", "599")
-                task_guacd.cancel("server has disconnected")
-                task_client.cancel("server has disconnected")
-                reg.disconnect_connection(connid)
-                # if connid in socket_tuples:
-                #     __log_info(f"Removing {connid}")
-                #     socket_tuples.pop(connid)
-                #     reg.disconnect_connection(connid)
-                # path_arr = (await client_socket.get_path()).split("/")
-                # if reconnect_handler is not None and len(path_arr) == 4:
-                #     await reconnect_handler.on_reconnect(
-                #         id_instance=path_arr[2], token=path_arr[3]
-                #     )
-                # return
-                # __log_info(f" PROXY: Exception on receive : {exc}")
-                raise asyncio.CancelledError()  # must re-raise
-
-            # forward messages to client
-
-    if isinstance(guacd_socket, GuacamoleSocketStream):
+            await asyncio.sleep(interval)
+            now = datetime.now()
+            reason = ""
+            if cfg.idle_hard_limit_s > 0 and now - info.created_at >= limit_hard:
+                reason = "limit"
+            elif cfg.idle_timeout_s > 0 and now - info.last_input >= limit_idle:
+                reason = "idle"
+            if reason == "":
+                if now - info.last_seen_guacd >= keepalive:
+                    await client_socket.send("nop")
+                continue
+
+            _log_info(f" PROXY:   0 -> Closing {connid} ({reason})")
+            reg.expire_connection(info, reason)
+            await client_socket.send(
+                "error", f"Session {reason}", STATUS_CLIENT_TIMEOUT
+            )
+            task_client.cancel(f"session {reason}")
+            task_guacd.cancel(f"session {reason}")
+            if idle_handler is not None:
+                await idle_handler.on_idle(
+                    id_instance=info.id_instance, connid=connid, reason=reason
+                )
+            return
+
+    if isinstance(guacd_socket, (GuacamoleSocketStream, GuacamoleSocketWorker)):
         # global socket_tuples
         # global sockets_guacd
 
@@ -387,6 +427,7 @@ async def proxy_guacamole_ws(
 
         task_client = asyncio.create_task(forward_client_to_guacd())
         task_guacd = asyncio.create_task(forward_guacd_to_client())
+        task_idle = asyncio.create_task(watch_idle_session())
         # __log_queuesinfo(f" PROXY:  0 -> Create Tasks: {task_client} {task_guacd}")
         _log_info(f"Length sockelist: {len(socket_tuples)}")
         _log_info(f" PROXY:   0 -> Completed Guacamole connection connid={connid}")
@@ -394,7 +435,17 @@ async def proxy_guacamole_ws(
         if newinstance is not None:
             newinstance.connected_at = datetime.now()
             await dbase.update_instance(newinstance)
-        await asyncio.gather(task_client, task_guacd)
+        try:
+            await asyncio.gather(task_client, task_guacd)
+        finally:
+            # release the socket tuple even if neither loop reached its handler
+            if task_idle.done() is False:
+                task_idle.cancel("session closed")
+            if recorder is not None:
+                recorder.close(wait=False)
+            if isinstance(guacd_socket, GuacamoleSocketWorker) and reg.workers:
+                await reg.workers.release(guacd_socket)
+            reg.disconnect_connection(info.id_instance, connid)
 
 
 MessageHandler: TypeAlias = Callable[[str, tuple[str, ...]], Awaitable[None]]
@@ -404,6 +455,85 @@ Middleware: TypeAlias = Callable[
 ]
 
 
+def _client_message_handler(
+    client_socket: GuacamoleSocket,
+    guacd_socket: GuacamoleSocket,
+    info: SocketTuple,
+    resize_handler: Optional[ResizeHandler] = None,
+) -> MessageHandler:
+    """Assemble the middlewares handling messages from the client."""
+    middlewares = [
+        _handle_errors(client_socket=client_socket),
+        _handle_ping(client_socket=client_socket),
+        _handle_ignore_internal,
+        _handle_user_input(info=info),
+    ]
+    if resize_handler:
+        middlewares.append(_handle_size_message(resize_handler=resize_handler))
+    return _assemble_middlewares(
+        *middlewares,
+        default=_forward_message(socket=guacd_socket),
+    )
+
+
+async def _pump_client_to_guacd(
+    client_socket: GuacamoleSocket,
+    handle_message: MessageHandler,
+    info: SocketTuple,
+    recorder: Optional[SessionRecorder] = None,
+    count: int = -1,
+) -> None:
+    """
+    Pass client messages to the message handler.
+
+    Stops after `count` messages, a negative count forwards until cancelled.
+    """
+    while count != 0:
+        opcode, *args = await client_socket.receive()
+        if recorder is not None:
+            recorder.record(DIRECTION_CLIENT, opcode, tuple(args))
+        await handle_message(opcode, tuple(args))
+        if COLLECT_STATS is True:
+            info.stats.add_opcode_guacd_to_client(opcode, args)
+        info.last_seen_client = datetime.now()
+        if opcode == "error":
+            _log_info(f"Error raised on guacd loop -> {opcode} {args}")
+        count -= 1
+
+
+async def _pump_guacd_to_client(
+    guacd_socket: GuacamoleSocketStream | GuacamoleSocketWorker,
+    client_socket: GuacamoleSocket,
+    info: SocketTuple,
+    recorder: Optional[SessionRecorder] = None,
+    count: int = -1,
+) -> None:
+    """
+    Forward guacd messages to the client.
+
+    In principle they could be forwarded without any parsing,
+    but the client might expect to always receive full messages.
+    This is in line with the Guacamole Java proxy. Messages of a proxy
+    worker are already parsed and passed on unchanged.
+    """
+    while count != 0:
+        count -= 1
+        if isinstance(guacd_socket, GuacamoleSocketWorker):
+            message = await guacd_socket.receive_encoded()
+            await client_socket.send_encoded(message)
+            info.last_seen_guacd = datetime.now()
+            continue
+        opcode, *args = await guacd_socket.receive()
+        if recorder is not None:
+            recorder.record(DIRECTION_GUACD, opcode, tuple(args))
+        if COLLECT_STATS is True:
+            info.stats.add_opcode_client_to_guacd(opcode, args)
+        await client_socket.send(opcode, *args)
+        info.last_seen_guacd = datetime.now()
+        if opcode == "error":
+            _log_info(f"Error raised on guacd loop -> {opcode} {args}")
+
+
 async def _assert_must_have_handler(opcode: str, args: tuple[str, ...]) -> None:
     raise AssertionError(f"message must be handled, but got: {opcode} {args}")
 
@@ -467,6 +597,19 @@ async def _handle_ignore_internal(
     return await next_handler(opcode, args)
 
 
+def _handle_user_input(*, info: SocketTuple) -> Middleware:
+    """Track the time of the last user input for idle detection."""
+
+    async def inner_handle_user_input(
+        next_handler: MessageHandler, opcode: str, args: tuple[str, ...]
+    ) -> None:
+        if opcode in OPCODES_USER_INPUT:
+            info.last_input = datetime.now()
+        return await next_handler(opcode, args)
+
+    return inner_handle_user_input
+
+
 def _handle_size_message(*, resize_handler: ResizeHandler) -> Middleware:
     """Parse `size` messages and pass them to the `resize_handler`."""
 
@@ -1,14 +1,15 @@
 """Proxy extensions"""
 
-import subprocess
 import asyncio
-import websockets
+from typing import Optional
 from datetime import datetime
 from dataclasses import dataclass
 from quart import Websocket
+from websockets.asyncio.client import ClientConnection
 from app.daas.adapter.adapter_ssh import SshAdapter, SshAdapterConfig
 from app.daas.common.enums import BackendName
 from app.daas.container.docker.DockerRequest import DockerRequest
+from app.daas.proxy.audio_relay import AudioRelay
 from app.daas.proxy.proxy_registry import ProxyRegistry
 from app.plugins.platform.messaging.messaging_backend import MessagingBackend
 from app.qweb.common.qweb_tools import get_backend, get_backend_component, get_database
@@ -31,6 +32,8 @@ class ProxyExtensionsConfig:
     service_proto_printer: str
     service_container: str
     update_service_ip: bool
+    audio_buffer_frames: int = 32
+    audio_linger_s: int = 30
 
 
 class ProxyExtensions(Loggable):
@@ -40,6 +43,7 @@ class ProxyExtensions(Loggable):
         Loggable.__init__(self, LogTarget.PROXY)
         self.connected = False
         self.config = cfg
+        self.audio_relays: dict[str, AudioRelay] = {}
 
     def connect(self):
         """Connects the component"""
@@ -51,18 +55,30 @@ class ProxyExtensions(Loggable):
         self.connected = False
         return True
 
-    async def create_audio_socket(self, inst: InstanceObject) -> subprocess.Popen:
-        """creates socket for microphone stream"""
-        return subprocess.Popen(
-            [
-                "pacat",
-                f"--server={inst.host}:{self.config.service_port_audio}",
-                "--channels=1",
-                "--latency-msec=1",
-            ],
-            stdin=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-        )
+    async def create_audio_socket(
+        self, conid: str, inst: InstanceObject
+    ) -> AudioRelay:
+        """creates or reuses relay for microphone stream"""
+        for key, unused in list(self.audio_relays.items()):
+            if key != conid and unused.attached == 0 and not unused.is_running():
+                self.audio_relays.pop(key)
+        cmd = [
+            "pacat",
+            f"--server={inst.host}:{self.config.service_port_audio}",
+            "--channels=1",
+            "--latency-msec=1",
+        ]
+        relay: Optional[AudioRelay] = self.audio_relays.get(conid)
+        if relay is not None and relay.cmd != cmd:
+            await relay.stop()
+            relay = None
+        if relay is None:
+            relay = AudioRelay(
+                cmd, self.config.audio_buffer_frames, self.config.audio_linger_s
+            )
+            self.audio_relays[conid] = relay
+        await relay.attach()
+        return relay
 
     async def proxy_audio_socket(
         self,
@@ -70,44 +86,49 @@ class ProxyExtensions(Loggable):
         inst: InstanceObject,
         con: GuacamoleConnection,
         client_ws: Websocket,
-        audio_proc: subprocess.Popen,
+        audio_relay: AudioRelay,
     ):
         """Proxies incoming websocket data to instance microphone sink"""
         reg = await get_backend_component(BackendName.PROXY, ProxyRegistry)
         new_tuple = await self._create_socket_tuple(
-            conid, inst, con, audio_proc, client_ws
+            conid, inst, con, audio_relay, client_ws
         )
         reg.add_connection(new_tuple)
 
+        closed = False
         try:
-            while True:
-                await asyncio.sleep(0)
-                if audio_proc is not None and audio_proc.stdin:
-                    data = await asyncio.wait_for(client_ws.receive(), timeout=3.0)
-                    if isinstance(data, str):
-                        if data == "close":
-                            self._log_info("Closing audio connection")
-                            break
-                    else:
-                        audio_proc.stdin.write(data)
-                        audio_proc.stdin.flush()
+            while audio_relay.is_running():
+                data = await asyncio.wait_for(client_ws.receive(), timeout=3.0)
+                if isinstance(data, str):
+                    if data == "close":
+                        self._log_info("Closing audio connection")
+                        closed = True
+                        break
                 else:
-                    self._log_info("The pipe is not ready")
-            if audio_proc.stdin:
-                audio_proc.stdin.close()
-            audio_proc.terminate()
+                    audio_relay.push(data)
             self._log_info("Exit audio socket loop")
         except Exception as exe:
             self._log_info(f"error on audio pipe: {exe}")
+        audio_relay.detach()
+        if closed:
+            self.audio_relays.pop(conid, None)
+            await audio_relay.stop()
         reg.disconnect_connection(conid)
 
+    def get_audio_stats(self) -> dict[str, dict]:
+        """Returns collection of audio stream statistics"""
+        result = {}
+        for conid, relay in self.audio_relays.items():
+            result[conid] = relay.tojson()
+        return result
+
     async def proxy_printer_sockets(
         self,
         conid: str,
         inst: InstanceObject,
         con: GuacamoleConnection,
         client_ws: Websocket,
-        backend_ws: websockets.WebSocketClientProtocol,
+        backend_ws: ClientConnection,
     ):
         """Proxifies client_ws and backend_ws"""
         reg = await get_backend_component(BackendName.PROXY, ProxyRegistry)
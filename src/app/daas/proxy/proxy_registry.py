@@ -1,8 +1,92 @@
 """Proxy registry"""
 
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
 from typing import Optional
+import psutil
 from app.daas.proxy.config import ViewerConfig
-from app.daas.proxy.guacamole_proxy import SocketTuple, WebsocketStats
+from app.daas.proxy.guacamole_proxy import SocketTuple, WebsocketStats, socket_tuples
+from app.daas.proxy.proxy_workers import ProxyWorkerPool
+from app.qweb.common.metrics import METRICS
+
+PROXY_OPENED = METRICS.counter(
+    "daas_proxy_connections_opened_total", "Viewer connections opened"
+)
+PROXY_CLOSED = METRICS.counter(
+    "daas_proxy_connections_closed_total", "Viewer connections closed"
+)
+PROXY_EXPIRED = METRICS.counter(
+    "daas_proxy_connections_expired_total",
+    "Viewer connections closed by the idle engine",
+    ("reason",),
+)
+PROXY_ACTIVE = METRICS.gauge("daas_proxy_connections_active", "Open viewer connections")
+
+
+@dataclass
+class ClosedConnection:
+    """
+    Describes a closed connection kept in the registry history.
+
+    Only the metadata and statistics are retained, the sockets of the
+    original SocketTuple are released on disconnect.
+    """
+
+    id: str
+    id_instance: str
+    id_owner: int
+    last_seen_guacd: datetime
+    last_seen_client: datetime
+    closed_at: datetime
+    stats: WebsocketStats
+    created_at: datetime = field(default_factory=datetime.now)
+    reason: str = "closed"
+
+    @classmethod
+    def from_tuple(cls, info: SocketTuple) -> "ClosedConnection":
+        """Creates history entry from socket tuple"""
+        return cls(
+            info.id,
+            info.id_instance,
+            info.id_owner,
+            info.last_seen_guacd,
+            info.last_seen_client,
+            datetime.now(),
+            info.stats,
+            info.created_at,
+            info.closed_reason if info.closed_reason != "" else "closed",
+        )
+
+    def tojson(self):
+        """Converts object to json"""
+        return {
+            "id": self.id,
+            "id_instance": self.id_instance,
+            "last_seen_guacd": self.last_seen_guacd,
+            "last_seen_client": self.last_seen_client,
+            "created_at": self.created_at,
+            "closed_at": self.closed_at,
+            "reason": self.reason,
+            "stats": self.stats.tojson(),
+        }
+
+
+@dataclass
+class ConnectionRollup:
+    """Aggregated statistics of connections evicted from the history"""
+
+    evicted: int = 0
+    stats: WebsocketStats = field(default_factory=WebsocketStats)
+
+    def add(self, conn: ClosedConnection):
+        """Folds evicted connection into rollup"""
+        self.evicted += 1
+        self.stats.add(conn.stats)
+
+    def tojson(self):
+        """Converts object to json"""
+        return {"evicted": self.evicted, "stats": self.stats.tojson()}
 
 
 class ProxyRegistry:
@@ -14,16 +98,33 @@ class ProxyRegistry:
     ):
         self.config = cfg_proxy
         self.active_connections: dict[str, SocketTuple] = {}
-        self.closed_connections: dict[str, SocketTuple] = {}
+        self.closed_connections: OrderedDict[str, ClosedConnection] = OrderedDict()
+        self.closed_rollup = ConnectionRollup()
+        self.expired_connections: dict[str, int] = {"idle": 0, "limit": 0}
+        self.expired_seconds = 0.0
+        self.workers: Optional[ProxyWorkerPool] = None
         self.connected = False
+        PROXY_ACTIVE.labels().set_function(lambda: len(self.active_connections))
 
     def connect(self):
         """Connects the component"""
+        if self.config.workers > 0 and self.workers is None:
+            self.workers = ProxyWorkerPool(
+                self.config.guacd,
+                self.config.workers,
+                self.config.workers_socket_dir,
+                self.config.workers_vnodes,
+                self.config.workers_stats_ms,
+            )
+            self.workers.start()
         self.connected = True
         return self.connected
 
     def disconnect(self) -> bool:
         """Disconnects the component"""
+        if self.workers is not None:
+            self.workers.stop()
+            self.workers = None
         self.connected = False
         return True
 
@@ -33,6 +134,8 @@ class ProxyRegistry:
             old = self.active_connections[info.id_instance]
             info.stats.add(old.stats)
         self.active_connections[info.id_instance] = info
+        if METRICS.enabled:
+            PROXY_OPENED.labels().inc()
 
     def get_connection(self, connid: str) -> Optional[SocketTuple]:
         """Returns info object if available"""
@@ -50,18 +153,64 @@ class ProxyRegistry:
 
     def get_closed_connections(self, userid: int = 0) -> dict[str, dict]:
         """Returns all closed connections"""
+        self.evict_closed_connections()
         result = {}
         for connid, info in self.closed_connections.items():
             if userid in (0, info.id_owner):
                 result[connid] = info.tojson()
         return result
 
-    def disconnect_connection(self, id_instance: str):
-        """Removes connection"""
+    def disconnect_connection(self, id_instance: str, connid: str = ""):
+        """
+        Removes connection
+
+        If connid is specified, the connection is only removed when it is
+        still the active one for the instance, so a late disconnect of a
+        replaced connection does not close its successor.
+        """
+        if connid != "":
+            socket_tuples.pop(connid, None)
         info = self.get_connection(id_instance)
-        if info is not None:
-            self.closed_connections[id_instance] = info
-            self.active_connections.pop(id_instance)
+        if info is None or connid not in ("", info.id):
+            return
+        self.active_connections.pop(id_instance)
+        self.closed_connections.pop(id_instance, None)
+        self.closed_connections[id_instance] = ClosedConnection.from_tuple(info)
+        self.evict_closed_connections()
+        if METRICS.enabled:
+            PROXY_CLOSED.labels().inc()
+
+    def expire_connection(self, info: SocketTuple, reason: str):
+        """
+        Records connection closed by the idle engine
+
+        The reason is kept on the socket tuple, so the history entry created
+        on disconnect accounts the session as expired instead of closed.
+        """
+        info.closed_reason = reason
+        if reason not in self.expired_connections:
+            self.expired_connections[reason] = 0
+        self.expired_connections[reason] += 1
+        self.expired_seconds += (datetime.now() - info.created_at).total_seconds()
+        if METRICS.enabled:
+            PROXY_EXPIRED.labels(reason).inc()
+
+    def evict_closed_connections(self) -> int:
+        """Evicts closed connections exceeding count or age limits"""
+        evicted = 0
+        limit_count = max(self.config.history_max_closed, 0)
+        limit_ts = datetime.now().timestamp() - self.config.history_retention_s
+        while self.closed_connections:
+            _, oldest = next(iter(self.closed_connections.items()))
+            if (
+                len(self.closed_connections) <= limit_count
+                and oldest.closed_at.timestamp() >= limit_ts
+            ):
+                break
+            self.closed_connections.popitem(last=False)
+            self.closed_rollup.add(oldest)
+            evicted += 1
+        return evicted
 
     def get_stats_instance(self, id_instance: str) -> Optional[WebsocketStats]:
         """Get stats for specific instance"""
@@ -78,6 +227,7 @@ class ProxyRegistry:
 
     def get_stats_closed(self) -> dict[str, dict]:
         """Returns collection of statistic objects"""
+        self.evict_closed_connections()
         result = {}
         for connid, info in self.closed_connections.items():
             result[connid] = info.stats.tojson()
@@ -89,3 +239,26 @@ class ProxyRegistry:
         result.update(self.get_stats_active())
         result.update(self.get_stats_closed())
         return result
+
+    def get_stats_rollup(self) -> dict:
+        """Returns aggregated statistics of evicted and expired connections"""
+        result = self.closed_rollup.tojson()
+        result["expired"] = self.expired_connections.copy()
+        result["expired_seconds"] = self.expired_seconds
+        return result
+
+    def get_stats_workers(self) -> list[dict]:
+        """Returns sessions per proxy worker"""
+        if self.workers is None:
+            return []
+        return self.workers.tojson()
+
+    def get_stats_memory(self) -> dict[str, int]:
+        """Returns gauges describing the memory footprint of the registry"""
+        return {
+            "active_connections": len(self.active_connections),
+            "closed_connections": len(self.closed_connections),
+            "closed_evicted": self.closed_rollup.evicted,
+            "socket_tuples": len(socket_tuples),
+            "process_rss": psutil.Process().memory_info().rss,
+        }
@@ -0,0 +1,240 @@
+"""
+Proxy worker processes owning guacd sockets.
+
+In worker mode each Guacamole session is assigned to one of several
+worker processes by consistent hashing of its connection id. The worker
+connects to guacd, parses the guacd stream, collects the statistics and
+sends complete messages to the main process in frames, which are passed
+to the client WebSocket without parsing them again. Messages from the
+client are still handled by the middlewares of the main process and are
+written to guacd by the worker as is.
+"""
+
+import asyncio
+import bisect
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+from app.daas.proxy.guacamole_proxy import WebsocketStats
+from app.daas.proxy.streams import (
+    FRAME_HEADER,
+    FRAME_MESSAGE,
+    FRAME_STATS,
+    GuacamoleSocketStream,
+    GuacamoleSocketWorker,
+)
+from app.daas.proxy.syntax import format_message_b
+from app.qweb.logging.logging import LogTarget, Loggable
+
+WORKER_CONNECT_TIMEOUT = 10.0
+WORKER_FINISH_TIMEOUT = 2.0
+WORKER_CHUNK_SIZE = 64 * 1024
+
+
+class HashRing:
+    """Consistent hash ring mapping keys to worker indices"""
+
+    def __init__(self, nodes: int, vnodes: int):
+        self.ring = sorted(
+            (self._hash(f"{node}-{vnode}"), node)
+            for node in range(nodes)
+            for vnode in range(vnodes)
+        )
+        self.keys = [key for key, _ in self.ring]
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def get(self, key: str) -> int:
+        """Returns worker index for key"""
+        index = bisect.bisect(self.keys, self._hash(key)) % len(self.keys)
+        return self.ring[index][1]
+
+
+@dataclass
+class ProxyWorkerInfo:
+    """Describes a worker process as seen by the main process"""
+
+    index: int
+    path: str
+    process: Optional[multiprocessing.process.BaseProcess] = None
+    restarts: int = 0
+    sessions_active: int = 0
+    sessions_total: int = 0
+    starting: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {
+            "index": self.index,
+            "pid": self.process.pid if self.process is not None else None,
+            "alive": self.process is not None and self.process.is_alive(),
+            "restarts": self.restarts,
+            "sessions_active": self.sessions_active,
+            "sessions_total": self.sessions_total,
+        }
+
+
+class ProxyWorkerPool(Loggable):
+    """Starts proxy workers and assigns sessions to them"""
+
+    def __init__(
+        self, guacd: str, workers: int, socket_dir: str, vnodes: int, stats_ms: int
+    ):
+        Loggable.__init__(self, LogTarget.PROXY)
+        self.guacd = guacd
+        self.socket_dir = socket_dir
+        self.stats_ms = stats_ms
+        self.ring = HashRing(workers, vnodes)
+        self.workers = [
+            ProxyWorkerInfo(index, os.path.join(socket_dir, f"worker-{index}.sock"))
+            for index in range(workers)
+        ]
+        self.context = multiprocessing.get_context("spawn")
+
+    def start(self):
+        """Starts all worker processes"""
+        os.makedirs(self.socket_dir, exist_ok=True)
+        for worker in self.workers:
+            self._start_worker(worker)
+
+    def stop(self):
+        """Stops all worker processes"""
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.terminate()
+                worker.process.join(timeout=5)
+                worker.process = None
+
+    def _start_worker(self, worker: ProxyWorkerInfo):
+        if os.path.exists(worker.path):
+            os.unlink(worker.path)
+        worker.process = self.context.Process(
+            target=run_proxy_worker,
+            args=(worker.path, self.guacd, self.stats_ms),
+            name=f"daas-proxy-worker-{worker.index}",
+            daemon=True,
+        )
+        worker.process.start()
+        self._log_info(f"Started proxy worker {worker.index} ({worker.process.pid})")
+
+    async def connect(self, key: str) -> GuacamoleSocketWorker:
+        """Opens a session channel to the worker responsible for key"""
+        worker = self.workers[self.ring.get(key)]
+        async with worker.starting:
+            if worker.process is None or not worker.process.is_alive():
+                if worker.process is not None:
+                    worker.restarts += 1
+                # spawning a process takes a while, keep the loop responsive
+                await asyncio.to_thread(self._start_worker, worker)
+
+        deadline = time.monotonic() + WORKER_CONNECT_TIMEOUT
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(worker.path)
+                break
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.05)
+        worker.sessions_active += 1
+        worker.sessions_total += 1
+        return GuacamoleSocketWorker(
+            reader=reader, writer=writer, worker=worker.index
+        )
+
+    async def release(self, socket: GuacamoleSocketWorker):
+        """Closes session channel after receiving the final statistics"""
+        worker = self.workers[socket.worker]
+        worker.sessions_active = max(worker.sessions_active - 1, 0)
+        await socket.finish(WORKER_FINISH_TIMEOUT)
+
+    def tojson(self) -> list[dict]:
+        """Converts object to json"""
+        return [worker.tojson() for worker in self.workers]
+
+
+class ProxyWorker(Loggable):
+    """Serves Guacamole sessions of the main process within a worker"""
+
+    def __init__(self, path: str, guacd: str, stats_ms: int):
+        Loggable.__init__(self, LogTarget.PROXY)
+        self.path = path
+        self.guacd = guacd
+        self.stats_interval = stats_ms / 1000
+
+    async def serve(self):
+        """Serves sessions until terminated"""
+        server = await asyncio.start_unix_server(self._handle_session, self.path)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_session(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        host, port = self.guacd.split(":")
+        guacd_reader, guacd_writer = await asyncio.open_connection(host, port)
+        guacd_socket = GuacamoleSocketStream(reader=guacd_reader, writer=guacd_writer)
+
+        async def forward_main_to_guacd():
+            while data := await reader.read(WORKER_CHUNK_SIZE):
+                guacd_writer.write(data)
+                await guacd_writer.drain()
+
+        stats = WebsocketStats()
+
+        async def forward_guacd_to_main():
+            nonlocal stats
+            sent_at = time.monotonic()
+            while message := await guacd_socket.receive():
+                opcode, *args = message
+                stats.add_opcode_client_to_guacd(opcode, args)
+                self._write_frame(writer, FRAME_MESSAGE, format_message_b(*message))
+                if time.monotonic() - sent_at >= self.stats_interval:
+                    self._write_stats(writer, stats)
+                    stats = WebsocketStats()
+                    sent_at = time.monotonic()
+                await writer.drain()
+
+        tasks = [
+            asyncio.create_task(forward_main_to_guacd()),
+            asyncio.create_task(forward_guacd_to_main()),
+        ]
+        done, pending = await asyncio.wait(
+            tasks, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            if (exe := task.exception()) is not None:
+                self._log_info(f"Proxy worker session closed: {exe}")
+        guacd_writer.close()
+        # the main process waits for the statistics since the last report
+        try:
+            self._write_stats(writer, stats)
+            await writer.drain()
+        except (ConnectionError, RuntimeError):
+            pass
+        writer.close()
+
+    @classmethod
+    def _write_stats(cls, writer: asyncio.StreamWriter, stats: WebsocketStats):
+        payload = json.dumps(stats.tojson()).encode("utf-8")
+        cls._write_frame(writer, FRAME_STATS, payload)
+
+    @staticmethod
+    def _write_frame(writer: asyncio.StreamWriter, kind: bytes, payload: bytes):
+        writer.write(FRAME_HEADER.pack(kind, len(payload)))
+        writer.write(payload)
+
+
+def run_proxy_worker(path: str, guacd: str, stats_ms: int):
+    """Entrypoint of a worker process"""
+    asyncio.run(ProxyWorker(path, guacd, stats_ms).serve())
@@ -0,0 +1,110 @@
+"""
+Record and read Guacamole instruction streams.
+
+Each recorded instruction is stored as a Guacamole message itself,
+prefixed with its direction and the microseconds since the recording
+started:
+
+```
+direction "," timestamp "," opcode ("," arg)* ";"
+```
+
+This way the existing parser can read recordings without a separate
+format, and the gzip compression keeps the files compact. Compression
+and file writes happen in a writer thread, so recording does not block
+the event loop.
+"""
+
+import gzip
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from collections.abc import Iterator
+from typing import Optional
+from .syntax import IncrementalBinaryGuacamoleParser, format_message_b
+
+DIRECTION_CLIENT = "c"
+"""Instruction sent by the client to guacd."""
+
+DIRECTION_GUACD = "g"
+"""Instruction sent by guacd to the client."""
+
+RECORDING_SUFFIX = ".guacrec.gz"
+READ_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class RecordedInstruction:
+    """A single recorded instruction"""
+
+    direction: str
+    timestamp_us: int
+    message: tuple[str, ...]
+
+
+class SessionRecorder:
+    """Writes the instruction stream of a single proxy session."""
+
+    def __init__(self, folder: str, connid: str) -> None:
+        os.makedirs(folder, exist_ok=True)
+        self.path = os.path.join(folder, f"{connid}{RECORDING_SUFFIX}")
+        self.started_at = time.monotonic_ns()
+        self.instructions = 0
+        self.closed = False
+        self.__pending: queue.SimpleQueue[Optional[bytes]] = queue.SimpleQueue()
+        self.__file = gzip.open(self.path, mode="wb", compresslevel=1)
+        self.__writer = threading.Thread(
+            target=self.__write, name=f"recorder-{connid}"
+        )
+        self.__writer.start()
+
+    def record(self, direction: str, opcode: str, args: tuple[str, ...]) -> None:
+        """Appends instruction to the recording."""
+        if self.closed:
+            return
+        delta_us = (time.monotonic_ns() - self.started_at) // 1000
+        self.__pending.put(format_message_b(direction, str(delta_us), opcode, *args))
+        self.instructions += 1
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Flushes and closes the recording.
+
+        Without `wait` the writer thread finishes the pending instructions
+        in the background.
+        """
+        if not self.closed:
+            self.closed = True
+            self.__pending.put(None)
+        if wait:
+            self.__writer.join()
+
+    def __write(self) -> None:
+        finished = False
+        while not finished:
+            chunks = [self.__pending.get()]
+            while not self.__pending.empty():
+                chunks.append(self.__pending.get_nowait())
+            if chunks[-1] is None:
+                finished = True
+            self.__file.write(b"".join(chunk for chunk in chunks if chunk))
+        self.__file.close()
+
+
+def read_recording(path: str) -> Iterator[RecordedInstruction]:
+    """Reads all instructions of a recording in order."""
+    parser = IncrementalBinaryGuacamoleParser()
+    with gzip.open(path, mode="rb") as pointer:
+        while chunk := pointer.read(READ_CHUNK_SIZE):
+            parser.feed(chunk)
+            while message := parser.next_message():
+                yield _to_instruction(message)
+    while message := parser.next_message(final=True):
+        yield _to_instruction(message)
+
+
+def _to_instruction(message: tuple[str, ...]) -> RecordedInstruction:
+    direction, timestamp, *instruction = message
+    return RecordedInstruction(direction, int(timestamp), tuple(instruction))
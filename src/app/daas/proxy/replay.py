@@ -0,0 +1,263 @@
+"""
+Replay recorded Guacamole sessions through the proxy pipeline.
+
+Each replayed session runs the same parser, middlewares and forward
+loops as `proxy_guacamole_ws`, connected to a local fake guacd and a
+fake WebSocket. This allows measuring throughput and regressions without
+a live guacd or instance:
+
+```
+python3 -m app.daas.proxy.replay data/recordings/*.guacrec.gz -n 16
+```
+
+By default recordings are replayed as fast as possible to measure the
+throughput, so latencies include the queueing in front of the proxy.
+With `--realtime` the recorded pacing is kept and latencies reflect the
+delay added by the proxy pipeline.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from .guacamole_proxy import (
+    OPCODE_INTERNAL,
+    SocketTuple,
+    WebsocketStats,
+    _client_message_handler,
+    _pump_client_to_guacd,
+    _pump_guacd_to_client,
+)
+from .recorder import (
+    DIRECTION_CLIENT,
+    DIRECTION_GUACD,
+    RecordedInstruction,
+    read_recording,
+)
+from .streams import GuacamoleSocketStream, GuacamoleSocketWs
+from .syntax import (
+    IncrementalBinaryGuacamoleParser,
+    format_message,
+    format_message_b,
+)
+
+
+@dataclass
+class ReplayResult:
+    """Result of a replay run"""
+
+    sessions: int
+    instructions: int
+    duration_s: float
+    instructions_per_second: float
+    latency_p50_ms: float
+    latency_p99_ms: float
+    cpu_per_session_ms: float
+    latencies_ms: list[float] = field(default_factory=list, repr=False)
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        result = asdict(self)
+        result.pop("latencies_ms")
+        return result
+
+
+class FakeWebsocket:
+    """
+    Stand-in for `quart.Websocket` replaying recorded client messages.
+
+    Timestamps of sent messages are kept to measure the latency of
+    client to guacd instructions.
+    """
+
+    def __init__(self, messages: list[RecordedInstruction], realtime: bool):
+        self.path = "/wss/connect/replay/replay"
+        self.messages = deque(messages)
+        self.realtime = realtime
+        self.started_at = time.monotonic()
+        self.pending: deque[float] = deque()
+        self.received: deque[float] = deque()
+        self.remaining = 0
+        self.done = asyncio.Event()
+
+    async def receive(self) -> str:
+        """Returns next recorded client message"""
+        if not self.messages:
+            # all messages replayed, block until the session is torn down
+            await asyncio.Event().wait()
+        item = self.messages.popleft()
+        if self.realtime:
+            delay = item.timestamp_us / 1e6 - (time.monotonic() - self.started_at)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        self.pending.append(time.monotonic())
+        return format_message(*item.message)
+
+    async def send(self, data: str) -> None:
+        """Collects messages forwarded to the client"""
+        self.received.append(time.monotonic())
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self.done.set()
+
+
+class FakeGuacd:
+    """Local TCP server replaying recorded guacd messages."""
+
+    def __init__(self, messages: list[RecordedInstruction], realtime: bool):
+        self.messages = messages
+        self.realtime = realtime
+        self.sent: deque[float] = deque()
+        self.received = 0
+        self.latencies_ms: list[float] = []
+        self.server: asyncio.Server | None = None
+        self.client: FakeWebsocket | None = None
+        self.finished = asyncio.Event()
+
+    async def start(self) -> tuple[str, int]:
+        """Starts server on an ephemeral port"""
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return host, port
+
+    async def stop(self):
+        """Stops server"""
+        if self.server is not None:
+            self.server.close()
+            await self.finished.wait()
+            await self.server.wait_closed()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        task_read = asyncio.create_task(self._read_client(reader))
+        started_at = time.monotonic()
+        for item in self.messages:
+            if self.realtime:
+                delay = item.timestamp_us / 1e6 - (time.monotonic() - started_at)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self.sent.append(time.monotonic())
+            writer.write(format_message_b(*item.message))
+            await writer.drain()
+        await task_read
+        writer.close()
+        self.finished.set()
+
+    async def _read_client(self, reader: asyncio.StreamReader):
+        parser = IncrementalBinaryGuacamoleParser()
+        while raw := await reader.read(65536):
+            parser.feed(raw)
+            while parser.next_message() is not None:
+                self.received += 1
+                if self.client is not None and self.client.pending:
+                    sent_at = self.client.pending.popleft()
+                    self.latencies_ms.append((time.monotonic() - sent_at) * 1000)
+
+
+async def replay_session(
+    recording: list[RecordedInstruction], realtime: bool = False
+) -> tuple[int, list[float]]:
+    """Replays one session, returns the instruction count and latencies"""
+    from_client = [
+        item
+        for item in recording
+        if item.direction == DIRECTION_CLIENT and item.message[0] != OPCODE_INTERNAL
+    ]
+    from_guacd = [item for item in recording if item.direction == DIRECTION_GUACD]
+
+    guacd = FakeGuacd(from_guacd, realtime)
+    host, port = await guacd.start()
+    client_ws = FakeWebsocket(from_client, realtime)
+    client_ws.remaining = len(from_guacd)
+    guacd.client = client_ws
+    if client_ws.remaining == 0:
+        client_ws.done.set()
+
+    reader, writer = await asyncio.open_connection(host, port)
+    guacd_socket = GuacamoleSocketStream(reader=reader, writer=writer)
+    client_socket = GuacamoleSocketWs(client_ws)  # type: ignore[arg-type]
+    info = SocketTuple(
+        "replay",
+        "replay",
+        0,
+        guacd_socket,
+        client_socket,
+        None,  # type: ignore[arg-type]
+        datetime.now(),
+        datetime.now(),
+        WebsocketStats(),
+    )
+    handle_message = _client_message_handler(client_socket, guacd_socket, info)
+    await asyncio.gather(
+        _pump_client_to_guacd(
+            client_socket, handle_message, info, count=len(from_client)
+        ),
+        _pump_guacd_to_client(
+            guacd_socket, client_socket, info, count=len(from_guacd)
+        ),
+    )
+    await client_ws.done.wait()
+    writer.close()
+    await guacd.stop()
+
+    latencies = guacd.latencies_ms
+    for sent_at, received_at in zip(guacd.sent, client_ws.received):
+        latencies.append((received_at - sent_at) * 1000)
+    return len(from_client) + len(from_guacd), latencies
+
+
+async def replay(
+    paths: list[str], sessions: int, realtime: bool = False
+) -> ReplayResult:
+    """Replays recordings at the given concurrency"""
+    recordings = [list(read_recording(path)) for path in paths]
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    results = await asyncio.gather(
+        *[
+            replay_session(recordings[index % len(recordings)], realtime)
+            for index in range(sessions)
+        ]
+    )
+    duration = time.monotonic() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    instructions = sum(count for count, _ in results)
+    latencies = sorted(lat for _, lats in results for lat in lats)
+    p50 = p99 = 0.0
+    if len(latencies) > 1:
+        quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p99 = quantiles[49], quantiles[98]
+    elif latencies:
+        p50 = p99 = latencies[0]
+    return ReplayResult(
+        sessions,
+        instructions,
+        duration,
+        instructions / duration if duration > 0 else 0,
+        p50,
+        p99,
+        cpu * 1000 / max(sessions, 1),
+        latencies,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("recordings", nargs="+", help="recorded session files")
+    parser.add_argument("-n", "--sessions", type=int, default=1)
+    parser.add_argument(
+        "-r", "--realtime", action="store_true", help="keep recorded pacing"
+    )
+    args = parser.parse_args()
+    result = asyncio.run(replay(args.recordings, args.sessions, args.realtime))
+    print(json.dumps(result.tojson(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
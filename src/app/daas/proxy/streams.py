@@ -2,6 +2,9 @@
 
 import asyncio
 import abc
+import json
+import struct
+from collections.abc import Callable
 
 # import time
 
@@ -12,8 +15,18 @@ from .syntax import (
     IncrementalBinaryGuacamoleParser,
     format_message_b,
     format_message,
+    parse_one_message,
 )
 
+FRAME_HEADER = struct.Struct("!cI")
+"""Header of frames sent by proxy workers: type and payload length."""
+
+FRAME_MESSAGE = b"m"
+"""Frame containing one encoded Guacamole message."""
+
+FRAME_STATS = b"s"
+"""Frame containing a JSON encoded statistics delta."""
+
 
 class GuacamoleSocket(abc.ABC):
     """A GuacamoleSocket can send() and receive() Guacamole messages."""
@@ -30,6 +43,10 @@ class GuacamoleSocket(abc.ABC):
         """Immediately send a Guacamole message over the socket."""
         raise NotImplementedError()
 
+    async def send_encoded(self, message: str) -> None:
+        """Send an already encoded Guacamole message."""
+        raise NotImplementedError()
+
 
 class GuacamoleSocketWs(GuacamoleSocket):
     """GuacamoleSocket adapter for quart.Websocket."""
@@ -65,6 +82,10 @@ class GuacamoleSocketWs(GuacamoleSocket):
     async def send(self, opcode: str, *args: str) -> None:
         await self.__ws.send(format_message(opcode, *args))
 
+    async def send_encoded(self, message: str) -> None:
+        """Send an already encoded Guacamole message."""
+        await self.__ws.send(message)
+
 
 class GuacamoleSocketStream(GuacamoleSocket):
     """GuacamoleSocket implementation for asyncio streams."""
@@ -97,3 +118,68 @@ class GuacamoleSocketStream(GuacamoleSocket):
     async def send(self, opcode: str, *args: str) -> None:
         self.__writer.write(format_message_b(opcode, *args))
         await self.__writer.drain()  # proper backpressure
+
+
+class GuacamoleSocketWorker(GuacamoleSocket):
+    """
+    GuacamoleSocket adapter for a session owned by a proxy worker.
+
+    Messages to guacd are written as is and forwarded by the worker.
+    Messages from guacd arrive already parsed and framed by the worker,
+    so they can be passed to the client without parsing them again.
+    """
+
+    def __init__(
+        self,
+        *,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        worker: int,
+    ) -> None:
+        self.worker = worker
+        self.on_stats: Callable[[dict], None] | None = None
+        self.__reader = reader
+        self.__writer = writer
+
+    async def receive(self) -> tuple[str, ...]:
+        return parse_one_message(await self.receive_encoded())
+
+    async def receive_encoded(self) -> str:
+        """Receive the next encoded Guacamole message from the worker."""
+        while True:
+            try:
+                header = await self.__reader.readexactly(FRAME_HEADER.size)
+                kind, length = FRAME_HEADER.unpack(header)
+                payload = await self.__reader.readexactly(length)
+            except asyncio.IncompleteReadError as exe:
+                raise ValueError("proxy worker closed the session") from exe
+            if kind == FRAME_MESSAGE:
+                return payload.decode("utf-8")
+            if kind == FRAME_STATS and self.on_stats is not None:
+                self.on_stats(json.loads(payload))
+
+    async def send(self, opcode: str, *args: str) -> None:
+        self.__writer.write(format_message_b(opcode, *args))
+        await self.__writer.drain()
+
+    def close(self) -> None:
+        """Close the channel, which makes the worker close guacd as well."""
+        self.__writer.close()
+
+    async def finish(self, timeout: float) -> None:
+        """
+        Close the channel after the worker sent its final statistics.
+
+        The worker closes guacd on end of input and reports the statistics
+        collected since its last report, which are passed to `on_stats`.
+        """
+        try:
+            if self.__writer.can_write_eof():
+                self.__writer.write_eof()
+            async with asyncio.timeout(timeout):
+                while True:
+                    await self.receive_encoded()
+        except (ValueError, ConnectionError, TimeoutError):
+            pass
+        finally:
+            self.close()
@@ -0,0 +1,44 @@
+"""Test recording and replaying Guacamole sessions."""
+
+import asyncio
+
+from .recorder import (
+    DIRECTION_CLIENT,
+    DIRECTION_GUACD,
+    SessionRecorder,
+    read_recording,
+)
+from .replay import replay
+
+
+def _record_session(folder: str) -> str:
+    recorder = SessionRecorder(folder, "$session")
+    recorder.record(DIRECTION_GUACD, "size", ("0", "1024", "768"))
+    recorder.record(DIRECTION_CLIENT, "mouse", ("10", "20", "1"))
+    recorder.record(DIRECTION_CLIENT, "", ("ping", "1"))
+    recorder.record(DIRECTION_GUACD, "blob", ("1", "a,;b☃"))
+    recorder.record(DIRECTION_CLIENT, "key", ("65", "1"))
+    recorder.record(DIRECTION_GUACD, "sync", ("12345",))
+    recorder.close()
+    return recorder.path
+
+
+def test_recording_roundtrip(tmp_path):
+    """Recorded instructions are read back in order."""
+    path = _record_session(str(tmp_path))
+    recording = list(read_recording(path))
+    assert [item.direction for item in recording] == ["g", "c", "c", "g", "c", "g"]
+    assert recording[3].message == ("blob", "1", "a,;b☃")
+    assert recording[2].message == ("", "ping", "1")
+    timestamps = [item.timestamp_us for item in recording]
+    assert timestamps == sorted(timestamps)
+
+
+def test_replay_concurrent_sessions(tmp_path):
+    """Replaying forwards every non-internal instruction of each session."""
+    path = _record_session(str(tmp_path))
+    result = asyncio.run(replay([path], sessions=4))
+    assert result.sessions == 4
+    assert result.instructions == 4 * 5
+    assert len(result.latencies_ms) == 4 * 5
+    assert result.latency_p99_ms >= result.latency_p50_ms >= 0
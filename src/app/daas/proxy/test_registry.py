@@ -0,0 +1,68 @@
+"""Test accounting of expired sessions in the proxy registry."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from .config import ViewerConfig
+from .guacamole_proxy import SocketTuple, WebsocketStats, _handle_user_input
+from .proxy_registry import ProxyRegistry
+
+
+def _registry() -> ProxyRegistry:
+    return ProxyRegistry(
+        ViewerConfig(
+            guacd="localhost:4822",
+            viewer_protocol="https",
+            viewer_host="localhost",
+            viewer_port=443,
+            token_length=32,
+        )
+    )
+
+
+def _tuple(connid: str) -> SocketTuple:
+    now = datetime.now()
+    return SocketTuple(
+        connid, "inst", 1, None, None, None, now, now, WebsocketStats()  # type: ignore
+    )
+
+
+def test_expired_session_is_accounted_on_disconnect():
+    """An expired session lands in the history with its reason and duration."""
+    reg = _registry()
+    info = _tuple("conn")
+    info.created_at = datetime.now() - timedelta(seconds=30)
+    reg.add_connection(info)
+    reg.expire_connection(info, "idle")
+    reg.disconnect_connection(info.id_instance, info.id)
+    closed = reg.get_closed_connections()["inst"]
+    assert closed["reason"] == "idle"
+    rollup = reg.get_stats_rollup()
+    assert rollup["expired"]["idle"] == 1
+    assert rollup["expired_seconds"] >= 30
+
+
+def test_regular_disconnect_is_not_expired():
+    """Sessions closed by the client keep the default reason."""
+    reg = _registry()
+    info = _tuple("conn")
+    reg.add_connection(info)
+    reg.disconnect_connection(info.id_instance, info.id)
+    assert reg.get_closed_connections()["inst"]["reason"] == "closed"
+
+
+def test_resize_and_clipboard_are_not_user_input():
+    """Only keyboard, mouse and touch events reset the idle timer."""
+    info = _tuple("conn")
+    before = datetime.now() - timedelta(hours=1)
+    info.last_input = before
+
+    async def forward(opcode: str, args: tuple[str, ...]):
+        pass
+
+    handler = _handle_user_input(info=info)
+    for opcode in ("size", "clipboard", "sync"):
+        asyncio.run(handler(forward, opcode, ()))
+    assert info.last_input == before
+    asyncio.run(handler(forward, "mouse", ("1", "1", "0")))
+    assert info.last_input > before
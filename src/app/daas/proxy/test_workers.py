@@ -0,0 +1,45 @@
+"""Test sessions served by a proxy worker."""
+
+import asyncio
+import os
+import tempfile
+
+from .proxy_workers import ProxyWorker
+from .streams import GuacamoleSocketWorker
+from .syntax import format_message_b
+
+
+async def _session(messages: int) -> tuple[int, list[dict]]:
+    async def guacd(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        for index in range(messages):
+            writer.write(format_message_b("sync", str(index)))
+        await writer.drain()
+        await reader.read()
+        writer.close()
+
+    server = await asyncio.start_server(guacd, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    path = os.path.join(tempfile.mkdtemp(dir="/tmp"), "worker.sock")
+    # statistics are only reported periodically after an hour
+    worker = ProxyWorker(path, f"{host}:{port}", 3600 * 1000)
+    serving = await asyncio.start_unix_server(worker._handle_session, path)
+    reader, writer = await asyncio.open_unix_connection(path)
+    socket = GuacamoleSocketWorker(reader=reader, writer=writer, worker=0)
+    reports: list[dict] = []
+    socket.on_stats = reports.append
+    received = 0
+    for _ in range(messages):
+        await socket.receive_encoded()
+        received += 1
+    await socket.finish(2.0)
+    serving.close()
+    server.close()
+    return received, reports
+
+
+def test_final_statistics_are_flushed_on_close():
+    """Statistics collected since the last report arrive when closing."""
+    received, reports = asyncio.run(_session(5))
+    assert received == 5
+    assert len(reports) == 1
+    assert reports[0]["total_opcodes"] == 5
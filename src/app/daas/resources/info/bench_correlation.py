@@ -0,0 +1,171 @@
+"""
+Benchmark correlation of backend objects with their database records.
+
+Simulates proxmox and docker backends and a database answering every
+query after a fixed latency. Each size compares the former per-object
+lookups with a single batched correlation pass:
+
+```
+python3 -m app.daas.resources.info.bench_correlation -s 10 100 1000 5000 -q 1
+```
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from app.daas.resources.info.correlation import ObjectCorrelation
+
+
+class BackendStandIn:
+    """Returns a fixed number of vms, containers and images"""
+
+    def __init__(self, count: int):
+        self.vms = [
+            SimpleNamespace(id_object=str(100 + index), name=f"vm-{index}")
+            for index in range(count)
+        ]
+        self.containers = [
+            SimpleNamespace(id_object=f"c{index}", name=f"cont-{index}")
+            for index in range(count)
+        ]
+        self.images = [
+            SimpleNamespace(id_object=f"i{index}", name=f"img-{index}")
+            for index in range(count)
+        ]
+
+    async def enumerate_vms(self, _):
+        """Returns all vms"""
+        return self.vms
+
+    async def enumerate_container(self, _):
+        """Returns all containers"""
+        return self.containers
+
+    async def enumerate_images(self, _, __):
+        """Returns all images"""
+        return self.images
+
+
+class DatabaseStandIn:
+    """Answers single and batched lookups after a fixed latency"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.queries = 0
+
+    async def __query(self, result):
+        self.queries += 1
+        await asyncio.sleep(self.latency)
+        return result
+
+    async def get_daas_object_by_proxmox_id(self, vmid: str):
+        """Single lookup by proxmox id"""
+        return await self.__query(SimpleNamespace(id=vmid, id_proxmox=int(vmid)))
+
+    async def get_daas_object_by_docker_id(self, name: str):
+        """Single lookup by docker id, only images are known"""
+        found = name.startswith("img-")
+        return await self.__query(SimpleNamespace(id=name) if found else None)
+
+    async def get_environment_by_backend_id(self, name: str):
+        """Single lookup of an environment"""
+        return await self.__query(SimpleNamespace(id_object=f"obj-{name}"))
+
+    async def get_daas_object(self, objid: str):
+        """Single lookup by object id"""
+        return await self.__query(SimpleNamespace(id=objid))
+
+    async def get_daas_objects_by_proxmox_ids(self, ids: list[int]):
+        """Batched lookup by proxmox ids"""
+        return await self.__query(
+            [SimpleNamespace(id=str(x), id_proxmox=x) for x in ids]
+        )
+
+    async def get_daas_objects_by_docker_ids(self, ids: list[str]):
+        """Batched lookup by docker ids"""
+        return await self.__query(
+            [SimpleNamespace(id=x, id_docker=x) for x in ids if x.startswith("img-")]
+        )
+
+    async def get_environments_by_backend_ids(self, ids: list[str]):
+        """Batched lookup of environments"""
+        return await self.__query(
+            [SimpleNamespace(id_backend=x, id_object=f"obj-{x}") for x in ids]
+        )
+
+    async def get_daas_objects_by_ids(self, ids: list[str]):
+        """Batched lookup by object ids"""
+        return await self.__query([SimpleNamespace(id=x) for x in ids])
+
+
+async def legacy_pass(backend: BackendStandIn, dbase: DatabaseStandIn) -> int:
+    """Resolves every object with its own queries like before"""
+    matched = 0
+    for vm in await backend.enumerate_vms(False):
+        if await dbase.get_daas_object_by_proxmox_id(str(vm.id_object)):
+            matched += 1
+    for img in await backend.enumerate_images([], False):
+        if await dbase.get_daas_object_by_docker_id(img.name):
+            matched += 1
+    for cont in await backend.enumerate_container(False):
+        obj = await dbase.get_daas_object_by_docker_id(cont.name)
+        if obj is None:
+            env = await dbase.get_environment_by_backend_id(cont.name)
+            if env is not None:
+                obj = await dbase.get_daas_object(env.id_object)
+        if obj is not None:
+            matched += 1
+    return matched
+
+
+async def batched_pass(backend: BackendStandIn, dbase: DatabaseStandIn) -> int:
+    """Resolves all objects with a single correlation pass"""
+    correlation = ObjectCorrelation(backend, dbase, 0)  # type: ignore
+    corr = await correlation.get(False)
+    matched = sum(1 for vm in corr.vms if corr.get_vm_object(vm))
+    matched += sum(1 for img in corr.images if corr.get_image_object(img))
+    matched += sum(1 for cont in corr.containers if corr.get_container_object(cont))
+    return matched
+
+
+async def bench_size(size: int, latency: float, legacy_max: int) -> dict:
+    """Runs both strategies against backends of the given size"""
+    backend = BackendStandIn(size)
+    result: dict = {"objects": size * 3}
+    strategies = {"batched": batched_pass}
+    if size <= legacy_max:
+        strategies["legacy"] = legacy_pass
+    for name, strategy in strategies.items():
+        dbase = DatabaseStandIn(latency)
+        started = time.perf_counter()
+        matched = await strategy(backend, dbase)
+        result[name] = {
+            "queries": dbase.queries,
+            "matched": matched,
+            "wall_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "-s", "--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000]
+    )
+    parser.add_argument("-q", "--query-ms", type=float, default=1.0)
+    parser.add_argument("-l", "--legacy-max", type=int, default=1000)
+    args = parser.parse_args()
+
+    async def run() -> list[dict]:
+        return [
+            await bench_size(size, args.query_ms / 1000, args.legacy_max)
+            for size in args.sizes
+        ]
+
+    print(json.dumps(asyncio.run(run()), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,13 +10,14 @@ from app.daas.common.enums import BackendName
 from app.daas.common.model import (
     Application,
     DaasObject,
+    Environment,
     File,
     GuacamoleConnection,
-    Instance,
 )
 from app.daas.db.database import Database
+from app.daas.messaging.qmsg.hub_backend import QHubBackend
 from app.daas.objects.object_instance import InstanceObject
-from app.daas.resources.info.objectinfo import Objectinfo
+from app.daas.resources.info.objectinfo import summarize_object_ressources
 from app.daas.resources.limits.ressource_limits import RessourceLimits
 from app.qweb.common.qweb_tools import get_backend_component
 from app.qweb.logging.logging import LogTarget, Loggable
@@ -83,6 +84,7 @@ class DashboardInstanceObject:
     created_at: datetime
     booted_at: datetime
     connected_at: datetime
+    online: bool = False
 
 
 @dataclass
@@ -132,6 +134,18 @@ class DashboardInfo:
     utilized_ressources: dict
 
 
+@dataclass
+class DashboardData:
+    """Rows required to assemble the dashboard of a single user"""
+
+    objects: list[DaasObject]
+    environments: list[Environment]
+    instances: list[InstanceObject]
+    connections: list[GuacamoleConnection]
+    files: list[File]
+    applications: list[Application]
+
+
 # pylint: disable=too-few-public-methods
 class DashboardInfoStore(Loggable):
     """Sysinfo object to provide DashboardInfo"""
@@ -144,15 +158,32 @@ class DashboardInfoStore(Loggable):
         await self.dbase.connect()
         self._log_info("DashboardInfo initialized")
 
-    # pylint: disable=too-many-locals,import-outside-toplevel
+    async def read_dashboard_data(self, userid: int) -> DashboardData:
+        """
+        Reads all dashboard rows of a user with a fixed number of queries
+
+        Environments and connections are fetched by id lists and instances
+        come with their objects and environments preloaded, so the number
+        of queries does not grow with the number of objects.
+        """
+        objects = [
+            obj
+            for obj in await self.dbase.get_daas_objects_available(userid)
+            if obj is not None
+        ]
+        envs = await self.dbase.get_environments_by_objects([x.id for x in objects])
+        insts = await self.dbase.get_instances_by_owner(userid)
+        con_ids = [x.id_con for x in insts if x.id_con is not None]
+        cons = await self.dbase.get_guacamole_connections(con_ids)
+        files = await self.dbase.get_all_files(userid)
+        apps = await self.dbase.get_all_applications(userid)
+        return DashboardData(objects, envs, insts, cons, files, apps)
+
     async def get_dashboard_info(self, userid: int) -> DashboardInfo:
         """Dashboard info"""
         limits = await get_backend_component(BackendName.LIMITS, RessourceLimits)
+        data = await self.read_dashboard_data(userid)
 
-        # Object list
-        user_objects: list[DaasObject] = await self.dbase.get_daas_objects_available(
-            userid
-        )
         objlist = [
             DashboardUserObject(
                 x.id,
@@ -164,43 +195,9 @@ class DashboardInfoStore(Loggable):
                 x.object_mode,
                 x.object_mode_extended,
             )
-            for x in user_objects
+            for x in data.objects
         ]
-
-        envlist: list[DashboardEnvironmentObject] = []
-        for obj in user_objects:
-            envs = await self.dbase.get_environments_by_object(obj.id)
-            for env in envs:
-                # obj = await dbase.get_daas_object(env.id_object)
-                if obj is not None:
-
-                    apps = {}
-                    for app in env.env_apps:
-                        name = app["name"]
-                        apps[name] = app
-                    tasks = {}
-                    for task in env.env_tasks:
-                        name = task["cmd"]
-                        tasks[name] = task
-
-                    envlist.append(
-                        DashboardEnvironmentObject(
-                            env.id,
-                            env.id_object,
-                            obj.id_owner,
-                            env.name,
-                            obj.id_user,
-                            obj.os_type,
-                            env.state,
-                            apps,
-                            tasks,
-                            env.env_target,
-                            f"{env.created_at}",
-                        )
-                    )
-
-        # Files
-        all_files: list[File] = await self.dbase.get_all_files(userid)
+        envlist = self.__create_environments(data)
         filelist = [
             DashboardFileObject(
                 file.id,
@@ -213,10 +210,8 @@ class DashboardInfoStore(Loggable):
                 file.filesize,
                 file.created_at,
             )
-            for file in all_files
+            for file in data.files
         ]
-        # Apps
-        all_apps: list[Application] = await self.dbase.get_all_applications(userid)
         applist = [
             DashboardApplicationObject(
                 app.id,
@@ -229,15 +224,63 @@ class DashboardInfoStore(Loggable):
                 app.version,
                 app.installer_type,
             )
-            for app in all_apps
+            for app in data.applications
         ]
+        instlist = await self.__create_instances(data, userid)
+        conlist = self.__create_connections(data, instlist)
 
-        # Instance List
-        all_insts: list[InstanceObject] = await self.dbase.get_instances_by_owner(
-            userid
+        owned = [obj for obj in data.objects if obj.id_owner == userid]
+        utilized = summarize_object_ressources(owned, data.instances)
+        limit = await limits.get_user_limit(userid)
+        dict_limit = {}
+        if limit is not None:
+            dict_limit = asdict(limit)
+        # Create info
+        info = DashboardInfo(
+            [asdict(x) for x in objlist],
+            [asdict(x) for x in envlist],
+            [asdict(x) for x in instlist],
+            [asdict(x) for x in applist],
+            [asdict(x) for x in filelist],
+            [asdict(x) for x in conlist],
+            dict_limit,
+            asdict(utilized),
         )
+        return info
+
+    def __create_environments(
+        self, data: DashboardData
+    ) -> list[DashboardEnvironmentObject]:
+        objects = {obj.id: obj for obj in data.objects}
+        envlist: list[DashboardEnvironmentObject] = []
+        for env in data.environments:
+            obj = objects.get(env.id_object)
+            if obj is None:
+                continue
+            apps = {app["name"]: app for app in env.env_apps}
+            tasks = {task["cmd"]: task for task in env.env_tasks}
+            envlist.append(
+                DashboardEnvironmentObject(
+                    env.id,
+                    env.id_object,
+                    obj.id_owner,
+                    env.name,
+                    obj.id_user,
+                    obj.os_type,
+                    env.state,
+                    apps,
+                    tasks,
+                    env.env_target,
+                    f"{env.created_at}",
+                )
+            )
+        return envlist
+
+    async def __create_instances(
+        self, data: DashboardData, userid: int
+    ) -> list[DashboardInstanceObject]:
         instlist: list[DashboardInstanceObject] = []
-        for inst in all_insts:
+        for inst in data.instances:
             if inst.app.id_owner in (0, userid):
                 envname = ""
                 if inst.env is not None:
@@ -259,44 +302,35 @@ class DashboardInfoStore(Loggable):
                     )
                 )
 
-        # Connections
-        conlist = []
+        hosts = {inst.id: inst.host for inst in data.instances}
+        hub = await get_backend_component(BackendName.MESSAGING, QHubBackend)
+        online = hub.heartbeat_receiver.get_online_states(list(hosts.values()))
         for inst_info in instlist:
-            if inst_info.id_con is not None:
-                con = await self.dbase.get_guacamole_connection(inst_info.id_con)
-                if con is not None and isinstance(con, GuacamoleConnection):
-                    inst = await self.dbase.get_instance_by_id(inst_info.id_instance)
-                    if inst is not None and isinstance(inst, Instance):
-                        conlist.append(
-                            DashboardConnectionObject(
-                                inst.id,
-                                con.viewer_url,
-                                con.protocol,
-                                inst.app.viewer_resolution,
-                                inst.app.viewer_resize,
-                                inst.app.viewer_scale,
-                                inst.app.viewer_dpi,
-                                inst.app.viewer_colors,
-                                inst.app.viewer_force_lossless,
-                            )
-                        )
-
-        infotool = Objectinfo()
-        await infotool.initialize()
-        utilized = await infotool.get_objectinfo_user(userid)
-        limit = await limits.get_user_limit(userid)
-        dict_limit = {}
-        if limit is not None:
-            dict_limit = asdict(limit)
-        # Create info
-        info = DashboardInfo(
-            [asdict(x) for x in objlist],
-            [asdict(x) for x in envlist],
-            [asdict(x) for x in instlist],
-            [asdict(x) for x in applist],
-            [asdict(x) for x in filelist],
-            [asdict(x) for x in conlist],
-            dict_limit,
-            asdict(utilized),
-        )
-        return info
+            inst_info.online = online.get(hosts[inst_info.id_instance], False)
+        return instlist
+
+    def __create_connections(
+        self, data: DashboardData, instlist: list[DashboardInstanceObject]
+    ) -> list[DashboardConnectionObject]:
+        cons = {con.id: con for con in data.connections}
+        insts = {inst.id: inst for inst in data.instances}
+        conlist: list[DashboardConnectionObject] = []
+        for inst_info in instlist:
+            if inst_info.id_con is None or inst_info.id_con not in cons:
+                continue
+            con = cons[inst_info.id_con]
+            app = insts[inst_info.id_instance].app
+            conlist.append(
+                DashboardConnectionObject(
+                    inst_info.id_instance,
+                    con.viewer_url,
+                    con.protocol,
+                    app.viewer_resolution,
+                    app.viewer_resize,
+                    app.viewer_scale,
+                    app.viewer_dpi,
+                    app.viewer_colors,
+                    app.viewer_force_lossless,
+                )
+            )
+        return conlist
@@ -10,3 +10,4 @@ class SysteminfoConfig:
     known_daas_vms: list
     excluded_object_properties: list
     system_object_owner: int
+    correlation_ttl: float = 5.0
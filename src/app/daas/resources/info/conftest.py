@@ -0,0 +1,55 @@
+"""Shared fixtures for tests reading an in-memory database."""
+
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import StaticPool
+
+from app.daas.db.db_api import DatabaseApi
+from app.daas.db.db_model import JsonType, ORMEntity
+
+
+def _row(cls, **values):
+    for column in cls.__table__.columns:
+        if column.name in values or column.nullable:
+            continue
+        if isinstance(column.type, JsonType):
+            values[column.name] = []
+        elif column.type.python_type is int:
+            values[column.name] = 0
+        else:
+            values[column.name] = ""
+    return cls(**values)
+
+
+@pytest.fixture(name="sqlite_db")
+def fixture_sqlite_db():
+    """
+    Connected in-memory database recording executed statements
+
+    Provides the api, a dbman to assign to a Database, a row factory
+    filling required columns and the statements as (sql, parameters).
+    """
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    ORMEntity.metadata.create_all(engine)
+    statements: list[tuple] = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda *args: statements.append((args[2], args[3])),
+    )
+    api = DatabaseApi(engine, ORMEntity.metadata)
+    api.connect()
+    yield SimpleNamespace(
+        api=api,
+        dbman=SimpleNamespace(connected=True, api=api),
+        row=_row,
+        statements=statements,
+    )
+    api.disconnect()
+    engine.dispose()
@@ -0,0 +1,152 @@
+"""
+Correlation of backend objects with their database records
+
+Proxmox vms, docker containers and docker images are enumerated once per
+pass and matched with their database records by a single IN-list query
+per lookup column, so a pass issues the same number of queries for ten
+or thousands of objects. The merged view is cached for a short time and
+shared by all callers, concurrent callers share a running pass.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+from app.daas.common.model import DaasObject
+from app.daas.db.database import Database
+from app.daas.resources.info.objectstats import (
+    ObjectStats,
+    SystemInfoDockerContainer,
+    SystemInfoDockerImage,
+    SystemInfoProxmoxMachine,
+)
+from app.qweb.logging.logging import LogTarget, Loggable
+
+
+@dataclass
+class CorrelatedObjects:
+    """Backend objects of a single pass together with their db records"""
+
+    vms: list[SystemInfoProxmoxMachine]
+    containers: list[SystemInfoDockerContainer]
+    images: list[SystemInfoDockerImage]
+    by_proxmox_id: dict[str, DaasObject]
+    by_docker_id: dict[str, DaasObject]
+    by_backend_id: dict[str, DaasObject]
+    created_at: float
+    failed: list[str] = field(default_factory=list)
+
+    def get_vm_object(self, vm: SystemInfoProxmoxMachine) -> Optional[DaasObject]:
+        """Returns db object of a vm"""
+        return self.by_proxmox_id.get(str(vm.id_object))
+
+    def get_image_object(self, image: SystemInfoDockerImage) -> Optional[DaasObject]:
+        """Returns db object of an image"""
+        return self.by_docker_id.get(image.name)
+
+    def get_container_object(
+        self, container: SystemInfoDockerContainer
+    ) -> Optional[DaasObject]:
+        """Returns db object of a container, directly or by its environment"""
+        obj = self.by_docker_id.get(container.name)
+        if obj is None:
+            obj = self.by_backend_id.get(container.name)
+        return obj
+
+
+def _index(items: list[Any], key: Callable[[Any], str]) -> dict[str, Any]:
+    """Indexes items by key, keeping the first item of every key"""
+    result: dict[str, Any] = {}
+    for item in items:
+        result.setdefault(key(item), item)
+    return result
+
+
+class ObjectCorrelation(Loggable):
+    """Enumerates backend objects and resolves their db records in batches"""
+
+    def __init__(self, objtool: ObjectStats, dbase: Database, ttl: float):
+        Loggable.__init__(self, LogTarget.SYS)
+        self.objtool = objtool
+        self.dbase = dbase
+        self.ttl = ttl
+        self.cache: dict[bool, CorrelatedObjects] = {}
+        self.pending: dict[bool, asyncio.Future] = {}
+        self.generation = 0
+        self.passes = 0
+
+    async def get(self, detailed: bool = False) -> CorrelatedObjects:
+        """Returns the cached view or runs a new pass"""
+        cached = self.cache.get(detailed)
+        if cached is not None and time.monotonic() - cached.created_at < self.ttl:
+            return cached
+        future = self.pending.get(detailed)
+        if future is None:
+            future = asyncio.ensure_future(self.__correlate(detailed))
+            self.pending[detailed] = future
+            future.add_done_callback(lambda _: self.pending.pop(detailed, None))
+        return await asyncio.shield(future)
+
+    def invalidate(self):
+        """Drops cached views, the next caller runs a new pass"""
+        self.generation += 1
+        self.cache.clear()
+
+    async def __correlate(self, detailed: bool) -> CorrelatedObjects:
+        generation = self.generation
+        failed: list[str] = []
+        vms, containers = await asyncio.gather(
+            self.__enumerate("vm", self.objtool.enumerate_vms(detailed), failed),
+            self.__enumerate(
+                "container", self.objtool.enumerate_container(detailed), failed
+            ),
+        )
+        images = await self.__enumerate(
+            "image", self.objtool.enumerate_images(containers, detailed), failed
+        )
+
+        vmids = {str(vm.id_object) for vm in vms}
+        objs = await self.dbase.get_daas_objects_by_proxmox_ids(
+            sorted(int(vmid) for vmid in vmids if vmid.isdigit())
+        )
+        by_proxmox_id = _index(objs, lambda obj: str(obj.id_proxmox))
+
+        names = {cont.name for cont in containers} | {img.name for img in images}
+        objs = await self.dbase.get_daas_objects_by_docker_ids(sorted(names))
+        by_docker_id = _index(objs, lambda obj: obj.id_docker)
+
+        unmatched = {x.name for x in containers if x.name not in by_docker_id}
+        envs = await self.dbase.get_environments_by_backend_ids(sorted(unmatched))
+        objs = await self.dbase.get_daas_objects_by_ids(
+            sorted({env.id_object for env in envs})
+        )
+        env_objects = _index(objs, lambda obj: obj.id)
+        by_backend_id = {
+            env.id_backend: env_objects[env.id_object]
+            for env in reversed(envs)
+            if env.id_object in env_objects
+        }
+
+        result = CorrelatedObjects(
+            vms,
+            containers,
+            images,
+            by_proxmox_id,
+            by_docker_id,
+            by_backend_id,
+            time.monotonic(),
+            failed,
+        )
+        # a pass invalidated while running is returned but not cached
+        if generation == self.generation:
+            self.cache[detailed] = result
+        self.passes += 1
+        return result
+
+    async def __enumerate(self, kind: str, coro, failed: list[str]) -> list:
+        try:
+            return await coro
+        except (TypeError, ValueError) as exe:
+            self._log_error(f"Backend not available for enumeration: {exe}")
+            failed.append(kind)
+            return []
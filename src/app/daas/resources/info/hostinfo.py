@@ -2,16 +2,21 @@
 Host information
 """
 
+import asyncio
 import subprocess
+import time
 from dataclasses import dataclass
+from functools import partial
 import os
 import logging
 from typing import Optional
 import psutil
 
 from app.daas.common.enums import BackendName
+from app.daas.resources.info.hostsampler import HostSampler, HostSamplerConfig
 from app.daas.storage.cephstore import Cephstore
 from app.daas.storage.filestore import Filestore
+from app.daas.storage.local.fs_usage import DirectoryUsage
 from app.daas.vm.proxmox.ProxmoxApi import ApiProxmox
 from app.plugins.platform.vm.vm_backend import VmBackend
 from app.plugins.storage.ceph.ceph_backend import CephBackend
@@ -36,6 +41,7 @@ class HostRessources:
     utilized_disk_space_ceph: int
     utilized_disk_space_iso: int
     utilized_disk_space_images: int
+    sampled_at: float = 0.0
 
 
 # pylint:disable=too-many-instance-attributes
@@ -51,22 +57,75 @@ class PathSize:
     partition_size: int
     partition_used: int
     partition_free: int
+    sampled_at: float = 0.0
+
+
+METRIC_CPU = "cpu"
+METRIC_MEMORY = "memory"
+METRIC_PARTITION = "partition"
+METRIC_USAGE = "usage"
 
 
 class Hostinfo:
     """
     Keeps track of available host ressources
+
+    With a sampler config, metrics are refreshed in the background and
+    requests return the latest samples instead of reading the host.
     """
 
-    def __init__(self):
+    def __init__(self, config: Optional[HostSamplerConfig] = None):
         self.logger = logging.getLogger("daas.backend")
+        self.sampler: Optional[HostSampler] = None
+        if config is not None and config.enabled:
+            self.sampler = HostSampler(config)
+
+    async def start_sampler(self) -> bool:
+        """Registers all host metrics and starts sampling them"""
+        if self.sampler is None:
+            return False
+        cfg = self.sampler.config
+        read_host_cpu_utilization_since()
+        self.sampler.register(
+            METRIC_CPU, read_host_cpu_utilization_since, cfg.interval_cpu
+        )
+        self.sampler.register(METRIC_MEMORY, read_host_memory, cfg.interval_memory)
+        try:
+            paths = await self.__get_sampled_paths()
+        except AssertionError:
+            self.__log_info("Disk metrics not sampled, backends missing")
+            paths = []
+        usage = await self.__get_usage_index()
+        for path in paths:
+            self.sampler.register(
+                f"{METRIC_PARTITION}:{path}",
+                partial(read_partition, path),
+                cfg.interval_partition,
+            )
+            if usage is not None and usage.get_usage(path) is not None:
+                self.sampler.register(
+                    f"{METRIC_USAGE}:{path}",
+                    partial(usage.get_usage, path),
+                    cfg.interval_partition,
+                )
+            else:
+                self.sampler.register(
+                    f"{METRIC_USAGE}:{path}",
+                    partial(read_disk_usage, path),
+                    cfg.interval_usage,
+                )
+        await self.sampler.start()
+        return True
+
+    async def stop_sampler(self):
+        """Stops sampling"""
+        if self.sampler is not None:
+            await self.sampler.stop()
 
     async def read_host_ressources(self) -> Optional[HostRessources]:
         """Returns currently available host ressources"""
         cpu_total = self.__read_host_cpus()
-        cpu_used = self.__read_host_cpu_utilization()
-        mem_total = self.__read_host_memory_total()
-        mem_used = self.__read_host_memory_used()
+        cpu_used, mem_total, mem_used, sampled_at = await self.__read_host_load()
         diskinfo_local = await self.__read_host_disksize_local()
         diskinfo_ceph = await self.__read_host_disksize_ceph()
         diskinfo_iso = await self.__read_host_disksize_iso()
@@ -90,6 +149,13 @@ class Hostinfo:
                 diskinfo_ceph.partition_used,
                 diskinfo_iso.partition_used,
                 diskinfo_img.partition_used,
+                min(
+                    sampled_at,
+                    diskinfo_local.sampled_at,
+                    diskinfo_ceph.sampled_at,
+                    diskinfo_iso.sampled_at,
+                    diskinfo_img.sampled_at,
+                ),
             )
         return None
 
@@ -100,6 +166,38 @@ class Hostinfo:
             return 0
         return count
 
+    async def __read_host_load(self) -> tuple[float, int, int, float]:
+        """Returns cpu utilization, total and used memory and sample time"""
+        if self.__is_sampling():
+            assert self.sampler is not None
+            cpu = await self.sampler.get(METRIC_CPU)
+            memory = await self.sampler.get(METRIC_MEMORY)
+            if cpu is not None and memory is not None:
+                mem_total, mem_used = memory.value
+                sampled_at = min(cpu.sampled_at, memory.sampled_at)
+                return cpu.value, mem_total, mem_used, sampled_at
+        cpu_used = await asyncio.to_thread(read_host_cpu_utilization)
+        mem_total, mem_used = read_host_memory()
+        return cpu_used, mem_total, mem_used, time.time()
+
+    async def __get_sampled_paths(self) -> list[str]:
+        """Returns all folders with sampled disk metrics"""
+        fs_config = (await self._get_backend_files()).config
+        ceph_config = (await self._get_backend_ceph()).config
+        vm_config = await self._get_backend_vmconfig()
+        return [
+            fs_config.folder_tmp,
+            fs_config.folder_upload,
+            fs_config.folder_shared,
+            fs_config.folder_docker,
+            f"{ceph_config.daasfs['folder_mount']}/daasfs/",
+            f"{vm_config.main_folder}/{vm_config.storage_iso}",
+            f"{vm_config.main_folder}/{vm_config.storage_img}",
+        ]
+
+    def __is_sampling(self) -> bool:
+        return self.sampler is not None and self.sampler.running
+
     # pylint:disable=import-outside-toplevel
     async def __read_host_disksize_ceph(self) -> Optional[PathSize]:
         """Returns current sizeinfo for local files"""
@@ -147,6 +245,7 @@ class Hostinfo:
                 size_iso.partition_size,
                 size_iso.partition_used,
                 size_iso.partition_free,
+                size_iso.sampled_at,
             )
 
     # pylint:disable=import-outside-toplevel
@@ -166,6 +265,7 @@ class Hostinfo:
                 size_img.partition_size,
                 size_img.partition_used,
                 size_img.partition_free,
+                size_img.sampled_at,
             )
 
     # pylint:disable=import-outside-toplevel
@@ -198,52 +298,49 @@ class Hostinfo:
                 size_tmp.partition_size,
                 size_tmp.partition_used,
                 size_tmp.partition_free,
+                min(
+                    size_tmp.sampled_at,
+                    size_upload.sampled_at,
+                    size_shared.sampled_at,
+                    size_docker.sampled_at,
+                ),
             )
 
-    def __read_host_cpu_utilization(self) -> float:
-        """Returns currently utilization of cpu"""
-        return psutil.cpu_percent(interval=0.1)
-
-    def __read_host_memory_total(self) -> int:
-        """Returns current total memory"""
-        memory_info = psutil.virtual_memory()
-        return memory_info.total
-
-    def __read_host_memory_used(self) -> int:
-        """Returns current total memory"""
-        memory_info = psutil.virtual_memory()
-        return memory_info.used
-
-    async def __get_disk_usage(self, path: str) -> int:
-        """Get used bytes for folder"""
-        if os.path.exists(path):
-            result = subprocess.run(["du", "-sb", path], stdout=subprocess.PIPE)
-            ret = result.stdout
-            if ret != "":
-                arr = result.stdout.split()
-                if len(arr) > 0:
-                    return int(arr[0])
-        return 0
-
     async def __get_diskinfo(self, path: str) -> PathSize:
         """Returns disk size"""
-        if os.path.exists(path):
-            total_used_space = await self.__get_disk_usage(path)
-            result = subprocess.run(["df", "-B1", path], stdout=subprocess.PIPE)
-            lines = result.stdout.decode("utf-8").splitlines()
-            if len(lines) > 1:
-                devname, total, used, available, _, mountdir = lines[1].split()
+        if self.__is_sampling():
+            assert self.sampler is not None
+            partition = await self.sampler.get(f"{METRIC_PARTITION}:{path}")
+            usage = await self.sampler.get(f"{METRIC_USAGE}:{path}")
+            if partition is not None and usage is not None:
+                info: PathSize = partition.value
                 return PathSize(
-                    path,
-                    True,
-                    devname,
-                    mountdir,
-                    total_used_space,
-                    int(total),
-                    int(used),
-                    int(available),
+                    info.path,
+                    info.exists,
+                    info.device,
+                    info.mountdir,
+                    usage.value,
+                    info.partition_size,
+                    info.partition_used,
+                    info.partition_free,
+                    min(partition.sampled_at, usage.sampled_at),
                 )
-        return PathSize(path, False, "", "", 0, 0, 0, 0)
+        info = await asyncio.to_thread(read_partition, path)
+        if info.exists:
+            index = await self.__get_usage_index()
+            tracked = index.get_usage(path) if index is not None else None
+            if tracked is not None:
+                info.path_size = tracked
+            else:
+                info.path_size = await asyncio.to_thread(read_disk_usage, path)
+        return info
+
+    async def __get_usage_index(self) -> Optional[DirectoryUsage]:
+        """Returns usage index of the filestore, if available"""
+        try:
+            return (await self._get_backend_files()).usage
+        except AssertionError:
+            return None
 
     async def initialize(self):
         """Initializes component"""
@@ -251,3 +348,52 @@ class Hostinfo:
 
     def __log_info(self, msg: str):
         self.logger.info("Hostinfo          : %s", msg)
+
+
+def read_host_cpu_utilization() -> float:
+    """Returns current utilization of cpu, blocks for a short interval"""
+    return psutil.cpu_percent(interval=0.1)
+
+
+def read_host_cpu_utilization_since() -> float:
+    """Returns utilization of cpu since the previous call"""
+    return psutil.cpu_percent(interval=None)
+
+
+def read_host_memory() -> tuple[int, int]:
+    """Returns total and used memory"""
+    memory_info = psutil.virtual_memory()
+    return memory_info.total, memory_info.used
+
+
+def read_disk_usage(path: str) -> int:
+    """Get used bytes for folder"""
+    if os.path.exists(path):
+        result = subprocess.run(["du", "-sb", path], stdout=subprocess.PIPE)
+        ret = result.stdout
+        if ret != "":
+            arr = result.stdout.split()
+            if len(arr) > 0:
+                return int(arr[0])
+    return 0
+
+
+def read_partition(path: str) -> PathSize:
+    """Returns size of the partition containing path"""
+    if os.path.exists(path):
+        result = subprocess.run(["df", "-B1", path], stdout=subprocess.PIPE)
+        lines = result.stdout.decode("utf-8").splitlines()
+        if len(lines) > 1:
+            devname, total, used, available, _, mountdir = lines[1].split()
+            return PathSize(
+                path,
+                True,
+                devname,
+                mountdir,
+                0,
+                int(total),
+                int(used),
+                int(available),
+                time.time(),
+            )
+    return PathSize(path, False, "", "", 0, 0, 0, 0, time.time())
@@ -0,0 +1,150 @@
+"""
+Background sampling of host metrics
+"""
+
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from app.qweb.logging.logging import LogTarget, Loggable
+
+
+@dataclass(kw_only=True)
+class HostSamplerConfig:
+    """Config data for HostSampler"""
+
+    enabled: bool = True
+    interval_cpu: float = 2.0
+    interval_memory: float = 5.0
+    interval_partition: float = 30.0
+    interval_usage: float = 300.0
+    history_size: int = 60
+
+
+@dataclass
+class HostSample:
+    """A single sampled value"""
+
+    value: Any
+    sampled_at: float
+
+
+@dataclass
+class HostMetric:
+    """A metric refreshed by its own reader and cadence"""
+
+    name: str
+    reader: Callable[[], Any]
+    interval: float
+    history: deque = field(default_factory=deque)
+    errors: int = 0
+    last_error: str = ""
+    task: Optional[asyncio.Task] = None
+
+    @property
+    def latest(self) -> Optional[HostSample]:
+        """Returns most recent sample"""
+        if len(self.history) == 0:
+            return None
+        return self.history[-1]
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        latest = self.latest
+        return {
+            "interval": self.interval,
+            "value": latest.value if latest is not None else None,
+            "sampled_at": latest.sampled_at if latest is not None else 0.0,
+            "samples": len(self.history),
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+class HostSampler(Loggable):
+    """
+    Refreshes registered metrics in the background.
+
+    Readers may block, they run in worker threads. Requests read the
+    latest sample instantly, a reader is only invoked on request if the
+    metric has not been sampled yet.
+    """
+
+    def __init__(self, config: HostSamplerConfig):
+        Loggable.__init__(self, LogTarget.SYS)
+        self.config = config
+        self.metrics: dict[str, HostMetric] = {}
+        self.running = False
+
+    def register(self, name: str, reader: Callable[[], Any], interval: float):
+        """Registers a metric, replaces an existing one with the same name"""
+        self.unregister(name)
+        metric = HostMetric(
+            name, reader, interval, deque(maxlen=max(self.config.history_size, 1))
+        )
+        self.metrics[name] = metric
+        if self.running:
+            metric.task = asyncio.create_task(self.__run_metric(metric))
+
+    def unregister(self, name: str):
+        """Removes a metric and stops its sampling"""
+        metric = self.metrics.pop(name, None)
+        if metric is not None and metric.task is not None:
+            metric.task.cancel()
+
+    async def start(self):
+        """Starts sampling all registered metrics"""
+        if self.running:
+            return
+        self.running = True
+        for metric in self.metrics.values():
+            metric.task = asyncio.create_task(self.__run_metric(metric))
+        self._log_info(f"HostSampler started with {len(self.metrics)} metrics")
+
+    async def stop(self):
+        """Stops sampling"""
+        self.running = False
+        tasks = [m.task for m in self.metrics.values() if m.task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for metric in self.metrics.values():
+            metric.task = None
+
+    async def get(self, name: str) -> Optional[HostSample]:
+        """Returns latest sample, samples once if none exists yet"""
+        metric = self.metrics.get(name)
+        if metric is None:
+            return None
+        if metric.latest is None:
+            await self.sample(metric)
+        return metric.latest
+
+    def get_history(self, name: str) -> list[HostSample]:
+        """Returns retained samples of a metric, oldest first"""
+        metric = self.metrics.get(name)
+        if metric is None:
+            return []
+        return list(metric.history)
+
+    async def sample(self, metric: HostMetric):
+        """Reads a metric in a worker thread and stores the sample"""
+        try:
+            value = await asyncio.to_thread(metric.reader)
+        except Exception as exe:  # pylint: disable=broad-exception-caught
+            metric.errors += 1
+            metric.last_error = f"{exe}"
+            self._log_error(f"Sampling '{metric.name}' failed: {exe}")
+            return
+        metric.history.append(HostSample(value, time.time()))
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {name: metric.tojson() for name, metric in self.metrics.items()}
+
+    async def __run_metric(self, metric: HostMetric):
+        while True:
+            await self.sample(metric)
+            await asyncio.sleep(metric.interval)
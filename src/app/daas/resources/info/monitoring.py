@@ -8,7 +8,6 @@ from app.daas.common.enums import BackendName
 from app.daas.common.model import RessourceInfo
 from app.daas.proxy.proxy_registry import ProxyRegistry
 from app.daas.resources.info.infotools import create_taskinfo_result
-from app.daas.resources.info.objectinfo import Objectinfo
 from app.daas.resources.info.hostinfo import HostRessources
 from app.daas.resources.info.sysinfo import Systeminfo
 from app.daas.resources.limits.ressource_limits import RessourceLimits
@@ -77,6 +76,10 @@ class MonitoringInfoWebsockets:
 
     active_websockets: dict[str, dict]
     closed_websockets: dict[str, dict]
+    closed_rollup: dict
+    memory: dict[str, int]
+    audio_streams: dict[str, dict]
+    workers: list[dict]
 
     def tojson(self):
         """Converts object to json"""
@@ -99,6 +102,7 @@ class MonitoringInfoHost:
     inuse_disk_ceph: int
     inuse_disk_iso: int
     inuse_disk_images: int
+    sampled_at: float = 0.0
 
     def tojson(self):
         """Converts object to json"""
@@ -159,6 +163,23 @@ class MonitoringInfoLimit:
         return asdict(self)
 
 
+@dataclass
+class MonitoringInfoReconcile:
+    """InfoObject for drift between database and backends"""
+
+    runs: int
+    failures: int
+    rows_written: int
+    drift_changed: int
+    drift_missing: int
+    drift_untracked: int
+    last: dict
+
+    def tojson(self):
+        """Converts object to json"""
+        return asdict(self)
+
+
 @dataclass
 class MonitoringInfo:
     """InfoObject for Monitoring"""
@@ -171,6 +192,7 @@ class MonitoringInfo:
     info_objects: MonitoringInfoObjects
     info_utilization: MonitoringInfoUtilization
     info_limits: MonitoringInfoLimit
+    info_reconcile: MonitoringInfoReconcile
 
     def tojson(self):
         """Converts object to json"""
@@ -183,12 +205,37 @@ class MonitoringInfo:
             "info_objects": self.info_objects.tojson(),
             "info_utilization": self.info_utilization.tojson(),
             "info_limits": self.info_limits.tojson(),
+            "info_reconcile": self.info_reconcile.tojson(),
         }
 
 
 class MonitoringInfoTool:
     """Monitoring info"""
 
+    async def create_monitoring_info(self, userid: int = 0) -> MonitoringInfo:
+        """Creates the complete monitoring info"""
+        include_hostinfo = True
+        taskinfo = await self.create_monitoring_info_tasks(userid)
+        fileinfo = await self.create_monitoring_info_files(userid)
+        appinfo = await self.create_monitoring_info_apps(userid)
+        socketinfo = await self.create_monitoring_info_websockets(userid)
+        hostinfo = await self.create_monitoring_info_host(include_hostinfo)
+        objinfo = await self.create_monitoring_info_objects(True, userid)
+        objutil = await self.create_monitoring_info_utilization(userid)
+        limitinfo = await self.create_monitoring_info_limit(userid)
+        reconcileinfo = await self.create_monitoring_info_reconcile(userid)
+        return MonitoringInfo(
+            taskinfo,
+            fileinfo,
+            appinfo,
+            hostinfo,
+            socketinfo,
+            objinfo,
+            objutil,
+            limitinfo,
+            reconcileinfo,
+        )
+
     async def create_monitoring_info_host(
         self,
         include_hostinfo: bool = False,
@@ -212,6 +259,7 @@ class MonitoringInfoTool:
             hostinfo.utilized_disk_space_ceph,
             hostinfo.utilized_disk_space_iso,
             hostinfo.utilized_disk_space_images,
+            hostinfo.sampled_at,
         )
 
     async def create_monitoring_info_limit(
@@ -231,23 +279,47 @@ class MonitoringInfoTool:
                 limits = []
         return MonitoringInfoLimit(limits, limiter.limit_system, limiter.limit_fallback)
 
+    async def create_monitoring_info_reconcile(
+        self,
+        userid: int = 0,
+    ) -> MonitoringInfoReconcile:
+        if userid != 0:
+            return MonitoringInfoReconcile(0, 0, 0, 0, 0, 0, {})
+        systool = await get_backend_component(BackendName.INFO, Systeminfo)
+        return MonitoringInfoReconcile(**systool.get_reconcile_info())
+
     async def create_monitoring_info_utilization(
         self,
         userid: int = 0,
     ) -> MonitoringInfoUtilization:
-        infotool = Objectinfo()
-        await infotool.initialize()
-        info = await infotool.get_objectinfo_user(userid)
+        systool = await get_backend_component(BackendName.INFO, Systeminfo)
+        info = await systool.objectinfo.get_objectinfo_user(userid)
         return MonitoringInfoUtilization(**asdict(info))
 
     async def create_monitoring_info_websockets(
         self,
         userid: int = 0,
     ) -> MonitoringInfoWebsockets:
+        from app.daas.proxy.proxy_extensions import ProxyExtensions
+
         reg = await get_backend_component(BackendName.PROXY, ProxyRegistry)
         active = reg.get_active_connections(userid)
         closed = reg.get_closed_connections(userid)
-        return MonitoringInfoWebsockets(active, closed)
+        rollup = {}
+        memory = {}
+        audio = {}
+        workers = []
+        if userid == 0:
+            rollup = reg.get_stats_rollup()
+            memory = reg.get_stats_memory()
+            ext = await get_backend_component(
+                BackendName.EXTENSIONS, ProxyExtensions
+            )
+            audio = ext.get_audio_stats()
+            workers = reg.get_stats_workers()
+        return MonitoringInfoWebsockets(
+            active, closed, rollup, memory, audio, workers
+        )
 
     async def create_monitoring_info_objects(
         self, daas_only: bool = True, userid: int = 0, detailed: bool = False
@@ -322,15 +394,15 @@ class MonitoringInfoTool:
         tasklist_ret = []
         tasks_final_ret = []
 
-        tasks_running = await taskman.get_scheduled_tasks(ScheduledTaskFilter.RUNNING)
-        filtered_running = await taskman.filter_tasks(tasks_running, userid, "", "")
+        filtered_running = await taskman.find_tasks(
+            ScheduledTaskFilter.RUNNING, userid
+        )
         for _, task in filtered_running.items():
             taskinfo = create_taskinfo_result(task).tojson()
             tasklist_ret.append(taskinfo)
             tasks_running_ret.append(taskinfo)
 
-        tasks_final = await taskman.get_scheduled_tasks(ScheduledTaskFilter.FINAL)
-        filtered_final = await taskman.filter_tasks(tasks_final, userid, "", "")
+        filtered_final = await taskman.find_tasks(ScheduledTaskFilter.FINAL, userid)
         for _, task in filtered_final.items():
             taskinfo = create_taskinfo_result(task).tojson()
             tasklist_ret.append(taskinfo)
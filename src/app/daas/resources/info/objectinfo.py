@@ -3,7 +3,9 @@ Host information
 """
 
 from dataclasses import dataclass
-from app.daas.common.model import DaasObject
+from typing import Optional
+from app.daas.common.enums import BackendName
+from app.daas.common.model import DaasObject, RessourceAggregate
 from app.daas.db.database import Database
 from app.daas.objects.object_instance import InstanceObject
 from app.qweb.logging.logging import LogTarget, Loggable
@@ -36,14 +38,70 @@ class ObjectRessources:
         )
 
 
+def summarize_object_ressources(
+    objlist: list[DaasObject], instlist: list[InstanceObject]
+) -> ObjectRessources:
+    """Sums up ressources of already fetched objects and instances"""
+    objects = len(objlist)
+    instances = len(instlist)
+    object_vms = sum(1 for obj in objlist if obj.object_type == "vm")
+    object_images = sum(1 for obj in objlist if obj.object_type == "container")
+    instance_vms = sum(1 for inst in instlist if inst.app.object_type == "vm")
+    instance_images = sum(1 for inst in instlist if inst.app.object_type == "container")
+    max_cpus = sum(obj.hw_cpus for obj in objlist)
+    max_mem = sum(obj.hw_memory for obj in objlist)
+    max_dsk = sum(obj.hw_disksize for obj in objlist)
+    utilized_cpus = sum(inst.app.hw_cpus for inst in instlist)
+    utilized_mem = sum(inst.app.hw_memory for inst in instlist)
+    utilized_dsk = sum(inst.app.hw_disksize for inst in instlist)
+    return ObjectRessources(
+        objects,
+        instances,
+        object_vms,
+        object_images,
+        instance_vms,
+        instance_images,
+        max_cpus,
+        max_mem,
+        max_dsk,
+        utilized_cpus,
+        utilized_mem,
+        utilized_dsk,
+    )
+
+
+def summarize_object_aggregates(
+    objects: list[RessourceAggregate], instances: list[RessourceAggregate]
+) -> ObjectRessources:
+    """Sums up ressources of objects and instances grouped by owner and type"""
+    return ObjectRessources(
+        sum(x.amount for x in objects),
+        sum(x.amount for x in instances),
+        sum(x.amount for x in objects if x.object_type == "vm"),
+        sum(x.amount for x in objects if x.object_type == "container"),
+        sum(x.amount for x in instances if x.object_type == "vm"),
+        sum(x.amount for x in instances if x.object_type == "container"),
+        sum(x.cpus for x in objects),
+        sum(x.memory for x in objects),
+        sum(x.disk for x in objects),
+        sum(x.cpus for x in instances),
+        sum(x.memory for x in instances),
+        sum(x.disk for x in instances),
+    )
+
+
 class Objectinfo(Loggable):
     """
     Keeps track of available host ressources
+
+    Ressources are summed up by the database and memoized per user until
+    the generation of the ressource ledger changes.
     """
 
     def __init__(self):
         Loggable.__init__(self, LogTarget.SYS)
         self.dbase = Database()
+        self.memo: dict[int, tuple[int, ObjectRessources]] = {}
 
     async def initialize(self):
         """Initializes component"""
@@ -60,40 +118,28 @@ class Objectinfo(Loggable):
 
     async def __read_object_ressources(self, userid: int = 0) -> ObjectRessources:
         """Returns currently available host ressources"""
+        generation = await self.__get_generation()
+        memo = self.memo.get(userid)
+        if generation is not None and memo is not None and memo[0] == generation:
+            return memo[1]
+        id_owner = userid if userid != 0 else None
+        objects = await self.dbase.aggregate_daas_objects(id_owner)
+        instances = await self.dbase.aggregate_instances(id_owner)
+        result = summarize_object_aggregates(objects, instances)
+        if generation is not None:
+            self.memo = {
+                key: entry for key, entry in self.memo.items() if entry[0] == generation
+            }
+            self.memo[userid] = (generation, result)
+        return result
 
-        if userid != 0:
-            objlist: list[DaasObject] = await self.dbase.get_daas_objects_by_owner(
-                userid
-            )
-        else:
-            objlist: list[DaasObject] = await self.dbase.all_daas_objects()
-        instlist: list[InstanceObject] = await self.dbase.get_instances_by_owner(userid)
-
-        objects = len(objlist)
-        instances = len(instlist)
-        object_vms = sum(1 for obj in objlist if obj.object_type == "vm")
-        object_images = sum(1 for obj in objlist if obj.object_type == "container")
-        instance_vms = sum(1 for inst in instlist if inst.app.object_type == "vm")
-        instance_images = sum(
-            1 for inst in instlist if inst.app.object_type == "container"
-        )
-        max_cpus = sum(obj.hw_cpus for obj in objlist)
-        max_mem = sum(obj.hw_memory for obj in objlist)
-        max_dsk = sum(obj.hw_disksize for obj in objlist)
-        utilized_cpus = sum(inst.app.hw_cpus for inst in instlist)
-        utilized_mem = sum(inst.app.hw_memory for inst in instlist)
-        utilized_dsk = sum(inst.app.hw_disksize for inst in instlist)
-        return ObjectRessources(
-            objects,
-            instances,
-            object_vms,
-            object_images,
-            instance_vms,
-            instance_images,
-            max_cpus,
-            max_mem,
-            max_dsk,
-            utilized_cpus,
-            utilized_mem,
-            utilized_dsk,
-        )
+    # pylint: disable=import-outside-toplevel
+    async def __get_generation(self) -> Optional[int]:
+        from app.daas.resources.limits.ressource_limits import RessourceLimits
+        from app.qweb.common.qweb_tools import get_backend_component
+
+        try:
+            limits = await get_backend_component(BackendName.LIMITS, RessourceLimits)
+        except (TypeError, ValueError):
+            return None
+        return limits.ledger.generation
@@ -155,29 +155,25 @@ class SystemInfoObjects:
     ):
         self.vms_list = vms
         self.image_list = images
-        self.vms_usage_total = self.__sum_vms(vms, StatisticType.VM_BOTH)
-        self.vms_usage_online = self.__sum_vms(vms, StatisticType.VM_ON)
-        self.vms_usage_offline = self.__sum_vms(vms, StatisticType.VM_OFF)
-        self.images_usage_total = self.__sum_images(images, StatisticType.IMG_BOTH)
-        self.images_usage_online = self.__sum_images(images, StatisticType.IMG_ON)
-        self.images_usage_offline = self.__sum_images(images, StatisticType.IMG_OFF)
-        self.all_usage_total = self.__sum_all(StatisticType.ALL_BOTH)
-        self.all_usage_online = self.__sum_all(StatisticType.ALL_ON)
-        self.all_usage_offline = self.__sum_all(StatisticType.ALL_OFF)
-        # for vm in self.vms_list:
-        #     print(f"VMS: {vm.name} {vm.running}")
-        # for img in self.image_list:
-        #     print(f"IMG: {img.name} {img.running}")
-
-        # print(f"VMS-OFF: {self.vms_usage_offline.tostring()}")
-        # print(f"VMS-ON : {self.vms_usage_online.tostring()}")
-        # print(f"VMS-TOT: {self.vms_usage_total.tostring()}")
-        # print(f"IMG-OFF: {self.images_usage_offline.tostring()}")
-        # print(f"IMG-ON : {self.images_usage_online.tostring()}")
-        # print(f"IMG-TOT: {self.images_usage_total.tostring()}")
-        # print(f"ALL-OFF: {self.all_usage_offline.tostring()}")
-        # print(f"ALL-ON : {self.all_usage_online.tostring()}")
-        # print(f"ALL-TOT: {self.all_usage_total.tostring()}")
+        self.vms_usage_online, self.vms_usage_offline = self.__sum_vms(vms)
+        self.vms_usage_total = self.__add(
+            self.vms_usage_online, self.vms_usage_offline
+        )
+        self.images_usage_online, self.images_usage_offline = self.__sum_images(
+            images
+        )
+        self.images_usage_total = self.__add(
+            self.images_usage_online, self.images_usage_offline
+        )
+        self.all_usage_total = self.__add(
+            self.vms_usage_total, self.images_usage_total
+        )
+        self.all_usage_online = self.__add(
+            self.vms_usage_online, self.images_usage_online
+        )
+        self.all_usage_offline = self.__add(
+            self.vms_usage_offline, self.images_usage_offline
+        )
 
     def tojson(self):
         """Converts to json object"""
@@ -195,121 +191,61 @@ class SystemInfoObjects:
             "self.all_usage_offline": asdict(self.all_usage_offline),
         }
 
-    def __sum_all(self, stats_type: StatisticType):
-        usage_vms = self.vms_usage_total
-        usage_img = self.images_usage_total
-        if stats_type == StatisticType.ALL_BOTH:
-            usage_vms = self.vms_usage_total
-            usage_img = self.images_usage_total
-        elif stats_type == StatisticType.ALL_ON:
-            usage_vms = self.vms_usage_online
-            usage_img = self.images_usage_online
-        elif stats_type == StatisticType.ALL_OFF:
-            usage_vms = self.vms_usage_offline
-            usage_img = self.images_usage_offline
-
+    def __add(
+        self, first: SystemInfoObjectUtilization, second: SystemInfoObjectUtilization
+    ) -> SystemInfoObjectUtilization:
         return SystemInfoObjectUtilization(
-            usage_img.amount + usage_vms.amount,
-            usage_img.cpus + usage_vms.cpus,
-            usage_img.mem_use + usage_vms.mem_use,
-            usage_img.mem_max + usage_vms.mem_max,
-            usage_img.disk_size + usage_vms.disk_size,
-            usage_img.disk_in + usage_vms.disk_in,
-            usage_img.disk_out + usage_vms.disk_out,
-            usage_img.net_in + usage_vms.net_in,
-            usage_img.net_out + usage_vms.net_out,
+            first.amount + second.amount,
+            first.cpus + second.cpus,
+            first.mem_use + second.mem_use,
+            first.mem_max + second.mem_max,
+            first.disk_size + second.disk_size,
+            first.disk_in + second.disk_in,
+            first.disk_out + second.disk_out,
+            first.net_in + second.net_in,
+            first.net_out + second.net_out,
         )
 
     def __sum_images(
         self,
         object_list: list[SystemInfoDockerImage],
-        stats_type: StatisticType,
-    ) -> SystemInfoObjectUtilization:
-
-        amount: int = 0
-        cpus: int = 0
-        mem_use: int = 0
-        mem_max: int = 0
-        disk_size: int = 0
-        disk_in: int = 0
-        disk_out: int = 0
-        net_in: int = 0
-        net_out: int = 0
-        templates: int = 0
-
+    ) -> tuple[SystemInfoObjectUtilization, SystemInfoObjectUtilization]:
+        """Sums up running and stopped images in a single pass"""
+        online = SystemInfoObjectUtilization(0, 0, 0, 0, 0, 0, 0, 0, 0)
+        offline = SystemInfoObjectUtilization(0, 0, 0, 0, 0, 0, 0, 0, 0)
         for info in object_list:
-            if (
-                (stats_type == StatisticType.IMG_BOTH)
-                or (stats_type == StatisticType.IMG_ON and info.running is True)
-                or (stats_type == StatisticType.IMG_OFF and info.running is False)
-            ):
-                templates += 1 if info.template is True else 0
-                amount += 1
-                cpus += info.cpus
-                mem_use += info.mem_usage
-                mem_max += info.mem_limit
-                disk_size += info.disk_size
-                disk_in += info.disk_in
-                disk_out += info.disk_out
-                net_in += info.net_in
-                net_out += info.net_out
-        return SystemInfoObjectUtilization(
-            amount,
-            cpus,
-            mem_use,
-            mem_max,
-            disk_size,
-            disk_in,
-            disk_out,
-            net_in,
-            net_out,
-        )
+            usage = online if info.running is True else offline
+            usage.amount += 1
+            usage.cpus += info.cpus
+            usage.mem_use += info.mem_usage
+            usage.mem_max += info.mem_limit
+            usage.disk_size += info.disk_size
+            usage.disk_in += info.disk_in
+            usage.disk_out += info.disk_out
+            usage.net_in += info.net_in
+            usage.net_out += info.net_out
+        return online, offline
 
     def __sum_vms(
         self,
         object_list: list[SystemInfoProxmoxMachine],
-        stats_type: StatisticType,
-    ) -> SystemInfoObjectUtilization:
-
-        amount: int = 0
-        cpus: int = 0
-        mem_use: int = 0
-        mem_max: int = 0
-        disk_size: int = 0
-        disk_in: int = 0
-        disk_out: int = 0
-        net_in: int = 0
-        net_out: int = 0
-        templates: int = 0
-
+    ) -> tuple[SystemInfoObjectUtilization, SystemInfoObjectUtilization]:
+        """Sums up running and stopped vms, stopped ones only use disk space"""
+        online = SystemInfoObjectUtilization(0, 0, 0, 0, 0, 0, 0, 0, 0)
+        offline = SystemInfoObjectUtilization(0, 0, 0, 0, 0, 0, 0, 0, 0)
         for info in object_list:
-            if (
-                (stats_type == StatisticType.VM_BOTH)
-                or (stats_type == StatisticType.VM_ON and info.running is True)
-                or (stats_type == StatisticType.VM_OFF and info.running is False)
-            ):
-                amount += 1
-                templates += 1 if info.template is True else 0
-                disk_size += info.disk_size
-                if info.running:
-                    cpus += info.cpus
-                    mem_use += info.mem_use
-                    mem_max += info.mem_use
-                    disk_in += info.disk_in
-                    disk_out += info.disk_out
-                    net_in += info.net_in
-                    net_out += info.net_out
-        return SystemInfoObjectUtilization(
-            amount,
-            cpus,
-            mem_use,
-            mem_max,
-            disk_size,
-            disk_in,
-            disk_out,
-            net_in,
-            net_out,
-        )
+            usage = online if info.running else offline
+            usage.amount += 1
+            usage.disk_size += info.disk_size
+            if info.running:
+                usage.cpus += info.cpus
+                usage.mem_use += info.mem_use
+                usage.mem_max += info.mem_use
+                usage.disk_in += info.disk_in
+                usage.disk_out += info.disk_out
+                usage.net_in += info.net_in
+                usage.net_out += info.net_out
+        return online, offline
 
 
 class ObjectStats:
@@ -442,6 +378,9 @@ class ObjectStats:
         api = await get_backend_component(BackendName.CONTAINER, DockerRequest)
         result: list[SystemInfoDockerImage] = []
         imglist = await api.docker_image_list(detailed)
+        by_name: dict[str, list[SystemInfoDockerContainer]] = {}
+        for cont in container:
+            by_name.setdefault(cont.name, []).append(cont)
         if len(imglist) > 0:
             for sysobject in imglist:
                 cpus: int = 0
@@ -452,17 +391,11 @@ class ObjectStats:
                 disk_out: int = 0
                 net_in: int = 0
                 net_out: int = 0
-                matched: list[SystemInfoDockerContainer] = []
                 name = sysobject.name
                 dockerid = sysobject.attrs["Id"]
                 disk_size = int(sysobject.attrs["Size"])
                 template: bool = False
-                for cont in container:
-                    if cont.name == name:
-                        matched.append(cont)
-                        # print(f"Matched: {cont.name} - {name}")
-                    # else:
-                    #     print(f"Unmatched: {cont.name} - {name}")
+                matched = list(by_name.get(name, []))
                 running: bool = len(matched) > 0
                 if running is True:
                     cont = container[0]
@@ -0,0 +1,202 @@
+"""
+Reconciliation of database objects with backend reality
+
+A background pass correlates proxmox vms and docker images with their
+database records, computes the difference and writes only changed rows
+in a single batch. Objects missing in a backend and backend objects
+unknown to the database are reported as drift, never deleted.
+"""
+
+import asyncio
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Optional
+from app.daas.common.model import DaaSEntity, DaasObject
+from app.daas.db.database import Database
+from app.daas.db.db_model import Tablenames
+from app.daas.resources.info.correlation import CorrelatedObjects, ObjectCorrelation
+from app.qweb.logging.logging import LogTarget, Loggable
+
+# Columns owned by the proxmox backend, mapped to SystemInfoProxmoxMachine
+VM_COLUMNS = {"hw_cpus": "cpus", "hw_disksize": "disk_size"}
+
+
+@dataclass(kw_only=True)
+class ReconcilerConfig:
+    """Config data for ObjectReconciler"""
+
+    enabled: bool = True
+    interval: float = 60.0
+    startup_delay: float = 10.0
+    detailed: bool = False
+    serve_cached: bool = True
+
+
+@dataclass
+class ObjectDrift:
+    """A column differing between database and backend"""
+
+    id_object: str
+    column: str
+    stored: Any
+    actual: Any
+
+
+@dataclass
+class ReconcileReport:
+    """Result of a single reconciliation pass"""
+
+    started_at: float = 0.0
+    duration: float = 0.0
+    checked: int = 0
+    changed: list[ObjectDrift] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)
+    untracked: list[str] = field(default_factory=list)
+    written: int = 0
+    error: str = ""
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return asdict(self)
+
+
+def compute_drift(
+    corr: CorrelatedObjects,
+    objects: list[DaasObject],
+    known: set[str],
+) -> tuple[ReconcileReport, list[DaasObject]]:
+    """Compares database objects with a correlated pass"""
+    report = ReconcileReport(checked=len(objects))
+    vms = {str(vm.id_object): vm for vm in corr.vms}
+    images = {img.name for img in corr.images}
+    outdated: list[DaasObject] = []
+    for obj in objects:
+        if obj.object_type == "vm" and obj.id_proxmox > 0:
+            vm = vms.get(str(obj.id_proxmox))
+            if vm is None:
+                if "vm" not in corr.failed:
+                    report.missing.append(obj.id)
+                continue
+            drift = [
+                ObjectDrift(obj.id, col, getattr(obj, col), getattr(vm, attr))
+                for col, attr in VM_COLUMNS.items()
+                if getattr(obj, col) != getattr(vm, attr)
+            ]
+            for entry in drift:
+                setattr(obj, entry.column, entry.actual)
+            if len(drift) > 0:
+                report.changed.extend(drift)
+                outdated.append(obj)
+        elif obj.object_type == "container" and obj.id_docker != "":
+            if obj.id_docker not in images and "image" not in corr.failed:
+                report.missing.append(obj.id)
+    for vm in corr.vms:
+        if corr.get_vm_object(vm) is None and vm.name not in known:
+            report.untracked.append(f"vm:{vm.id_object}")
+    for img in corr.images:
+        if corr.get_image_object(img) is None and img.name not in known:
+            report.untracked.append(f"image:{img.name}")
+    return report, outdated
+
+
+class ObjectReconciler(Loggable):
+    """
+    Periodically reconciles database objects with the backends
+
+    Request paths read the correlated pass of the last run instead of
+    querying the backends themselves while `serve_cached` is set. Writes
+    of objects and instances invalidate that pass, so it is only served
+    until the database changes.
+    """
+
+    def __init__(
+        self,
+        config: ReconcilerConfig,
+        correlation: ObjectCorrelation,
+        dbase: Database,
+        known: set[str],
+    ):
+        Loggable.__init__(self, LogTarget.SYS)
+        self.config = config
+        self.correlation = correlation
+        self.dbase = dbase
+        self.known = known
+        self.task: Optional[asyncio.Task] = None
+        self.unsubscribe: Optional[Callable[[], None]] = None
+        self.lock = asyncio.Lock()
+        self.last: Optional[ReconcileReport] = None
+        self.runs = 0
+        self.failures = 0
+        self.written = 0
+
+    async def start(self):
+        """Starts periodic reconciliation"""
+        if self.config.enabled is False or self.task is not None:
+            return
+        if self.config.serve_cached:
+            self.correlation.ttl = max(self.correlation.ttl, 2 * self.config.interval)
+            self.unsubscribe = Database.subscribe_changes(self.__on_change)
+        self.task = asyncio.create_task(self.__run())
+        self._log_info(f"Reconciliation started every {self.config.interval}s")
+
+    async def stop(self):
+        """Stops periodic reconciliation"""
+        if self.unsubscribe is not None:
+            self.unsubscribe()
+            self.unsubscribe = None
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    async def reconcile(self, detailed: bool = False) -> ReconcileReport:
+        """Runs a single pass and writes changed rows"""
+        async with self.lock:
+            started = time.time()
+            try:
+                self.correlation.invalidate()
+                corr = await self.correlation.get(detailed)
+                objects = await self.dbase.all_daas_objects()
+                report, outdated = compute_drift(corr, objects, self.known)
+                if len(outdated) > 0:
+                    report.written = await self.dbase.update_daas_objects(
+                        outdated, list(VM_COLUMNS)
+                    )
+            except Exception as exe:  # pylint: disable=broad-exception-caught
+                self.failures += 1
+                report = ReconcileReport(error=f"{exe}")
+                self._log_error("Reconciliation failed", 1, exe)
+            report.started_at = started
+            report.duration = time.time() - started
+            self.runs += 1
+            self.written += report.written
+            self.last = report
+            if len(report.changed) + len(report.missing) > 0:
+                self._log_info(
+                    f"Reconciled: changed={len(report.changed)} "
+                    f"missing={len(report.missing)} written={report.written}"
+                )
+            return report
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        last = self.last if self.last is not None else ReconcileReport()
+        return {
+            "runs": self.runs,
+            "failures": self.failures,
+            "rows_written": self.written,
+            "drift_changed": len(last.changed),
+            "drift_missing": len(last.missing),
+            "drift_untracked": len(last.untracked),
+            "last": last.tojson(),
+        }
+
+    def __on_change(self, table: Tablenames, id_pk: str, model: Optional[DaaSEntity]):
+        if table in (Tablenames.Obj, Tablenames.Inst):
+            self.correlation.invalidate()
+
+    async def __run(self):
+        await asyncio.sleep(self.config.startup_delay)
+        while True:
+            await self.reconcile(self.config.detailed)
+            await asyncio.sleep(self.config.interval)
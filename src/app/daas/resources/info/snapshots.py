@@ -0,0 +1,142 @@
+"""
+Materialized snapshots of dashboard and monitoring views
+
+A snapshot is built once and served until changes of objects, instances
+or tasks invalidate it. Invalidated snapshots are rebuilt lazily by the
+next request, so a burst of changes causes at most a single rebuild and
+views nobody requests are never rebuilt. Every snapshot carries an ETag
+derived from its content.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from typing import Awaitable, Callable, Optional
+
+from app.qweb.logging.logging import LogTarget, Loggable
+
+SnapshotBuilder = Callable[[int], Awaitable[dict]]
+SnapshotKey = tuple[str, int]
+
+
+class SnapshotKind(Enum):
+    """Views kept as snapshots"""
+
+    DASHBOARD = "dashboard"
+    MONITORING = "monitoring"
+
+
+@dataclass(kw_only=True)
+class SnapshotStoreConfig:
+    """Config data for SnapshotStore"""
+
+    enabled: bool = True
+    max_age: float = 30.0
+    max_entries: int = 1000
+
+
+@dataclass
+class Snapshot:
+    """Precomputed view of a single user"""
+
+    kind: str
+    userid: int
+    data: dict
+    etag: str
+    built_at: float
+    stale: bool = False
+
+    def is_fresh(self, max_age: float) -> bool:
+        """Checks if the snapshot may be served"""
+        if self.stale:
+            return False
+        return max_age <= 0 or time.monotonic() - self.built_at < max_age
+
+
+def create_etag(data: dict) -> str:
+    """Creates an ETag from the content of data"""
+    encoded = json.dumps(data, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+class SnapshotStore(Loggable):
+    """
+    Keeps snapshots of registered views per user
+
+    Concurrent requests for a missing snapshot share a single build. A
+    snapshot invalidated while it was built is stored as stale, so it is
+    never served as current.
+    """
+
+    def __init__(self, config: SnapshotStoreConfig):
+        Loggable.__init__(self, LogTarget.SYS)
+        self.config = config
+        self.builders: dict[str, SnapshotBuilder] = {}
+        self.snapshots: OrderedDict[SnapshotKey, Snapshot] = OrderedDict()
+        self.building: dict[SnapshotKey, asyncio.Future] = {}
+        self.versions: dict[SnapshotKey, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+
+    def register(self, kind: str, builder: SnapshotBuilder):
+        """Registers the builder of a view"""
+        self.builders[kind] = builder
+
+    async def get(self, kind: str, userid: int) -> Snapshot:
+        """Returns a current snapshot, builds it if required"""
+        key = (kind, userid)
+        snapshot = self.snapshots.get(key)
+        if snapshot is not None and snapshot.is_fresh(self.config.max_age):
+            self.hits += 1
+            self.snapshots.move_to_end(key)
+            return snapshot
+        self.misses += 1
+        return await self.__build(key)
+
+    def invalidate(self, userid: Optional[int] = None):
+        """Invalidates views of a user and system views, or all views"""
+        keys = set(self.snapshots) | set(self.building)
+        for key in keys:
+            if userid is None or key[1] in (userid, 0):
+                self.versions[key] = self.versions.get(key, 0) + 1
+                snapshot = self.snapshots.get(key)
+                if snapshot is not None:
+                    snapshot.stale = True
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {
+            "entries": len(self.snapshots),
+            "stale": sum(1 for x in self.snapshots.values() if x.stale),
+            "hits": self.hits,
+            "misses": self.misses,
+            "rebuilds": self.rebuilds,
+        }
+
+    async def __build(self, key: SnapshotKey) -> Snapshot:
+        future = self.building.get(key)
+        if future is None:
+            version = self.versions.get(key, 0)
+            future = asyncio.ensure_future(self.__create(key, version))
+            self.building[key] = future
+            future.add_done_callback(lambda _: self.building.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def __create(self, key: SnapshotKey, version: int) -> Snapshot:
+        kind, userid = key
+        data = await self.builders[kind](userid)
+        snapshot = Snapshot(kind, userid, data, create_etag(data), time.monotonic())
+        snapshot.stale = self.versions.get(key, 0) != version
+        self.rebuilds += 1
+        if self.config.enabled:
+            self.snapshots[key] = snapshot
+            self.snapshots.move_to_end(key)
+            while len(self.snapshots) > self.config.max_entries:
+                evicted, _ = self.snapshots.popitem(last=False)
+                self.versions.pop(evicted, None)
+        return snapshot
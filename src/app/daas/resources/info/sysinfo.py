@@ -3,12 +3,27 @@ System information
 """
 
 from dataclasses import asdict, dataclass
-from typing import Optional
+from typing import Any, Callable, Optional
+from app.daas.common.enums import BackendName
 from app.daas.db.database import Database
 from app.daas.resources.info.boardinfo import DashboardInfo, DashboardInfoStore
+from app.daas.resources.info.correlation import CorrelatedObjects, ObjectCorrelation
 from app.daas.common.model import DaasObject
 from app.daas.resources.info.hostinfo import HostRessources, Hostinfo
+from app.daas.resources.info.hostsampler import HostSamplerConfig
+from app.daas.resources.info.objectinfo import Objectinfo
 from app.daas.resources.info.config import SysteminfoConfig
+from app.daas.resources.info.reconciler import (
+    ObjectReconciler,
+    ReconcileReport,
+    ReconcilerConfig,
+)
+from app.daas.resources.info.snapshots import (
+    Snapshot,
+    SnapshotKind,
+    SnapshotStore,
+    SnapshotStoreConfig,
+)
 from app.daas.resources.info.objectstats import (
     ObjectStats,
     SystemInfoDockerContainer,
@@ -44,30 +59,88 @@ class Systeminfo(Loggable):
     Filestore to keep track of files
     """
 
-    def __init__(self, config: SysteminfoConfig):
+    def __init__(
+        self,
+        config: SysteminfoConfig,
+        config_sampler: Optional[HostSamplerConfig] = None,
+        config_snapshots: Optional[SnapshotStoreConfig] = None,
+        config_reconcile: Optional[ReconcilerConfig] = None,
+    ):
         Loggable.__init__(self, LogTarget.SYS)
         self.config = config
         self.objtool = ObjectStats()
-        self.hosttool = Hostinfo()
+        self.hosttool = Hostinfo(config_sampler)
         self.boardtool = DashboardInfoStore()
+        self.objectinfo = Objectinfo()
+        if config_snapshots is None:
+            config_snapshots = SnapshotStoreConfig()
+        self.snapshots = SnapshotStore(config_snapshots)
+        self.snapshots.register(
+            SnapshotKind.DASHBOARD.value, self.__build_dashboard_snapshot
+        )
+        self.snapshots.register(
+            SnapshotKind.MONITORING.value, self.__build_monitoring_snapshot
+        )
+        self.snapshot_sources: list[Callable[[], None]] = []
+        self.snapshot_attached = False
         self.current_objinfo: Optional[SystemInfoObjects] = None
         self.current_hostinfo: Optional[HostRessources] = None
+        self.objinfo_memo: dict[
+            tuple[bool, bool, int], tuple[CorrelatedObjects, SystemInfoObjects]
+        ] = {}
         self.dbase = Database()
+        self.correlation = ObjectCorrelation(
+            self.objtool, self.dbase, config.correlation_ttl
+        )
+        if config_reconcile is None:
+            config_reconcile = ReconcilerConfig()
+        self.reconciler = ObjectReconciler(
+            config_reconcile,
+            self.correlation,
+            self.dbase,
+            set(config.known_daas_vms + config.known_daas_images),
+        )
 
     async def initialize(self):
         """Initializes component"""
         await self.dbase.connect()
         await self.boardtool.initialize()
+        await self.objectinfo.initialize()
+        await self.hosttool.start_sampler()
+        await self.reconciler.start()
+
+    async def stop(self):
+        """Stops background sampling and snapshot invalidation"""
+        await self.hosttool.stop_sampler()
+        await self.reconciler.stop()
+        for detach in self.snapshot_sources:
+            detach()
+        self.snapshot_sources = []
+        self.snapshot_attached = False
 
     async def get_dashboard_info(self, userid: int) -> DashboardInfo:
         """Dashboard info"""
         return await self.boardtool.get_dashboard_info(userid)
 
+    async def get_snapshot(self, kind: str, userid: int) -> Snapshot:
+        """Returns the current snapshot of a dashboard or monitoring view"""
+        await self.__attach_snapshot_sources()
+        return await self.snapshots.get(kind, userid)
+
     async def synchronize_all_objects(self, detailed: bool) -> bool:
         """Synchronizes database with system wide containers and proxmox-vms"""
         self.current_hostinfo = await self.get_hostinfo()
+        report = await self.reconciler.reconcile(detailed)
         self.current_objinfo = await self.get_objinfo(detailed)
-        return True
+        return report.error == ""
+
+    def get_reconcile_info(self) -> dict:
+        """Returns drift metrics of the reconciliation"""
+        return self.reconciler.tojson()
+
+    def get_reconcile_report(self) -> Optional[ReconcileReport]:
+        """Returns report of the last reconciliation"""
+        return self.reconciler.last
 
     async def get_hostinfo(self) -> Optional[HostRessources]:
         """Returns hostinfo"""
@@ -76,7 +149,8 @@ class Systeminfo(Loggable):
 
     async def get_objinfo(self, detailed: bool) -> SystemInfoObjects:
         """Returns objinfo"""
-        self.current_objinfo = await self.objtool.create_object_info(detailed)
+        corr = await self.correlation.get(detailed)
+        self.current_objinfo = SystemInfoObjects(corr.vms, corr.images)
         return self.current_objinfo
 
     async def get_filtered_objectinfo(
@@ -85,12 +159,24 @@ class Systeminfo(Loggable):
         only_daas: bool = False,
         only_user: int = -1,
     ) -> SystemInfoObjects:
-        """Returns all objects"""
+        """Returns statistics of objects, memoized per correlated pass"""
+        corr = await self.correlation.get(detailed)
+        key = (detailed, only_daas, only_user)
+        memo = self.objinfo_memo.get(key)
+        if memo is not None and memo[0] is corr:
+            return memo[1]
         user_vms = await self.filter_proxmox_vms(detailed, only_daas, only_user)
         user_docker_images = await self.filter_docker_images(
             detailed, only_daas, only_user
         )
-        return SystemInfoObjects(user_vms, user_docker_images)
+        result = SystemInfoObjects(user_vms, user_docker_images)
+        self.objinfo_memo = {
+            other: entry
+            for other, entry in self.objinfo_memo.items()
+            if other[0] != detailed or entry[0] is corr
+        }
+        self.objinfo_memo[key] = (corr, result)
+        return result
 
     async def get_all_objects(
         self,
@@ -107,7 +193,6 @@ class Systeminfo(Loggable):
         all_objects.extend(user_docker_images)
         return all_objects
 
-    # pylint: disable=import-outside-toplevel
     async def filter_proxmox_vms(
         self,
         detailed: bool = False,
@@ -117,16 +202,15 @@ class Systeminfo(Loggable):
         """
         Lists all vms
         """
-        result: list[SystemInfoProxmoxMachine] = []
-        vmlist = await self.objtool.enumerate_vms(detailed)
-        for single in vmlist:
-            obj = await self.dbase.get_daas_object_by_proxmox_id(str(single.id_object))
-            resp = await self.create_daas_response(
-                single, obj, self.config.known_daas_vms
-            )
-            if await self.check_filter(resp, only_daas, only_user):
-                result.append(single)
-        return result
+        corr = await self.correlation.get(detailed)
+        selected = await self.__select(
+            corr.vms,
+            corr.get_vm_object,
+            self.config.known_daas_vms,
+            only_daas,
+            only_user,
+        )
+        return [single for single, _ in selected]
 
     async def filter_docker_images(
         self,
@@ -137,17 +221,15 @@ class Systeminfo(Loggable):
         """
         Lists all docker images
         """
-        result: list[SystemInfoDockerImage] = []
-        contlist = await self.objtool.enumerate_container(detailed)
-        imagelist = await self.objtool.enumerate_images(contlist, detailed)
-        for single in imagelist:
-            obj = await self.dbase.get_daas_object_by_docker_id(single.name)
-            resp = await self.create_daas_response(
-                single, obj, self.config.known_daas_images
-            )
-            if await self.check_filter(resp, only_daas, only_user):
-                result.append(single)
-        return result
+        corr = await self.correlation.get(detailed)
+        selected = await self.__select(
+            corr.images,
+            corr.get_image_object,
+            self.config.known_daas_images,
+            only_daas,
+            only_user,
+        )
+        return [single for single, _ in selected]
 
     async def filter_docker_containers(
         self,
@@ -158,22 +240,16 @@ class Systeminfo(Loggable):
         """
         Lists all docker containers
         """
-        result: list[SystemInfoDockerContainer] = []
-        containerlist = await self.objtool.enumerate_container(detailed)
-        for single in containerlist:
-            obj = await self.dbase.get_daas_object_by_docker_id(single.name)
-            if obj is None:
-                env = await self.dbase.get_environment_by_backend_id(single.name)
-                if env is not None:
-                    obj = await self.dbase.get_daas_object(env.id_object)
-            resp = await self.create_daas_response(
-                single, obj, self.config.known_daas_containers
-            )
-            if await self.check_filter(resp, only_daas, only_user):
-                result.append(single)
-        return result
+        corr = await self.correlation.get(detailed)
+        selected = await self.__select(
+            corr.containers,
+            corr.get_container_object,
+            self.config.known_daas_containers,
+            only_daas,
+            only_user,
+        )
+        return [single for single, _ in selected]
 
-    # pylint: disable=import-outside-toplevel
     async def get_all_proxmox_vms(
         self,
         detailed: bool = False,
@@ -183,16 +259,15 @@ class Systeminfo(Loggable):
         """
         Lists all vms
         """
-        result: list[dict] = []
-        vmlist = await self.objtool.enumerate_vms(detailed)
-        for single in vmlist:
-            obj = await self.dbase.get_daas_object_by_proxmox_id(str(single.id_object))
-            resp = await self.create_daas_response(
-                single, obj, self.config.known_daas_vms
-            )
-            if await self.check_filter(resp, only_daas, only_user):
-                result.append(asdict(resp))
-        return result
+        corr = await self.correlation.get(detailed)
+        selected = await self.__select(
+            corr.vms,
+            corr.get_vm_object,
+            self.config.known_daas_vms,
+            only_daas,
+            only_user,
+        )
+        return [asdict(resp) for _, resp in selected]
 
     async def get_all_docker_images(
         self,
@@ -203,17 +278,15 @@ class Systeminfo(Loggable):
         """
         Lists all docker images
         """
-        result: list[dict] = []
-        contlist = await self.objtool.enumerate_container(detailed)
-        imagelist = await self.objtool.enumerate_images(contlist, detailed)
-        for single in imagelist:
-            obj = await self.dbase.get_daas_object_by_docker_id(single.name)
-            resp = await self.create_daas_response(
-                single, obj, self.config.known_daas_images
-            )
-            if await self.check_filter(resp, only_daas, only_user):
-                result.append(asdict(resp))
-        return result
+        corr = await self.correlation.get(detailed)
+        selected = await self.__select(
+            corr.images,
+            corr.get_image_object,
+            self.config.known_daas_images,
+            only_daas,
+            only_user,
+        )
+        return [asdict(resp) for _, resp in selected]
 
     async def get_all_docker_containers(
         self,
@@ -224,20 +297,15 @@ class Systeminfo(Loggable):
         """
         Lists all docker containers
         """
-        result: list[dict] = []
-        containerlist = await self.objtool.enumerate_container(detailed)
-        for single in containerlist:
-            obj = await self.dbase.get_daas_object_by_docker_id(single.name)
-            if obj is None:
-                env = await self.dbase.get_environment_by_backend_id(single.name)
-                if env is not None:
-                    obj = await self.dbase.get_daas_object(env.id_object)
-            resp = await self.create_daas_response(
-                single, obj, self.config.known_daas_containers
-            )
-            if await self.check_filter(resp, only_daas, only_user):
-                result.append(asdict(resp))
-        return result
+        corr = await self.correlation.get(detailed)
+        selected = await self.__select(
+            corr.containers,
+            corr.get_container_object,
+            self.config.known_daas_containers,
+            only_daas,
+            only_user,
+        )
+        return [asdict(resp) for _, resp in selected]
 
     async def create_daas_response(
         self,
@@ -308,3 +376,52 @@ class Systeminfo(Loggable):
     # async def synchronize_system_objects_docker(self, strategy: PersistanceStrategy):
     #     """Synchronizes system with database containers"""
     #     pass
+
+    async def __select(
+        self,
+        entries: list,
+        lookup: Callable[[Any], Optional[DaasObject]],
+        known_list: list,
+        only_daas: bool,
+        only_user: int,
+    ) -> list[tuple[Any, DaaSObjectResponse]]:
+        result = []
+        for single in entries:
+            resp = await self.create_daas_response(single, lookup(single), known_list)
+            if await self.check_filter(resp, only_daas, only_user):
+                result.append((single, resp))
+        return result
+
+    # pylint: disable=import-outside-toplevel
+    async def __attach_snapshot_sources(self):
+        """Invalidates snapshots on changes of objects, instances and tasks"""
+        from app.daas.resources.limits.ressource_limits import RessourceLimits
+        from app.qweb.common.qweb_tools import get_backend_component, get_service
+        from app.qweb.service.service_context import ServiceComponent
+        from app.qweb.service.service_tasks import QwebTaskManager
+
+        if self.snapshot_attached:
+            return
+        try:
+            limits = await get_backend_component(BackendName.LIMITS, RessourceLimits)
+            taskman = await get_service(ServiceComponent.TASK, QwebTaskManager)
+        except (TypeError, ValueError) as exe:
+            self._log_error(f"Snapshots only expire by age: {exe}")
+            return
+        self.snapshot_attached = True
+        self.snapshot_sources = [
+            limits.ledger.subscribe(self.snapshots.invalidate),
+            taskman.add_task_listener(
+                lambda task: self.snapshots.invalidate(task.id_owner)
+            ),
+        ]
+
+    async def __build_dashboard_snapshot(self, userid: int) -> dict:
+        return asdict(await self.boardtool.get_dashboard_info(userid))
+
+    # pylint: disable=import-outside-toplevel
+    async def __build_monitoring_snapshot(self, userid: int) -> dict:
+        from app.daas.resources.info.monitoring import MonitoringInfoTool
+
+        info = await MonitoringInfoTool().create_monitoring_info(userid)
+        return info.tojson()
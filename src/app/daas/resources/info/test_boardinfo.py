@@ -0,0 +1,60 @@
+"""Test that dashboard rows are read with a constant number of queries."""
+
+import asyncio
+
+from app.daas.db.db_model import (
+    ORMEnvironment,
+    ORMGuacamoleConnection,
+    ORMInstance,
+    ORMObject,
+)
+from .boardinfo import DashboardInfoStore
+
+
+def _fill(sqlite_db, start: int, count: int):
+    row = sqlite_db.row
+    session = sqlite_db.api.session
+    for index in range(start, start + count):
+        objid = f"obj{index}"
+        session.add(row(ORMObject, id=objid, id_owner=1, object_type="vm"))
+        session.add(row(ORMEnvironment, id=f"env{index}", id_object=objid))
+        session.add(row(ORMGuacamoleConnection, id=f"con{index}"))
+        session.add(
+            row(
+                ORMInstance,
+                id=f"inst{index}",
+                id_app=objid,
+                id_env=f"env{index}",
+                id_con=f"con{index}",
+                id_owner=1,
+            )
+        )
+    session.commit()
+
+
+def _read(sqlite_db):
+    store = DashboardInfoStore()
+    store.dbase.dbman = sqlite_db.dbman
+    sqlite_db.statements.clear()
+    data = asyncio.run(store.read_dashboard_data(1))
+    return data, len(sqlite_db.statements)
+
+
+def test_dashboard_rows_are_complete(sqlite_db):
+    """Objects, environments, connections and instances are all read."""
+    _fill(sqlite_db, 0, 3)
+    data, _ = _read(sqlite_db)
+    assert len(data.objects) == 3
+    assert len(data.environments) == 3
+    assert len(data.connections) == 3
+    assert all(inst.env is not None for inst in data.instances)
+
+
+def test_dashboard_queries_do_not_grow_with_objects(sqlite_db):
+    """Dashboard rows of 2 and 20 objects need the same number of queries."""
+    _fill(sqlite_db, 0, 2)
+    _, queries_small = _read(sqlite_db)
+    _fill(sqlite_db, 2, 18)
+    data, queries_large = _read(sqlite_db)
+    assert len(data.objects) == 20
+    assert queries_small == queries_large
@@ -0,0 +1,105 @@
+"""Test that backend objects are correlated with a constant number of queries."""
+
+import asyncio
+from types import SimpleNamespace
+
+from .correlation import ObjectCorrelation
+
+
+class _Backends:
+    def __init__(self, count: int):
+        self.count = count
+        self.enumerations = 0
+
+    async def enumerate_vms(self, detailed: bool):
+        self.enumerations += 1
+        await asyncio.sleep(0.01)
+        return [
+            SimpleNamespace(id_object=str(100 + index), name=f"vm{index}")
+            for index in range(self.count)
+        ]
+
+    async def enumerate_container(self, detailed: bool):
+        return [
+            SimpleNamespace(id_object=f"c{index}", name=f"cont{index}")
+            for index in range(self.count)
+        ]
+
+    async def enumerate_images(self, containers: list, detailed: bool):
+        return [
+            SimpleNamespace(id_object=f"i{index}", name=f"img{index}")
+            for index in range(self.count)
+        ]
+
+
+class _Database:
+    def __init__(self):
+        self.queries = 0
+
+    async def get_daas_objects_by_proxmox_ids(self, ids: list[int]):
+        self.queries += 1
+        return [SimpleNamespace(id=f"vm{x}", id_proxmox=x) for x in ids if x % 2]
+
+    async def get_daas_objects_by_docker_ids(self, ids: list[str]):
+        self.queries += 1
+        return [SimpleNamespace(id=x, id_docker=x) for x in ids if "img" in x]
+
+    async def get_environments_by_backend_ids(self, ids: list[str]):
+        self.queries += 1
+        return [SimpleNamespace(id_backend=x, id_object=f"obj-{x}") for x in ids]
+
+    async def get_daas_objects_by_ids(self, ids: list[str]):
+        self.queries += 1
+        return [SimpleNamespace(id=x) for x in ids]
+
+
+def _correlate(count: int) -> tuple[int, ObjectCorrelation]:
+    dbase = _Database()
+    correlation = ObjectCorrelation(_Backends(count), dbase, ttl=60)  # type: ignore
+    corr = asyncio.run(correlation.get(False))
+    assert len(corr.vms) == len(corr.containers) == len(corr.images) == count
+    assert corr.get_vm_object(corr.vms[1]) is not None
+    assert corr.get_vm_object(corr.vms[0]) is None
+    assert corr.get_image_object(corr.images[0]) is not None
+    container = corr.get_container_object(corr.containers[0])
+    assert container is not None and container.id == "obj-cont0"
+    return dbase.queries, correlation
+
+
+def test_correlation_queries_do_not_grow_with_objects():
+    """A pass over 5 and 500 objects needs the same number of queries."""
+    assert _correlate(5)[0] == _correlate(500)[0] == 4
+
+
+def test_correlation_is_cached_and_shared():
+    """Concurrent callers share a pass, cached views are reused until dropped."""
+    _, correlation = _correlate(5)
+    backends = correlation.objtool
+
+    async def run():
+        first, second = await asyncio.gather(
+            correlation.get(True), correlation.get(True)
+        )
+        assert first is second
+        assert await correlation.get(True) is first
+        correlation.invalidate()
+        assert await correlation.get(True) is not first
+
+    asyncio.run(run())
+    assert correlation.passes == 3
+    assert backends.enumerations == 3
+
+
+def test_pass_invalidated_while_running_is_not_cached():
+    """A pass started before an invalidation is not served afterwards."""
+    _, correlation = _correlate(5)
+    correlation.invalidate()
+
+    async def run():
+        pending = asyncio.create_task(correlation.get(False))
+        await asyncio.sleep(0.001)
+        correlation.invalidate()
+        await pending
+        return correlation.cache
+
+    assert asyncio.run(run()) == {}
@@ -0,0 +1,51 @@
+"""Test background sampling of host metrics."""
+
+import asyncio
+import time
+
+from .hostinfo import PathSize, read_partition
+from .hostsampler import HostSampler, HostSamplerConfig
+
+
+def test_sampler_refreshes_metrics_in_background():
+    """Metrics refresh on their own cadence and keep a bounded history."""
+    calls = {"fast": 0, "slow": 0}
+
+    def read_fast() -> int:
+        calls["fast"] += 1
+        return calls["fast"]
+
+    def read_slow() -> int:
+        calls["slow"] += 1
+        time.sleep(0.05)
+        return calls["slow"]
+
+    def read_broken() -> int:
+        raise OSError("device gone")
+
+    async def scenario():
+        sampler = HostSampler(HostSamplerConfig(history_size=3))
+        sampler.register("fast", read_fast, 0.01)
+        sampler.register("slow", read_slow, 10.0)
+        sampler.register("broken", read_broken, 10.0)
+        lazy = await sampler.get("fast")
+        assert lazy is not None and lazy.value == 1
+        await sampler.start()
+        await asyncio.sleep(0.2)
+        started = time.perf_counter()
+        latest = await sampler.get("slow")
+        assert time.perf_counter() - started < 0.01
+        await sampler.stop()
+        assert await sampler.get("missing") is None
+        return sampler, latest
+
+    sampler, latest = asyncio.run(scenario())
+    assert latest is not None and latest.value == 1 and calls["slow"] == 1
+    history = sampler.get_history("fast")
+    assert len(history) == 3 and calls["fast"] > 3
+    values = [sample.value for sample in history]
+    assert values == list(range(values[0], values[0] + 3))
+    assert sampler.tojson()["broken"]["errors"] == 1
+    assert sampler.tojson()["broken"]["value"] is None
+    info = read_partition("/")
+    assert isinstance(info, PathSize) and info.sampled_at > 0
@@ -0,0 +1,101 @@
+"""Test that object statistics are aggregated by the database."""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.daas.db.db_model import ORMInstance, ORMObject
+from .objectinfo import Objectinfo, summarize_object_ressources
+from .objectstats import SystemInfoObjects
+
+
+def _fill(sqlite_db, start: int, count: int):
+    row = sqlite_db.row
+    session = sqlite_db.api.session
+    for index in range(start, start + count):
+        objid = f"obj{index}"
+        session.add(
+            row(
+                ORMObject,
+                id=objid,
+                id_owner=index % 3,
+                object_type="vm" if index % 2 else "container",
+                hw_cpus=index % 4 + 1,
+                hw_memory=1024 * index,
+                hw_disksize=4096 * index,
+            )
+        )
+        if index % 3 != 2:
+            session.add(
+                row(ORMInstance, id=f"inst{index}", id_app=objid, id_owner=index % 3)
+            )
+    session.commit()
+
+
+def _aggregate(sqlite_db, userid: int):
+    tool = Objectinfo()
+    tool.dbase.dbman = sqlite_db.dbman
+    sqlite_db.statements.clear()
+    aggregated = asyncio.run(tool.get_objectinfo_user(userid))
+    return aggregated, len(sqlite_db.statements)
+
+
+def _summarize(sqlite_db, userid: int):
+    tool = Objectinfo()
+    tool.dbase.dbman = sqlite_db.dbman
+
+    async def run():
+        if userid != 0:
+            objlist = await tool.dbase.get_daas_objects_by_owner(userid)
+            instlist = await tool.dbase.get_instances_by_owner(userid)
+        else:
+            objlist = await tool.dbase.all_daas_objects()
+            instlist = await tool.dbase.all_instances()
+        return summarize_object_ressources(objlist, instlist)
+
+    return asyncio.run(run())
+
+
+def test_aggregation_of_single_owner(sqlite_db):
+    """Grouped sums of an owner equal the summation of its rows."""
+    _fill(sqlite_db, 0, 6)
+    aggregated, _ = _aggregate(sqlite_db, 1)
+    assert aggregated == _summarize(sqlite_db, 1)
+
+
+def test_aggregation_of_all_owners(sqlite_db):
+    """Grouped sums of all owners equal the summation of all rows."""
+    _fill(sqlite_db, 0, 6)
+    aggregated, _ = _aggregate(sqlite_db, 0)
+    assert aggregated == _summarize(sqlite_db, 0)
+
+
+def test_aggregation_query_count_is_constant(sqlite_db):
+    """Aggregating 60 objects needs as many queries as 6 objects."""
+    _fill(sqlite_db, 0, 6)
+    _, queries_small = _aggregate(sqlite_db, 1)
+    _fill(sqlite_db, 6, 54)
+    _, queries_large = _aggregate(sqlite_db, 1)
+    assert queries_small == queries_large == 2
+
+
+def test_backend_statistics_in_single_pass():
+    """Stopped vms only account disk space, totals combine both states."""
+    traffic = {"disk_in": 1, "disk_out": 1, "net_in": 1, "net_out": 1}
+    vms = [
+        SimpleNamespace(running=running, cpus=2, mem_use=8, disk_size=16, **traffic)
+        for running in (True, False, True)
+    ]
+    images = [
+        SimpleNamespace(
+            running=running, cpus=1, mem_usage=4, mem_limit=8, disk_size=32, **traffic
+        )
+        for running in (False, True)
+    ]
+    info = SystemInfoObjects(vms, images)  # type: ignore
+    assert (info.vms_usage_online.amount, info.vms_usage_online.cpus) == (2, 4)
+    assert (info.vms_usage_offline.cpus, info.vms_usage_offline.disk_size) == (0, 16)
+    assert info.vms_usage_total.disk_size == 48
+    assert info.images_usage_total.mem_max == 16
+    assert info.all_usage_total.amount == 5
+    assert info.all_usage_online.cpus == 5
+    assert info.all_usage_offline.disk_size == 48
@@ -0,0 +1,133 @@
+"""Test that reconciliation writes only drifted rows in a single batch."""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.daas.db.database import Database
+from app.daas.db.db_model import ORMObject, Tablenames
+from .correlation import CorrelatedObjects
+from .reconciler import ObjectReconciler, ReconcilerConfig
+
+
+class _Correlation:
+    def __init__(self, vms: list, images: list, failed: list[str]):
+        self.vms = vms
+        self.images = images
+        self.failed = failed
+        self.ttl = 5.0
+        self.invalidated = 0
+
+    def invalidate(self):
+        self.invalidated += 1
+
+    async def get(self, detailed: bool) -> CorrelatedObjects:
+        objs: dict = {vm.id_object: SimpleNamespace() for vm in self.vms[:3]}
+        return CorrelatedObjects(
+            self.vms, [], self.images, objs, {}, {}, 0.0, self.failed
+        )
+
+
+def _vm(vmid: int, cpus: int) -> SimpleNamespace:
+    return SimpleNamespace(
+        id_object=str(vmid), name=f"vm{vmid}", cpus=cpus, disk_size=64
+    )
+
+
+def _fill(sqlite_db):
+    row = sqlite_db.row
+    session = sqlite_db.api.session
+    for vmid in (100, 101, 102, 103):
+        session.add(
+            row(
+                ORMObject,
+                id=f"obj{vmid}",
+                object_type="vm",
+                id_proxmox=vmid,
+                hw_cpus=2,
+                hw_disksize=64,
+            )
+        )
+    session.add(row(ORMObject, id="cont", object_type="container", id_docker="gone"))
+    session.commit()
+
+
+def _reconcile(sqlite_db, failed: list[str]):
+    _fill(sqlite_db)
+    dbase = Database()
+    dbase.dbman = sqlite_db.dbman
+    vms = [_vm(100, 2), _vm(101, 4), _vm(102, 8), _vm(200, 1)]
+    images = [SimpleNamespace(name="unknown")]
+    reconciler = ObjectReconciler(
+        ReconcilerConfig(),
+        _Correlation(vms, images, failed),  # type: ignore
+        dbase,
+        set(),
+    )
+    sqlite_db.statements.clear()
+    report = asyncio.run(reconciler.reconcile())
+    return report, reconciler
+
+
+def _stored_cpus(sqlite_db) -> dict[str, int]:
+    return {x.id: x.hw_cpus for x in sqlite_db.api.session.query(ORMObject).all()}
+
+
+def test_only_drifted_rows_are_written(sqlite_db):
+    """Drifted vms are written in a single batch, others stay untouched."""
+    report, reconciler = _reconcile(sqlite_db, [])
+    assert [(x.id_object, x.stored, x.actual) for x in report.changed] == [
+        ("obj101", 2, 4),
+        ("obj102", 2, 8),
+    ]
+    updates = [p for sql, p in sqlite_db.statements if sql.startswith("UPDATE")]
+    assert len(updates) == 1 and len(updates[0]) == 2
+    stored = _stored_cpus(sqlite_db)
+    assert stored["obj101"] == 4 and stored["obj102"] == 8 and stored["obj100"] == 2
+    assert reconciler.tojson()["rows_written"] == 2
+
+
+def test_written_rows_notify_subscribers(sqlite_db):
+    """Subscribers of repository changes see every written object."""
+    recorded = []
+    unsubscribe = Database.subscribe_changes(
+        lambda table, id_pk, model: recorded.append(id_pk)
+    )
+    try:
+        _reconcile(sqlite_db, [])
+    finally:
+        unsubscribe()
+    assert sorted(recorded) == ["obj101", "obj102"]
+
+
+def test_missing_and_untracked_objects_are_reported(sqlite_db):
+    """Stored objects without backend and unknown backend objects are reported."""
+    report, reconciler = _reconcile(sqlite_db, [])
+    assert sorted(report.missing) == ["cont", "obj103"]
+    assert report.untracked == ["vm:200", "image:unknown"]
+    assert reconciler.tojson()["drift_missing"] == 2
+
+
+def test_failed_backends_do_not_report_missing_objects(sqlite_db):
+    """Objects of a backend that could not be enumerated are not missing."""
+    report, _ = _reconcile(sqlite_db, ["vm", "image"])
+    assert report.missing == []
+
+
+def test_changes_invalidate_the_served_pass():
+    """Object and instance writes invalidate the pass served to requests."""
+    correlation = _Correlation([], [], [])
+    config = ReconcilerConfig(startup_delay=3600)
+    dbase = Database()
+    reconciler = ObjectReconciler(config, correlation, dbase, set())  # type: ignore
+
+    async def run():
+        await reconciler.start()
+        dbase._notify_change(Tablenames.Obj, "obj", None)
+        dbase._notify_change(Tablenames.Inst, "inst", None)
+        dbase._notify_change(Tablenames.File, "file", None)
+        await reconciler.stop()
+        dbase._notify_change(Tablenames.Obj, "obj", None)
+
+    asyncio.run(run())
+    assert correlation.invalidated == 2
+    assert correlation.ttl == 2 * config.interval
@@ -0,0 +1,83 @@
+"""Test materialized view snapshots and their invalidation."""
+
+import asyncio
+
+from .snapshots import SnapshotStore, SnapshotStoreConfig
+
+
+def _store(calls: list, state: dict) -> SnapshotStore:
+    async def build(userid: int) -> dict:
+        calls.append(userid)
+        value = state.get("value", 1)
+        await asyncio.sleep(0.01)
+        return {"user": userid, "value": value}
+
+    store = SnapshotStore(SnapshotStoreConfig(max_age=0))
+    store.register("view", build)
+    return store
+
+
+def test_concurrent_requests_share_a_build():
+    """Concurrent requests of a missing snapshot build it once."""
+    calls: list[int] = []
+
+    async def scenario():
+        store = _store(calls, {})
+        first, second = await asyncio.gather(
+            store.get("view", 1), store.get("view", 1)
+        )
+        third = await store.get("view", 1)
+        return first, second, third, store.tojson()
+
+    first, second, third, status = asyncio.run(scenario())
+    assert first is second is third and calls == [1]
+    assert status["hits"] == 1 and status["rebuilds"] == 1
+
+
+def test_invalidation_affects_user_and_system_views():
+    """Invalidating a user marks its views and the system views stale."""
+    calls: list[int] = []
+
+    async def scenario():
+        store = _store(calls, {})
+        for userid in (0, 1, 2):
+            await store.get("view", userid)
+        store.invalidate(2)
+        return {key[1]: snap.stale for key, snap in store.snapshots.items()}
+
+    assert asyncio.run(scenario()) == {0: True, 1: False, 2: True}
+
+
+def test_invalidated_snapshots_are_rebuilt_on_request():
+    """Invalidations do not rebuild until the next request needs a snapshot."""
+    calls: list[int] = []
+    state = {"value": 1}
+
+    async def scenario():
+        store = _store(calls, state)
+        first = await store.get("view", 1)
+        state["value"] = 2
+        store.invalidate(1)
+        store.invalidate(1)
+        await asyncio.sleep(0.05)
+        built = list(calls)
+        refreshed = await store.get("view", 1)
+        return first, refreshed, built
+
+    first, refreshed, built = asyncio.run(scenario())
+    assert built == [1] and calls == [1, 1]
+    assert refreshed.data["value"] == 2 and refreshed.etag != first.etag
+
+
+def test_invalidation_during_build_stores_stale_snapshot():
+    """A snapshot invalidated while it was built is never served as current."""
+    calls: list[int] = []
+
+    async def scenario():
+        store = _store(calls, {})
+        pending = asyncio.create_task(store.get("view", 3))
+        await asyncio.sleep(0)
+        store.invalidate(3)
+        return (await pending).stale
+
+    assert asyncio.run(scenario())
@@ -0,0 +1,174 @@
+"""Admission of ressource demand with reservations and a waiting queue"""
+
+import asyncio
+import heapq
+import itertools
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Callable, Optional
+from app.daas.common.model import RessourceInfo
+from app.daas.resources.limits.ressource_ledger import RessourceLedger
+from app.qweb.logging.logging import LogTarget, Loggable
+
+
+class AdmissionCheck(Enum):
+    """Outcome of checking demand against current capacity"""
+
+    OK = "ok"
+    USER = "user"
+    SYSTEM = "system"
+
+
+DemandCheck = Callable[[int, RessourceInfo, Optional[RessourceInfo]], AdmissionCheck]
+
+
+@dataclass(order=True)
+class AdmissionRequest:
+    """A queued demand, ordered by priority and arrival"""
+
+    rank: int
+    sequence: int
+    key: str = field(compare=False)
+    userid: int = field(compare=False)
+    demand: RessourceInfo = field(compare=False)
+    userlimit: Optional[RessourceInfo] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class AdmissionController(Loggable):
+    """
+    Reserves capacity for demand or queues it until capacity is freed.
+
+    Checking and reserving happen without awaiting in between, so two
+    concurrent requests can never pass on the same capacity. Queued
+    requests are served by priority, then in order of arrival. A request
+    blocked by the system limit keeps all requests behind it waiting,
+    while one blocked only by its own user limit is passed by others.
+    """
+
+    def __init__(
+        self,
+        ledger: RessourceLedger,
+        check: DemandCheck,
+        queue_size: int,
+        recheck_interval: float,
+    ):
+        Loggable.__init__(self, LogTarget.LIMIT)
+        self.ledger = ledger
+        self.check = check
+        self.queue_size = queue_size
+        self.recheck_interval = recheck_interval
+        self.queue: list[AdmissionRequest] = []
+        self.sequence = itertools.count()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timedout = 0
+        self.ledger.subscribe(lambda _: self.dispatch())
+
+    async def admit(
+        self,
+        key: str,
+        userid: int,
+        demand: RessourceInfo,
+        userlimit: Optional[RessourceInfo],
+        priority: int = 0,
+        timeout: float = 0.0,
+    ) -> bool:
+        """
+        Reserves demand under key, waits up to timeout for capacity
+        """
+        if len(self.queue) == 0:
+            checked = self.check(userid, demand, userlimit)
+            if checked == AdmissionCheck.OK:
+                self.__reserve(key, userid, demand)
+                return True
+            if timeout <= 0:
+                self.rejected += 1
+                return False
+        if timeout <= 0 or len(self.queue) >= self.queue_size:
+            self.rejected += 1
+            return False
+
+        loop = asyncio.get_running_loop()
+        request = AdmissionRequest(
+            -priority,
+            next(self.sequence),
+            key,
+            userid,
+            demand,
+            userlimit,
+            loop.create_future(),
+        )
+        heapq.heappush(self.queue, request)
+        self.queued += 1
+        self.dispatch()
+        deadline = loop.time() + timeout
+        waited = False
+        try:
+            while not request.future.done():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(
+                        asyncio.shield(request.future),
+                        min(remaining, self.recheck_interval),
+                    )
+                except asyncio.TimeoutError:
+                    self.dispatch()
+            task = asyncio.current_task()
+            if request.future.done() and task is not None and task.cancelling():
+                # wait_for may hand out the admission of a cancelled caller
+                raise asyncio.CancelledError()
+            waited = True
+        finally:
+            if not request.future.done():
+                request.future.cancel()
+                self.queue.remove(request)
+                heapq.heapify(self.queue)
+                self.timedout += 1
+                self.dispatch()
+            elif waited is False and not request.future.cancelled():
+                # admitted, but the caller was cancelled before it resumed
+                self.release(key)
+        return not request.future.cancelled()
+
+    def release(self, key: str):
+        """Releases the reservation of a failed task and serves the queue"""
+        self.ledger.release(key)
+        self.dispatch()
+
+    def dispatch(self):
+        """Admits queued requests as long as capacity allows"""
+        blocked: list[AdmissionRequest] = []
+        while len(self.queue) > 0:
+            request = self.queue[0]
+            if request.future.done():
+                heapq.heappop(self.queue)
+                continue
+            checked = self.check(request.userid, request.demand, request.userlimit)
+            if checked == AdmissionCheck.SYSTEM:
+                break
+            heapq.heappop(self.queue)
+            if checked == AdmissionCheck.USER:
+                blocked.append(request)
+                continue
+            self.__reserve(request.key, request.userid, request.demand)
+            request.future.set_result(True)
+        for request in blocked:
+            heapq.heappush(self.queue, request)
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {
+            "waiting": len(self.queue),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timedout": self.timedout,
+        }
+
+    def __reserve(self, key: str, userid: int, demand: RessourceInfo):
+        self.ledger.reserve(key, userid, demand)
+        self.admitted += 1
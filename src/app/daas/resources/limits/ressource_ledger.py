@@ -0,0 +1,262 @@
+"""Running totals of ressources used per user and system-wide"""
+
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional
+from app.daas.common.model import RessourceInfo
+
+LedgerCallback = Callable[[Optional[int]], None]
+
+
+@dataclass
+class LedgerTotals:
+    """Ressources accounted for a single owner"""
+
+    objects: int = 0
+    vms: int = 0
+    containers: int = 0
+    instances: int = 0
+    cpus: int = 0
+    memory: int = 0
+    disk: int = 0
+
+    def add(self, other: "LedgerTotals", sign: int = 1):
+        """Adds (or subtracts) other totals"""
+        self.objects += sign * other.objects
+        self.vms += sign * other.vms
+        self.containers += sign * other.containers
+        self.instances += sign * other.instances
+        self.cpus += sign * other.cpus
+        self.memory += sign * other.memory
+        self.disk += sign * other.disk
+
+    def to_info(self, userid: int) -> RessourceInfo:
+        """Converts totals into the format of ressource limits"""
+        return RessourceInfo(
+            userid,
+            self.vms,
+            self.containers,
+            self.objects,
+            self.cpus,
+            self.memory,
+            self.disk,
+        )
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return asdict(self)
+
+
+@dataclass
+class LedgerReservation:
+    """Demand of an in-flight task, accounted until released or expired"""
+
+    key: str
+    id_owner: int
+    demand: RessourceInfo
+    expires: float
+
+
+class RessourceLedger:
+    """
+    Keeps running totals of objects and instances.
+
+    Every object and instance contributes once, keyed by its id, so
+    recording the same entity again replaces its contribution. Updates
+    never await, which makes each of them atomic on the event loop.
+    """
+
+    def __init__(self, reservation_timeout: float):
+        self.reservation_timeout = reservation_timeout
+        self.system = LedgerTotals()
+        self.users: dict[int, LedgerTotals] = {}
+        self.objects: dict[str, tuple[int, LedgerTotals]] = {}
+        self.instances: dict[str, tuple[int, str, LedgerTotals]] = {}
+        self.reservations: dict[str, LedgerReservation] = {}
+        self.idle: dict[str, str] = {}
+        self.subscribers: list[LedgerCallback] = []
+        self.loaded = False
+        self.generation = 0
+
+    def subscribe(self, callback: LedgerCallback) -> Callable[[], None]:
+        """
+        Subscribes to changes which may free capacity, returns unsubscribe
+
+        The callback receives the owner whose usage changed, or None if the
+        usage of all owners may have changed.
+        """
+        self.subscribers.append(callback)
+        return lambda: self.subscribers.remove(callback)
+
+    def load(self, objects: list[Any], instances: list[Any]) -> dict:
+        """Rebuilds all totals and returns the drift of the previous ones"""
+        previous = {userid: totals.tojson() for userid, totals in self.users.items()}
+        self.system = LedgerTotals()
+        self.users = {}
+        self.objects = {}
+        self.instances = {}
+        for obj in objects:
+            self.__record_object(obj)
+        for inst in instances:
+            self.__record_instance(inst)
+        self.idle = {
+            id_inst: reason
+            for id_inst, reason in self.idle.items()
+            if id_inst in self.instances
+        }
+        self.loaded = True
+        self.__notify({None})
+        drift = {}
+        for userid in set(previous) | set(self.users):
+            before = previous.get(userid, LedgerTotals().tojson())
+            after = self.users.get(userid, LedgerTotals()).tojson()
+            diff = {
+                name: after[name] - before[name]
+                for name in after
+                if after[name] != before[name]
+            }
+            if len(diff) > 0:
+                drift[userid] = diff
+        return drift
+
+    def record_object(self, obj: Any):
+        """Accounts a created or updated object"""
+        self.__notify(self.__record_object(obj))
+
+    def remove_object(self, id_object: str):
+        """Removes an object together with its instances"""
+        owners = self.__replace(self.objects, id_object, None)
+        for id_inst, (_, id_app, _) in list(self.instances.items()):
+            if id_app == id_object:
+                owners |= self.__replace(self.instances, id_inst, None)
+                self.idle.pop(id_inst, None)
+        self.__notify(owners)
+
+    def record_instance(self, inst: Any):
+        """Accounts a started or updated instance, which is no longer idle"""
+        if inst is not None:
+            self.idle.pop(inst.id, None)
+        self.__notify(self.__record_instance(inst))
+
+    def remove_instance(self, id_instance: str):
+        """Removes a stopped instance"""
+        self.idle.pop(id_instance, None)
+        self.__notify(self.__replace(self.instances, id_instance, None))
+
+    def record_idle(self, id_instance: str, reason: str) -> bool:
+        """
+        Marks a running instance whose viewer session expired as idle
+
+        Idle instances keep their ressources until they are stopped, the
+        mark only reports them as reclaimable. Returns False for instances
+        which are not accounted.
+        """
+        if id_instance not in self.instances:
+            return False
+        self.idle[id_instance] = reason
+        return True
+
+    def get_idle_usage(self, userid: Optional[int] = None) -> RessourceInfo:
+        """Returns ressources held by idle instances of a user or all users"""
+        totals = LedgerTotals()
+        for id_inst in self.idle:
+            id_owner, _, entry = self.instances[id_inst]
+            if userid is None or id_owner == userid:
+                totals.add(entry)
+        return totals.to_info(-1 if userid is None else userid)
+
+    def reserve(self, key: str, userid: int, demand: RessourceInfo):
+        """Accounts demand of an in-flight task under key"""
+        self.reservations[key] = LedgerReservation(
+            key, userid, demand, time.monotonic() + self.reservation_timeout
+        )
+
+    def release(self, key: str):
+        """Removes the reservation for key if present"""
+        reservation = self.reservations.pop(key, None)
+        if reservation is not None:
+            self.__notify({reservation.id_owner})
+
+    def get_usage(self, userid: int) -> RessourceInfo:
+        """Returns used and reserved ressources of a user"""
+        usage = self.users.get(userid, LedgerTotals()).to_info(userid)
+        for reservation in self.__get_reservations():
+            if reservation.id_owner == userid:
+                usage.add(reservation.demand)
+        return usage
+
+    def get_system_usage(self) -> RessourceInfo:
+        """Returns used and reserved ressources of all users"""
+        usage = self.system.to_info(-1)
+        for reservation in self.__get_reservations():
+            usage.add(reservation.demand)
+        return usage
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {
+            "system": self.system.tojson(),
+            "users": {uid: totals.tojson() for uid, totals in self.users.items()},
+            "reservations": len(self.__get_reservations()),
+            "idle": len(self.idle),
+            "generation": self.generation,
+        }
+
+    def __get_reservations(self) -> list[LedgerReservation]:
+        now = time.monotonic()
+        for key, reservation in list(self.reservations.items()):
+            if reservation.expires < now:
+                self.reservations.pop(key)
+        return list(self.reservations.values())
+
+    def __record_object(self, obj: Any) -> set[Optional[int]]:
+        if obj is None:
+            return set()
+        totals = LedgerTotals(
+            objects=1,
+            vms=1 if obj.object_type == "vm" else 0,
+            containers=1 if obj.object_type == "container" else 0,
+        )
+        return self.__replace(self.objects, obj.id, (obj.id_owner, totals))
+
+    def __record_instance(self, inst: Any) -> set[Optional[int]]:
+        if inst is None or inst.app is None:
+            return set()
+        app = inst.app
+        totals = LedgerTotals(
+            instances=1,
+            cpus=app.hw_cpus,
+            memory=app.hw_memory,
+            disk=app.hw_disksize,
+        )
+        entry = (inst.id_owner, app.id, totals)
+        return self.__replace(self.instances, inst.id, entry)
+
+    def __notify(self, owners: set[Optional[int]]):
+        if len(owners) == 0:
+            return
+        self.generation += 1
+        for callback in list(self.subscribers):
+            for userid in owners:
+                callback(userid)
+
+    def __replace(
+        self, entries: dict, key: str, entry: Optional[tuple]
+    ) -> set[Optional[int]]:
+        owners: set[Optional[int]] = set()
+        previous = entries.pop(key, None)
+        if previous is not None:
+            self.__account(previous[0], previous[-1], -1)
+            owners.add(previous[0])
+        if entry is not None:
+            entries[key] = entry
+            self.__account(entry[0], entry[-1], 1)
+            owners.add(entry[0])
+        return owners
+
+    def __account(self, userid: int, totals: LedgerTotals, sign: int):
+        self.system.add(totals, sign)
+        user = self.users.setdefault(userid, LedgerTotals())
+        user.add(totals, sign)
+        if user == LedgerTotals():
+            self.users.pop(userid)
@@ -1,12 +1,17 @@
 """Manages ressource limits"""
 
-import logging
+import asyncio
 from dataclasses import dataclass, fields
-from typing import Optional
-from app.daas.common.model import RessourceInfo
+from typing import Callable, Optional
+from app.daas.common.model import DaaSEntity, RessourceInfo
 from app.daas.db.database import Database
+from app.daas.db.db_model import Tablenames
 from app.daas.resources.info.hostinfo import Hostinfo
-from app.daas.resources.info.objectinfo import Objectinfo
+from app.daas.resources.limits.ressource_admission import (
+    AdmissionCheck,
+    AdmissionController,
+)
+from app.daas.resources.limits.ressource_ledger import RessourceLedger
 from app.qweb.logging.logging import LogTarget, Loggable
 
 
@@ -29,6 +34,11 @@ class RessourceLimitsConfig:
     enable_overcommit: bool
     enable_fallback_userlimit: bool
     log_verification: bool
+    reservation_timeout: float = 600.0
+    audit_interval: float = 900.0
+    admission_timeout: float = 300.0
+    admission_queue_size: int = 100
+    admission_recheck_interval: float = 5.0
 
 
 class RessourceLimits(Loggable):
@@ -43,13 +53,25 @@ class RessourceLimits(Loggable):
         self.limit_system: Optional[RessourceInfo] = None
         self.limits_user: dict[int, RessourceInfo] = {}
         self.hosttool = Hostinfo()
-        self.objtool = Objectinfo()
+        self.ledger = RessourceLedger(config.reservation_timeout)
+        self.admission = AdmissionController(
+            self.ledger,
+            self.check_demand,
+            config.admission_queue_size,
+            config.admission_recheck_interval,
+        )
+        self.task_audit: Optional[asyncio.Task] = None
+        self.unsubscribe: Optional[Callable[[], None]] = None
         self.dbase = Database()
 
     async def initialize(self):
         """Initializes system"""
-        await self.objtool.initialize()
         await self.dbase.connect()
+        if self.unsubscribe is None:
+            self.unsubscribe = Database.subscribe_changes(self.record_change)
+        await self.audit()
+        if self.config.audit_interval > 0 and self.task_audit is None:
+            self.task_audit = asyncio.create_task(self.__run_audit())
         limits = await self.dbase.get_all_limits()
         for limit in limits:
             await self.put_user_limit(limit.id_owner, limit)
@@ -77,6 +99,44 @@ class RessourceLimits(Loggable):
         if self.initialized:
             self._log_info(f"Initialized with: Overcommit={self.overcommitted}")
 
+    async def stop(self):
+        """Stops the periodic audit and accounting of changes"""
+        if self.unsubscribe is not None:
+            self.unsubscribe()
+            self.unsubscribe = None
+        if self.task_audit is not None:
+            self.task_audit.cancel()
+            await asyncio.gather(self.task_audit, return_exceptions=True)
+            self.task_audit = None
+
+    async def audit(self) -> dict:
+        """Rebuilds the ledger from the database and logs corrected drift"""
+        objects = await self.dbase.all_daas_objects()
+        instances = await self.dbase.all_instances()
+        drift = self.ledger.load(objects, instances)
+        for userid, diff in drift.items():
+            self._log_info(f"Ledger drift corrected for {userid}: {diff}")
+        return drift
+
+    def record_change(self, table: Tablenames, id_pk: str, model: Optional[DaaSEntity]):
+        """Accounts objects and instances written to or removed from the database"""
+        if table == Tablenames.Obj:
+            if model is None:
+                self.ledger.remove_object(id_pk)
+            else:
+                self.ledger.record_object(model)
+        elif table == Tablenames.Inst:
+            if model is None:
+                self.ledger.remove_instance(id_pk)
+            else:
+                self.ledger.record_instance(model)
+
+    def record_idle(self, id_instance: str, reason: str):
+        """Accounts an instance whose viewer session expired as reclaimable"""
+        if self.ledger.record_idle(id_instance, reason):
+            usage = self.ledger.get_idle_usage()
+            self._log_info(f"Instance {id_instance} idle ({reason}), idle: {usage}")
+
     async def get_user_limit(self, userid: int) -> Optional[RessourceInfo]:
         """Returns specified user limits if available"""
         limit = await self.dbase.get_limit(userid)
@@ -105,37 +165,83 @@ class RessourceLimits(Loggable):
         """Removes specified user limits if available"""
         return await self.dbase.get_all_limits()
 
-    async def verify_demand(self, userid: int, demand: RessourceInfo) -> bool:
-        """Verfies demand against system and user limits"""
+    async def verify_demand(
+        self, userid: int, demand: RessourceInfo, key: str = ""
+    ) -> bool:
+        """
+        Verfies demand against system and user limits
+
+        With a key, the admitted demand stays reserved until it is released
+        or the reservation expires.
+        """
+        userlimit = await self.get_user_limit(userid)
+        if key != "":
+            return await self.admission.admit(key, userid, demand, userlimit)
+        return self.check_demand(userid, demand, userlimit) == AdmissionCheck.OK
+
+    async def admit_demand(
+        self,
+        userid: int,
+        demand: RessourceInfo,
+        key: str,
+        priority: int = 0,
+        timeout: Optional[float] = None,
+    ) -> bool:
+        """
+        Reserves demand under key, waits for capacity if limits are exceeded
+
+        Waiting requests are served by priority and time out after the
+        configured admission timeout unless another timeout is given.
+        """
+        if timeout is None:
+            timeout = self.config.admission_timeout
+        userlimit = await self.get_user_limit(userid)
+        return await self.admission.admit(
+            key, userid, demand, userlimit, priority, timeout
+        )
+
+    def release_demand(self, key: str):
+        """Releases a reservation once the reserving task is done"""
+        self.admission.release(key)
+
+    def check_demand(
+        self,
+        userid: int,
+        demand: RessourceInfo,
+        userlimit: Optional[RessourceInfo],
+    ) -> AdmissionCheck:
+        """Checks demand against current usage and reservations"""
+        if self.limit_system is None:
+            self.__log_verification("Systemlimit not available")
+            return AdmissionCheck.SYSTEM
         self.__log_verification("Verify system ressources:")
-        check_sys = await self.verify_demand_against_system(demand)
+        sys_res = self.ledger.get_system_usage()
+        sys_res.add(demand)
+        if self.__verify_limits(sys_res, self.limit_system) is False:
+            return AdmissionCheck.SYSTEM
         self.__log_verification("Verify user ressources:")
-        check_usr = await self.verify_demand_against_user(userid, demand)
-        return check_sys and check_usr
+        if userlimit is not None:
+            usr_res = self.ledger.get_usage(userid)
+            usr_res.add(demand)
+            if self.__verify_limits(usr_res, userlimit) is False:
+                return AdmissionCheck.USER
+        return AdmissionCheck.OK
 
     async def verify_demand_against_user(
-        self, userid: int, demand: RessourceInfo
+        self,
+        userid: int,
+        demand: RessourceInfo,
+        userlimit: Optional[RessourceInfo] = None,
     ) -> bool:
         """Verfies demand against user limits"""
-        userlimit = await self.get_user_limit(userid)
+        if userlimit is None:
+            userlimit = await self.get_user_limit(userid)
         if userlimit is None:
             self.__log_verification(f"No limit configured for user {userid}")
             return True
-        objres = await self.objtool.get_objectinfo_user(userid)
-        if objres is None:
-            self.__log_verification(f"Objectinfo not available for user {userid}")
-            return False
-        sys_res = RessourceInfo(
-            userid,
-            objres.object_vms,
-            objres.object_images,
-            objres.objects,
-            objres.utilized_cpus,
-            objres.utilized_memory,
-            objres.utilized_diskspace,
-        )
+        sys_res = self.ledger.get_usage(userid)
         sys_res.add(demand)
-        return await self.__verify_limits(sys_res, userlimit)
+        return self.__verify_limits(sys_res, userlimit)
 
     async def verify_demand_against_system(self, demand: RessourceInfo) -> bool:
         """Verfies demand against system limits"""
@@ -144,21 +250,11 @@ class RessourceLimits(Loggable):
                 self._log_info("Systemlimit not available")
             return False
 
-        objres = await self.objtool.get_objectinfo_system()
-        sys_res = RessourceInfo(
-            -1,
-            objres.object_vms,
-            objres.object_images,
-            objres.objects,
-            objres.utilized_cpus,
-            objres.utilized_memory,
-            objres.utilized_diskspace,
-        )
+        sys_res = self.ledger.get_system_usage()
         sys_res.add(demand)
-        self._log_info(f"Verify objres: {objres}")
         self._log_info(f"Verify sysres: {sys_res}")
         self._log_info(f"Verify demand: {demand}")
-        return await self.__verify_limits(sys_res, self.limit_system)
+        return self.__verify_limits(sys_res, self.limit_system)
 
     async def verify_configured_limit(self) -> bool:
         """Verfies configured system limit"""
@@ -166,8 +262,7 @@ class RessourceLimits(Loggable):
             self.__log_verification("Systemlimit not available")
             return False
         hostres = await self.hosttool.read_host_ressources()
-        objres = await self.objtool.get_objectinfo_system()
-        if hostres is not None and objres is not None:
+        if hostres is not None and self.ledger.loaded:
             info_host = RessourceInfo(
                 -1,
                 -1,
@@ -177,17 +272,15 @@ class RessourceLimits(Loggable):
                 hostres.max_memory,
                 hostres.max_disk_space_data,
             )
-            verified = await self.__verify_limits(self.limit_system, info_host)
+            verified = self.__verify_limits(self.limit_system, info_host)
             if verified is False and self.config.enable_overcommit is True:
                 self.overcommitted = True
                 return True
             return verified
-        self._log_info(f"Required ressources not vailable: {hostres},{objres}")
+        self._log_info(f"Required ressources not vailable: {hostres}")
         return False
 
-    async def __verify_limits(
-        self, demand: RessourceInfo, limit: RessourceInfo
-    ) -> bool:
+    def __verify_limits(self, demand: RessourceInfo, limit: RessourceInfo) -> bool:
         result = True
         failed = ""
         for field in fields(limit):
@@ -197,7 +290,7 @@ class RessourceLimits(Loggable):
 
             limit_value = getattr(limit, fieldname)
             demand_value = getattr(demand, fieldname)
-            checked = await self.__verify_limit(demand_value, limit_value)
+            checked = self.__verify_limit(demand_value, limit_value)
             if checked is False:
                 self.__log_verification(
                     f"Limit {fieldname} exceeded: {demand_value} > {limit_value}"
@@ -211,7 +304,7 @@ class RessourceLimits(Loggable):
 
         return result
 
-    async def __verify_limit(self, demand: int, limit: int):
+    def __verify_limit(self, demand: int, limit: int):
         result = False
         if limit == -1:
             result = True
@@ -219,6 +312,14 @@ class RessourceLimits(Loggable):
             result = True
         return result
 
+    async def __run_audit(self):
+        while True:
+            await asyncio.sleep(self.config.audit_interval)
+            try:
+                await self.audit()
+            except (SystemError, ValueError) as exe:
+                self._log_error(f"Ledger audit failed: {exe}")
+
     def __log_verification(self, msg: str):
         if self.config.log_verification:
             self._log_info(msg)
@@ -0,0 +1,131 @@
+"""Test admission of concurrent demand bursts against a shared capacity."""
+
+import asyncio
+import random
+from types import SimpleNamespace
+
+from app.daas.common.model import RessourceInfo
+from .ressource_admission import AdmissionCheck, AdmissionController
+from .ressource_ledger import RessourceLedger
+
+CAPACITY_CPUS = 8
+USER_CPUS = 4
+
+
+def _demand(userid: int, cpus: int) -> RessourceInfo:
+    return RessourceInfo(userid, 0, 1, 1, cpus, 0, 0)
+
+
+def _controller(queue_size: int = 100) -> AdmissionController:
+    ledger = RessourceLedger(reservation_timeout=60)
+
+    def check(userid, demand, userlimit):
+        if ledger.get_system_usage().cpu_max + demand.cpu_max > CAPACITY_CPUS:
+            return AdmissionCheck.SYSTEM
+        if userlimit is not None:
+            used = ledger.get_usage(userid).cpu_max + demand.cpu_max
+            if used > userlimit.cpu_max:
+                return AdmissionCheck.USER
+        return AdmissionCheck.OK
+
+    return AdmissionController(ledger, check, queue_size, recheck_interval=0.05)
+
+
+def test_bursts_never_exceed_capacity():
+    """Concurrent bursts are admitted within limits, failures free capacity."""
+    rng = random.Random(7)
+    controller = _controller()
+    ledger = controller.ledger
+    limit = _demand(0, USER_CPUS)
+    peaks = {"system": 0, "user": 0}
+    outcome = {"landed": 0, "failed": 0, "timedout": 0}
+
+    async def task(index: int):
+        userid = index % 3
+        key = f"obj{index}"
+        demand = _demand(userid, rng.choice([1, 2]))
+        if not await controller.admit(key, userid, demand, limit, timeout=2.0):
+            outcome["timedout"] += 1
+            return
+        peaks["system"] = max(peaks["system"], ledger.get_system_usage().cpu_max)
+        peaks["user"] = max(peaks["user"], ledger.get_usage(userid).cpu_max)
+        await asyncio.sleep(rng.uniform(0.001, 0.02))
+        if rng.random() < 0.3:
+            controller.release(key)
+            outcome["failed"] += 1
+            return
+        inst = SimpleNamespace(
+            id=f"inst{index}",
+            id_owner=userid,
+            app=SimpleNamespace(
+                id=key, hw_cpus=demand.cpu_max, hw_memory=0, hw_disksize=0
+            ),
+        )
+        ledger.record_instance(inst)
+        controller.release(key)
+        await asyncio.sleep(rng.uniform(0.001, 0.02))
+        ledger.remove_instance(inst.id)
+        outcome["landed"] += 1
+
+    async def run():
+        for _ in range(3):
+            await asyncio.gather(*[task(index) for index in range(40)])
+
+    asyncio.run(run())
+    assert peaks["system"] <= CAPACITY_CPUS
+    assert peaks["user"] <= USER_CPUS
+    assert outcome["timedout"] == 0
+    assert outcome["landed"] + outcome["failed"] == 120
+    assert ledger.get_system_usage().cpu_max == 0
+    assert len(controller.queue) == 0
+
+
+def test_priority_timeout_and_rejection():
+    """Waiting demand is served by priority, times out or is rejected."""
+    controller = _controller(queue_size=2)
+    order = []
+
+    async def waiter(key: str, priority: int, timeout: float):
+        admitted = await controller.admit(
+            key, 1, _demand(1, 4), None, priority, timeout
+        )
+        order.append((key, admitted))
+
+    async def run():
+        assert await controller.admit("full", 1, _demand(1, 8), None)
+        assert not await controller.admit("now", 1, _demand(1, 1), None)
+        tasks = [
+            asyncio.create_task(waiter("low", 0, 1.0)),
+            asyncio.create_task(waiter("high", 5, 1.0)),
+        ]
+        await asyncio.sleep(0.01)
+        assert not await controller.admit("full", 1, _demand(1, 1), None, 0, 1.0)
+        controller.release("full")
+        await asyncio.gather(*tasks)
+        assert await controller.admit("late", 1, _demand(1, 4), None, 0, 0.1) is False
+
+    asyncio.run(run())
+    assert order == [("high", True), ("low", True)]
+    assert controller.tojson()["timedout"] == 1
+    assert controller.tojson()["rejected"] == 2
+
+
+def test_cancelled_waiter_releases_admitted_demand():
+    """A waiter cancelled right after its admission releases the demand."""
+    controller = _controller()
+    ledger = controller.ledger
+
+    async def run():
+        assert await controller.admit("full", 1, _demand(1, 8), None)
+        waiter = asyncio.create_task(
+            controller.admit("queued", 1, _demand(1, 4), None, 0, 1.0)
+        )
+        await asyncio.sleep(0.01)
+        ledger.release("full")
+        assert "queued" in ledger.reservations
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return waiter.cancelled()
+
+    assert asyncio.run(run())
+    assert ledger.reservations == {}
@@ -0,0 +1,94 @@
+"""Test running ressource totals of the ledger."""
+
+from types import SimpleNamespace
+
+from app.daas.common.model import RessourceInfo
+from .ressource_ledger import RessourceLedger
+
+
+def _obj(objid: str, owner: int, objtype: str = "vm"):
+    return SimpleNamespace(
+        id=objid,
+        id_owner=owner,
+        object_type=objtype,
+        hw_cpus=2,
+        hw_memory=1024,
+        hw_disksize=4096,
+    )
+
+
+def _inst(instid: str, app):
+    return SimpleNamespace(id=instid, id_owner=app.id_owner, app=app)
+
+
+def test_ledger_accounts_reserves_and_audits():
+    """Totals follow records, reservations count until released."""
+    ledger = RessourceLedger(reservation_timeout=60)
+    vm1, cnt1 = _obj("vm1", 1), _obj("cnt1", 1, "container")
+    ledger.load([vm1, cnt1, _obj("vm2", 2)], [_inst("i1", vm1)])
+    usage = ledger.get_usage(1)
+    assert (usage.vm_max, usage.container_max, usage.obj_max) == (1, 1, 2)
+    assert (usage.cpu_max, usage.mem_max, usage.dsk_max) == (2, 1024, 4096)
+    assert ledger.get_system_usage().obj_max == 3
+
+    ledger.record_object(vm1)
+    ledger.record_instance(_inst("i1", vm1))
+    assert ledger.get_usage(1).obj_max == 2 and ledger.get_usage(1).cpu_max == 2
+
+    demand = RessourceInfo(1, 0, 1, 1, 2, 1024, 4096)
+    ledger.reserve("cnt1:a", 1, demand)
+    ledger.reserve("cnt1:b", 2, RessourceInfo(2, 0, 1, 1, 2, 1024, 4096))
+    assert ledger.get_usage(1).cpu_max == 4
+    assert ledger.get_system_usage().cpu_max == 6
+    ledger.record_instance(_inst("i2", cnt1))
+    assert ledger.get_usage(1).cpu_max == 6 and len(ledger.reservations) == 2
+    ledger.release("cnt1:a")
+    ledger.release("cnt1:b")
+    assert ledger.get_usage(1).cpu_max == 4 and len(ledger.reservations) == 0
+
+    ledger.record_object(_obj("new", 2, "container"))
+    ledger.reserve("gone", 2, demand)
+    ledger.reservations["gone"].expires = 0
+    assert ledger.get_usage(2).cpu_max == 0
+
+    ledger.remove_instance("i2")
+    ledger.remove_object("vm1")
+    remaining = RessourceInfo(1, 0, 1, 1, 0, 0, 0)
+    assert ledger.get_usage(1).get_data() == remaining.get_data()
+    drift = ledger.load([vm1, cnt1, _obj("vm2", 2)], [])
+    assert drift == {
+        1: {"objects": 1, "vms": 1},
+        2: {"objects": -1, "containers": -1},
+    }
+
+
+def test_subscribers_receive_affected_owner():
+    """Changes notify the owners whose usage changed, a reload all owners."""
+    ledger = RessourceLedger(reservation_timeout=60)
+    owners = []
+    ledger.subscribe(owners.append)
+    vm1 = _obj("vm1", 1)
+    ledger.record_object(vm1)
+    ledger.record_instance(_inst("i1", _obj("cnt2", 2, "container")))
+    ledger.reserve("r3", 3, RessourceInfo(3, 0, 1, 1, 2, 1024, 4096))
+    ledger.release("r3")
+    ledger.record_object(_obj("vm1", 4))
+    ledger.remove_instance("missing")
+    ledger.load([vm1], [])
+    assert owners == [1, 2, 3, 1, 4, None]
+
+
+def test_idle_instances_are_reported_until_stopped():
+    """Expired sessions mark instances idle until they are used or removed."""
+    ledger = RessourceLedger(reservation_timeout=60)
+    vm1, vm2 = _obj("vm1", 1), _obj("vm2", 2)
+    ledger.load([vm1, vm2], [_inst("i1", vm1), _inst("i2", vm2)])
+    assert ledger.record_idle("i1", "idle") and ledger.record_idle("i2", "limit")
+    assert not ledger.record_idle("unknown", "idle")
+    assert ledger.get_idle_usage().cpu_max == 4
+    assert ledger.get_idle_usage(1).cpu_max == 2
+    ledger.record_instance(_inst("i1", vm1))
+    assert ledger.get_idle_usage(1).cpu_max == 0
+    ledger.remove_instance("i2")
+    assert ledger.get_idle_usage().cpu_max == 0 and ledger.idle == {}
+    assert ledger.get_system_usage().cpu_max == 2
@@ -1,21 +1,36 @@
 """Filestore component to manage local and remote file access"""
 
+from typing import Optional
 from app.daas.storage.local.fs_config import FilestoreConfig
 from app.daas.storage.local.fs_docker import FilestoreDocker
+from app.daas.storage.local.fs_usage import DirectoryUsage, DirectoryUsageConfig
 
 
 class Filestore(FilestoreDocker):
     """Filestore to keep track of files"""
 
-    def __init__(self, config: FilestoreConfig):
-
+    def __init__(
+        self,
+        config: FilestoreConfig,
+        config_usage: Optional[DirectoryUsageConfig] = None,
+    ):
         super().__init__(config)
+        if config_usage is not None:
+            self.usage = DirectoryUsage(config_usage)
 
     async def initialize(self) -> bool:
         """Create intial folders"""
         init_db = await self.initialize_database()
         init_fs = await self.initialize_filesystem()
         init_perm = await self.initialize_permissions()
+        await self.usage.start(
+            [
+                self.config.folder_tmp,
+                self.config.folder_upload,
+                self.config.folder_shared,
+                self.config.folder_docker,
+            ]
+        )
         success = init_fs and init_perm and init_db
         if success is False:
             self._log_error("Filestore NOT initialized")
@@ -28,5 +43,6 @@ class Filestore(FilestoreDocker):
 
     async def disconnect(self) -> bool:
         """Disconnects the component"""
+        await self.usage.stop()
         self.connected = False
         return True
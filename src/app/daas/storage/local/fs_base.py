@@ -3,6 +3,7 @@
 import os
 import uuid
 from app.daas.storage.local.fs_config import FilestoreConfig
+from app.daas.storage.local.fs_usage import DirectoryUsage, DirectoryUsageConfig
 from app.qweb.common.qweb_tools import get_database
 from app.qweb.logging.logging import LogTarget, Loggable
 
@@ -14,6 +15,7 @@ class FilestoreBase(Loggable):
         Loggable.__init__(self, LogTarget.FILES_LOCAL)
         self.dbase = None
         self.config = config
+        self.usage = DirectoryUsage(DirectoryUsageConfig())
 
     async def initialize_filesystem(self) -> bool:
         """Create intial folders"""
@@ -1,5 +1,6 @@
 """Baseclass for docker filestore"""
 
+import asyncio
 import os
 import shutil
 from app.daas.common.model import File
@@ -54,6 +55,7 @@ class FilestoreDocker(FilestoreUploads):
                 file.write("\n# RUN INSTALLERS\n")
                 for installer in installers:
                     file.write(f"RUN {installer}\n")
+        self.usage.record_write(dstfile)
 
         result = dstfile
         assert os.path.exists(result)
@@ -91,6 +93,7 @@ class FilestoreDocker(FilestoreUploads):
 
         with open(dstfile, "w", encoding="UTF-8") as dockerfile:
             lines = dockerfile.writelines(lines)
+        self.usage.record_write(dstfile)
 
         result = dstfile
         assert os.path.exists(result)
@@ -125,6 +128,7 @@ class FilestoreDocker(FilestoreUploads):
                 file.write("# RUN INSTALLERS\n")
                 for installer in installers:
                     file.write(f"RUN {installer}\n")
+        self.usage.record_write(dockerfile)
         if len(files) > 0:
             for file in files:
                 self._log_info(f"FILE: {file}")
@@ -152,6 +156,7 @@ class FilestoreDocker(FilestoreUploads):
         if found_from_line:
             with open(dockerfile, "w", encoding="UTF-8") as file:
                 file.write("\n".join(new_dockerfile_content))
+            self.usage.record_write(dockerfile)
         self._log_info(f"Updated FROM tag for {name} (owner={userid})")
 
     async def get_docker_envfile(self, userid: int, imgname: str, envname: str) -> str:
@@ -175,6 +180,7 @@ class FilestoreDocker(FilestoreUploads):
         dstfile = f"{dstfolder}/Dockerfile.{envname}"
         if os.path.exists(dstfile):
             os.remove(dstfile)
+            self.usage.record_delete(dstfile)
         assert os.path.exists(result) is False
         return result
 
@@ -194,6 +200,7 @@ class FilestoreDocker(FilestoreUploads):
         # Copy as template
         with open(f"{dstfolder}/Dockerfile", "w", encoding="UTF-8") as file:
             file.write(f"FROM {imagename}\n")
+        self.usage.record_write(f"{dstfolder}/Dockerfile")
         # copy folder
         # shutil.copytree(dockerfolder, dstfolder, dirs_exist_ok=True)
 
@@ -219,6 +226,7 @@ class FilestoreDocker(FilestoreUploads):
             shutil.copy(dockerfile, dstfolder)
         else:
             shutil.copytree(dockerfolder, dstfolder, dirs_exist_ok=True)
+        await asyncio.to_thread(self.usage.record_tree, dstfolder)
 
         assert os.path.exists(dstfolder)
         result = f"{dstfolder}/Dockerfile"
@@ -244,6 +252,7 @@ class FilestoreDocker(FilestoreUploads):
             shutil.copy(dockerfile, dstfile)
         else:
             shutil.copytree(dockerfolder, dstfolder, dirs_exist_ok=True)
+        await asyncio.to_thread(self.usage.record_tree, dstfolder)
 
         assert os.path.exists(dstfile)
         return dstfile
@@ -254,6 +263,7 @@ class FilestoreDocker(FilestoreUploads):
         """
         folder = await self.get_user_folder_docker(userid, subdir)
         shutil.rmtree(folder)
+        await asyncio.to_thread(self.usage.record_tree, folder)
 
         assert os.path.exists(folder) is False
         return True
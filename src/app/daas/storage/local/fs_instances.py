@@ -1,11 +1,16 @@
 """ Baseclass for instance filestore"""
 
 import os
-from app.daas.common.model import File, Instance
+from typing import TYPE_CHECKING
+from app.daas.adapter.adapter_transfer import TransferEntry
+from app.daas.common.model import File
 from app.daas.storage.local.fs_permissions import FilestorePermissions
 from app.daas.storage.local.fs_config import FilestoreConfig
 from app.qweb.common.qweb_tools import get_database
 
+if TYPE_CHECKING:
+    from app.daas.objects.object_instance import InstanceObject
+
 CMD_LINUX_CHMOD = "/usr/bin/chmod"
 CMD_LINUX_XTERM = "/usr/bin/xterm"
 CMD_LINUX_MKDIR = "mkdir"
@@ -39,28 +44,50 @@ class FilestoreInstances(FilestorePermissions):
                 return 0, ret.sys_log, ""
         return 1, "", "No instance"
 
-    async def upload_file_to_instance(self, file: File, instance: Instance) -> bool:
-        """Upload file to tmp folder"""
-        srcfile = file.localpath
-        dstfile = file.remotepath
-
-        windows = False
-        if instance.app.os_type in ("win10", "win11"):
-            windows = True
-        return await self.__upload_inst_file(
-            adr=instance.host,
-            filename=srcfile,
-            folder=dstfile,
-            windows=windows,
-            remote_name=file.name,
-        )
+    async def upload_file_to_instance(
+        self, file: File, instance: "InstanceObject"
+    ) -> bool:
+        """Upload file to tmp folder and its remote path"""
+        copied = await self.upload_files_to_instance([file], instance)
+        return copied[file.id]
+
+    async def upload_files_to_instance(
+        self, files: list[File], instance: "InstanceObject"
+    ) -> dict[str, bool]:
+        """
+        Upload files to tmp folder and their remote path
+
+        All files are sent within a single transfer, a file is copied if
+        both of its destinations were confirmed.
+        """
+        uploads = [file for file in files if os.path.exists(file.localpath)]
+        result = {file.id: False for file in files}
+        if len(uploads) == 0:
+            return result
+        windows = instance.app.os_type in ("win10", "win11")
+        entries = []
+        for file in uploads:
+            tmpfile = await self.get_filename_instance(file.localpath, windows, "tmp")
+            entries.append(TransferEntry(file.localpath, tmpfile))
+            entries.append(
+                TransferEntry(file.localpath, f"{file.remotepath}/{file.name}")
+            )
+        ret = await instance.inst_vminvoke_upload_entries(entries)
+        if isinstance(ret.response_data, dict):
+            states = ret.response_data.get("files", [])
+            for index, file in enumerate(uploads):
+                confirmed = states[2 * index : 2 * index + 2]
+                result[file.id] = len(confirmed) == 2 and all(
+                    state["confirmed"] for state in confirmed
+                )
+        return result
 
     async def upload_inst_file_upload(
         self, adr: str, filename: str, os_username: str, windows: bool
-    ):
+    ) -> bool:
         """Uploads file to upload folder"""
-        folder = await self.get_inst_folder_upload(adr, os_username, windows, True)
-        return self.__upload_inst_file(adr, filename, folder, windows)
+        folder = await self.__get_inst_folder_upload(os_username, windows, True)
+        return await self.__upload_inst_file(adr, filename, folder)
 
     async def upload_inst_file_tmp(
         self,
@@ -70,8 +97,8 @@ class FilestoreInstances(FilestorePermissions):
         windows: bool,
     ) -> bool:
         """Uploads file to tmp folder"""
-        folder = await self.get_inst_folder_tmp(adr, os_username, windows, True)
-        return await self.__upload_inst_file(adr, filename, folder, windows)
+        folder = await self.__get_inst_folder_tmp(os_username, windows, True)
+        return await self.__upload_inst_file(adr, filename, folder)
 
     # pylint: disable=too-many-arguments
     async def execute_inst_file_tmp(
@@ -291,36 +318,24 @@ class FilestoreInstances(FilestorePermissions):
         return result
 
     async def __upload_inst_file(
-        self, adr: str, filename: str, folder: str, windows: bool, remote_name: str = ""
+        self, adr: str, filename: str, folder: str, remote_name: str = ""
     ) -> bool:
         """
-        Upload file to instance
+        Upload file to folder within instance
+
+        The transfer creates missing folders, so the upload takes a single
+        round trip.
         """
         from app.daas.db.database import Database
 
         dbase = await get_database(Database)
-
-        result = False
         instance = await dbase.get_instance_by_adr(adr)
-
-        if instance is not None:
-            if os.path.exists(filename) is False:
-                return False
-            name = os.path.basename(filename)
-            norm_folder = f"{folder}/{name}"
-            if remote_name != "":
-                norm_folder = f"{folder}/{remote_name}"
-            if windows:
-                if remote_name != "":
-                    norm_folder = f"{folder}/{remote_name}"
-                else:
-                    norm_folder = f"{folder}/{name}"
-            ret = await instance.inst_vminvoke_upload(
-                filename, instance.app.os_type in ("win10", "win11"), False
-            )
-            if ret is not None and ret.response_code == 200:
-                result = True
-        return result
+        if instance is None or os.path.exists(filename) is False:
+            return False
+        name = remote_name if remote_name != "" else os.path.basename(filename)
+        entry = TransferEntry(filename, f"{folder}/{name}")
+        ret = await instance.inst_vminvoke_upload_entries([entry])
+        return ret.response_code == 200
 
     async def __get_windows_prefix_pstools(
         self,
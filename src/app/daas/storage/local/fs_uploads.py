@@ -19,6 +19,7 @@ class FilestoreUploads(FilestoreInstances):
         dstfile = f"{dstfolder}/{id_file}.file"
         if os.path.exists(dstfile):
             os.remove(dstfile)
+            self.usage.record_delete(dstfile)
         assert os.path.exists(dstfile) is False
         return True
 
@@ -28,6 +29,7 @@ class FilestoreUploads(FilestoreInstances):
         dstfile = f"{dstfolder}/{id_file}.file"
         if os.path.exists(dstfile):
             os.remove(dstfile)
+            self.usage.record_delete(dstfile)
         assert os.path.exists(dstfile) is False
         return True
 
@@ -39,6 +41,7 @@ class FilestoreUploads(FilestoreInstances):
         if received_file is not None:
             self._log_info(f"Persisting {name} to {fullname}")
             await received_file.save(fullname)
+            self.usage.record_write(fullname)
             if os.path.exists(fullname):
                 self._log_info(f"  0 -> Persisted {name} to {fullname}")
                 result = True
@@ -90,5 +93,6 @@ class FilestoreUploads(FilestoreInstances):
         folder = await self.get_user_folder_docker(userid, subdir)
         if os.path.exists(srcfile):
             shutil.copyfile(srcfile, f"{folder}/{name}")
+            self.usage.record_write(f"{folder}/{name}")
             return True
         return False
@@ -0,0 +1,273 @@
+"""
+Incremental usage index for local filestore folders
+
+The index is seeded by a single scan of every root folder and then kept
+up to date by the filestore's own write and delete hooks. If the
+optional package `inotify_simple` is installed, changes made by other
+processes are picked up as well. A periodic reconciliation scan corrects
+any remaining drift, so usage queries never walk the tree.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from app.qweb.logging.logging import LogTarget, Loggable
+
+try:
+    import inotify_simple  # type: ignore
+except ImportError:
+    inotify_simple = None
+
+
+@dataclass(kw_only=True)
+class DirectoryUsageConfig:
+    """Config data for DirectoryUsage"""
+
+    enabled: bool = True
+    use_inotify: bool = True
+    reconcile_interval: float = 3600.0
+    reconcile_batch: int = 1000
+    reconcile_pause: float = 0.01
+
+
+class DirectoryUsage(Loggable):
+    """
+    Keeps track of the bytes used below a set of root folders
+    """
+
+    def __init__(self, config: DirectoryUsageConfig):
+        Loggable.__init__(self, LogTarget.FILES_LOCAL)
+        self.config = config
+        self.lock = threading.Lock()
+        self.files: dict[str, dict[str, int]] = {}
+        self.totals: dict[str, int] = {}
+        self.dirty: dict[str, set[str]] = {}
+        self.drift: dict[str, int] = {}
+        self.reconciled_at: dict[str, float] = {}
+        self.task_reconcile: Optional[asyncio.Task] = None
+        self.watcher: Optional[_InotifyWatcher] = None
+
+    async def start(self, roots: list[str]):
+        """Scans all roots and starts watching and reconciliation"""
+        if self.config.enabled is False:
+            return
+        for root in roots:
+            await asyncio.to_thread(self.add_root, root)
+        if self.config.use_inotify and inotify_simple is not None:
+            self.watcher = _InotifyWatcher(self)
+            self.watcher.start()
+        if self.config.reconcile_interval > 0:
+            self.task_reconcile = asyncio.create_task(self.__run_reconcile())
+        watching = "inotify" if self.watcher is not None else "hooks"
+        self._log_info(f"DirectoryUsage tracking {len(self.totals)} roots ({watching})")
+
+    async def stop(self):
+        """Stops watching and reconciliation"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        if self.task_reconcile is not None:
+            self.task_reconcile.cancel()
+            await asyncio.gather(self.task_reconcile, return_exceptions=True)
+            self.task_reconcile = None
+
+    def add_root(self, folder: str) -> int:
+        """Adds a root folder and returns its initial usage"""
+        root = os.path.abspath(folder)
+        files = self.__scan(root, 0)
+        with self.lock:
+            self.files[root] = files
+            self.totals[root] = sum(files.values())
+            self.drift[root] = 0
+            self.reconciled_at[root] = time.time()
+            return self.totals[root]
+
+    def get_usage(self, folder: str) -> Optional[int]:
+        """Returns used bytes of a root folder or None if not tracked"""
+        return self.totals.get(os.path.abspath(folder))
+
+    def record_write(self, path: str):
+        """Updates the index after a file was written"""
+        abspath = os.path.abspath(path)
+        root = self.__get_root(abspath)
+        if root is None:
+            return
+        try:
+            size = os.path.getsize(abspath)
+        except OSError:
+            self.record_delete(abspath)
+            return
+        with self.lock:
+            self.__set_size(root, abspath, size)
+
+    def record_delete(self, path: str):
+        """Updates the index after a file was deleted"""
+        abspath = os.path.abspath(path)
+        root = self.__get_root(abspath)
+        if root is None:
+            return
+        with self.lock:
+            self.__set_size(root, abspath, None)
+
+    def record_tree(self, folder: str):
+        """Updates the index after a folder was copied, replaced or removed"""
+        absfolder = os.path.abspath(folder)
+        root = self.__get_root(absfolder)
+        if root is None:
+            return
+        files = self.__scan(absfolder, 0)
+        prefix = f"{absfolder}{os.sep}"
+        with self.lock:
+            known = [p for p in self.files[root] if p.startswith(prefix)]
+            for path in known:
+                if path not in files:
+                    self.__set_size(root, path, None)
+            for path, size in files.items():
+                self.__set_size(root, path, size)
+
+    def reconcile(self) -> dict[str, int]:
+        """Rescans all roots and returns the corrected drift in bytes"""
+        result = {}
+        for root in list(self.totals):
+            with self.lock:
+                self.dirty[root] = set()
+            files = self.__scan(root, self.config.reconcile_batch)
+            with self.lock:
+                for path in self.dirty.pop(root, set()):
+                    try:
+                        files[path] = os.path.getsize(path)
+                    except OSError:
+                        files.pop(path, None)
+                total = sum(files.values())
+                result[root] = self.totals[root] - total
+                self.files[root] = files
+                self.totals[root] = total
+                self.drift[root] = result[root]
+                self.reconciled_at[root] = time.time()
+        return result
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {
+            root: {
+                "usage": total,
+                "files": len(self.files.get(root, {})),
+                "drift": self.drift.get(root, 0),
+                "reconciled_at": self.reconciled_at.get(root, 0.0),
+            }
+            for root, total in self.totals.items()
+        }
+
+    def __get_root(self, abspath: str) -> Optional[str]:
+        for root in self.totals:
+            if abspath == root or abspath.startswith(f"{root}{os.sep}"):
+                return root
+        return None
+
+    def __set_size(self, root: str, path: str, size: Optional[int]):
+        files = self.files[root]
+        previous = files.pop(path, 0)
+        if size is not None:
+            files[path] = size
+        self.totals[root] += (size or 0) - previous
+        dirty = self.dirty.get(root)
+        if dirty is not None:
+            dirty.add(path)
+
+    def __scan(self, folder: str, batch: int) -> dict[str, int]:
+        """Walks folder, pauses after every batch of entries if batch > 0"""
+        files: dict[str, int] = {}
+        pending = [folder]
+        visited = 0
+        while len(pending) > 0:
+            current = pending.pop()
+            try:
+                entries = list(os.scandir(current))
+            except OSError:
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        files[entry.path] = entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+                visited += 1
+                if batch > 0 and visited % batch == 0:
+                    time.sleep(self.config.reconcile_pause)
+        return files
+
+    async def __run_reconcile(self):
+        while True:
+            await asyncio.sleep(self.config.reconcile_interval)
+            drift = await asyncio.to_thread(self.reconcile)
+            for root, value in drift.items():
+                if value != 0:
+                    self._log_info(f"Corrected usage drift of {value} bytes: {root}")
+
+
+class _InotifyWatcher:
+    """Forwards inotify events of all folders below the roots to the index"""
+
+    def __init__(self, usage: DirectoryUsage):
+        assert inotify_simple is not None
+        flags = inotify_simple.flags
+        self.usage = usage
+        self.inotify = inotify_simple.INotify()
+        self.mask = (
+            flags.CLOSE_WRITE
+            | flags.CREATE
+            | flags.DELETE
+            | flags.MOVED_FROM
+            | flags.MOVED_TO
+        )
+        self.folders: dict[int, str] = {}
+        self.running = False
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Adds watches and starts reading events in a daemon thread"""
+        for root in list(self.usage.totals):
+            self.__watch_tree(root)
+        self.running = True
+        self.thread = threading.Thread(
+            target=self.__run, name="DirectoryUsage", daemon=True
+        )
+        self.thread.start()
+
+    def stop(self):
+        """Stops reading events"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2)
+        self.inotify.close()
+
+    def __watch_tree(self, folder: str):
+        for current, _, _ in os.walk(folder):
+            try:
+                descriptor = self.inotify.add_watch(current, self.mask)
+            except OSError:
+                continue
+            self.folders[descriptor] = current
+
+    def __run(self):
+        flags = inotify_simple.flags  # type: ignore
+        while self.running:
+            for event in self.inotify.read(timeout=1000):
+                folder = self.folders.get(event.wd)
+                if folder is None or event.name == "":
+                    continue
+                path = os.path.join(folder, event.name)
+                if event.mask & flags.ISDIR:
+                    if event.mask & (flags.CREATE | flags.MOVED_TO):
+                        self.__watch_tree(path)
+                    self.usage.record_tree(path)
+                elif event.mask & (flags.DELETE | flags.MOVED_FROM):
+                    self.usage.record_delete(path)
+                else:
+                    self.usage.record_write(path)
@@ -0,0 +1,57 @@
+"""Test placement of files uploaded to instances."""
+
+import asyncio
+import os
+import tempfile
+from types import SimpleNamespace
+
+from .fs_config import FilestoreConfig
+from .fs_instances import FilestoreInstances
+
+
+class _FakeInstance:
+    def __init__(self, confirmed: set[str]):
+        self.app = SimpleNamespace(os_type="l26")
+        self.confirmed = confirmed
+        self.entries: list = []
+
+    async def inst_vminvoke_upload_entries(self, entries: list):
+        self.entries.extend(entries)
+        states = [{"confirmed": entry.dst in self.confirmed} for entry in entries]
+        return SimpleNamespace(response_code=200, response_data={"files": states})
+
+
+def test_files_reach_tmp_and_remote_path():
+    """Files go to tmp and to remotepath/name within a single transfer."""
+    folder = tempfile.mkdtemp(dir="/tmp")
+    files = []
+    for index in range(2):
+        localpath = os.path.join(folder, f"local{index}.exe")
+        with open(localpath, "wb") as file:
+            file.write(b"data")
+        files.append(
+            SimpleNamespace(
+                id=f"f{index}",
+                localpath=localpath,
+                remotepath="/root/shared",
+                name=f"setup{index}.exe",
+            )
+        )
+    files.append(
+        SimpleNamespace(id="gone", localpath="/nonexistent", remotepath="", name="")
+    )
+    confirmed = {
+        "/root/daas/tmp/local0.exe",
+        "/root/shared/setup0.exe",
+        "/root/daas/tmp/local1.exe",
+    }
+    instance = _FakeInstance(confirmed)
+    store = FilestoreInstances(FilestoreConfig.__new__(FilestoreConfig))
+    copied = asyncio.run(store.upload_files_to_instance(files, instance))
+    assert [(entry.src, entry.dst) for entry in instance.entries] == [
+        (files[0].localpath, "/root/daas/tmp/local0.exe"),
+        (files[0].localpath, "/root/shared/setup0.exe"),
+        (files[1].localpath, "/root/daas/tmp/local1.exe"),
+        (files[1].localpath, "/root/shared/setup1.exe"),
+    ]
+    assert copied == {"f0": True, "f1": False, "gone": False}
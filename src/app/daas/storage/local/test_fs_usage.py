@@ -0,0 +1,39 @@
+"""Test the incremental usage index of filestore folders."""
+
+import os
+import shutil
+
+from .fs_usage import DirectoryUsage, DirectoryUsageConfig
+
+
+def test_usage_follows_hooks_and_reconciles(tmp_path):
+    """Hooks keep totals exact, reconciliation corrects foreign changes."""
+    root = tmp_path / "upload"
+    (root / "1").mkdir(parents=True)
+    (root / "1" / "a.file").write_bytes(b"x" * 100)
+    usage = DirectoryUsage(DirectoryUsageConfig(use_inotify=False))
+    assert usage.add_root(str(root)) == 100
+    assert usage.get_usage(str(tmp_path / "other")) is None
+
+    (root / "1" / "b.file").write_bytes(b"x" * 50)
+    usage.record_write(str(root / "1" / "b.file"))
+    (root / "1" / "a.file").write_bytes(b"x" * 10)
+    usage.record_write(str(root / "1" / "a.file"))
+    usage.record_write(str(tmp_path / "outside.file"))
+    assert usage.get_usage(str(root)) == 60
+
+    os.remove(root / "1" / "b.file")
+    usage.record_delete(str(root / "1" / "b.file"))
+    assert usage.get_usage(str(root)) == 10
+
+    shutil.copytree(root / "1", root / "2" / "img")
+    usage.record_tree(str(root / "2"))
+    assert usage.get_usage(str(root)) == 20
+    shutil.rmtree(root / "2")
+    usage.record_tree(str(root / "2"))
+    assert usage.get_usage(str(root)) == 10
+
+    (root / "foreign.file").write_bytes(b"x" * 1000)
+    assert usage.reconcile() == {str(root): -1000}
+    assert usage.get_usage(str(root)) == 1010
+    assert usage.tojson()[str(root)]["files"] == 2
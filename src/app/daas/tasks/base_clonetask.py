@@ -1,11 +1,18 @@
+import asyncio
 from dataclasses import asdict, dataclass
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 from quart import json
 from app.daas.common.model import Environment, File
 from app.daas.objects.object_application import ApplicationObject
 from app.daas.objects.object_container import ContainerObject
 from app.daas.objects.object_instance import InstanceObject
 from app.daas.objects.object_machine import MachineObject
+from app.daas.tasks.task_journal import (
+    STEP_START,
+    JournalState,
+    TaskJournal,
+    get_serializable_args,
+)
 from app.daas.tasks.task_config import (
     ApplistObject,
     CloneTaskConfig,
@@ -14,8 +21,15 @@ from app.daas.tasks.task_config import (
     TasklistObject,
 )
 from app.plugins.platform.phases.enums import PhasesSystemTask
-from app.qweb.common.qweb_tools import run_system_task
+from app.qweb.common.qweb_tools import (
+    get_database,
+    get_service,
+    run_system_task,
+    wait_system_task,
+)
+from app.qweb.service.service_context import ServiceComponent
 from app.qweb.logging.logging import LogTarget, Loggable
+from app.qweb.processing.processor import QwebResult
 
 
 class CloneTaskBase(Loggable):
@@ -27,16 +41,106 @@ class CloneTaskBase(Loggable):
         assert self.cfg.args.args is not None
         assert self.cfg.args.args["app"] is not None
         assert self.cfg.args.args["obj"] is not None
-        assert self.cfg.args.args["inst"] is not None
         self.args = self.cfg.args.args
         assert self.args is not None
         assert isinstance(self.args["app"], ApplicationObject)
         assert isinstance(self.args["obj"], MachineObject | ContainerObject)
-        assert isinstance(self.args["inst"], InstanceObject)
+        assert isinstance(self.args.get("inst"), InstanceObject | None)
         self.app: ApplicationObject = self.args["app"]
         self.obj: MachineObject | ContainerObject = self.args["obj"]
-        self.inst: InstanceObject = self.args["inst"]
+        # resumed tasks get the instance, new tasks start it themselves
+        self.inst: Optional[InstanceObject] = self.args.get("inst")
         self.env: Optional[Environment] = None
+        self.journal: Optional[TaskJournal] = None
+
+    async def _run_journaled(
+        self, tasktype: str, pipeline: Callable[[], Awaitable[QwebResult]]
+    ) -> QwebResult:
+        """
+        Runs pipeline while recording its progress in the task journal.
+
+        Cancelled tasks are finished in the journal, unless the service
+        shuts down, which keeps them resumable after the restart.
+        """
+        self.journal = await TaskJournal.open(
+            self.cfg.args.id_task,
+            tasktype,
+            self.obj.id_owner,
+            self.obj.id,
+            self.inst.id if self.inst is not None else "",
+            {**self.args, "id_app": self.app.id},
+        )
+        if self.journal.resumed:
+            await self._restore_state()
+        try:
+            result = await pipeline()
+        except asyncio.CancelledError:
+            if await self._is_stopping() is False:
+                await self.journal.finish(JournalState.CANCELLED, "Task cancelled")
+            raise
+        except Exception as exe:
+            reason = type(exe).__name__
+            if f"{exe}" != "":
+                reason = f"{reason}: {exe}"
+            await self.journal.finish(JournalState.FAILED, reason)
+            raise
+        if result.response_code == 200:
+            await self.journal.finish(JournalState.DONE)
+        else:
+            await self.journal.finish(JournalState.FAILED, result.error_message)
+        return result
+
+    async def _is_stopping(self) -> bool:
+        from app.qweb.service.service_tasks import QwebTaskManager
+
+        mancomp = await get_service(ServiceComponent.TASK, QwebTaskManager)
+        return mancomp.stopping
+
+    async def _run_step(self, name: str, step: Callable[[], Awaitable]) -> bool:
+        """Runs step unless it was completed before a restart"""
+        if self.journal is not None and self.journal.is_done(name):
+            self._log_info(f"Skipping completed step: {name}")
+            return True
+        result = await step()
+        if result and self.journal is not None:
+            id_env = self.env.id if self.env is not None else ""
+            await self.journal.complete(name, {"id_env": id_env})
+        return bool(result)
+
+    async def _start_baseimage(self, mode: str) -> bool:
+        """
+        Creates the object and starts its instance.
+
+        The waiting request is notified through the `started` future as
+        soon as the instance is running.
+        """
+        created = await self._create_baseimage(get_serializable_args(self.args))
+        if created is None or created.response_code != 200:
+            self._log_error(f"Baseimage not created: {self.obj.id}")
+            return False
+        self.inst = await self.obj.baseimage_start(self.obj.id_owner, True, mode)
+        if self.inst is None:
+            await self._update_error("Instance not created")
+            return False
+        if self.journal is not None:
+            self.journal.entry.id_instance = self.inst.id
+        started = self.args.get("started")
+        if isinstance(started, asyncio.Future) and started.done() is False:
+            started.set_result(self.inst.id)
+        return True
+
+    async def _create_baseimage(self, args: dict) -> Optional[QwebResult]:
+        """Creates the baseimage of the object, implemented by subclasses"""
+        raise NotImplementedError()
+
+    async def _restore_state(self):
+        from app.daas.db.database import Database
+
+        assert self.journal is not None
+        id_env = self.journal.entry.data.get("id_env", "")
+        if id_env != "":
+            dbase = await get_database(Database)
+            self.env = await dbase.get_environment(id_env)
 
     async def _get_files(
         self,
@@ -97,19 +201,21 @@ class CloneTaskBase(Loggable):
         self._log_info("Creating env")
 
     async def _run_task_wait_for_inst(self):
+        assert self.inst is not None
         ttype = PhasesSystemTask.PHASES_WAIT_FOR_INSTANCE.value
         task = await run_system_task(
             ttype, self.obj.id_owner, self.obj.id, self.inst.id
         )
         assert task is not None
         self._log_info("Waiting")
-        await task.task
+        await wait_system_task(task)
         self._log_info("Waited")
 
     async def _run_task_configure_connection(self):
+        assert self.inst is not None
         ttype = PhasesSystemTask.PHASES_CONFIGURE_CONNECTION.value
         task = await run_system_task(
             ttype, self.obj.id_owner, self.obj.id, self.inst.id
         )
         assert task is not None
-        await task.task
+        await wait_system_task(task)
@@ -5,6 +5,8 @@ from nest_asyncio import asyncio
 from app.daas.objects.object_container import ContainerObject
 from app.daas.objects.object_instance import InstanceObject
 from app.daas.objects.object_machine import MachineObject
+from app.daas.tasks.task_journal import STEP_BASEIMAGE, STEP_START
+from app.plugins.platform.phases.enums import PhasesSystemTask
 from app.qweb.common.qweb_tools import get_database
 from app.qweb.processing.processor import QwebResult
 from app.daas.tasks.base_clonetask import CloneTaskBase, CloneTaskConfig
@@ -18,18 +20,26 @@ class CloneTask(CloneTaskBase):
 
     async def run(self) -> QwebResult:
         self._log_info("Enter clone task")
-        if await self._handle_state_baseimage():
+        tasktype = PhasesSystemTask.PHASES_CLONE_FROM_APP.value
+        return await self._run_journaled(tasktype, self._run_pipeline)
+
+    async def _run_pipeline(self) -> QwebResult:
+        mode = "run-clone"
+        if not await self._run_step(STEP_START, lambda: self._start_baseimage(mode)):
+            return QwebResult(400, {}, 3, "Error on start_baseimage()")
+        if await self._run_step(STEP_BASEIMAGE, self._handle_state_baseimage):
             if await self._handle_state_environment(self.args):
                 return QwebResult(200, {})
             return QwebResult(400, {}, 1, "Error on handle_env()")
         return QwebResult(400, {}, 2, "Error on handle_baseimage()")
 
+    async def _create_baseimage(self, args: dict) -> Optional[QwebResult]:
+        return await self.obj.baseimage_clone(self.args["id_base"], args)
+
     async def _handle_state_baseimage(self) -> bool:
         await self._update_state("Wait for instance boot (baseimage)")
-        online = await self.inst.check_online_state()
-        while online is False:
-            online = await self.inst.check_online_state()
-            await asyncio.sleep(1)
+        assert self.inst is not None
+        await self.inst.wait_online_state(True)
         self._log_info("Finalize baseimage")
         await self._update_state("Finalize baseimage")
         finalized = await self.obj.baseimage_finalize()
@@ -40,12 +50,12 @@ class CloneTask(CloneTaskBase):
         return True
 
     async def _handle_state_environment(self, args: dict) -> bool:
-        assert await self._create_env(args)
-        assert await self._configure_connection()
-        assert await self._configure_env(args)
-        assert await self._install_env(args)
-        assert await self._finalize_env(args)
-        assert await self._run_env(args)
+        assert await self._run_step("create_env", lambda: self._create_env(args))
+        assert await self._run_step("connection", self._configure_connection)
+        assert await self._run_step("configure", lambda: self._configure_env(args))
+        assert await self._run_step("install", lambda: self._install_env(args))
+        assert await self._run_step("finalize", lambda: self._finalize_env(args))
+        assert await self._run_step("run", lambda: self._run_env(args))
         return True
 
     async def _create_env(self, args: dict) -> bool:
@@ -118,6 +128,7 @@ class CloneTask(CloneTaskBase):
         dbase = await get_database(Database)
         assert self.env is not None
         obj = await dbase.get_daas_object(self.obj.id)
+        assert self.inst is not None
         inst = await dbase.get_instance_by_id(self.inst.id)
         assert inst is not None
         inst.id_env = self.env.id
@@ -7,6 +7,8 @@ from app.daas.objects.object_instance import InstanceObject
 from app.daas.objects.object_machine import MachineObject
 from app.daas.tasks.base_clonetask import CloneTaskBase
 from app.daas.tasks.task_config import CreateTaskConfig
+from app.daas.tasks.task_journal import STEP_BASEIMAGE, STEP_START
+from app.plugins.platform.phases.enums import PhasesSystemTask
 from app.qweb.common.qweb_tools import get_database
 from app.qweb.processing.processor import QwebResult
 
@@ -19,12 +21,22 @@ class CreateTask(CloneTaskBase):
 
     async def run(self) -> QwebResult:
         self._log_info("Enter create task")
-        if await self._handle_state_baseimage():
+        tasktype = PhasesSystemTask.PHASES_CREATE_FROM_APP.value
+        return await self._run_journaled(tasktype, self._run_pipeline)
+
+    async def _run_pipeline(self) -> QwebResult:
+        mode = "run-install"
+        if not await self._run_step(STEP_START, lambda: self._start_baseimage(mode)):
+            return QwebResult(400, {}, 3, "Error on start_baseimage()")
+        if await self._run_step(STEP_BASEIMAGE, self._handle_state_baseimage):
             if await self._handle_state_environment(self.args):
                 return QwebResult(200, {})
             return QwebResult(400, {}, 1, "Error on handle_env()")
         return QwebResult(400, {}, 2, "Error on handle_baseimage()")
 
+    async def _create_baseimage(self, args: dict) -> Optional[QwebResult]:
+        return await self.obj.baseimage_create(args)
+
     async def _handle_state_baseimage(self) -> bool:
         await self._update_state("Wait for instance boot (baseimage)")
         await self._wait_for_inst_baseimage()
@@ -37,12 +49,12 @@ class CreateTask(CloneTaskBase):
         return True
 
     async def _handle_state_environment(self, args: dict) -> bool:
-        assert await self._create_env(args)
-        assert await self._configure_connection()
-        assert await self._configure_env(args)
-        assert await self._install_env(args)
-        assert await self._finalize_env(args)
-        assert await self._run_env(args)
+        assert await self._run_step("create_env", lambda: self._create_env(args))
+        assert await self._run_step("connection", self._configure_connection)
+        assert await self._run_step("configure", lambda: self._configure_env(args))
+        assert await self._run_step("install", lambda: self._install_env(args))
+        assert await self._run_step("finalize", lambda: self._finalize_env(args))
+        assert await self._run_step("run", lambda: self._run_env(args))
         return True
 
     async def _create_env(self, args: dict) -> bool:
@@ -115,6 +127,7 @@ class CreateTask(CloneTaskBase):
         dbase = await get_database(Database)
         assert self.env is not None
         obj = await dbase.get_daas_object(self.obj.id)
+        assert self.inst is not None
         inst = await dbase.get_instance_by_id(self.inst.id)
         assert inst is not None
         inst.id_env = self.env.id
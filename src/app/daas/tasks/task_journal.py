@@ -0,0 +1,234 @@
+"""
+Write-ahead journal of multi-step tasks.
+
+Clone and create tasks record every completed step in the database. If
+the service is restarted while such a task is running, the task is
+resumed after its last completed step on startup. Tasks which can not
+be resumed are compensated instead, so no half-built objects are left.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import TYPE_CHECKING, Optional
+from app.daas.common.model import TaskJournalEntry
+from app.plugins.platform.phases.enums import PhasesSystemTask
+from app.qweb.common.qweb_tools import get_database, run_system_task
+from app.qweb.logging.logging import LogTarget, Loggable
+
+if TYPE_CHECKING:
+    from app.qweb.service.service_tasks import ScheduledTask
+
+RESUMABLE_TASKS = [
+    PhasesSystemTask.PHASES_CLONE_FROM_APP.value,
+    PhasesSystemTask.PHASES_CREATE_FROM_APP.value,
+]
+STEP_START = "start"
+STEP_BASEIMAGE = "baseimage"
+JOURNAL_RETENTION = timedelta(days=7)
+
+
+class JournalState(Enum):
+    """State of a journaled task"""
+
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    COMPENSATED = "compensated"
+
+
+class TaskJournal(Loggable):
+    """Records progress of a single task"""
+
+    def __init__(self, entry: TaskJournalEntry, resumed: bool):
+        Loggable.__init__(self, LogTarget.AUTOMATION)
+        self.entry = entry
+        self.resumed = resumed
+
+    @classmethod
+    async def open(
+        cls,
+        id_task: str,
+        tasktype: str,
+        id_owner: int,
+        id_object: str,
+        id_instance: str,
+        args: dict,
+    ) -> "TaskJournal":
+        """Opens existing journal of the task or starts a new one"""
+        from app.daas.db.database import Database
+
+        dbase = await get_database(Database)
+        entry = await dbase.get_journal_entry(id_task)
+        if entry is not None and entry.state == JournalState.RUNNING.value:
+            journal = cls(entry, True)
+            journal._log_info(f"Resuming task {id_task} after step '{entry.step}'")
+            return journal
+        now = datetime.now().isoformat()
+        entry = TaskJournalEntry(
+            id=id_task,
+            tasktype=tasktype,
+            id_owner=id_owner,
+            id_object=id_object,
+            id_instance=id_instance,
+            state=JournalState.RUNNING.value,
+            step="",
+            steps_done=[],
+            args=get_serializable_args(args),
+            data={},
+            reason="",
+            created_at=now,
+            updated_at=now,
+        )
+        journal = cls(entry, False)
+        await journal._save()
+        return journal
+
+    def is_done(self, step: str) -> bool:
+        """Checks whether step was completed before"""
+        return step in self.entry.steps_done
+
+    async def complete(self, step: str, data: Optional[dict] = None):
+        """Records completed step and its results"""
+        self.entry.step = step
+        self.entry.steps_done = [*self.entry.steps_done, step]
+        if data is not None:
+            self.entry.data = {**self.entry.data, **data}
+        await self._save()
+
+    async def finish(self, state: JournalState, reason: str = ""):
+        """
+        Records final state of the task.
+
+        Completed tasks need neither resume nor compensation, so their
+        entry is removed. Other entries are kept for a while to explain
+        the failure and pruned afterwards.
+        """
+        from app.daas.db.database import Database
+
+        self.entry.state = state.value
+        self.entry.reason = reason[:256]
+        if state == JournalState.DONE:
+            dbase = await get_database(Database)
+            await dbase.delete_journal_entry(self.entry.id)
+        else:
+            await self._save()
+        await prune_task_journal()
+
+    async def _save(self):
+        from app.daas.db.database import Database
+
+        dbase = await get_database(Database)
+        self.entry.updated_at = datetime.now().isoformat()
+        await dbase.save_journal_entry(self.entry)
+
+
+class TaskJournalSpill(Loggable):
+    """
+    Spill handler keeping tasks evicted from the task store in the journal.
+
+    Journaled tasks already have an entry, other tasks get a terminal
+    entry, so their outcome stays available after eviction.
+    """
+
+    def __init__(self):
+        Loggable.__init__(self, LogTarget.AUTOMATION)
+        self.pending: set[asyncio.Task] = set()
+
+    def __call__(self, task: "ScheduledTask"):
+        spill = asyncio.get_running_loop().create_task(self._save(task))
+        self.pending.add(spill)
+        spill.add_done_callback(self.pending.discard)
+
+    async def _save(self, task: "ScheduledTask"):
+        from app.daas.db.database import Database
+
+        try:
+            dbase = await get_database(Database)
+            if await dbase.get_journal_entry(task.id_task) is not None:
+                return
+            state = JournalState.DONE if task.success else JournalState.FAILED
+            entry = TaskJournalEntry(
+                id=task.id_task,
+                tasktype=task.tasktype,
+                id_owner=task.id_owner,
+                id_object=task.id_object,
+                id_instance=task.id_instance,
+                state=state.value,
+                step="",
+                steps_done=[],
+                args={},
+                data={},
+                reason=task.reason[:256],
+                created_at=task.started_at.isoformat(),
+                updated_at=task.stopped_at.isoformat(),
+            )
+            await dbase.save_journal_entry(entry)
+        except Exception as exe:
+            self._log_error(f"Task not spilled to journal: {task.id_task} ({exe})")
+
+
+def get_serializable_args(args: dict) -> dict:
+    """Returns task arguments which can be stored as json"""
+    result = {}
+    for key, val in args.items():
+        if isinstance(val, str | int | float | bool) or val is None:
+            result[key] = val
+    return result
+
+
+async def prune_task_journal() -> int:
+    """Removes finished journal entries older than the retention"""
+    from app.daas.db.database import Database
+
+    dbase = await get_database(Database)
+    before = datetime.now() - JOURNAL_RETENTION
+    return await dbase.prune_journal_entries(before.isoformat())
+
+
+async def resume_task_journal() -> int:
+    """Resumes or compensates tasks interrupted by a restart"""
+    from app.daas.db.database import Database
+
+    dbase = await get_database(Database)
+    await prune_task_journal()
+    entries = await dbase.get_journal_entries_by_state(JournalState.RUNNING.value)
+    resumed = 0
+    for entry in entries:
+        journal = TaskJournal(entry, True)
+        if entry.tasktype not in RESUMABLE_TASKS:
+            await journal.finish(JournalState.FAILED, "Interrupted by restart")
+            continue
+        obj = await dbase.get_daas_object(entry.id_object)
+        app = await dbase.get_application(entry.args.get("id_app", ""))
+        inst = await dbase.get_instance_by_id(entry.id_instance)
+        if obj is None or app is None or inst is None:
+            await _compensate(journal, obj)
+            continue
+        targs = {**entry.args, "app": app, "obj": obj, "inst": inst}
+        journal._log_info(f"Resuming interrupted task: {entry}")
+        await run_system_task(
+            entry.tasktype,
+            entry.id_owner,
+            entry.id_object,
+            entry.id_instance,
+            targs,
+            entry.id,
+        )
+        resumed += 1
+    return resumed
+
+
+async def _compensate(journal: TaskJournal, obj):
+    from app.daas.objects.base_object import DaasBaseObject
+
+    reason = "Instance lost during restart"
+    if isinstance(obj, DaasBaseObject):
+        if journal.is_done(STEP_BASEIMAGE):
+            # the baseimage is usable, only the environment is incomplete
+            await obj.set_extended_mode(f"Interrupted after {journal.entry.step}")
+        elif await obj.delete():
+            reason = "Incomplete baseimage deleted"
+    journal._log_info(f"Compensated interrupted task: {journal.entry} ({reason})")
+    await journal.finish(JournalState.COMPENSATED, reason)
@@ -1,6 +1,5 @@
 """Task to configure objects after being started"""
 
-import asyncio
 from dataclasses import dataclass
 from datetime import datetime
 from app.daas.common.enums import BackendName
@@ -69,11 +68,7 @@ class PostbootTask(Loggable):
         return result
 
     async def wait_for_boot(self, inst: InstanceObject) -> bool:
-        online = await inst.check_online_state()
-        while online is False:
-            online = await inst.check_online_state()
-            await asyncio.sleep(1)
-            self._log_info("Loop wait postboot task")
+        online = await inst.wait_online_state(True)
         await self.update_boot_time(inst)
         self._log_info(f"Waited for boot (instance={inst.id})", 0)
         return online
@@ -104,9 +99,7 @@ class PostbootTask(Loggable):
             self._log_info(f"Shutdown-Wait not needed (instance={inst.id})", True)
             return True
 
-        while online is True:
-            online = await inst.check_online_state()
-            await asyncio.sleep(0)
+        online = not await inst.wait_online_state(False)
         code = 0 if online is False else 1
         self._log_info(f"Waited for shutdown (instance={inst.id})", code)
         return online
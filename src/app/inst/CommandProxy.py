@@ -2,13 +2,12 @@
 
 import os
 import sys
-import click
-from ProxyControl import ProxyControl
-from adapter.tools.ProxyTools import split_command_from_args
+from ProxyAgent import call_agent
 
 
 DEBUG_MODE = False
 # DEBUG_MODE = True
+INVOCATION_TYPES = ("app", "cmd", "action", "resolution", "ospackage", "filesystem")
 
 
 def __initialize_component(mode: bool):
@@ -24,80 +23,100 @@ def __initialize_component(mode: bool):
         sys.stdout = open(f"{statusfolder}/{statusfile}", "w")
 
 
-@click.group
-def clickproxy():
+def __run_via_agent() -> bool:
     """
-    Spawns a new process with specified parameters
+    Forwards the invocation to a running ProxyAgent
     """
-
-
-@clickproxy.command
-@click.argument("args", nargs=-1)
-def app(args: list):
-    """
-    Invokes app with specified arguments
-    """
-    proxy = ProxyControl()
-    cmd_parsed, args_parsed = split_command_from_args(args)
-    ret = proxy.execute_app(cmd_parsed, args_parsed)
-    return ret
-
-
-@clickproxy.command
-@click.argument("args", nargs=-1)
-def cmd(args: list):
+    if len(sys.argv) < 2 or sys.argv[1] not in INVOCATION_TYPES:
+        return False
+    response = call_agent(sys.argv[1], sys.argv[2:])
+    if response is None:
+        return False
+    print(response.get("output", ""), end="")
+    if response.get("code") == -1:
+        print(response.get("std_err", ""), file=sys.stderr)
+    return True
+
+
+def __run_local():
     """
-    Invokes api command with specified arguments
+    Executes the invocation within this process
     """
-    proxy = ProxyControl()
-    cmd_parsed, args_parsed = split_command_from_args(args)
-    return proxy.execute_cmd(cmd_parsed, args_parsed)
+    import click
+    from ProxyControl import ProxyControl
+    from adapter.tools.ProxyTools import split_command_from_args
+
+    @click.group
+    def clickproxy():
+        """
+        Spawns a new process with specified parameters
+        """
+
+    @clickproxy.command
+    @click.argument("args", nargs=-1)
+    def app(args: list):
+        """
+        Invokes app with specified arguments
+        """
+        proxy = ProxyControl()
+        cmd_parsed, args_parsed = split_command_from_args(args)
+        ret = proxy.execute_app(cmd_parsed, args_parsed)
+        return ret
+
+    @clickproxy.command
+    @click.argument("args", nargs=-1)
+    def cmd(args: list):
+        """
+        Invokes api command with specified arguments
+        """
+        proxy = ProxyControl()
+        cmd_parsed, args_parsed = split_command_from_args(args)
+        return proxy.execute_cmd(cmd_parsed, args_parsed)
+
+    @clickproxy.command
+    @click.argument("args", nargs=-1)
+    def action(args: list):
+        """
+        Invokes api action with specified arguments
+        """
+        proxy = ProxyControl()
+        cmd_parsed, args_parsed = split_command_from_args(args)
+        return proxy.execute_action(cmd_parsed, args_parsed)
+
+    @clickproxy.command
+    @click.argument("args", nargs=-1)
+    def resolution(args: list):
+        """
+        Invokes api commands to control screen reolutions
+        """
+        proxy = ProxyControl()
+        cmd_parsed, args_parsed = split_command_from_args(args)
+        return proxy.execute_resolution(cmd_parsed, args_parsed)
+
+    @clickproxy.command
+    @click.argument("args", nargs=-1)
+    def ospackage(args: list):
+        """
+        Invokes api commands to control native ospackages
+        """
+        proxy = ProxyControl()
+        cmd_parsed, args_parsed = split_command_from_args(args)
+        return proxy.execute_ospackage(cmd_parsed, args_parsed)
+
+    @clickproxy.command
+    @click.argument("args", nargs=-1)
+    def filesystem(args: list):
+        """
+        Invokes api commands to manage filesystem
+        """
+        proxy = ProxyControl()
+        cmd_parsed, args_parsed = split_command_from_args(args)
+        return proxy.execute_filesystem(cmd_parsed, args_parsed)
 
-
-@clickproxy.command
-@click.argument("args", nargs=-1)
-def action(args: list):
-    """
-    Invokes api action with specified arguments
-    """
-    proxy = ProxyControl()
-    cmd_parsed, args_parsed = split_command_from_args(args)
-    return proxy.execute_action(cmd_parsed, args_parsed)
-
-
-@clickproxy.command
-@click.argument("args", nargs=-1)
-def resolution(args: list):
-    """
-    Invokes api commands to control screen reolutions
-    """
-    proxy = ProxyControl()
-    cmd_parsed, args_parsed = split_command_from_args(args)
-    return proxy.execute_resolution(cmd_parsed, args_parsed)
-
-
-@clickproxy.command
-@click.argument("args", nargs=-1)
-def ospackage(args: list):
-    """
-    Invokes api commands to control native ospackages
-    """
-    proxy = ProxyControl()
-    cmd_parsed, args_parsed = split_command_from_args(args)
-    return proxy.execute_ospackage(cmd_parsed, args_parsed)
-
-
-@clickproxy.command
-@click.argument("args", nargs=-1)
-def filesystem(args: list):
-    """
-    Invokes api commands to manage filesystem
-    """
-    proxy = ProxyControl()
-    cmd_parsed, args_parsed = split_command_from_args(args)
-    return proxy.execute_filesystem(cmd_parsed, args_parsed)
+    clickproxy()
 
 
 if __name__ == "__main__":
     __initialize_component(DEBUG_MODE)
-    clickproxy()
+    if __run_via_agent() is False:
+        __run_local()
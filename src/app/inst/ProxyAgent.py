@@ -0,0 +1,272 @@
+#!/usr/bin/python3
+"""
+Resident agent executing CommandProxy requests
+
+The agent keeps ProxyControl loaded and accepts requests on a local
+socket, so commands do not pay interpreter startup and module imports.
+Every connection is served by its own thread. Requests and responses are
+json lines:
+
+    {"type": "resolution", "args": ["get"], "token": "...", "session": 1}
+    {"code": 0, "std_out": "1920x1080", "std_err": "", "output": "1920x1080"}
+
+On every start the agent writes a new random token to a file only
+readable by its user. Requests without that token are refused, so other
+local users cannot run commands through the agent. Requests from another
+Windows session are refused as well, because apps have to be spawned in
+the interactive session the caller was started in (psexec -i). Refused
+requests are answered with AGENT_REFUSED and were not executed, so the
+client runs them itself.
+
+Only the standard library is imported at module level, so the thin
+client stays cheap for CommandProxy.
+"""
+
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import threading
+from typing import Optional
+
+DEFAULT_AGENT_HOST = "127.0.0.1"
+DEFAULT_AGENT_PORT = 5680
+DEFAULT_AGENT_CONNECT_TIMEOUT = 0.2
+DEFAULT_AGENT_TIMEOUT = 600.0
+DEFAULT_AGENT_TOKEN_FILE = "C:/Users/root/daas/agent.token"
+if os.name == "posix":
+    DEFAULT_AGENT_TOKEN_FILE = "/root/daas/agent.token"
+AGENT_REFUSED = -2
+
+
+def get_session_id() -> int:
+    """
+    Returns the Windows session of this process, -1 on other systems
+    """
+    if os.name != "nt":
+        return -1
+    import ctypes
+    from ctypes import wintypes
+
+    session = wintypes.DWORD()
+    kernel32 = ctypes.windll.kernel32  # type: ignore[attr-defined]
+    if kernel32.ProcessIdToSessionId(os.getpid(), ctypes.byref(session)) == 0:
+        return -1
+    return session.value
+
+
+def read_token(token_file: str = DEFAULT_AGENT_TOKEN_FILE) -> Optional[str]:
+    """
+    Reads the token of the running agent, returns None if there is none
+    """
+    try:
+        with open(token_file, "r", encoding="utf-8") as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def _response(code: int, std_err: str) -> dict:
+    return {"code": code, "std_out": "", "std_err": std_err, "output": ""}
+
+
+class ProxyAgentHandler(socketserver.StreamRequestHandler):
+    """
+    Serves json line requests of a single connection
+    """
+
+    server: "ProxyAgentServer"
+
+    def handle(self):
+        for line in self.rfile:
+            if line.strip() == b"":
+                continue
+            try:
+                request = json.loads(line)
+                response = self.server.agent.handle_request(request)
+            except (ValueError, TypeError, AttributeError) as exe:
+                response = _response(2, f"Invalid request: {exe}")
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class ProxyAgentServer(socketserver.ThreadingTCPServer):
+    """
+    Threaded server bound to the loopback interface
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, agent: "ProxyAgent", address: tuple[str, int]):
+        self.agent = agent
+        super().__init__(address, ProxyAgentHandler)
+
+
+class ProxyAgent:
+    """
+    Executes requests with a shared ProxyControl
+    """
+
+    def __init__(
+        self,
+        proxy=None,
+        host: str = DEFAULT_AGENT_HOST,
+        port: int = DEFAULT_AGENT_PORT,
+        token_file: str = DEFAULT_AGENT_TOKEN_FILE,
+    ):
+        """
+        Default constructor
+
+        Creates a ProxyControl collecting output per request if none is given
+        """
+        if proxy is None:
+            from ProxyControl import ProxyControl
+
+            proxy = ProxyControl()
+        self.proxy = proxy
+        self.proxy.data_handler = self.__collect_data
+        self.address = (host, port)
+        self.token_file = token_file
+        self.token = ""
+        self.session = get_session_id()
+        self.local = threading.local()
+        self.server: Optional[ProxyAgentServer] = None
+        self.thread: Optional[threading.Thread] = None
+
+    def handle_request(self, request: dict) -> dict:
+        """
+        Checks token and session of a request before executing it
+        """
+        token = str(request.get("token", ""))
+        if self.token == "" or not hmac.compare_digest(token, self.token):
+            return _response(AGENT_REFUSED, "Invalid token")
+        session = int(request.get("session", -1))
+        if session != self.session:
+            return _response(AGENT_REFUSED, f"Session mismatch: {session}")
+        return self.execute(
+            str(request.get("type", "")), list(request.get("args", []))
+        )
+
+    def execute(self, invocation_type: str, args: list) -> dict:
+        """
+        Executes a request like CommandProxy does
+        """
+        from adapter.tools.ProxyTools import split_command_from_args
+
+        self.local.output = []
+        cmd_parsed, args_parsed = split_command_from_args(args)
+        code, std_out, std_err = self.proxy.execute(
+            invocation_type, cmd_parsed, args_parsed
+        )
+        return {
+            "code": code,
+            "std_out": std_out,
+            "std_err": std_err,
+            "output": "".join(self.local.output),
+        }
+
+    def start(self) -> threading.Thread:
+        """
+        Starts serving requests in a background thread
+        """
+        self.server = ProxyAgentServer(self, self.address)
+        self.__write_token()
+        self.proxy.watch_state()
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="ProxyAgent", daemon=True
+        )
+        self.thread.start()
+        return self.thread
+
+    def stop(self):
+        """
+        Stops serving requests
+        """
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.token != "" and read_token(self.token_file) == self.token:
+            os.remove(self.token_file)
+        self.token = ""
+
+    def __write_token(self):
+        folder = os.path.dirname(self.token_file)
+        if folder != "" and os.path.exists(folder) is False:
+            os.makedirs(folder)
+        token = secrets.token_hex(32)
+        if os.path.exists(self.token_file):
+            os.remove(self.token_file)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL
+        with os.fdopen(os.open(self.token_file, flags, 0o600), "w") as file:
+            file.write(token)
+        self.token = token
+
+    def __collect_data(self, msg: str):
+        output = getattr(self.local, "output", None)
+        if output is None:
+            print(msg, end="")
+        else:
+            output.append(msg)
+
+
+def call_agent(
+    invocation_type: str,
+    args: list,
+    host: str = DEFAULT_AGENT_HOST,
+    port: int = DEFAULT_AGENT_PORT,
+    timeout: float = DEFAULT_AGENT_TIMEOUT,
+    token_file: str = DEFAULT_AGENT_TOKEN_FILE,
+) -> Optional[dict]:
+    """
+    Sends a request to the agent
+
+    Returns None if no agent is reachable or the agent refused the request
+    without executing it
+    """
+    token = read_token(token_file)
+    if token is None:
+        return None
+    try:
+        sock = socket.create_connection(
+            (host, port), timeout=DEFAULT_AGENT_CONNECT_TIMEOUT
+        )
+    except OSError:
+        return None
+    request = {
+        "type": invocation_type,
+        "args": list(args),
+        "token": token,
+        "session": get_session_id(),
+    }
+    # the request may have been executed, so do not retry it locally
+    with sock:
+        sock.settimeout(timeout)
+        try:
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+        except socket.timeout:
+            return _response(-1, "Agent timed out")
+        except OSError as exe:
+            return _response(-1, f"Agent failed: {exe}")
+    if line == b"":
+        return _response(-1, "Agent closed connection")
+    response = json.loads(line)
+    if response.get("code") == AGENT_REFUSED:
+        return None
+    return response
+
+
+if __name__ == "__main__":
+    agent = ProxyAgent()
+    agent.start()
+    print(f"ProxyAgent listening on {agent.address[0]}:{agent.address[1]}")
+    try:
+        assert agent.thread is not None
+        agent.thread.join()
+    except KeyboardInterrupt:
+        agent.stop()
@@ -5,6 +5,7 @@ Proxies control backend to instance
 import os
 import logging
 from dataclasses import dataclass
+from typing import Callable, Optional
 
 from adapter.AdapterBase import AdapterBaseConfig
 
@@ -71,10 +72,13 @@ class ProxyControl:
     within virtualized or containerized instances
     """
 
-    def __init__(self):
+    def __init__(self, data_handler: Optional[Callable[[str], None]] = None):
         """
         Default constructor
+
+        Command output is printed unless a data handler is given
         """
+        self.data_handler = data_handler
         self.cfg = ProxyControlMappings(
             DEFAULT_PACKAGECMD_ALLOWED,
             DEFAULT_FILESYSTEMCMD_ALLOWED,
@@ -86,6 +90,32 @@ class ProxyControl:
         self.__init_logging()
         self.adapter = self.__get_os_adapter()
 
+    def watch_state(self):
+        """
+        Keeps cached guest state valid, for long running processes only
+        """
+        self.adapter.watch_state()
+
+    def execute(self, invocation_type: str, cmd: str, args: list) -> tuple:
+        """
+        Executes request of specified invocation type
+        """
+        if invocation_type == "app":
+            return self.execute_app(cmd, args)
+        if invocation_type == "cmd":
+            return self.execute_cmd(cmd, args)
+        if invocation_type == "action":
+            return self.execute_action(cmd, args)
+        if invocation_type == "resolution":
+            return self.execute_resolution(cmd, args)
+        if invocation_type == "ospackage":
+            return self.execute_ospackage(cmd, args)
+        if invocation_type == "filesystem":
+            return self.execute_filesystem(cmd, args)
+        txt_err = f"Unknown invocation type: {invocation_type}"
+        self.__log_error(txt_err)
+        return 2, "", txt_err
+
     def execute_app(self, prog: str, args: list) -> tuple:
         """
         Executes specified app
@@ -281,7 +311,10 @@ class ProxyControl:
         raise NotImplementedError()
 
     def __log_data(self, msg: str):
-        print(msg, end="")
+        if self.data_handler is not None:
+            self.data_handler(msg)
+        else:
+            print(msg, end="")
 
     def __log_error(self, msg: str):
         logging.getLogger(DEFAULT_LOGNAME).error(msg)
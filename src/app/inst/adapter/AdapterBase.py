@@ -63,6 +63,12 @@ class AdapterBase(ABC):
         self.log_info(msg)
         return width, height
 
+    def watch_state(self):
+        """
+        Starts watching guest state changes to keep caches valid.
+        Without watchers cached state expires after a short time
+        """
+
     def get_default_resolution(self):
         """
         Returns fallback resolution (640x480)
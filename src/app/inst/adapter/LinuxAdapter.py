@@ -16,6 +16,7 @@ from .tools.LinuxTools import (
     get_ospackage_args,
     try_find_pid,
     persist_pid,
+    watch_display_state,
 )
 
 from adapter.AdapterBase import AdapterBase, AdapterBaseConfig
@@ -41,6 +42,12 @@ class LinuxAdapter(AdapterBase):
         super().__init__(baseconf)
         self.cfg = conf
 
+    def watch_state(self):
+        """
+        Watches RandR changes if python-xlib is available
+        """
+        watch_display_state()
+
     def spawn_app(self, prog: str, args: list) -> tuple[int, str, str]:
         """
         Spawns an app within Linux
@@ -23,6 +23,7 @@ from .tools.WindowsTools import (
     get_current_resolution,
     set_current_resolution,
     construct_ospackage_arguments,
+    watch_display_state,
 )
 
 # Globals
@@ -56,6 +57,12 @@ class WindowsAdapter(AdapterBase):
         super().__init__(baseconf)
         self.cfg = conf
 
+    def watch_state(self):
+        """
+        Watches display changes via WM_DISPLAYCHANGE
+        """
+        watch_display_state()
+
     def spawn_app(self, prog: str, args: list) -> tuple[int, str, str]:
         """
         Spawns an app within Windows
@@ -6,6 +6,12 @@ import subprocess
 import logging
 import re
 import psutil
+from .StateCache import CachedState, start_watcher
+
+DISPLAY_TTL = 2.0
+DISPLAY_TTL_WATCHED = 300.0
+PROCESS_TTL = 1.0
+PIDSEARCH_EXCLUDED = ("grep", "python", "/bin/sh -c")
 
 
 @dataclass
@@ -33,6 +39,7 @@ def process_popen(prog: str, args: list) -> int:
         stderr=subprocess.PIPE,
         text=False,
     )
+    PROCESS_STATE.invalidate()
     pid = try_find_pid(prog)
     if pid > 0:
         return pid
@@ -50,22 +57,14 @@ def persist_pid(pid: int) -> tuple:
 
 def try_find_pid(prog: str) -> int:
     """
-    Try to find pid by process name
+    Try to find pid by process name within the cached process table
     """
-    result = -1
-    grepparams = [
-        "/usr/bin/ps aux",
-        f"/usr/bin/grep {prog}",
-        "/usr/bin/grep -Ev '(grep|python|/bin/sh -c)'",
-        "/usr/bin/head -n1",
-        "/usr/bin/tr -s ' '",
-        "/usr/bin/cut -f2 -d' '",
-    ]
-    grepfilter = "|".join(grepparams)
-    code, str_out, _ = process_run(grepfilter, [])
-    if code == 0 and str_out != "":
-        result = int(str_out)
-    return result
+    for proc in PROCESS_STATE.get():
+        cmdline = " ".join(proc.cmdline) if len(proc.cmdline) > 0 else proc.name
+        if prog in cmdline:
+            if not any(excluded in cmdline for excluded in PIDSEARCH_EXCLUDED):
+                return proc.pid
+    return -1
 
 
 def process_run(prog: str, args: list) -> tuple:
@@ -85,30 +84,33 @@ def process_run(prog: str, args: list) -> tuple:
 
 
 def get_process_list(name: str = "") -> list:
+    """
+    Enumerates running processes from the cached process table
+    """
+    processes = PROCESS_STATE.get()
+    if name != "":
+        return [proc for proc in processes if proc.name == name]
+    return list(processes)
+
+
+def scan_process_list() -> list:
     """
     Enumerates running processes
     """
     result = []
     for proc in psutil.process_iter():
-        proc_element = None
         try:
-            proc_element = Process(
-                name=proc.name(),
-                cmdline=proc.cmdline(),
-                status=proc.status(),
-                pid=proc.pid,
-                username=proc.username(),
+            result.append(
+                Process(
+                    name=proc.name(),
+                    cmdline=proc.cmdline(),
+                    status=proc.status(),
+                    pid=proc.pid,
+                    username=proc.username(),
+                )
             )
-        except psutil.AccessDenied:
+        except (psutil.AccessDenied, psutil.NoSuchProcess):
             pass
-
-        # Append if name is empty or euqal to proc.name
-        if proc_element is not None:
-            if name != "":
-                if name == proc_element.name:
-                    result.append(proc_element)
-            else:
-                result.append(proc_element)
     return result
 
 
@@ -122,6 +124,7 @@ def process_kill(killterm: int):
             kill_args = ["-9", f"{killterm}"]
 
         process_run("kill", kill_args)
+        PROCESS_STATE.invalidate()
     except (
         subprocess.CalledProcessError,
         subprocess.TimeoutExpired,
@@ -139,7 +142,7 @@ def extract_resolutions(screen: str) -> list:
     """
     Extract all native resolutions
     """
-    xrandr_output = subprocess.check_output("/usr/bin/xrandr").decode("utf-8")
+    xrandr_output = DISPLAY_STATE.get()
     screen_pattern_open = re.compile(r'\b([\w-]+)\b(?=\s+connected\b)')
     screen_pattern_close = re.compile(r'\sdisconnected')
     resolution_pattern = re.compile(r'\s+(\d+)x(\d+)')
@@ -207,14 +210,16 @@ def resolution_set(width: int, height: int, monitor: str) -> tuple:
         "--mode",
         f"{width}x{height}",
     ]
-    return process_run("/usr/bin/xrandr", args)
+    result = process_run("/usr/bin/xrandr", args)
+    DISPLAY_STATE.invalidate()
+    return result
 
 
 def extract_current_resolution(screen: str) -> tuple:
     """
     Extract current resolution
     """
-    xrandr_output = subprocess.check_output("/usr/bin/xrandr").decode("utf-8")
+    xrandr_output = DISPLAY_STATE.get()
     screen_pattern_open = re.compile(r'\b([\w-]+)\b(?=\s+connected\b)')
     screen_pattern_close = re.compile(r'\sdisconnected')
     resolution_pattern = re.compile(r'\s+(\d+)x(\d+)')
@@ -274,3 +279,42 @@ def choose_valid_resolution_linux(
     msg = f"No reasonable resolution! Using defaults {width}x{height}"
     logging.getLogger(__name__).info(msg)
     return default_width, default_height
+
+
+def query_xrandr() -> str:
+    """
+    Queries screens and resolutions
+    """
+    return subprocess.check_output("/usr/bin/xrandr").decode("utf-8")
+
+
+def watch_randr(invalidate, subscribed):
+    """
+    Invalidates on RandR screen changes, requires python-xlib
+    """
+    # pylint: disable=import-outside-toplevel
+    from Xlib import display as xdisplay
+    from Xlib.ext import randr
+
+    dpy = xdisplay.Display()
+    dpy.screen().root.xrandr_select_input(
+        randr.RRScreenChangeNotifyMask
+        | randr.RRCrtcChangeNotifyMask
+        | randr.RROutputChangeNotifyMask
+    )
+    dpy.flush()
+    subscribed()
+    while True:
+        dpy.next_event()
+        invalidate()
+
+
+def watch_display_state():
+    """
+    Starts watching RandR changes for the display cache
+    """
+    start_watcher([DISPLAY_STATE], watch_randr)
+
+
+DISPLAY_STATE = CachedState(query_xrandr, DISPLAY_TTL, DISPLAY_TTL_WATCHED)
+PROCESS_STATE = CachedState(scan_process_list, PROCESS_TTL, PROCESS_TTL)
@@ -0,0 +1,91 @@
+"""
+Cached guest state
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+Watcher = Callable[[Callable[[], None], Callable[[], None]], None]
+
+
+class CachedState(Generic[T]):
+    """
+    Caches a value obtained by a loader for a limited time.
+
+    A watcher may invalidate the value when the underlying state changes.
+    While a watcher is running the longer watched ttl applies, otherwise
+    the value is refreshed after the short ttl.
+    """
+
+    def __init__(self, loader: Callable[[], T], ttl: float, ttl_watched: float):
+        self.loader = loader
+        self.ttl = ttl
+        self.ttl_watched = ttl_watched
+        self.lock = threading.Lock()
+        self.value: Optional[T] = None
+        self.loaded_at = 0.0
+        self.valid = False
+        self.generation = 0
+        self.watched = False
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, refresh: bool = False) -> T:
+        """
+        Returns cached value, loads it if missing, expired or requested
+        """
+        with self.lock:
+            ttl = self.ttl_watched if self.watched else self.ttl
+            if refresh or not self.valid or time.monotonic() - self.loaded_at > ttl:
+                generation = self.generation
+                self.value = self.loader()
+                self.loaded_at = time.monotonic()
+                # changes during the load invalidate the loaded value
+                self.valid = generation == self.generation
+                self.misses += 1
+            else:
+                self.hits += 1
+            return self.value  # type: ignore
+
+    def invalidate(self):
+        """
+        Forces the next access to load the value again
+        """
+        self.generation += 1
+        self.valid = False
+
+
+def start_watcher(states: list[CachedState], watcher: Watcher) -> threading.Thread:
+    """
+    Runs watcher in a daemon thread, the watcher invalidates on changes.
+    The watcher calls subscribed once it receives changes, only then the
+    watched ttl applies. If the watcher stops or fails, the short ttl
+    applies again.
+    """
+
+    def invalidate():
+        for state in states:
+            state.invalidate()
+
+    def subscribed():
+        # values loaded before the subscription may have missed changes
+        for state in states:
+            state.watched = True
+        invalidate()
+
+    def run():
+        try:
+            watcher(invalidate, subscribed)
+        except Exception as exe:
+            logging.getLogger(__name__).error(f"State watcher stopped: {exe}")
+        finally:
+            for state in states:
+                state.watched = False
+            invalidate()
+
+    thread = threading.Thread(target=run, name="StateWatcher", daemon=True)
+    thread.start()
+    return thread
@@ -14,6 +14,11 @@ import win32gui
 import win32process
 import win32con
 import win32api
+from .StateCache import CachedState, start_watcher
+
+DISPLAY_TTL = 2.0
+DISPLAY_TTL_WATCHED = 300.0
+PROCESS_TTL = 1.0
 
 
 @dataclass
@@ -89,6 +94,7 @@ def process_popen(prog: str, args: list, shell: bool, codepage: str) -> int:
             shell=shell,
             encoding=codepage,
         )
+        PROCESS_STATE.invalidate()
         if theproc is not None and theproc.returncode is not None:
             print("RUNNING")
             result = theproc.returncode
@@ -107,28 +113,33 @@ def process_popen(prog: str, args: list, shell: bool, codepage: str) -> int:
 
 
 def get_process_list(name: str = "") -> list:
+    """
+    Enumerates running processes from the cached process table
+    """
+    processes = PROCESS_STATE.get()
+    if name != "":
+        return [proc for proc in processes if proc.name == name]
+    return list(processes)
+
+
+def scan_process_list() -> list:
     """
     Enumerates running processes
     """
     result = []
     for proc in psutil.process_iter():
-        proc_element = None
         try:
-            proc_element = Process(
-                name=proc.name(),
-                cmdline=proc.cmdline(),
-                status=proc.status(),
-                pid=proc.pid,
-                username=proc.username(),
+            result.append(
+                Process(
+                    name=proc.name(),
+                    cmdline=proc.cmdline(),
+                    status=proc.status(),
+                    pid=proc.pid,
+                    username=proc.username(),
+                )
             )
-        except psutil.AccessDenied:
+        except (psutil.AccessDenied, psutil.NoSuchProcess):
             pass
-        if proc_element is not None:
-            if name != "":
-                if name == proc_element.name:
-                    result.append(proc_element)
-            else:
-                result.append(proc_element)
     return result
 
 
@@ -144,6 +155,7 @@ def process_kill(killterm: int | str, codepage: str):
             kill_args = ["/F", "/IM", f"{killterm}"]
 
         process_run("taskkill", kill_args, True, codepage)
+        PROCESS_STATE.invalidate()
     except (
         subprocess.CalledProcessError,
         subprocess.TimeoutExpired,
@@ -164,10 +176,12 @@ def try_find_pid(searchterms: list, timeout: int) -> int:
     """
     result = -1
 
+    refresh = False
     while timeout > 0:
-        result = __find_pid(searchterms)
+        result = __find_pid(searchterms, refresh)
         if result != -1:
             break
+        refresh = True
         timeout -= 1
     return result
 
@@ -205,6 +219,13 @@ def maximize_windows_by_pid(pid: int, searchterms: list):
 
 
 def get_resolution_list() -> list:
+    """
+    Enumerates available screen resolutions from the display cache
+    """
+    return list(RESOLUTIONS_STATE.get())
+
+
+def scan_resolution_list() -> list:
     """
     Enumerates available screen resolutions
     """
@@ -337,9 +358,18 @@ def set_current_resolution(width: int, height: int):
     devmode.PelsHeight = height
     devmode.Fields = win32con.DM_PELSWIDTH | win32con.DM_PELSHEIGHT
     win32api.ChangeDisplaySettings(devmode, 0)
+    RESOLUTIONS_STATE.invalidate()
+    CURRENT_RESOLUTION_STATE.invalidate()
 
 
 def get_current_resolution(args: list) -> tuple:
+    """
+    Retrieves currently used screen resolution from the display cache
+    """
+    return CURRENT_RESOLUTION_STATE.get()
+
+
+def scan_current_resolution() -> tuple:
     """
     Retrieves currently used screen resolution
     """
@@ -351,10 +381,41 @@ def get_current_resolution(args: list) -> tuple:
     return width, height
 
 
-def __find_pid(searchterms: list) -> int:
+def watch_display_changes(invalidate, subscribed):
+    """
+    Invalidates on display changes via a hidden window receiving WM_DISPLAYCHANGE
+    """
+
+    def wndproc(hwnd, msg, wparam, lparam):
+        if msg == win32con.WM_DISPLAYCHANGE:
+            invalidate()
+        return win32gui.DefWindowProc(hwnd, msg, wparam, lparam)
+
+    wndclass = win32gui.WNDCLASS()
+    wndclass.lpfnWndProc = wndproc
+    wndclass.lpszClassName = "DaasDisplayWatcher"
+    wndclass.hInstance = win32api.GetModuleHandle(None)
+    atom = win32gui.RegisterClass(wndclass)
+    win32gui.CreateWindow(
+        atom, "DaasDisplayWatcher", 0, 0, 0, 0, 0, 0, 0, wndclass.hInstance, None
+    )
+    subscribed()
+    win32gui.PumpMessages()
+
+
+def watch_display_state():
+    """
+    Starts watching display changes for the display caches
+    """
+    start_watcher(
+        [RESOLUTIONS_STATE, CURRENT_RESOLUTION_STATE], watch_display_changes
+    )
+
+
+def __find_pid(searchterms: list, refresh: bool = False) -> int:
     result = -1
 
-    proglist = get_process_list()
+    proglist = PROCESS_STATE.get(refresh)
     for single in proglist:
         cmptext = single.name.upper()
         if cmptext in searchterms:
@@ -392,3 +453,10 @@ def __get_pid_path(username: str):
 
 def __get_status_path(username: str):
     return f"C:/Users/{username}/daas/status"
+
+
+RESOLUTIONS_STATE = CachedState(scan_resolution_list, DISPLAY_TTL, DISPLAY_TTL_WATCHED)
+CURRENT_RESOLUTION_STATE = CachedState(
+    scan_current_resolution, DISPLAY_TTL, DISPLAY_TTL_WATCHED
+)
+PROCESS_STATE = CachedState(scan_process_list, PROCESS_TTL, PROCESS_TTL)
@@ -0,0 +1,79 @@
+"""Test expiry and invalidation of cached guest state."""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from adapter.tools import StateCache  # noqa: E402
+from adapter.tools.StateCache import CachedState, start_watcher  # noqa: E402
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _counting_state(ttl: float, ttl_watched: float) -> CachedState:
+    loads = iter(range(1000))
+    return CachedState(lambda: next(loads), ttl, ttl_watched)
+
+
+def test_ttl_expiry_and_refresh(monkeypatch):
+    """Values are reloaded after the ttl or when a refresh is requested."""
+    clock = _Clock()
+    monkeypatch.setattr(StateCache.time, "monotonic", clock)
+    state = _counting_state(2.0, 300.0)
+    assert state.get() == 0
+    clock.now += 1.5
+    assert state.get() == 0
+    clock.now += 1.0
+    assert state.get() == 1
+    assert state.get(refresh=True) == 2
+    assert (state.hits, state.misses) == (1, 3)
+
+
+def test_invalidation_during_load():
+    """An invalidation while loading forces the next access to load again."""
+    state = CachedState(lambda: state.invalidate() or "stale", 300.0, 300.0)
+    assert state.get() == "stale"
+    assert state.valid is False
+    state.loader = lambda: "fresh"
+    assert state.get() == "fresh" and state.valid
+
+
+def test_watched_ttl_applies_after_subscription(monkeypatch):
+    """The watched ttl only applies once the watcher has subscribed."""
+    clock = _Clock()
+    monkeypatch.setattr(StateCache.time, "monotonic", clock)
+    state = _counting_state(2.0, 300.0)
+    subscribe = threading.Event()
+    ready = threading.Event()
+    stop = threading.Event()
+    seen = []
+
+    def watcher(invalidate, subscribed):
+        seen.append(state.watched)
+        subscribe.wait(5)
+        subscribed()
+        ready.set()
+        stop.wait(5)
+        invalidate()
+
+    assert state.get() == 0
+    thread = start_watcher([state], watcher)
+    clock.now += 10.0
+    assert state.get() == 1
+    subscribe.set()
+    assert ready.wait(5)
+    assert state.get() == 2
+    clock.now += 100.0
+    assert state.get() == 2
+    stop.set()
+    thread.join(5)
+    assert seen == [False]
+    assert state.watched is False and state.get() == 3
@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""
+Benchmark request latency with cold and warm state caches
+
+Cold requests invalidate all cached guest state first, like every
+request did before the caches existed. Warm requests are served from
+memory within the cache ttl:
+
+    python3 bench_state.py -n 50
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+from ProxyControl import ProxyControl
+
+if os.name == "nt":
+    from adapter.tools import WindowsTools as tools
+else:
+    from adapter.tools import LinuxTools as tools
+
+REQUESTS: list[tuple[str, str, list[str]]] = [
+    ("action", "tasklist", []),
+    ("resolution", "get", []),
+    ("resolution", "list", []),
+]
+
+
+def invalidate_all():
+    """
+    Invalidates all cached guest state
+    """
+    for value in vars(tools).values():
+        if isinstance(value, tools.CachedState):
+            value.invalidate()
+
+
+def bench_request(proxy: ProxyControl, request: tuple, count: int, cold: bool):
+    """
+    Measures latency of a request in ms
+    """
+    invocation_type, cmd, args = request
+    latencies = []
+    for _ in range(count):
+        if cold:
+            invalidate_all()
+        started = time.perf_counter()
+        try:
+            proxy.execute(invocation_type, cmd, list(args))
+        except (OSError, ValueError) as exe:
+            return {"request": f"{invocation_type} {cmd}", "error": f"{exe}"}
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {
+        "request": f"{invocation_type} {cmd}",
+        "mode": "cold" if cold else "warm",
+        "p50_ms": round(statistics.median(latencies), 3),
+        "max_ms": round(max(latencies), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--count", type=int, default=50)
+    args = parser.parse_args()
+    proxy = ProxyControl(data_handler=lambda msg: None)
+    results = []
+    for request in REQUESTS:
+        results.append(bench_request(proxy, request, args.count, True))
+        results.append(bench_request(proxy, request, args.count, False))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Test the protocol and dispatch of the ProxyAgent."""
+
+import os
+import socket
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from ProxyAgent import AGENT_REFUSED, ProxyAgent, call_agent  # noqa: E402
+
+
+class _FakeProxy:
+    def __init__(self):
+        self.data_handler = None
+        self.calls = []
+
+    def watch_state(self):
+        pass
+
+    def execute(self, invocation_type: str, cmd: str, args: list) -> tuple:
+        self.calls.append((invocation_type, cmd, args))
+        self.data_handler(f"ran {cmd}")
+        return 0, cmd, ""
+
+
+def _start_agent() -> tuple[ProxyAgent, _FakeProxy]:
+    proxy = _FakeProxy()
+    token_file = os.path.join(tempfile.mkdtemp(dir="/tmp"), "agent.token")
+    agent = ProxyAgent(proxy, port=0, token_file=token_file)
+    agent.start()
+    assert agent.server is not None
+    agent.address = agent.server.server_address[:2]
+    return agent, proxy
+
+
+def test_requests_are_dispatched_with_output():
+    """Requests carrying the token run on the shared proxy."""
+    agent, proxy = _start_agent()
+    try:
+        host, port = agent.address
+        response = call_agent(
+            "action", ["version", "x"], host, port, token_file=agent.token_file
+        )
+        assert os.stat(agent.token_file).st_mode & 0o077 == 0
+    finally:
+        agent.stop()
+    assert response == {
+        "code": 0,
+        "std_out": "version",
+        "std_err": "",
+        "output": "ran version",
+    }
+    assert proxy.calls == [("action", "version", ["x"])]
+    assert os.path.exists(agent.token_file) is False
+
+
+def test_requests_without_token_are_refused():
+    """Refused requests are not executed and let the client run them."""
+    agent, proxy = _start_agent()
+    try:
+        host, port = agent.address
+        with socket.create_connection((host, port), timeout=5) as sock:
+            sock.sendall(b'{"type": "cmd", "args": ["id"], "token": "guess"}\n')
+            with sock.makefile("rb") as reader:
+                line = reader.readline()
+        other = os.path.join(os.path.dirname(agent.token_file), "other.token")
+        with open(other, "w", encoding="utf-8") as file:
+            file.write("guess")
+        fallback = call_agent("cmd", ["id"], host, port, token_file=other)
+    finally:
+        agent.stop()
+    assert str(AGENT_REFUSED).encode() in line
+    assert fallback is None
+    assert proxy.calls == []
+
+
+def test_slow_agent_times_out():
+    """Clients stop waiting for an agent after the timeout."""
+    with socket.socket() as server:
+        server.bind(("127.0.0.1", 0))
+        server.listen()
+        host, port = server.getsockname()
+        token_file = os.path.join(tempfile.mkdtemp(dir="/tmp"), "agent.token")
+        with open(token_file, "w", encoding="utf-8") as file:
+            file.write("token")
+        response = call_agent("cmd", [], host, port, 0.1, token_file)
+    assert response is not None
+    assert response["code"] == -1 and response["std_err"] == "Agent timed out"
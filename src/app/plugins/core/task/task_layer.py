@@ -26,7 +26,7 @@ class ServiceObjectLayer(QwebObjectLayer):
 
     async def get_object(self, obj: LayerObject, args: dict) -> Optional[Any]:
         """Retrieves entity from service component"""
-        result = None
+        result: Optional[Any] = None
         mancomp = await get_service(ServiceComponent.TASK, QwebTaskManager)
 
         if obj.objtype == ServiceObject.TASK.value:
@@ -52,26 +52,11 @@ class ServiceObjectLayer(QwebObjectLayer):
             objectid = args["id_object"]
             instid = args["id_instance"]
             state = args["state"]
-            unfiltered = await mancomp.get_scheduled_tasks(state)
-            result = {}
-            if len(unfiltered.keys()) > 0:
-                for name, val in unfiltered.items():
-                    if objectid == "" and instid == "":
-                        result[name] = val.to_json()
-                        continue
-                    if objectid != "" and instid != "":
-                        if objectid == val.id_object and instid == val.id_instance:
-                            result[name] = val.to_json()
-                            continue
-                    else:
-                        if objectid != "":
-                            if objectid == val.id_object:
-                                result[name] = val.to_json()
-                                continue
-                        if instid != "":
-                            if instid == val.id_instance:
-                                result[name] = val.to_json()
-                                continue
+            flt = ScheduledTaskFilter.ALL
+            if state in [item.value for item in ScheduledTaskFilter]:
+                flt = ScheduledTaskFilter(state)
+            filtered = await mancomp.find_tasks(flt, 0, objectid, instid)
+            result = {name: val.to_json() for name, val in filtered.items()}
             self._log_info(f"fetched tasklist: {result}")
             return result
         else:
@@ -2,8 +2,10 @@
 
 from enum import Enum
 from app.qweb.common.common import TaskArgs
+from app.qweb.common.qweb_tools import get_service
 from app.qweb.processing.processor import QwebResult
-from app.qweb.service.service_tasks import ScheduledTask
+from app.qweb.service.service_context import ServiceComponent
+from app.qweb.service.service_tasks import QwebTaskManager, ScheduledTask
 from app.daas.common.ctx import (
     get_request_object,
     log_task_arguments,
@@ -24,7 +26,10 @@ async def task_get(args: TaskArgs) -> QwebResult:
     log_task_arguments(args.ctx, args.req, args.info, args.user)
     entity = get_request_object(args.ctx, "entity", ScheduledTask)
     if entity is not None:
-        return QwebResult(200, entity.to_json())
+        mancomp = await get_service(ServiceComponent.TASK, QwebTaskManager)
+        data = entity.to_json()
+        data["queue_position"] = await mancomp.get_queue_position(entity.id_task)
+        return QwebResult(200, data)
     return QwebResult(400, {}, 1, "No task")
 
 
@@ -68,8 +68,7 @@ async def audio_ws(args: TaskArgs):
 
     client_ws = websocket
     await client_ws.accept()
-    audio_proc = await extensions.create_audio_socket(inst)
-    await extensions.proxy_audio_socket(
-        f"audio_ws_{inst.id}", inst, con, client_ws, audio_proc
-    )
+    conid = f"audio_ws_{inst.id}"
+    audio_relay = await extensions.create_audio_socket(conid, inst)
+    await extensions.proxy_audio_socket(conid, inst, con, client_ws, audio_relay)
     return QwebResult(200, {}, 0, "Connection closed")
@@ -1,5 +1,7 @@
 """Phases plugin"""
 
+import asyncio
+from typing import Optional
 from app.plugins.platform.phases.phases_backend import PhasesBackend
 from app.plugins.platform.phases.phases_tasks import (
     PhasesTask,
@@ -33,6 +35,7 @@ from app.plugins.platform.phases.phases_tasks_env import (
     environments_get,
 )
 from app.plugins.platform.phases.enums import PhasesSystemTask
+from app.daas.tasks.task_journal import TaskJournalSpill, resume_task_journal
 from app.plugins.platform.phases.phases_tasks_sys import (
     run_task_app_clone,
     run_task_app_create,
@@ -40,7 +43,10 @@ from app.plugins.platform.phases.phases_tasks_sys import (
     run_task_postboot,
     run_task_wait_for_inst,
 )
+from app.qweb.common.qweb_tools import get_service
+from app.qweb.service.service_context import ServiceComponent
 from app.qweb.service.service_plugin import LoadOrder, PluginBase
+from app.qweb.service.service_tasks import QwebTaskManager
 from app.plugins.platform.phases.phases_routes import handler
 
 
@@ -52,6 +58,7 @@ class PhasesPlugin(PluginBase):
     ):
         self.backend = PhasesBackend()
         self.objlayer = None
+        self.task_resume: Optional[asyncio.Task] = None
         self.systasks = [
             (PhasesSystemTask.PHASES_POSTBOOT_ACTIONS.value, run_task_postboot),
             (PhasesSystemTask.PHASES_CREATE_FROM_APP.value, run_task_app_create),
@@ -107,9 +114,23 @@ class PhasesPlugin(PluginBase):
         )
 
     async def plugin_start(self) -> bool:
-        """Starts plugin"""
-        return await self.backend.connect()
+        """Starts plugin and resumes tasks interrupted by a restart"""
+        connected = await self.backend.connect()
+        if connected:
+            mancomp = await get_service(ServiceComponent.TASK, QwebTaskManager)
+            mancomp.set_spill_handler(TaskJournalSpill())
+            self.task_resume = asyncio.create_task(self._resume_tasks())
+        return connected
+
+    async def _resume_tasks(self):
+        try:
+            resumed = await resume_task_journal()
+            self._log_info(f"Resumed {resumed} interrupted tasks")
+        except Exception as exe:
+            self._log_error(f"Error on resuming interrupted tasks: {exe}")
 
     async def plugin_stop(self) -> bool:
         """Stops plugin"""
+        mancomp = await get_service(ServiceComponent.TASK, QwebTaskManager)
+        mancomp.set_spill_handler(None)
         return await self.backend.disconnect()
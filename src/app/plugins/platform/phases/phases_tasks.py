@@ -1,5 +1,6 @@
 """Phases Tasks"""
 
+import asyncio
 from enum import Enum
 from typing import Optional
 from app.daas.common.ctx import (
@@ -20,7 +21,14 @@ from app.daas.objects.object_machine import MachineObject, get_empty_machine_obj
 from app.daas.resources.info.sysinfo import Systeminfo
 from app.plugins.platform.phases.enums import PhasesSystemTask
 from app.qweb.common.common import TaskArgs
-from app.qweb.common.qweb_tools import get_backend_component, run_system_task
+from app.qweb.common.errors import TaskAdmissionError
+from app.qweb.common.qweb_tools import (
+    get_backend_component,
+    get_service,
+    run_system_task,
+)
+from app.qweb.service.service_context import ServiceComponent
+from app.qweb.service.service_tasks import QwebTaskManager
 from app.qweb.processing.processor import QwebResult
 
 DEFAULT_VM_CORES = 4
@@ -181,17 +189,10 @@ async def baseimage_clone_from_app(args: TaskArgs) -> QwebResult:
                 #     reqargs["newid"] = "foo"
                 #     newid = reqargs["newid"]
                 reqargs["id"] = newid
+                reqargs["id_base"] = obj.id
                 entity.id = newid
-                cloned = await entity.baseimage_clone(obj.id, reqargs)
-                if cloned is not None and cloned.response_code == 200:
-                    inst = await entity.baseimage_start(userid, True, "run-clone")
-                    if inst is not None:
-                        ttype = PhasesSystemTask.PHASES_CLONE_FROM_APP.value
-                        targs = {"app": app, "obj": entity, "inst": inst, **reqargs}
-                        await run_system_task(ttype, userid, newid, inst.id, targs)
-                        return await create_response_url_start(True, inst.id)
-                    return QwebResult(400, {}, 1, "Instance not created")
-                return QwebResult(400, {}, 2, "Clone object failed")
+                ttype = PhasesSystemTask.PHASES_CLONE_FROM_APP.value
+                return await _run_baseimage_task(ttype, app, entity, reqargs)
             return QwebResult(400, {}, 3, "Clone object failed")
         return QwebResult(400, {}, 4, "Object exists")
     return QwebResult(400, {}, 5, "No app")
@@ -217,21 +218,45 @@ async def baseimage_create_from_app(args: TaskArgs) -> QwebResult:
             entity = await _create_empty_object_by_app(reqargs, app, userid)
             if entity is not None:
                 entity.id = newid
-                cloned = await entity.baseimage_create(reqargs)
-                if cloned is not None and cloned.response_code == 200:
-                    inst = await entity.baseimage_start(userid, True, "run-install")
-                    if inst is not None:
-                        ttype = PhasesSystemTask.PHASES_CREATE_FROM_APP.value
-                        targs = {"app": app, "obj": entity, "inst": inst, **reqargs}
-                        await run_system_task(ttype, userid, newid, inst.id, targs)
-                        return await create_response_url_start(True, inst.id)
-                    return QwebResult(400, {}, 1, "Instance not created")
-                return QwebResult(400, {}, 2, "Clone object failed")
+                ttype = PhasesSystemTask.PHASES_CREATE_FROM_APP.value
+                return await _run_baseimage_task(ttype, app, entity, reqargs)
             return QwebResult(400, {}, 3, "Clone object failed")
         return QwebResult(400, {}, 4, "Object exists")
     return QwebResult(400, {}, 5, "No app")
 
 
+async def _run_baseimage_task(
+    ttype: str,
+    app: ApplicationObject,
+    entity: MachineObject | ContainerObject,
+    reqargs: dict,
+) -> QwebResult:
+    """
+    Creates and starts the object within a scheduled task.
+
+    Responds as soon as the instance runs, queued tasks respond with their
+    position instead. Nothing is created before the task is admitted.
+    """
+    started = asyncio.get_running_loop().create_future()
+    targs = {"app": app, "obj": entity, "started": started, **reqargs}
+    userid = reqargs["id_owner"]
+    try:
+        task = await run_system_task(ttype, userid, entity.id, "", targs)
+    except TaskAdmissionError as exe:
+        return QwebResult(503, {}, 6, f"{exe}")
+    if task is None:
+        return QwebResult(400, {}, 7, "Task not registered")
+    if task.queue is not None and task.queue.running is False:
+        mancomp = await get_service(ServiceComponent.TASK, QwebTaskManager)
+        position = mancomp.scheduler.position(task.queue)
+        return QwebResult(202, {"id_task": task.id_task, "queue_position": position})
+    await asyncio.wait((started, task.task), return_when=asyncio.FIRST_COMPLETED)
+    if started.done() is False:
+        started.cancel()
+        return QwebResult(400, {}, 1, f"Instance not created: {task.reason}")
+    return await create_response_url_start(True, started.result())
+
+
 async def _create_empty_object(
     reqargs: dict, old: DaasBaseObject, userid: int
 ) -> Optional[MachineObject | ContainerObject]:
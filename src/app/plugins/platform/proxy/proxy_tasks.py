@@ -17,6 +17,7 @@ from app.daas.objects.object_instance import InstanceObject
 from app.daas.objects.object_container import ContainerObject
 from app.daas.objects.object_machine import MachineObject
 from app.daas.proxy.guacamole_proxy import (
+    IdleHandler,
     ResizeHandler,
     proxy_guacamole_ws,
 )
@@ -25,6 +26,7 @@ from app.daas.proxy.jinja_params import (
     get_jinja_params_viewer,
 )
 from app.daas.proxy.proxy_registry import ProxyRegistry
+from app.daas.resources.limits.ressource_limits import RessourceLimits
 from app.daas.storage.filestore import Filestore
 from app.qweb.common.common import TaskArgs
 from app.qweb.common.qweb_tools import get_backend_component, get_database
@@ -297,6 +299,34 @@ class ProxmoxVncHandler(ResizeHandler, Loggable):
             self._log_info(f"Handler ommitted for {self.adr} ({res})", -1)
 
 
+class InstanceIdleHandler(IdleHandler, Loggable):
+    """Idlehandler reporting expired sessions to the ressource limits"""
+
+    def __init__(self, instance: InstanceObject, action: str):
+        Loggable.__init__(self, LogTarget.INST)
+        self.instance = instance
+        self.action = action
+
+    async def on_idle(self, *, id_instance: str, connid: str, reason: str) -> None:
+        """
+        Applies the configured idle action
+
+        `close` and `disconnect` keep the instance running and only mark it
+        idle in the ressource ledger, `stop` stops it and frees its
+        ressources once the instance is removed.
+        """
+        self._log_info(f"ON_IDLE: {id_instance} ({connid}) -> {self.action}")
+        limits = await get_backend_component(BackendName.LIMITS, RessourceLimits)
+        limits.record_idle(id_instance, reason)
+        if self.action == "disconnect":
+            await self.instance.disconnect(True)
+        elif self.action == "stop":
+            if isinstance(self.instance.app, MachineObject | ContainerObject):
+                await self.instance.app.stop(self.instance, True)
+        elif self.action != "close":
+            self._log_error(f"Unknown idle action: {self.action}", -1)
+
+
 async def proxy_ws(args: TaskArgs):
 
     from app.daas.db.database import Database
@@ -347,6 +377,8 @@ async def proxy_ws(args: TaskArgs):
             instance.host,
             pstools,
         )
+        reg = await get_backend_component(BackendName.PROXY, ProxyRegistry)
+        idle_handler = InstanceIdleHandler(instance, reg.config.idle_action)
         # reconnect_handler = ProxmoxReconnectHandler(
         #     api, logging.getLogger("daas.proxy")
         # )
@@ -355,6 +387,7 @@ async def proxy_ws(args: TaskArgs):
             websocket,
             connection_guac,
             resize_handler=resize_handler,
+            idle_handler=idle_handler,
             # reconnect_handler=None,
         )
 
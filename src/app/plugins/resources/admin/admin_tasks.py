@@ -49,8 +49,17 @@ async def admin_monitoring_info(args: TaskArgs) -> QwebResult:
     objinfo = await mon.create_monitoring_info_objects(detailed, userid)
     objutil = await mon.create_monitoring_info_utilization(userid)
     limitinfo = await mon.create_monitoring_info_limit(userid)
+    reconcileinfo = await mon.create_monitoring_info_reconcile(userid)
     info_all = MonitoringInfo(
-        taskinfo, fileinfo, appinfo, hostinfo, socketinfo, objinfo, objutil, limitinfo
+        taskinfo,
+        fileinfo,
+        appinfo,
+        hostinfo,
+        socketinfo,
+        objinfo,
+        objutil,
+        limitinfo,
+        reconcileinfo,
     )
     return QwebResult(200, info_all.tojson())
 
@@ -215,6 +224,5 @@ async def _get_filtered_tasks(reqargs: dict) -> list[dict]:
         elif reqargs["state"] == ScheduledTaskFilter.FINAL.value:
             flt = ScheduledTaskFilter.FINAL
     mancomp: QwebTaskManager = await get_service(ServiceComponent.TASK, QwebTaskManager)
-    tasks = await mancomp.get_scheduled_tasks(flt)
-    filtered = await mancomp.filter_tasks(tasks, userid, objid, instid)
+    filtered = await mancomp.find_tasks(flt, userid, objid, instid)
     return [v.to_json() for _, v in filtered.items()]
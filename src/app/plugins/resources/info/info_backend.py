@@ -2,6 +2,9 @@
 
 from app.daas.common.enums import BackendName
 from app.daas.resources.info.config import SysteminfoConfig
+from app.daas.resources.info.hostsampler import HostSamplerConfig
+from app.daas.resources.info.reconciler import ReconcilerConfig
+from app.daas.resources.info.snapshots import SnapshotStoreConfig
 from app.daas.resources.info.sysinfo import Systeminfo
 from app.qweb.service.service_context import QwebBackend
 
@@ -11,9 +14,18 @@ class InfoBackend(QwebBackend):
 
     component: Systeminfo
 
-    def __init__(self, cfg: SysteminfoConfig):
+    def __init__(
+        self,
+        cfg: SysteminfoConfig,
+        cfg_sampler: HostSamplerConfig,
+        cfg_snapshots: SnapshotStoreConfig,
+        cfg_reconcile: ReconcilerConfig,
+    ):
         self.cfg = cfg
-        self.component = Systeminfo(cfg)
+        self.cfg_sampler = cfg_sampler
+        self.cfg_snapshots = cfg_snapshots
+        self.cfg_reconcile = cfg_reconcile
+        self.component = Systeminfo(cfg, cfg_sampler, cfg_snapshots, cfg_reconcile)
         QwebBackend.__init__(
             self, name=BackendName.INFO.value, component=self.component
         )
@@ -35,6 +47,7 @@ class InfoBackend(QwebBackend):
     async def disconnect(self) -> bool:
         """Disconnects database adapter"""
         if self.component is not None:
+            await self.component.stop()
             self.connected = False
             return True
         return False
@@ -3,6 +3,9 @@
 from app.qweb.service.service_plugin import LoadOrder, PluginBase
 from app.daas.common.enums import ConfigFile, ConfigSections
 from app.daas.resources.info.config import SysteminfoConfig
+from app.daas.resources.info.hostsampler import HostSamplerConfig
+from app.daas.resources.info.reconciler import ReconcilerConfig
+from app.daas.resources.info.snapshots import SnapshotStoreConfig
 from app.plugins.resources.info.info_backend import InfoBackend
 from app.plugins.resources.info.info_tasks import (
     InfoTask,
@@ -26,7 +29,18 @@ class InfoPlugin(PluginBase):
     def __init__(self):
         cfgfile_db = self.read_toml_file(ConfigFile.INFO)
         self.cfg = SysteminfoConfig(**cfgfile_db[ConfigSections.INFO_SYS.value])
-        self.backend = InfoBackend(self.cfg)
+        self.cfg_sampler = HostSamplerConfig(
+            **cfgfile_db.get(ConfigSections.INFO_SAMPLER.value, {})
+        )
+        self.cfg_snapshots = SnapshotStoreConfig(
+            **cfgfile_db.get(ConfigSections.INFO_SNAPSHOTS.value, {})
+        )
+        self.cfg_reconcile = ReconcilerConfig(
+            **cfgfile_db.get(ConfigSections.INFO_RECONCILE.value, {})
+        )
+        self.backend = InfoBackend(
+            self.cfg, self.cfg_sampler, self.cfg_snapshots, self.cfg_reconcile
+        )
         self.objlayer = None
         self.systasks = []
         self.apitasks = [
@@ -1,12 +1,12 @@
 """Info Tasks"""
 
-from dataclasses import asdict
 from enum import Enum
 from app.daas.common.enums import BackendName
-from app.daas.resources.info.monitoring import MonitoringInfo, MonitoringInfoTool
+from app.daas.resources.info.monitoring import MonitoringInfoTool
+from app.daas.resources.info.snapshots import SnapshotKind
 from app.daas.resources.info.sysinfo import Systeminfo
 from app.qweb.common.common import TaskArgs
-from app.qweb.processing.processor import QwebResult
+from app.qweb.processing.processor import QwebCachedResult, QwebResult
 from app.daas.common.ctx import (
     get_backend_component,
     log_task_arguments,
@@ -32,32 +32,19 @@ async def dashboard_info(args: TaskArgs) -> QwebResult:
     """Returns dashboard info"""
     log_task_arguments(args.ctx, args.req, args.info, args.user)
     sys = get_backend_component(args.ctx, BackendName.INFO.value, Systeminfo)
-    info = await sys.get_dashboard_info(args.user.id_user)
-    if info is not None:
-        return QwebResult(200, {"dashboardinfo": asdict(info)})
-    return QwebResult(400, {}, 1, "Dashbaordinfo was empty")
+    kind = SnapshotKind.DASHBOARD.value
+    snapshot = await sys.get_snapshot(kind, args.user.id_user)
+    return QwebCachedResult(200, {"dashboardinfo": snapshot.data}, etag=snapshot.etag)
 
 
 async def monitoring_info(args: TaskArgs) -> QwebResult:
     """Returns monitoring info object"""
     log_task_arguments(args.ctx, args.req, args.info, args.user)
 
-    userid = args.user.id_user
-    mon = MonitoringInfoTool()
-    include_hostinfo = True
-    taskinfo = await mon.create_monitoring_info_tasks(userid)
-    fileinfo = await mon.create_monitoring_info_files(userid)
-    appinfo = await mon.create_monitoring_info_apps(userid)
-    socketinfo = await mon.create_monitoring_info_websockets(userid)
-    hostinfo = await mon.create_monitoring_info_host(include_hostinfo)
-    objinfo = await mon.create_monitoring_info_objects(True, userid)
-    objutil = await mon.create_monitoring_info_utilization(userid)
-    limitinfo = await mon.create_monitoring_info_limit(userid)
-
-    info_all = MonitoringInfo(
-        taskinfo, fileinfo, appinfo, hostinfo, socketinfo, objinfo, objutil, limitinfo
-    )
-    return QwebResult(200, info_all.tojson())
+    sys = get_backend_component(args.ctx, BackendName.INFO.value, Systeminfo)
+    kind = SnapshotKind.MONITORING.value
+    snapshot = await sys.get_snapshot(kind, args.user.id_user)
+    return QwebCachedResult(200, snapshot.data, etag=snapshot.etag)
 
 
 async def monitoring_info_tasks(args: TaskArgs) -> QwebResult:
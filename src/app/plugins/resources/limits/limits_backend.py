@@ -38,6 +38,7 @@ class LimitBackend(QwebBackend):
     async def disconnect(self) -> bool:
         """Disconnects database adapter"""
         if self.component is not None:
+            await self.component.stop()
             self.connected = False
             return True
         return False
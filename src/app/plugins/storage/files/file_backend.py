@@ -2,6 +2,7 @@
 
 from app.daas.common.enums import BackendName
 from app.daas.storage.filestore import Filestore, FilestoreConfig
+from app.daas.storage.local.fs_usage import DirectoryUsageConfig
 from app.qweb.service.service_context import QwebBackend
 
 
@@ -9,14 +10,17 @@ class FileBackend(QwebBackend):
     """File backend"""
 
     cfg_storage: FilestoreConfig
+    cfg_usage: DirectoryUsageConfig
     component: Filestore
 
     def __init__(
         self,
         cfg_storage: FilestoreConfig,
+        cfg_usage: DirectoryUsageConfig,
     ):
         self.cfg_storage = cfg_storage
-        self.component = Filestore(self.cfg_storage)
+        self.cfg_usage = cfg_usage
+        self.component = Filestore(self.cfg_storage, self.cfg_usage)
         QwebBackend.__init__(
             self, name=BackendName.FILE.value, component=self.component
         )
@@ -2,6 +2,7 @@
 
 from app.daas.common.enums import ConfigFile, ConfigSections
 from app.daas.storage.filestore import FilestoreConfig
+from app.daas.storage.local.fs_usage import DirectoryUsageConfig
 from app.plugins.storage.files.file_backend import FileBackend
 from app.plugins.storage.files.file_tasks import (
     FileTask,
@@ -36,7 +37,10 @@ class FilePlugin(PluginBase):
         self.cfg_storage = FilestoreConfig(
             **cfgfile_db[ConfigSections.FILES_STORE.value]
         )
-        self.backend = FileBackend(self.cfg_storage)
+        self.cfg_usage = DirectoryUsageConfig(
+            **cfgfile_db.get(ConfigSections.FILES_USAGE.value, {})
+        )
+        self.backend = FileBackend(self.cfg_storage, self.cfg_usage)
         self.objlayer = None
         self.systasks = []
         self.apitasks = [
@@ -1,8 +1,12 @@
 """Default Blueprints"""
 
+import hmac
 import inspect
-from quart import Blueprint
+from typing import Mapping, Optional
+from quart import Blueprint, Response, request
 from app.qweb.blueprints.blueprint_handler import BlueprintHandler
+from app.qweb.common.config import QwebMetricsConfig
+from app.qweb.common.metrics import CONTENT_TYPE, METRICS
 from app.qweb.blueprints.blueprint_info import (
     AuthenticationMode,
     ConcurrencyMode,
@@ -99,3 +103,29 @@ async def favicon():
     """Default Endpoint"""
     frame = inspect.currentframe()
     return await handler.handle_frame(frame)
+
+
+async def metrics():
+    """
+    Endpoint for metric scrapers, registered at the configured path
+
+    Only allowed hosts presenting the configured token are served.
+    """
+    from app.qweb.service.service_runtime import get_qweb_runtime
+
+    config = get_qweb_runtime().cfg_qweb.metrics
+    if is_metrics_scraper(config, request.remote_addr, request.headers) is False:
+        return Response("Forbidden", 403, content_type=CONTENT_TYPE)
+    return Response(METRICS.render(), 200, content_type=CONTENT_TYPE)
+
+
+def is_metrics_scraper(
+    config: QwebMetricsConfig, host: Optional[str], headers: Mapping[str, str]
+) -> bool:
+    """Checks if a request comes from an allowed scraper"""
+    if host not in config.allowed_hosts:
+        return False
+    if config.token == "":
+        return True
+    expected = f"Bearer {config.token}"
+    return hmac.compare_digest(headers.get("Authorization", ""), expected)
@@ -5,7 +5,10 @@ from types import FrameType
 from typing import Any, Optional
 from quart import Blueprint, Response, request, websocket
 from app.qweb.auth.auth_qweb import QwebUser
-from app.qweb.blueprints.blueprint_handler_base import BlueprintHandlerBase
+from app.qweb.blueprints.blueprint_handler_base import (
+    REQUESTS_INFLIGHT,
+    BlueprintHandlerBase,
+)
 from app.qweb.blueprints.blueprint_info import (
     AuthenticationMode,
     BlueprintInfo,
@@ -54,19 +57,26 @@ class BlueprintHandler(BlueprintHandlerBase):
         """Handles requests"""
 
         # Init frame
-        timing = await self._init_timing()
+        timing, echo = await self._init_timing()
         framename = self._get_frame_name(frame)
         if framename == "":
             self._log_error(f"Invalid framename: {framename}", 1)
             return self._create_error_response("Invalid frame name", 500)
 
         # handle frame
-        result, code = await self.__try_handle_frame(framename, timing)
+        inflight = REQUESTS_INFLIGHT.labels()
+        inflight.inc()
+        try:
+            result, code = await self.__try_handle_frame(framename, timing)
+        finally:
+            inflight.dec()
         if result is None:
+            self._record_metrics(framename, 500, timing)
             return self._create_error_response("Response was None", 500)
 
         # Finalize frame
-        await self._append_timing(result, timing)
+        await self._append_timing(result, timing, echo)
+        self._record_metrics(framename, code, timing)
         return result, code
 
     async def __try_handle_frame(self, framename: str, timing: Optional[Measurement]):
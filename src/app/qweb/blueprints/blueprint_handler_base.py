@@ -20,6 +20,7 @@ from app.qweb.processing.processor_api import ApiProcessor
 from app.qweb.processing.processor_websockets import WebsocketProcessor
 from app.qweb.service.service_context import CoreContext, BackendContext, ObjectContext
 from app.qweb.service.service_runtime import QwebProcessorContexts
+from app.qweb.common.metrics import METRICS
 from app.qweb.common.timings import Measurement
 from app.qweb.processing.processor import (
     ProcessorRequest,
@@ -29,6 +30,17 @@ from app.qweb.processing.processor import (
 )
 from app.qweb.service.service_tasks import QwebTaskManager
 
+REQUESTS_TOTAL = METRICS.counter(
+    "qweb_requests_total", "Handled requests", ("endpoint", "code")
+)
+REQUESTS_INFLIGHT = METRICS.gauge("qweb_requests_inflight", "Requests in progress")
+REQUEST_DURATION = METRICS.histogram(
+    "qweb_request_duration_seconds", "Request latency", ("endpoint",)
+)
+REQUEST_PHASES = METRICS.histogram(
+    "qweb_request_phase_seconds", "Time spent in request phases", ("phase",)
+)
+
 
 @dataclass
 class QwebRequest:
@@ -374,7 +386,7 @@ class BlueprintHandlerBase(Loggable):
             return self.infos[name]
         return None
 
-    async def _init_timing(self) -> Optional[Measurement]:
+    async def _init_timing(self) -> tuple[Optional[Measurement], bool]:
         timing = None
         if self.cfg_handler.enable_timings:
             formdata = self._loop_exec(request.form)
@@ -389,14 +401,29 @@ class BlueprintHandlerBase(Loggable):
                 cli_ms = json["timestamp"]
                 timing = Measurement()
                 timing.start(cli_ms)
-        return timing
+        echo = timing is not None
+        if timing is None and METRICS.enabled:
+            timing = Measurement()
+            timing.start()
+        return timing, echo
 
-    async def _append_timing(self, result, timing: Optional[Measurement]):
+    async def _append_timing(self, result, timing: Optional[Measurement], echo: bool):
         if timing is not None:
             timing.stop()
-            if isinstance(result, dict):
+            if echo and isinstance(result, dict):
                 result["timings"] = asdict(timing)
 
+    def _record_metrics(self, name: str, code: int, timing: Optional[Measurement]):
+        if METRICS.enabled is False:
+            return
+        REQUESTS_TOTAL.labels(name, code).inc()
+        if timing is not None:
+            if timing.request.stopped() is False:
+                timing.stop()
+            REQUEST_DURATION.labels(name).observe(timing.request.seconds())
+            for phase, seconds in timing.phases().items():
+                REQUEST_PHASES.labels(phase).observe(seconds)
+
     async def _append_echo_args(
         self, result: Response | dict | str, req: ProcessorRequest
     ):
@@ -1,7 +1,7 @@
 """Qweb config"""
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import tomllib
 from typing import Any
 
@@ -98,6 +98,55 @@ class SslConfig:
     keyfile: str
 
 
+@dataclass
+class QwebSchedulerConfig:
+    """Task scheduler config parameters"""
+
+    enabled: bool = True
+    max_running: int = 16
+    max_running_owner: int = 4
+    max_queued: int = 256
+    max_queued_owner: int = 32
+    default_priority: str = "normal"
+    weights: dict[str, int] = field(
+        default_factory=lambda: {"interactive": 8, "normal": 4, "bulk": 1}
+    )
+    priorities: dict[str, str] = field(default_factory=dict)
+    limits: dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class QwebTaskStoreConfig:
+    """Task registry config parameters"""
+
+    history_max_finished: int = 10000
+    history_retention_s: int = 86400
+
+
+@dataclass
+class QwebBulkConfig:
+    """Bulk task execution config parameters"""
+
+    max_inflight: int = 8
+    timeout_s: float = 0
+
+
+@dataclass
+class QwebMetricsConfig:
+    """
+    Metrics export config parameters
+
+    Scrapers must connect from an allowed host. If a token is set, they
+    must also send it as bearer token.
+    """
+
+    enabled: bool = False
+    path: str = "/metrics"
+    max_series: int = 100
+    allowed_hosts: list[str] = field(default_factory=lambda: ["127.0.0.1", "::1"])
+    token: str = ""
+
+
 @dataclass
 class QwebConfig:
     """Qweb config parameters"""
@@ -109,6 +158,10 @@ class QwebConfig:
     cors: CorsConfig
     proc: QuartProcessorConfig
     ssl: SslConfig
+    scheduler: QwebSchedulerConfig = field(default_factory=QwebSchedulerConfig)
+    tasks: QwebTaskStoreConfig = field(default_factory=QwebTaskStoreConfig)
+    bulk: QwebBulkConfig = field(default_factory=QwebBulkConfig)
+    metrics: QwebMetricsConfig = field(default_factory=QwebMetricsConfig)
 
 
 @dataclass
@@ -181,6 +234,10 @@ class ConfigReader:
             quart=QuartConfig(**conf["quart"], root_path=sys.root_path),
             proc=QuartProcessorConfig(**conf["template_args"]),
             ssl=ssl,
+            scheduler=QwebSchedulerConfig(**conf.get("scheduler", {})),
+            tasks=QwebTaskStoreConfig(**conf.get("tasks", {})),
+            bulk=QwebBulkConfig(**conf.get("bulk", {})),
+            metrics=QwebMetricsConfig(**conf.get("metrics", {})),
         )
 
     def create_auth_config_toml(self, file: str):
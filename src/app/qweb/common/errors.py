@@ -3,3 +3,7 @@
 
 class TaskExecutionError(Exception):
     """Provides details on errors during Task processing"""
+
+
+class TaskAdmissionError(TaskExecutionError):
+    """Raised when the task scheduler rejects a task due to backpressure"""
@@ -0,0 +1,341 @@
+"""
+Metrics exported in the prometheus text format
+
+Counters, gauges and histograms are updated without locks: every thread
+writes into its own cells, which are only summed up when the metrics are
+collected. Cells of finished threads are folded into a retired total
+whenever a thread adds its cell or the metrics are collected, so threads
+started per call do not pile up cells between scrapes.
+Each metric family keeps a bounded number of label combinations, further
+combinations are accounted to a single overflow series.
+"""
+
+import bisect
+import threading
+import time
+from typing import Any, Callable, Optional
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+OVERFLOW_LABEL = "other"
+
+
+class _Shards:
+    """Cells of a single series, one per writing thread"""
+
+    __slots__ = ("size", "local", "cells", "retired", "lock")
+
+    def __init__(self, size: int):
+        self.size = size
+        self.local = threading.local()
+        self.cells: list[tuple[threading.Thread, list[float]]] = []
+        self.retired = [0.0] * size
+        # Only guards folding, writes to cells never take it
+        self.lock = threading.Lock()
+
+    def cell(self) -> list[float]:
+        """Returns the cell of the current thread"""
+        cell = getattr(self.local, "cell", None)
+        if cell is None:
+            cell = [0.0] * self.size
+            self.local.cell = cell
+            with self.lock:
+                self.__fold()
+                self.cells.append((threading.current_thread(), cell))
+        return cell
+
+    def collect(self) -> list[float]:
+        """Sums up all cells, folds cells of finished threads"""
+        with self.lock:
+            self.__fold()
+            total = list(self.retired)
+            cells = [cell for _, cell in self.cells]
+        for cell in cells:
+            for index, value in enumerate(cell):
+                total[index] += value
+        return total
+
+    def __fold(self):
+        alive = []
+        for thread, cell in self.cells:
+            if thread.is_alive():
+                alive.append((thread, cell))
+                continue
+            for index, value in enumerate(cell):
+                self.retired[index] += value
+        self.cells = alive
+
+
+class Counter:
+    """Monotonically increasing value"""
+
+    __slots__ = ("shards",)
+
+    def __init__(self):
+        self.shards = _Shards(1)
+
+    def inc(self, amount: float = 1.0):
+        """Increments the counter"""
+        self.shards.cell()[0] += amount
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        """Returns exposition lines"""
+        return [f"{name}{labels} {_format(self.shards.collect()[0])}"]
+
+
+class Gauge:
+    """
+    Value that may go up and down
+
+    `set` replaces the base value, `inc` and `dec` add to it. A gauge
+    with a function reads its value when collected.
+    """
+
+    __slots__ = ("base", "shards", "function")
+
+    def __init__(self):
+        self.base = 0.0
+        self.shards = _Shards(1)
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float):
+        """Sets the base value"""
+        self.base = value
+
+    def inc(self, amount: float = 1.0):
+        """Increments the gauge"""
+        self.shards.cell()[0] += amount
+
+    def dec(self, amount: float = 1.0):
+        """Decrements the gauge"""
+        self.shards.cell()[0] -= amount
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        """Reads the value from function when collected"""
+        self.function = function
+
+    def value(self) -> float:
+        """Returns current value"""
+        if self.function is not None:
+            return float(self.function())
+        return self.base + self.shards.collect()[0]
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        """Returns exposition lines"""
+        return [f"{name}{labels} {_format(self.value())}"]
+
+
+class HistogramTimer:
+    """Observes the time spent within a with-block"""
+
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: "Histogram"):
+        self.histogram = histogram
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class Histogram:
+    """Distribution of observed values in fixed buckets"""
+
+    __slots__ = ("bounds", "shards")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        # One cell per bucket, +Inf, sum and count
+        self.shards = _Shards(len(bounds) + 3)
+
+    def observe(self, value: float):
+        """Adds a value"""
+        cell = self.shards.cell()
+        cell[bisect.bisect_left(self.bounds, value)] += 1
+        cell[-2] += value
+        cell[-1] += 1
+
+    def time(self) -> HistogramTimer:
+        """Observes the duration of a with-block in seconds"""
+        return HistogramTimer(self)
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        """Returns exposition lines"""
+        values = self.shards.collect()
+        result = []
+        cumulated = 0.0
+        bounds = [_format(bound) for bound in self.bounds] + ["+Inf"]
+        for bound, count in zip(bounds, values):
+            cumulated += count
+            bucket = _join_labels(labels, f'le="{bound}"')
+            result.append(f"{name}_bucket{bucket} {_format(cumulated)}")
+        result.append(f"{name}_sum{labels} {_format(values[-2])}")
+        result.append(f"{name}_count{labels} {_format(values[-1])}")
+        return result
+
+
+class MetricFamily:
+    """Metric with fixed label names and a bounded number of series"""
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        kind: str,
+        labelnames: tuple[str, ...],
+        factory: Callable[[], Counter | Gauge | Histogram],
+        max_series: int,
+    ):
+        self.name = name
+        self.description = description
+        self.kind = kind
+        self.labelnames = labelnames
+        self.factory = factory
+        self.max_series = max_series
+        self.series: dict[tuple[str, ...], Counter | Gauge | Histogram] = {}
+        self.overflows = 0
+
+    def labels(self, *values) -> Any:
+        """Returns the series of the given label values, its type is the kind"""
+        key = tuple(map(str, values))
+        series = self.series.get(key)
+        if series is None:
+            if len(self.series) >= self.max_series:
+                self.overflows += 1
+                key = (OVERFLOW_LABEL,) * len(self.labelnames)
+            series = self.series.setdefault(key, self.factory())
+        return series
+
+    def render(self) -> list[str]:
+        """Returns exposition lines of all series"""
+        lines = [
+            f"# HELP {self.name} {_escape(self.description, False)}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for key, series in list(self.series.items()):
+            labels = ",".join(
+                f'{label}="{_escape(value)}"'
+                for label, value in zip(self.labelnames, key)
+            )
+            labels = f"{{{labels}}}" if labels else ""
+            lines.extend(series.samples(self.name, labels))
+        return lines
+
+
+class MetricsRegistry:
+    """Keeps metric families and renders them"""
+
+    def __init__(self, max_series: int = 100):
+        self.enabled = True
+        self.max_series = max_series
+        self.families: dict[str, MetricFamily] = {}
+
+    def configure(self, enabled: bool, max_series: int):
+        """Applies config, existing families keep their series"""
+        self.enabled = enabled
+        self.max_series = max_series
+        for family in self.families.values():
+            family.max_series = max_series
+
+    def counter(
+        self, name: str, description: str, labelnames: tuple[str, ...] = ()
+    ) -> MetricFamily:
+        """Registers a counter family, returns an existing one of that name"""
+        return self.__register(name, description, "counter", labelnames, Counter)
+
+    def gauge(
+        self, name: str, description: str, labelnames: tuple[str, ...] = ()
+    ) -> MetricFamily:
+        """Registers a gauge family, returns an existing one of that name"""
+        return self.__register(name, description, "gauge", labelnames, Gauge)
+
+    def histogram(
+        self,
+        name: str,
+        description: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> MetricFamily:
+        """Registers a histogram family, returns an existing one of that name"""
+        bounds = tuple(sorted(buckets))
+        return self.__register(
+            name, description, "histogram", labelnames, lambda: Histogram(bounds)
+        )
+
+    def render(self) -> str:
+        """Renders all families in the text exposition format"""
+        lines = []
+        overflows = MetricFamily(
+            "qweb_metrics_series_overflow_total",
+            "Label combinations accounted to the overflow series",
+            "counter",
+            ("metric",),
+            Counter,
+            len(self.families),
+        )
+        for family in list(self.families.values()):
+            lines.extend(family.render())
+            if family.overflows > 0:
+                overflows.labels(family.name).inc(family.overflows)
+        lines.extend(overflows.render())
+        return "\n".join(lines) + "\n"
+
+    def __register(
+        self,
+        name: str,
+        description: str,
+        kind: str,
+        labelnames: tuple[str, ...],
+        factory: Callable[[], Counter | Gauge | Histogram],
+    ) -> MetricFamily:
+        family = self.families.get(name)
+        if family is None:
+            family = MetricFamily(
+                name, description, kind, labelnames, factory, self.max_series
+            )
+            family = self.families.setdefault(name, family)
+        return family
+
+
+METRICS = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Obtains the process wide registry"""
+    return METRICS
+
+
+def _format(value: float) -> str:
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str, quoted: bool = True) -> str:
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quoted else value
+
+
+def _join_labels(labels: str, extra: str) -> str:
+    if labels == "":
+        return f"{{{extra}}}"
+    return f"{labels[:-1]},{extra}}}"
@@ -1,4 +1,4 @@
-from typing import Optional, Type, TypeVar
+from typing import Any, Optional, Type, TypeVar
 
 from app.daas.common.enums import BackendName
 from app.qweb.service.service_context import ServiceComponent
@@ -53,6 +53,7 @@ async def run_system_task(
     id_object: str = "",
     id_instance: str = "",
     args: dict = {},
+    id_task: str = "",
 ) -> Optional[ScheduledTask]:
     from app.qweb.service.service_tasks import QwebTaskManager
     from app.qweb.common.common import SystemTaskArgs
@@ -60,7 +61,7 @@ async def run_system_task(
     mancomp: QwebTaskManager = await get_service(ServiceComponent.TASK, QwebTaskManager)
     task = mancomp.get_task_system(name)
     if task != "":
-        sysargs = SystemTaskArgs(args, "", id_object, id_instance)
+        sysargs = SystemTaskArgs(args, id_task, id_object, id_instance)
         newtask = (task, [sysargs], {})
         return await mancomp.start_systask(
             name, newtask, True, id_owner, id_object, id_instance
@@ -68,6 +69,14 @@ async def run_system_task(
     return None
 
 
+async def wait_system_task(task: ScheduledTask) -> Optional[Any]:
+    """Awaits a system task started by the calling task"""
+    from app.qweb.service.service_tasks import QwebTaskManager
+
+    mancomp: QwebTaskManager = await get_service(ServiceComponent.TASK, QwebTaskManager)
+    return await mancomp.wait_systask(task)
+
+
 # async def run_systask(
 #     self,
 #     name: str,
@@ -0,0 +1,91 @@
+"""Test the lock-free metrics registry and its text exposition."""
+
+import threading
+
+from app.qweb.blueprints.blueprint_defaults import is_metrics_scraper
+from .config import QwebMetricsConfig
+from .metrics import MetricsRegistry
+
+
+def test_counters_are_summed_across_threads():
+    """Increments of concurrent threads are neither lost nor double counted."""
+    registry = MetricsRegistry()
+    family = registry.counter("jobs_total", "Jobs", ("kind",))
+
+    def work():
+        for _ in range(10000):
+            family.labels("a").inc()
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    family.labels("a").inc(5)
+    assert "jobs_total" in registry.render()
+    for thread in threads:
+        thread.join()
+    assert 'jobs_total{kind="a"} 80005\n' in registry.render()
+    assert len(family.labels("a").shards.cells) == 1
+    assert 'jobs_total{kind="a"} 80005\n' in registry.render()
+
+
+def test_histogram_and_gauge_exposition():
+    """Buckets are cumulative, gauges combine base, deltas and functions."""
+    registry = MetricsRegistry()
+    hist = registry.histogram("lat_seconds", "Latency", (), (0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        hist.labels().observe(value)
+    gauge = registry.gauge("depth", 'Queue "depth"', ("queue",))
+    gauge.labels('a"b').set(3)
+    gauge.labels('a"b').dec()
+    gauge.labels("fn").set_function(lambda: 7)
+    lines = registry.render().splitlines()
+    assert lines[:7] == [
+        "# HELP lat_seconds Latency",
+        "# TYPE lat_seconds histogram",
+        'lat_seconds_bucket{le="0.1"} 2',
+        'lat_seconds_bucket{le="1"} 3',
+        'lat_seconds_bucket{le="+Inf"} 4',
+        "lat_seconds_sum 3.65",
+        "lat_seconds_count 4",
+    ]
+    assert 'depth{queue="a\\"b"} 2' in lines
+    assert 'depth{queue="fn"} 7' in lines
+    assert registry.gauge("depth", "Other") is gauge
+
+
+def test_label_cardinality_is_bounded():
+    """Label combinations beyond the limit share one overflow series."""
+    registry = MetricsRegistry(max_series=3)
+    family = registry.counter("hits_total", "Hits", ("path",))
+    for index in range(10):
+        family.labels(f"/path/{index}").inc()
+    assert len(family.series) == 4
+    text = registry.render()
+    assert 'hits_total{path="other"} 7' in text
+    assert 'qweb_metrics_series_overflow_total{metric="hits_total"} 7' in text
+
+
+def test_finished_thread_cells_are_folded_on_write():
+    """Cells of finished threads are folded without waiting for a scrape."""
+    registry = MetricsRegistry()
+    counter = registry.counter("runs_total", "Runs", ()).labels()
+    for _ in range(50):
+        thread = threading.Thread(target=counter.inc)
+        thread.start()
+        thread.join()
+    assert len(counter.shards.cells) <= 2
+    assert "runs_total 50\n" in registry.render()
+
+
+def test_metrics_scrapers_need_allowed_host_and_token():
+    """Scrapers must connect from an allowed host and carry the token."""
+    config = QwebMetricsConfig(enabled=True, allowed_hosts=["10.0.0.1"])
+    assert is_metrics_scraper(config, "10.0.0.1", {})
+    assert not is_metrics_scraper(config, "10.0.0.2", {})
+    assert not is_metrics_scraper(config, None, {})
+    config.token = "secret"
+    assert not is_metrics_scraper(config, "10.0.0.1", {})
+    assert not is_metrics_scraper(
+        config, "10.0.0.1", {"Authorization": "Bearer guess"}
+    )
+    assert is_metrics_scraper(config, "10.0.0.1", {"Authorization": "Bearer secret"})
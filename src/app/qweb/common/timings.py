@@ -25,6 +25,14 @@ class Timespan:
         """Create timestamp"""
         return round(time.time_ns() / 1000000)
 
+    def stopped(self) -> bool:
+        """Tells if both timestamps are set"""
+        return self.begin > 0 and self.end > 0
+
+    def seconds(self) -> float:
+        """Returns the timespan in seconds"""
+        return self.diff / 1000
+
     def to_json(self):
         """Converts object to json"""
         return asdict(self)
@@ -56,6 +64,15 @@ class Measurement:
         """Sets second timestamp"""
         self.request.stop()
 
+    def phases(self) -> dict[str, float]:
+        """Returns seconds spent in each stopped phase"""
+        spans = {
+            "authentication": self.authentication,
+            "processing": self.processing,
+            "context": self.context,
+        }
+        return {name: span.seconds() for name, span in spans.items() if span.stopped()}
+
     def to_json(self):
         """Converts object to json"""
         return asdict(self)
@@ -76,6 +76,13 @@ class QwebResult:
         )
 
 
+@dataclass
+class QwebCachedResult(QwebResult):
+    """Json result with an ETag, answered with 304 if the client has it"""
+
+    etag: str = ""
+
+
 @dataclass
 class ProcessorRequestContext:
     """Processor Request context"""
@@ -5,11 +5,12 @@ from dataclasses import asdict
 import traceback
 from types import TracebackType
 from typing import Any
-from quart import Response
-from app.daas.common.errors import ObjectProcessingError
+from quart import Response, current_app
+from app.daas.common.errors import ObjectProcessingError, RessourceLimitError
 from app.qweb.auth.auth_qweb import QwebUser
 from app.qweb.processing.processor import (
     ApiProcessorAction,
+    QwebCachedResult,
     QwebResult,
     ProcessorBase,
     ProcessorRequest,
@@ -57,7 +58,7 @@ class ApiProcessor(ProcessorBase):
         proc_request: ProcessorRequest,
         info: BlueprintInfo,
         user: QwebUser,
-    ) -> tuple[dict, int]:
+    ) -> tuple[Response | dict, int]:
         await self.__delay(proc_request)
         if proc_request.apitask != "":
             try:
@@ -65,12 +66,18 @@ class ApiProcessor(ProcessorBase):
                 if isinstance(ret, dict | list):
                     resp = QwebResult(200, ret, 0, "")
                     return asdict(resp), resp.response_code
+                if isinstance(ret, QwebCachedResult) and ret.etag != "":
+                    return self.__create_cached_response(proc_request, ret)
                 if isinstance(ret, QwebResult):
                     return asdict(ret), ret.response_code
                 msg = f"Unknown return type: {type(ret)}"
                 self._log_error(msg, 1)
                 resp = self.create_error_dict(msg)
                 return asdict(resp), resp.response_code
+            except RessourceLimitError as exe:
+                resp = self.create_error_dict(f"{exe}", 503)
+                self._log_info(f"Demand rejected: {exe}")
+                return asdict(resp), resp.response_code
             except Exception as exe:
                 resp = self.create_error_dict(
                     "Exception in ApiProcessor (JSON)", exception=exe
@@ -82,6 +89,32 @@ class ApiProcessor(ProcessorBase):
         resp = self.create_error_dict(msg)
         return asdict(resp), resp.response_code
 
+    def __create_cached_response(
+        self, proc_request: ProcessorRequest, result: QwebCachedResult
+    ) -> tuple[Response, int]:
+        etag = f'"{result.etag}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        request = proc_request.request_context.request_quart
+        if request is not None and result.response_code == 200:
+            if self.__etag_matches(request.headers.get("If-None-Match", ""), etag):
+                return Response("", status=304, headers=headers), 304
+        response = Response(
+            current_app.json.dumps(asdict(result)),
+            status=result.response_code,
+            headers=headers,
+            mimetype="application/json",
+        )
+        return response, result.response_code
+
+    def __etag_matches(self, header: str, etag: str) -> bool:
+        for candidate in header.split(","):
+            candidate = candidate.strip()
+            if candidate.startswith("W/"):
+                candidate = candidate[2:]
+            if candidate in ("*", etag):
+                return True
+        return False
+
     async def __create_html_result(
         self,
         ctx: QwebProcessorContexts,
@@ -0,0 +1,113 @@
+"""
+Benchmark bulk task execution against a fake backend.
+
+The fake backend serves a fixed number of requests in parallel, further
+requests wait for a free slot. Above an overload threshold it rejects
+requests, like Proxmox or Docker returning errors under load. Each run
+compares `asyncio.gather` with `run_bounded` at several limits:
+
+```
+python3 -m app.qweb.service.bench_concurrency -n 500 -c 16 -l 8 16 32
+```
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Awaitable, Callable
+from .service_concurrency import run_bounded
+
+
+class FakeBackend:
+    """Backend with limited capacity and overload errors"""
+
+    def __init__(self, capacity: int, latency_ms: float, overload: int):
+        self.capacity = asyncio.Semaphore(capacity)
+        self.latency = latency_ms / 1000
+        self.overload = overload
+        self.inflight = 0
+        self.rejected = 0
+
+    async def call(self) -> float:
+        """Serves one request, returns its latency in ms"""
+        started = time.monotonic()
+        self.inflight += 1
+        try:
+            if self.inflight > self.overload:
+                self.rejected += 1
+                raise ConnectionError("Backend overloaded")
+            async with self.capacity:
+                await asyncio.sleep(self.latency)
+        finally:
+            self.inflight -= 1
+        return (time.monotonic() - started) * 1000
+
+
+def _summarize(name: str, latencies: list[float], failed: int, duration: float):
+    p50 = p99 = 0.0
+    if len(latencies) > 1:
+        quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p99 = quantiles[49], quantiles[98]
+    return {
+        "mode": name,
+        "duration_ms": round(duration * 1000, 1),
+        "failed": failed,
+        "latency_p50_ms": round(p50, 1),
+        "latency_p99_ms": round(p99, 1),
+    }
+
+
+async def bench_gather(backend: FakeBackend, items: int) -> dict:
+    """Runs all items at once"""
+    started = time.monotonic()
+    results = await asyncio.gather(
+        *[backend.call() for _ in range(items)], return_exceptions=True
+    )
+    latencies = [res for res in results if isinstance(res, float)]
+    failed = items - len(latencies)
+    return _summarize("gather", latencies, failed, time.monotonic() - started)
+
+
+async def bench_bounded(backend: FakeBackend, items: int, limit: int) -> dict:
+    """Runs items with bounded concurrency"""
+    started = time.monotonic()
+    factories: list[Callable[[], Awaitable[Any]]] = [backend.call] * items
+    result = await run_bounded(factories, limit)
+    latencies = [item.result for item in result.succeeded]
+    return _summarize(
+        f"bounded-{limit}",
+        latencies,
+        len(result.failed),
+        time.monotonic() - started,
+    )
+
+
+async def bench(
+    items: int, capacity: int, latency_ms: float, overload: int, limits: list[int]
+) -> list[dict]:
+    """Runs all benchmark modes on fresh backends"""
+    results = [await bench_gather(FakeBackend(capacity, latency_ms, overload), items)]
+    for limit in limits:
+        backend = FakeBackend(capacity, latency_ms, overload)
+        results.append(await bench_bounded(backend, items, limit))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("-n", "--items", type=int, default=500)
+    parser.add_argument("-c", "--capacity", type=int, default=16)
+    parser.add_argument("-d", "--latency", type=float, default=20, help="ms")
+    parser.add_argument("-o", "--overload", type=int, default=256)
+    parser.add_argument("-l", "--limits", type=int, nargs="+", default=[8, 16, 32])
+    args = parser.parse_args()
+    results = asyncio.run(
+        bench(args.items, args.capacity, args.latency, args.overload, args.limits)
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
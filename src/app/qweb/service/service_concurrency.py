@@ -0,0 +1,130 @@
+"""
+Runs batches of coroutines with bounded concurrency.
+
+`run_bounded` replaces `asyncio.gather` for batches of tasks. At most
+`limit` items are in flight at once, every item may be bounded by a
+timeout and failures are collected per item instead of aborting the
+whole batch. Cancelling the caller cancels all items in flight and no
+further items are started.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterable, Optional
+
+ProgressCallback = Callable[["BulkProgress"], None]
+
+
+@dataclass
+class BulkItemResult:
+    """Result of a single item"""
+
+    index: int
+    success: bool = False
+    result: Any = None
+    error: Optional[BaseException] = None
+    timed_out: bool = False
+    duration_ms: float = 0
+
+
+@dataclass
+class BulkProgress:
+    """Progress of a batch"""
+
+    total: int
+    started: int = 0
+    finished: int = 0
+    failed: int = 0
+    inflight: int = 0
+
+
+@dataclass
+class BulkResult:
+    """Results of a batch in order of the items"""
+
+    items: list[BulkItemResult] = field(default_factory=list)
+    duration_ms: float = 0
+
+    @property
+    def succeeded(self) -> list[BulkItemResult]:
+        """Items finished without error"""
+        return [item for item in self.items if item.success]
+
+    @property
+    def failed(self) -> list[BulkItemResult]:
+        """Items finished with error or timeout"""
+        return [item for item in self.items if item.success is False]
+
+    def values(self) -> list[Any]:
+        """Returns results like `asyncio.gather`, raises the first error"""
+        for item in self.items:
+            if item.error is not None:
+                raise item.error
+        return [item.result for item in self.items]
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {
+            "total": len(self.items),
+            "succeeded": len(self.succeeded),
+            "failed": len(self.failed),
+            "timed_out": len([item for item in self.items if item.timed_out]),
+            "duration_ms": self.duration_ms,
+        }
+
+
+async def run_bounded(
+    factories: Iterable[Callable[[], Awaitable[Any]]],
+    limit: int = 0,
+    timeout: float = 0,
+    on_progress: Optional[ProgressCallback] = None,
+) -> BulkResult:
+    """
+    Runs coroutines created by factories with at most limit in flight.
+
+    Factories are called lazily, so no coroutine exists before its item
+    is started. A limit or timeout of 0 means unbounded.
+    """
+    pending = list(factories)
+    progress = BulkProgress(len(pending))
+    result = BulkResult([BulkItemResult(index) for index in range(len(pending))])
+    workers = len(pending) if limit <= 0 else min(limit, len(pending))
+    queue = iter(enumerate(pending))
+    started_at = time.monotonic()
+
+    async def run_item(index: int, factory: Callable[[], Awaitable[Any]]):
+        item = result.items[index]
+        item_start = time.monotonic()
+        try:
+            if timeout > 0:
+                item.result = await asyncio.wait_for(factory(), timeout)
+            else:
+                item.result = await factory()
+            item.success = True
+        except asyncio.TimeoutError as exe:
+            item.error = exe
+            item.timed_out = True
+        except Exception as exe:
+            item.error = exe
+        item.duration_ms = (time.monotonic() - item_start) * 1000
+
+    async def worker():
+        for index, factory in queue:
+            progress.started += 1
+            progress.inflight += 1
+            try:
+                await run_item(index, factory)
+            finally:
+                progress.inflight -= 1
+            progress.finished += 1
+            if result.items[index].success is False:
+                progress.failed += 1
+            if on_progress is not None:
+                on_progress(progress)
+
+    async with asyncio.TaskGroup() as group:
+        for _ in range(workers):
+            group.create_task(worker())
+    result.duration_ms = (time.monotonic() - started_at) * 1000
+    return result
@@ -13,6 +13,7 @@ from app.qweb.logging.logging import Loggable, QwebLogManager, LogTarget, Logger
 from app.qweb.auth.auth_dummy import QwebDummyAuthenticator
 from app.qweb.blueprints.blueprint_info import BlueprintInfo
 from app.qweb.common.config import ConfigReader, QwebAuthenticatorConfig, QwebConfig
+from app.qweb.common.metrics import METRICS
 from app.qweb.service.service_context import (
     BackendContext,
     ObjectContext,
@@ -42,7 +43,10 @@ class QwebServiceRuntime(Loggable):
         self.cfg_auth = self.reader.cfg_auth
         self.app = self.__create_app()
         self.services = CoreContextProvider(
-            QwebTaskManager(), QwebDummyAuthenticator(self.cfg_auth)
+            QwebTaskManager(
+                self.cfg_qweb.scheduler, self.cfg_qweb.tasks, self.cfg_qweb.bulk
+            ),
+            QwebDummyAuthenticator(self.cfg_auth),
         )
         self.blueprints = {}
         self.backends = BackendContextProvider()
@@ -221,6 +225,7 @@ class QwebServiceRuntime(Loggable):
 
     async def stop_tasks(self) -> bool:
         """Stops tasks"""
+        self.services.manager.stopping = True
         tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
         for task in tasks:
             self._log_info(f"Shutting down task: {task.get_name()}")
@@ -265,9 +270,13 @@ class QwebServiceRuntime(Loggable):
     def __create_app(self):
         from app.qweb.blueprints.blueprint_defaults import (
             handler as handler_default,
+            metrics as metrics_endpoint,
         )
 
         sys.setrecursionlimit(self.cfg_qweb.handler.recursion_limit)
+        METRICS.configure(
+            self.cfg_qweb.metrics.enabled, self.cfg_qweb.metrics.max_series
+        )
         quartargs = asdict(self.cfg_qweb.quart)
         quartargs.pop("webroot_folder")
         quartargs.pop("config_folder")
@@ -287,6 +296,13 @@ class QwebServiceRuntime(Loggable):
 
         # Blueprints
         self.app.register_blueprint(handler_default.blueprints)
+        if self.cfg_qweb.metrics.enabled:
+            self.app.add_url_rule(
+                self.cfg_qweb.metrics.path,
+                "metrics",
+                metrics_endpoint,
+                methods=["GET"],
+            )
         # if self.config.handler.enable_testing:
         #     self.app.register_blueprint(handler_testing.blueprints)
 
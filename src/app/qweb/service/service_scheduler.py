@@ -0,0 +1,316 @@
+"""
+Schedules system tasks.
+
+Tasks are queued per priority class and per owner. Whenever a slot
+becomes available, the priority class is chosen by smooth weighted
+round robin. Within a class the owner with the fewest running tasks is
+served next, ties going to the owner served least recently, so a
+burst of tasks by a single user can neither starve other users nor
+interactive tasks. Per tasktype and per owner limits bound the amount
+of concurrent work towards the backends. Each owner is served with its
+oldest task whose tasktype has a free slot, so a tasktype at its limit
+does not block other tasktypes queued behind it.
+"""
+
+import asyncio
+import contextvars
+import itertools
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+from app.qweb.common.config import QwebSchedulerConfig
+from app.qweb.common.errors import TaskAdmissionError
+from app.qweb.logging.logging import LogTarget, Loggable
+
+CURRENT_TASK: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "qweb_current_task", default=""
+)
+"""Id of the scheduled task running in the current context."""
+
+
+@dataclass
+class QueuedTask:
+    """Queue entry of a scheduled task"""
+
+    id_task: str
+    tasktype: str
+    id_owner: int
+    priority: str
+    seq: int
+    started: asyncio.Future
+    queued_at: float = field(default_factory=time.monotonic)
+    started_at: float = 0
+    running: bool = False
+    released: bool = False
+    nested: bool = False
+
+    @property
+    def waited_ms(self) -> float:
+        """Milliseconds spent in queue"""
+        end = self.started_at if self.running else time.monotonic()
+        return (end - self.queued_at) * 1000
+
+
+@dataclass
+class PriorityStats:
+    """Counts dispatches and wait times of a priority class"""
+
+    weight: int
+    dispatched: int = 0
+    wait_last_ms: float = 0
+    wait_avg_ms: float = 0
+    wait_max_ms: float = 0
+
+    def add_wait(self, waited_ms: float):
+        """Adds wait time of a dispatched task"""
+        self.dispatched += 1
+        self.wait_last_ms = waited_ms
+        self.wait_max_ms = max(self.wait_max_ms, waited_ms)
+        self.wait_avg_ms += (waited_ms - self.wait_avg_ms) / self.dispatched
+
+
+class TaskScheduler(Loggable):
+    """Admits and dispatches scheduled tasks"""
+
+    def __init__(self, cfg: Optional[QwebSchedulerConfig] = None):
+        Loggable.__init__(self, LogTarget.TASK)
+        self.cfg = cfg if cfg is not None else QwebSchedulerConfig()
+        self.queues: dict[str, dict[int, deque[QueuedTask]]] = {
+            name: {} for name in self.cfg.weights
+        }
+        self.stats = {
+            name: PriorityStats(weight) for name, weight in self.cfg.weights.items()
+        }
+        self.current_weights = {name: 0 for name in self.cfg.weights}
+        self.running_total = 0
+        self.running_type: dict[str, int] = {}
+        self.running_owner: dict[int, int] = {}
+        self.served_owner: dict[int, int] = {}
+        self.queued_total = 0
+        self.queued_owner: dict[int, int] = {}
+        self.rejected = 0
+        self.sequence = itertools.count()
+
+    def get_priority(self, tasktype: str) -> str:
+        """Returns priority class of tasktype"""
+        priority = self.cfg.priorities.get(tasktype, self.cfg.default_priority)
+        if priority not in self.queues:
+            return next(iter(self.queues))
+        return priority
+
+    def submit(self, id_task: str, tasktype: str, id_owner: int) -> QueuedTask:
+        """
+        Admits a task and returns its queue entry.
+
+        Tasks started from within another scheduled task are queued like
+        any other task, a parent awaiting them lends them its slot by
+        adopting them.
+        """
+        entry = QueuedTask(
+            id_task,
+            tasktype,
+            id_owner,
+            self.get_priority(tasktype),
+            next(self.sequence),
+            asyncio.get_event_loop().create_future(),
+        )
+        if self.cfg.enabled is False:
+            self._start(entry)
+            return entry
+
+        queued_owner = self.queued_owner.get(id_owner, 0)
+        if self.queued_total >= self.cfg.max_queued:
+            self.rejected += 1
+            raise TaskAdmissionError(
+                f"Task queue full: {tasktype} (queued={self.queued_total})"
+            )
+        if queued_owner >= self.cfg.max_queued_owner:
+            self.rejected += 1
+            raise TaskAdmissionError(
+                f"Task queue full for owner {id_owner}: {tasktype} "
+                f"(queued={queued_owner})"
+            )
+        owners = self.queues[entry.priority]
+        owners.setdefault(id_owner, deque()).append(entry)
+        self.queued_total += 1
+        self.queued_owner[id_owner] = queued_owner + 1
+        self._dispatch()
+        return entry
+
+    async def wait(self, entry: QueuedTask):
+        """Waits until the task may run"""
+        await entry.started
+
+    def adopt(self, entry: QueuedTask) -> bool:
+        """
+        Runs a queued task on the slot of the scheduled task awaiting it.
+
+        The awaiting parent would otherwise deadlock on its own slot. The
+        adopted task is not counted again. Tasks which are started but not
+        awaited by their parent stay queued and count against all limits.
+        """
+        if CURRENT_TASK.get() == "" or entry.running or entry.released:
+            return False
+        owners = self.queues[entry.priority]
+        queue = owners.get(entry.id_owner)
+        if queue is None or entry not in queue:
+            return False
+        queue.remove(entry)
+        self._dequeued(entry, owners, queue)
+        entry.nested = True
+        entry.running = True
+        entry.started_at = time.monotonic()
+        entry.started.set_result(True)
+        return True
+
+    def release(self, entry: QueuedTask):
+        """Releases the slot of a finished or cancelled task"""
+        if entry.released:
+            return
+        entry.released = True
+        if entry.nested:
+            return
+        if entry.running:
+            self.running_total -= 1
+            self.running_type[entry.tasktype] -= 1
+            self.running_owner[entry.id_owner] -= 1
+            if self.running_owner[entry.id_owner] == 0:
+                self.running_owner.pop(entry.id_owner)
+                if entry.id_owner not in self.queued_owner:
+                    self.served_owner.pop(entry.id_owner, None)
+        else:
+            owners = self.queues[entry.priority]
+            queue = owners.get(entry.id_owner)
+            if queue is not None and entry in queue:
+                queue.remove(entry)
+                self._dequeued(entry, owners, queue)
+            entry.started.cancel()
+        self._dispatch()
+
+    def position(self, entry: QueuedTask) -> int:
+        """
+        Estimates the queue position of a task within its priority class.
+
+        Owners are served alternately, so every other owner gets about
+        one task dispatched per task of the own queue ahead of this one.
+        """
+        if entry.running or entry.released:
+            return 0
+        owners = self.queues[entry.priority]
+        own = owners.get(entry.id_owner)
+        if own is None or entry not in own:
+            return 0
+        ahead = own.index(entry)
+        others = sum(
+            min(len(queue), ahead + 1)
+            for owner, queue in owners.items()
+            if owner != entry.id_owner
+        )
+        return ahead + others + 1
+
+    def _start(self, entry: QueuedTask):
+        entry.running = True
+        entry.started_at = time.monotonic()
+        self.running_total += 1
+        running_type = self.running_type.get(entry.tasktype, 0)
+        running_owner = self.running_owner.get(entry.id_owner, 0)
+        self.running_type[entry.tasktype] = running_type + 1
+        self.running_owner[entry.id_owner] = running_owner + 1
+        self.served_owner[entry.id_owner] = next(self.sequence)
+        self.stats[entry.priority].add_wait(entry.waited_ms)
+        if entry.started.done() is False:
+            entry.started.set_result(True)
+
+    def _dequeued(
+        self,
+        entry: QueuedTask,
+        owners: dict[int, deque[QueuedTask]],
+        queue: deque[QueuedTask],
+    ):
+        self.queued_total -= 1
+        self.queued_owner[entry.id_owner] -= 1
+        if self.queued_owner[entry.id_owner] == 0:
+            self.queued_owner.pop(entry.id_owner)
+        if len(queue) == 0:
+            owners.pop(entry.id_owner)
+
+    def _select_entry(self, queue: deque[QueuedTask]) -> Optional[QueuedTask]:
+        """Returns the first task of an owner whose tasktype has a free slot"""
+        limit_owner = self.cfg.max_running_owner
+        if 0 < limit_owner <= self.running_owner.get(queue[0].id_owner, 0):
+            return None
+        for entry in queue:
+            limit_type = self.cfg.limits.get(entry.tasktype, 0)
+            if limit_type <= 0 or self.running_type.get(entry.tasktype, 0) < limit_type:
+                return entry
+        return None
+
+    def _select(self, priority: str) -> Optional[QueuedTask]:
+        eligible = []
+        for queue in self.queues[priority].values():
+            entry = self._select_entry(queue)
+            if entry is not None:
+                eligible.append(entry)
+        if len(eligible) == 0:
+            return None
+        return min(
+            eligible,
+            key=lambda entry: (
+                self.running_owner.get(entry.id_owner, 0),
+                self.served_owner.get(entry.id_owner, -1),
+            ),
+        )
+
+    def _dispatch(self):
+        while self.queued_total > 0 and (
+            self.cfg.max_running <= 0 or self.running_total < self.cfg.max_running
+        ):
+            candidates = {}
+            for priority in self.queues:
+                candidate = self._select(priority)
+                if candidate is not None:
+                    candidates[priority] = candidate
+            if len(candidates) == 0:
+                return
+
+            # smooth weighted round robin between priority classes
+            total = 0
+            for priority in candidates:
+                self.current_weights[priority] += self.cfg.weights[priority]
+                total += self.cfg.weights[priority]
+            selected = max(candidates, key=lambda name: self.current_weights[name])
+            self.current_weights[selected] -= total
+
+            entry = candidates[selected]
+            owners = self.queues[selected]
+            queue = owners[entry.id_owner]
+            queue.remove(entry)
+            self._dequeued(entry, owners, queue)
+            self._start(entry)
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {
+            "running": self.running_total,
+            "queued": self.queued_total,
+            "rejected": self.rejected,
+            "priorities": {
+                name: {
+                    "queued": sum(len(queue) for queue in owners.values()),
+                    **vars(self.stats[name]),
+                }
+                for name, owners in self.queues.items()
+            },
+            "tasktypes": {
+                name: count for name, count in self.running_type.items() if count > 0
+            },
+            "owners": {
+                owner: {
+                    "running": self.running_owner.get(owner, 0),
+                    "queued": self.queued_owner.get(owner, 0),
+                }
+                for owner in set(self.running_owner) | set(self.queued_owner)
+                if self.running_owner.get(owner, 0) + self.queued_owner.get(owner, 0)
+            },
+        }
@@ -2,11 +2,40 @@
 
 import asyncio
 import secrets
+from functools import partial
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, Callable, Optional
+from app.qweb.common.config import (
+    QwebBulkConfig,
+    QwebSchedulerConfig,
+    QwebTaskStoreConfig,
+)
 from app.qweb.common.enums import ScheduledTaskFilter
 from app.qweb.common.errors import TaskExecutionError
+from app.qweb.common.metrics import METRICS
 from app.qweb.logging.logging import LogTarget, Loggable
+from app.qweb.service.service_concurrency import (
+    BulkResult,
+    ProgressCallback,
+    run_bounded,
+)
+from app.qweb.service.service_scheduler import CURRENT_TASK, QueuedTask, TaskScheduler
+from app.qweb.service.service_taskstore import SpillHandler, TaskListener, TaskStore
+
+TASKS_STARTED = METRICS.counter(
+    "qweb_tasks_started_total", "Scheduled tasks", ("type",)
+)
+TASKS_FINISHED = METRICS.counter(
+    "qweb_tasks_finished_total", "Finalized tasks", ("type", "outcome")
+)
+TASK_DURATION = METRICS.histogram(
+    "qweb_task_duration_seconds", "Task runtime including queueing", ("type",)
+)
+TASK_QUEUE_WAIT = METRICS.histogram(
+    "qweb_task_queue_wait_seconds", "Time spent in scheduler queue", ("priority",)
+)
+TASKS_RUNNING = METRICS.gauge("qweb_tasks_running", "Tasks holding a slot")
+TASKS_QUEUED = METRICS.gauge("qweb_tasks_queued", "Tasks waiting for a slot")
 
 
 class ScheduledTask(Loggable):
@@ -18,6 +47,7 @@ class ScheduledTask(Loggable):
     started_at: datetime
     stopped_at: datetime
     systask: bool
+    queue: Optional[QueuedTask]
     running: bool
     success: bool
     result: Optional[Any]
@@ -32,6 +62,7 @@ class ScheduledTask(Loggable):
         id_owner: int,
         id_object: str = "",
         id_instance: str = "",
+        queue: Optional[QueuedTask] = None,
     ):
         Loggable.__init__(self, LogTarget.TASK)
         self.tasktype = name
@@ -41,6 +72,7 @@ class ScheduledTask(Loggable):
         self.id_instance = id_instance
         self.task = task
         self.systask = systask
+        self.queue = queue
         self.running = True
         self.success = False
         self.finalized = False
@@ -51,10 +83,14 @@ class ScheduledTask(Loggable):
 
     def to_json(self) -> dict:
         data = vars(self).copy()
-        drop = ["task", "logger", "log_target", "result"]
+        drop = ["task", "logger", "log_target", "result", "queue"]
         for name in drop:
             if name in data:
                 data.pop(name)
+        if self.queue is not None:
+            data["priority"] = self.queue.priority
+            data["queued"] = self.queue.running is False and self.finalized is False
+            data["waited_ms"] = self.queue.waited_ms
         return data
 
 
@@ -63,16 +99,36 @@ class QwebTaskManager(Loggable):
 
     tasks_endpoint: dict[str, Any] = {}
     tasks_system: dict[str, Any] = {}
-    scheduled_tasks: dict[str, ScheduledTask] = {}
-    stopped_tasks: dict[str, ScheduledTask] = {}
 
-    def __init__(self):
+    def __init__(
+        self,
+        cfg: Optional[QwebSchedulerConfig] = None,
+        cfg_store: Optional[QwebTaskStoreConfig] = None,
+        cfg_bulk: Optional[QwebBulkConfig] = None,
+    ):
         Loggable.__init__(self, LogTarget.TASK)
         self.loop = asyncio.get_event_loop()
+        self.scheduler = TaskScheduler(cfg)
+        self.store = TaskStore(cfg_store)
+        self.cfg_bulk = cfg_bulk if cfg_bulk is not None else QwebBulkConfig()
+        self.stopping = False
+        self.store.add_listener(self._record_metrics)
+        TASKS_RUNNING.labels().set_function(lambda: self.scheduler.running_total)
+        TASKS_QUEUED.labels().set_function(lambda: self.scheduler.queued_total)
 
     def __repr__(self):
         return f"{self.__class__.__qualname__}" f"(tasks={len(self.tasks_endpoint)})"
 
+    @property
+    def scheduled_tasks(self) -> dict[str, ScheduledTask]:
+        """Running tasks by id"""
+        return self.store.running
+
+    @property
+    def stopped_tasks(self) -> dict[str, ScheduledTask]:
+        """Finished tasks by id"""
+        return self.store.finished
+
     async def __run_task(self, task, *args, **kwargs):
         return await task(*args, **kwargs)
 
@@ -87,29 +143,25 @@ class QwebTaskManager(Loggable):
     async def stop_scheduled_task(self, name: str) -> bool:
         return await self._stop_scheduled_task(name)
 
+    def set_spill_handler(self, handler: Optional[SpillHandler]):
+        """Sets handler receiving finished tasks evicted from the registry"""
+        self.store.spill_handler = handler
+
+    def add_task_listener(self, listener: TaskListener) -> Callable[[], None]:
+        """Adds listener for started and finished tasks, returns remover"""
+        return self.store.add_listener(listener)
+
     async def get_tasks_by_taskid(self, id_task: str) -> list[ScheduledTask]:
-        return list(
-            filter(
-                lambda obj: obj.id_task == id_task,
-                self.scheduled_tasks.values(),
-            )
-        )
+        task = self.store.get(id_task, ScheduledTaskFilter.RUNNING)
+        return [task] if task is not None else []
 
     async def get_tasks_by_object(self, id_object: str) -> list[ScheduledTask]:
-        return list(
-            filter(
-                lambda obj: obj.id_object == id_object,
-                self.scheduled_tasks.values(),
-            )
-        )
+        tasks = self.store.find(ScheduledTaskFilter.RUNNING, id_object=id_object)
+        return list(tasks.values())
 
     async def get_tasks_by_instance(self, id_instance: str) -> list[ScheduledTask]:
-        return list(
-            filter(
-                lambda obj: obj.id_instance == id_instance,
-                self.scheduled_tasks.values(),
-            )
-        )
+        tasks = self.store.find(ScheduledTaskFilter.RUNNING, id_instance=id_instance)
+        return list(tasks.values())
 
     async def _stop_scheduled_task(self, name: str) -> bool:
         result = False
@@ -119,54 +171,65 @@ class QwebTaskManager(Loggable):
         return result
 
     async def _remove_scheduled_task(self, name: str) -> bool:
-        result = False
         if name in self.scheduled_tasks:
-            self.scheduled_tasks.pop(name)
-            result = True
-        return result
+            return self.store.remove(name) is not None
+        return False
 
     async def _remove_stopped_task(self, name: str) -> bool:
-        result = False
         if name in self.stopped_tasks:
-            self.stopped_tasks.pop(name)
-            result = True
-        return result
+            return self.store.remove(name) is not None
+        return False
 
     async def _add_scheduled_task(self, task: ScheduledTask) -> bool:
         result = False
         if task is not None:
-            self.scheduled_tasks[task.id_task] = task
+            self.store.add(task)
             result = True
         return result
 
     async def _add_stopped_task(self, task: ScheduledTask) -> bool:
         result = False
         if task is not None:
-            self.stopped_tasks[task.id_task] = task
+            self.store.finalize(task)
             result = True
         return result
 
     async def get_scheduled_tasks(
         self, state: ScheduledTaskFilter
     ) -> dict[str, ScheduledTask]:
-        result = {}
-        if state == ScheduledTaskFilter.RUNNING or state == ScheduledTaskFilter.ALL:
-            result.update(self.scheduled_tasks.copy())
-        if state == ScheduledTaskFilter.FINAL or state == ScheduledTaskFilter.ALL:
-            result.update(self.stopped_tasks.copy())
-        return result
+        return self.store.find(state)
+
+    async def find_tasks(
+        self,
+        state: ScheduledTaskFilter,
+        id_owner: int = 0,
+        id_object: str = "",
+        id_instance: str = "",
+    ) -> dict[str, ScheduledTask]:
+        """Returns tasks matching state, owner, object and instance"""
+        return self.store.find(state, id_owner, id_object, id_instance)
 
     async def get_status_scheduled_task(self):
         running = await self.get_scheduled_tasks(ScheduledTaskFilter.RUNNING)
         stopped = await self.get_scheduled_tasks(ScheduledTaskFilter.FINAL)
-        self._log_info(f"TASKSTATE: {running} {stopped}")
+        self._log_info(f"TASKSTATE: {len(running)} {len(stopped)}")
         return {
             ScheduledTaskFilter.RUNNING.value: [
                 x.to_json() for _, x in running.items()
             ],
             ScheduledTaskFilter.FINAL.value: [x.to_json() for _, x in stopped.items()],
+            "scheduler": self.scheduler.tojson(),
+            "store": self.store.tojson(),
         }
 
+    async def get_queue_position(self, id_task: str) -> int:
+        """Returns queue position of a waiting task, 0 if not queued"""
+        if id_task in self.scheduled_tasks:
+            entry = self.scheduled_tasks[id_task].queue
+            if entry is not None:
+                return self.scheduler.position(entry)
+        return 0
+
     async def get_scheduled_task(
         self,
         state: ScheduledTaskFilter,
@@ -174,23 +237,20 @@ class QwebTaskManager(Loggable):
         objectid: str,
         instid: str,
     ) -> Optional[ScheduledTask]:
-        result = None
-        tasklist = await self.get_scheduled_tasks(state)
-        if id_task != "" and id_task in tasklist:
-            return tasklist[id_task]
-        for _, val in tasklist.items():
-            if objectid != "":
-                if objectid == val.id_object:
-                    return val
-            if instid != "":
-                if instid == val.id_instance:
-                    return val
-        return result
+        if id_task != "":
+            task = self.store.get(id_task, state)
+            if task is not None:
+                return task
+        if objectid != "":
+            for task in self.store.find(state, id_object=objectid).values():
+                return task
+        if instid != "":
+            for task in self.store.find(state, id_instance=instid).values():
+                return task
+        return None
 
     async def get_stopped_task(self, name: str) -> Optional[ScheduledTask]:
-        if name in self.stopped_tasks:
-            return self.stopped_tasks[name]
-        return None
+        return self.store.get(name, ScheduledTaskFilter.FINAL)
 
     async def filter_tasks(
         self,
@@ -241,56 +301,88 @@ class QwebTaskManager(Loggable):
             return self.tasks_system[name]
         return None
 
+    async def run_bulk(
+        self,
+        factories: list,
+        limit: Optional[int] = None,
+        timeout: Optional[float] = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ) -> BulkResult:
+        """
+        Runs coroutine factories with bounded concurrency.
+
+        Limit and timeout default to the bulk config. Failures are
+        collected per item in the returned result.
+        """
+        result = await run_bounded(
+            factories,
+            self.cfg_bulk.max_inflight if limit is None else limit,
+            self.cfg_bulk.timeout_s if timeout is None else timeout,
+            on_progress,
+        )
+        if len(result.failed) > 0:
+            self._log_info(f"Bulk run finished with errors: {result.tojson()}")
+        return result
+
     async def run_tasks_concurrently(self, tasks):
         """
-        tasks: a list of tuples, where each tuple contains an instance, a method name, and its arguments.
-        Example: [(instance1, "method1", arg1, arg2), (instance2, "method2", arg1)]
+        Runs the paired tasks of a single request concurrently.
+
+        tasks: a list of tuples of an instance, a method name and its
+        arguments, e.g. [(handler, "task_context", [info], {})]
         """
         coroutines = [
             self.__run_task(getattr(instance, method_name), *args, **kwargs)
             for instance, method_name, args, kwargs in tasks
         ]
-        created_tasks = [asyncio.create_task(coro) for coro in coroutines]
-        results = await asyncio.gather(*created_tasks)
-        return results
+        return await self._run_all(coroutines)
 
     async def run_apitasks_concurrently(self, tasks):
         """
-        tasks: a list of tuples, where each tuple contains an instance, a method name, and its arguments.
-        Example: [(instance1, "method1", arg1, arg2), (instance2, "method2", arg1)]
+        Runs a batch of api tasks through `run_bulk`.
+
+        tasks: a list of tuples of a method, its arguments and keyword
+        arguments, e.g. [(method1, [arg1, arg2], {}), (method2, [arg1], {})]
         """
-        coroutines = [
-            self.__run_apitask(method_name, *args, **kwargs)
+        factories = [
+            partial(self.__run_apitask, method_name, *args, **kwargs)
             for method_name, args, kwargs in tasks
         ]
-        created_tasks = [asyncio.create_task(coro) for coro in coroutines]
-        results = await asyncio.gather(*created_tasks)
-        return results
+        return (await self.run_bulk(factories)).values()
 
     async def run_apitask_concurrently(self, task):
         """
-        tasks: a list of tuples, where each tuple contains an instance, a method name, and its arguments.
-        Example: [(instance1, "method1", arg1, arg2), (instance2, "method2", arg1)]
+        task: a tuple of a method, its arguments and keyword arguments
         """
         method_name, args, kwargs = task
-        created_task = asyncio.create_task(
-            self.__run_apitask(method_name, *args, **kwargs)
-        )
-        result = await asyncio.gather(created_task)
-        return result[0]
+        return await self.__run_apitask(method_name, *args, **kwargs)
 
     async def run_systasks_concurrently(self, tasks):
         """
-        tasks: a list of tuples, where each tuple contains an instance, a method name, and its arguments.
-        Example: [(instance1, "method1", arg1, arg2), (instance2, "method2", arg1)]
+        Runs a batch of system tasks through `run_bulk`.
+
+        tasks: a list of tuples of a method, its arguments and keyword
+        arguments, e.g. [(method1, [arg1, arg2], {}), (method2, [arg1], {})]
         """
-        coroutines = [
-            self.__run_systask(method_name, *args, **kwargs)
+        factories = [
+            partial(self.__run_systask, method_name, *args, **kwargs)
             for method_name, args, kwargs in tasks
         ]
-        created_tasks = [asyncio.create_task(coro) for coro in coroutines]
-        results = await asyncio.gather(*created_tasks)
-        return results
+        return (await self.run_bulk(factories)).values()
+
+    async def _run_all(self, coroutines: list) -> list:
+        """
+        Runs the auth and context tasks of a single request concurrently.
+
+        Unlike `run_bulk` there is no limit or timeout, the first error is
+        raised at once and cancels the remaining coroutines.
+        """
+        tasks = [asyncio.create_task(coro) for coro in coroutines]
+        try:
+            return await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
 
     async def start_systask(
         self,
@@ -302,8 +394,9 @@ class QwebTaskManager(Loggable):
         id_instance: str = "",
     ) -> ScheduledTask:
         """
-        tasks: a list of tuples, where each tuple contains an instance, a method name, and its arguments.
-        Example: [(instance1, "method1", arg1, arg2), (instance2, "method2", arg1)]
+        Admits task to the scheduler and starts its runtime.
+
+        Raises TaskAdmissionError if the queue is full.
         """
         from app.qweb.common.common import SystemTaskArgs
 
@@ -316,15 +409,63 @@ class QwebTaskManager(Loggable):
                     args[0].id_task = taskid
                 else:
                     taskid = args[0].id_task
+        entry = self.scheduler.submit(taskid, name, id_owner)
         task_rt = asyncio.create_task(
             self._task_runtime(name, taskid, coro, *args, **kwargs)
         )
         task_sched = ScheduledTask(
-            name, taskid, task_rt, systask, id_owner, id_object, id_instance
+            name, taskid, task_rt, systask, id_owner, id_object, id_instance, entry
         )
+        task_rt.add_done_callback(lambda _: self._on_task_done(task_sched))
         await self._add_scheduled_task(task_sched)
+        if entry.running is False:
+            position = self.scheduler.position(entry)
+            self._log_info(f"Task queued    : {name} ({taskid}) Position={position}")
         return task_sched
 
+    async def wait_systask(self, task: ScheduledTask) -> Optional[Any]:
+        """
+        Awaits a task started by the calling task and returns its result.
+
+        A queued task is adopted onto the slot of the calling scheduled
+        task, which would otherwise deadlock waiting for a slot of its own.
+        """
+        if task.queue is not None:
+            self.scheduler.adopt(task.queue)
+        await task.task
+        return task.result
+
+    def _record_metrics(self, info: ScheduledTask):
+        if METRICS.enabled is False:
+            return
+        if info.id_task in self.store.running:
+            TASKS_STARTED.labels(info.tasktype).inc()
+            return
+        if info.success:
+            outcome = "success"
+        elif info.reason == "Task cancelled":
+            outcome = "cancelled"
+        else:
+            outcome = "failed"
+        TASKS_FINISHED.labels(info.tasktype, outcome).inc()
+        duration = (info.stopped_at - info.started_at).total_seconds()
+        TASK_DURATION.labels(info.tasktype).observe(duration)
+        if info.queue is not None and info.queue.started_at > 0:
+            TASK_QUEUE_WAIT.labels(info.queue.priority).observe(
+                info.queue.waited_ms / 1000
+            )
+
+    def _on_task_done(self, info: ScheduledTask):
+        # finalizes tasks cancelled before their runtime started
+        if info.queue is not None:
+            self.scheduler.release(info.queue)
+        if info.finalized is False:
+            info.running = False
+            info.reason = "Task cancelled"
+            info.stopped_at = datetime.now()
+            info.finalized = True
+            self.store.finalize(info)
+
     async def _task_runtime(
         self, typename: str, id_task: str, method_name: str, *args, **kwargs
     ) -> Optional[ScheduledTask]:
@@ -334,7 +475,10 @@ class QwebTaskManager(Loggable):
         )
         if info is not None:
             self._log_info(f"Task scheduled : {typename} ({id_task})", 0)
+            CURRENT_TASK.set(id_task)
             try:
+                if info.queue is not None:
+                    await self.scheduler.wait(info.queue)
                 info.result = await self.__run_systask(method_name, *args, **kwargs)
                 info.success = True
                 msg = f"{typename} ({id_task}) Result={info.result}"
@@ -358,10 +502,11 @@ class QwebTaskManager(Loggable):
                 msg = f"{typename} ({id_task}) Reason={info.reason}"
                 self._log_error(f"Task error     : {msg}", 3)
             finally:
+                if info.queue is not None:
+                    self.scheduler.release(info.queue)
                 info.running = False
                 info.stopped_at = datetime.now()
                 info.finalized = True
-                await self._remove_scheduled_task(id_task)
                 await self._add_stopped_task(info)
                 self._log_info(f"Task finalized : {typename} ({id_task})", 0)
             return info
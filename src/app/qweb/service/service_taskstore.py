@@ -0,0 +1,199 @@
+"""
+Stores scheduled tasks.
+
+Tasks are kept in a single registry with secondary indexes by object,
+instance and owner, so lookups do not scan all tasks. Finished tasks are
+retained in order of completion and evicted by count and age. Evicted
+tasks may be handed to a spill handler to keep the history elsewhere.
+Listeners are told about every task added or finalized.
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import TYPE_CHECKING, Callable, Optional
+from app.qweb.common.config import QwebTaskStoreConfig
+from app.qweb.common.enums import ScheduledTaskFilter
+from app.qweb.logging.logging import LogTarget, Loggable
+
+if TYPE_CHECKING:
+    from app.qweb.service.service_tasks import ScheduledTask
+
+SpillHandler = Callable[["ScheduledTask"], None]
+TaskListener = Callable[["ScheduledTask"], None]
+
+
+class TaskIndex:
+    """Maps a key to the ids of its tasks in insertion order"""
+
+    def __init__(self):
+        self.entries: dict[str | int, dict[str, None]] = {}
+
+    def add(self, key: str | int, id_task: str):
+        """Adds task id to key"""
+        self.entries.setdefault(key, {})[id_task] = None
+
+    def remove(self, key: str | int, id_task: str):
+        """Removes task id from key"""
+        ids = self.entries.get(key)
+        if ids is not None:
+            ids.pop(id_task, None)
+            if len(ids) == 0:
+                self.entries.pop(key)
+
+    def get(self, key: str | int) -> dict[str, None]:
+        """Returns task ids of key"""
+        return self.entries.get(key, {})
+
+
+class TaskStore(Loggable):
+    """Registry of running and finished tasks"""
+
+    def __init__(self, cfg: Optional[QwebTaskStoreConfig] = None):
+        Loggable.__init__(self, LogTarget.TASK)
+        self.cfg = cfg if cfg is not None else QwebTaskStoreConfig()
+        self.running: dict[str, "ScheduledTask"] = {}
+        self.finished: OrderedDict[str, "ScheduledTask"] = OrderedDict()
+        self.by_object = TaskIndex()
+        self.by_instance = TaskIndex()
+        self.by_owner = TaskIndex()
+        self.spill_handler: Optional[SpillHandler] = None
+        self.listeners: list[TaskListener] = []
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self.running) + len(self.finished)
+
+    def add(self, task: "ScheduledTask"):
+        """Adds running task"""
+        self.running[task.id_task] = task
+        if task.id_object != "":
+            self.by_object.add(task.id_object, task.id_task)
+        if task.id_instance != "":
+            self.by_instance.add(task.id_instance, task.id_task)
+        self.by_owner.add(task.id_owner, task.id_task)
+        self._notify(task)
+
+    def finalize(self, task: "ScheduledTask"):
+        """Moves task to the finished tasks and evicts old ones"""
+        if task.id_task not in self.running and task.id_task not in self.finished:
+            self.add(task)
+        self.running.pop(task.id_task, None)
+        self.finished[task.id_task] = task
+        self.finished.move_to_end(task.id_task)
+        self.evict()
+        self._notify(task)
+
+    def remove(self, id_task: str) -> Optional["ScheduledTask"]:
+        """Removes task from registry and indexes"""
+        task = self.running.pop(id_task, None)
+        if task is None:
+            task = self.finished.pop(id_task, None)
+        if task is not None:
+            self.by_object.remove(task.id_object, id_task)
+            self.by_instance.remove(task.id_instance, id_task)
+            self.by_owner.remove(task.id_owner, id_task)
+        return task
+
+    def get(
+        self, id_task: str, state: ScheduledTaskFilter = ScheduledTaskFilter.ALL
+    ) -> Optional["ScheduledTask"]:
+        """Returns task by id"""
+        if state in (ScheduledTaskFilter.RUNNING, ScheduledTaskFilter.ALL):
+            if id_task in self.running:
+                return self.running[id_task]
+        if state in (ScheduledTaskFilter.FINAL, ScheduledTaskFilter.ALL):
+            if id_task in self.finished:
+                return self.finished[id_task]
+        return None
+
+    def find(
+        self,
+        state: ScheduledTaskFilter = ScheduledTaskFilter.ALL,
+        id_owner: int = 0,
+        id_object: str = "",
+        id_instance: str = "",
+    ) -> dict[str, "ScheduledTask"]:
+        """Returns tasks matching all given filters, using the smallest index"""
+        candidates: list[dict] = []
+        if id_object != "":
+            candidates.append(self.by_object.get(id_object))
+        if id_instance != "":
+            candidates.append(self.by_instance.get(id_instance))
+        if id_owner != 0:
+            candidates.append(self.by_owner.get(id_owner))
+        if len(candidates) == 0:
+            candidates = self._get_state_dicts(state)
+            ids = [id_task for tasks in candidates for id_task in tasks]
+        else:
+            smallest = min(candidates, key=len)
+            ids = list(smallest)
+
+        result = {}
+        for id_task in ids:
+            task = self.get(id_task, state)
+            if task is None:
+                continue
+            if id_object not in ("", task.id_object):
+                continue
+            if id_instance not in ("", task.id_instance):
+                continue
+            if id_owner not in (0, task.id_owner):
+                continue
+            result[id_task] = task
+        return result
+
+    def evict(self) -> int:
+        """Evicts finished tasks exceeding count or age limits"""
+        evicted = 0
+        limit_count = max(self.cfg.history_max_finished, 0)
+        limit_ts = datetime.now().timestamp() - self.cfg.history_retention_s
+        while self.finished:
+            _, oldest = next(iter(self.finished.items()))
+            if (
+                len(self.finished) <= limit_count
+                and oldest.stopped_at.timestamp() >= limit_ts
+            ):
+                break
+            self.remove(oldest.id_task)
+            self._spill(oldest)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
+
+    def tojson(self) -> dict:
+        """Converts object to json"""
+        return {
+            "running": len(self.running),
+            "finished": len(self.finished),
+            "evicted": self.evicted,
+            "objects": len(self.by_object.entries),
+            "instances": len(self.by_instance.entries),
+            "owners": len(self.by_owner.entries),
+        }
+
+    def _get_state_dicts(self, state: ScheduledTaskFilter) -> list[dict]:
+        if state == ScheduledTaskFilter.RUNNING:
+            return [self.running]
+        if state == ScheduledTaskFilter.FINAL:
+            return [self.finished]
+        return [self.running, self.finished]
+
+    def add_listener(self, listener: TaskListener) -> Callable[[], None]:
+        """Adds listener for added and finalized tasks, returns remover"""
+        self.listeners.append(listener)
+        return lambda: self.listeners.remove(listener)
+
+    def _notify(self, task: "ScheduledTask"):
+        for listener in list(self.listeners):
+            try:
+                listener(task)
+            except Exception as exe:
+                self._log_error(f"Task listener failed: {task.id_task} ({exe})")
+
+    def _spill(self, task: "ScheduledTask"):
+        if self.spill_handler is None:
+            return
+        try:
+            self.spill_handler(task)
+        except Exception as exe:
+            self._log_error(f"Task spill failed: {task.id_task} ({exe})")
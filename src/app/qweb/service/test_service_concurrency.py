@@ -0,0 +1,72 @@
+"""Test bounded execution of bulk tasks and tasks of a request."""
+
+import asyncio
+
+from app.qweb.common.config import QwebBulkConfig
+from .service_concurrency import BulkProgress, run_bounded
+from .service_tasks import QwebTaskManager
+
+
+def test_limit_timeout_and_failures():
+    """Items run bounded, failures and timeouts are reported per item."""
+    inflight = [0, 0]
+    reports: list[BulkProgress] = []
+
+    async def work(delay: float, fail: bool = False) -> float:
+        inflight[0] += 1
+        inflight[1] = max(inflight)
+        try:
+            await asyncio.sleep(delay)
+            if fail:
+                raise ValueError("failed")
+            return delay
+        finally:
+            inflight[0] -= 1
+
+    factories = [lambda: work(0.01) for _ in range(8)]
+    factories.append(lambda: work(0.01, True))
+    factories.append(lambda: work(1))
+    result = asyncio.run(run_bounded(factories, 3, 0.2, reports.append))
+
+    assert inflight[1] == 3
+    assert len(result.succeeded) == 8
+    assert [item.index for item in result.failed] == [8, 9]
+    assert isinstance(result.items[8].error, ValueError)
+    assert result.items[9].timed_out
+    assert reports[-1].finished == 10 and reports[-1].failed == 2
+    assert result.tojson()["timed_out"] == 1
+
+
+def test_request_tasks_fail_fast():
+    """Tasks of a request ignore the bulk timeout, the first error aborts."""
+    class Handler:
+        cancelled = False
+
+        async def slow(self) -> str:
+            await asyncio.sleep(0.1)
+            return "slow"
+
+        async def fail(self):
+            raise ValueError("failed")
+
+        async def wait(self):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                self.cancelled = True
+                raise
+
+    async def scenario():
+        manager = QwebTaskManager(cfg_bulk=QwebBulkConfig(timeout_s=0.01))
+        handler = Handler()
+        ok = await manager.run_tasks_concurrently([(handler, "slow", [], {})])
+        try:
+            await manager.run_tasks_concurrently(
+                [(handler, "wait", [], {}), (handler, "fail", [], {})]
+            )
+        except ValueError:
+            await asyncio.sleep(0)
+            return ok, handler.cancelled
+        return ok, False
+
+    assert asyncio.run(scenario()) == (["slow"], True)
@@ -0,0 +1,109 @@
+"""Test scheduling of system tasks."""
+
+import asyncio
+import pytest
+
+from app.qweb.common.config import QwebSchedulerConfig
+from app.qweb.common.errors import TaskAdmissionError
+from .service_scheduler import CURRENT_TASK, TaskScheduler
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_fair_between_owners():
+    """A burst of a single owner does not delay other owners."""
+
+    async def scenario():
+        sched = TaskScheduler(QwebSchedulerConfig(max_running=1, max_running_owner=0))
+        entries = [sched.submit(f"a{index}", "A", 1) for index in range(4)]
+        entries.append(sched.submit("b0", "A", 2))
+        order = []
+        for _ in range(len(entries)):
+            running = next(e for e in entries if e.running and not e.released)
+            order.append(running.id_task)
+            sched.release(running)
+        return order
+
+    assert _run(scenario()) == ["a0", "b0", "a1", "a2", "a3"]
+
+
+def test_priority_weights_and_type_limits():
+    """Interactive tasks overtake bulk tasks limited by their tasktype."""
+
+    async def scenario():
+        cfg = QwebSchedulerConfig(
+            max_running=2,
+            max_running_owner=0,
+            priorities={"CLONE": "bulk", "CONNECT": "interactive"},
+            limits={"CLONE": 1},
+        )
+        sched = TaskScheduler(cfg)
+        clones = [sched.submit(f"c{index}", "CLONE", 1) for index in range(3)]
+        connect = sched.submit("i0", "CONNECT", 2)
+        return clones, connect, sched
+
+    clones, connect, sched = _run(scenario())
+    assert [entry.running for entry in clones] == [True, False, False]
+    assert connect.running
+    assert sched.position(clones[2]) == 2
+    assert sched.tojson()["tasktypes"] == {"CLONE": 1, "CONNECT": 1}
+
+
+def test_backpressure_and_cancel():
+    """Full queues reject tasks, cancelled entries free their place."""
+
+    async def scenario():
+        cfg = QwebSchedulerConfig(max_running=1, max_queued=1)
+        sched = TaskScheduler(cfg)
+        sched.submit("t0", "A", 1)
+        queued = sched.submit("t1", "A", 2)
+        with pytest.raises(TaskAdmissionError):
+            sched.submit("t2", "A", 3)
+        sched.release(queued)
+        assert queued.started.cancelled()
+        sched.submit("t3", "A", 3)
+        return sched.tojson()
+
+    status = _run(scenario())
+    assert status["rejected"] == 1
+    assert status["queued"] == 1
+
+
+def test_type_limit_does_not_block_other_types_of_owner():
+    """Tasks behind a tasktype at its limit run if their tasktype is free."""
+
+    async def scenario():
+        cfg = QwebSchedulerConfig(max_running=4, limits={"CREATE": 1})
+        sched = TaskScheduler(cfg)
+        creates = [sched.submit(f"c{index}", "CREATE", 1) for index in range(2)]
+        other = sched.submit("o0", "CONNECT", 1)
+        return creates, other
+
+    creates, other = _run(scenario())
+    assert [entry.running for entry in creates] == [True, False]
+    assert other.running
+
+
+def test_awaited_tasks_use_parent_slot():
+    """Tasks awaited by a running task are adopted onto its slot."""
+
+    async def scenario():
+        sched = TaskScheduler(QwebSchedulerConfig(max_running=1))
+        parent = sched.submit("p", "A", 1)
+        CURRENT_TASK.set(parent.id_task)
+        awaited = sched.submit("c", "B", 1)
+        spawned = sched.submit("s", "B", 1)
+        queued = (awaited.running, spawned.running)
+        adopted = sched.adopt(awaited)
+        CURRENT_TASK.set("")
+        status = sched.tojson()
+        sched.release(awaited)
+        sched.release(parent)
+        return queued, adopted, awaited, spawned, status, sched.running_total
+
+    queued, adopted, awaited, spawned, status, running = _run(scenario())
+    assert queued == (False, False) and adopted and awaited.nested
+    assert status["running"] == 1 and status["tasktypes"] == {"A": 1}
+    assert spawned.running and not spawned.nested and running == 1
@@ -0,0 +1,74 @@
+"""Test the indexed task registry."""
+
+import asyncio
+
+from app.qweb.common.config import QwebSchedulerConfig, QwebTaskStoreConfig
+from app.qweb.common.enums import ScheduledTaskFilter
+from .service_tasks import QwebTaskManager
+
+
+async def _work(delay: float) -> float:
+    await asyncio.sleep(delay)
+    return delay
+
+
+def test_indexes_and_retention():
+    """Finished tasks stay indexed until evicted by count."""
+
+    async def scenario():
+        spilled = []
+        manager = QwebTaskManager(
+            QwebSchedulerConfig(), QwebTaskStoreConfig(history_max_finished=3)
+        )
+        manager.set_spill_handler(spilled.append)
+        tasks = [
+            await manager.start_systask(
+                "T", (_work, [0], {}), True, index % 2 + 1, f"obj{index % 2}"
+            )
+            for index in range(5)
+        ]
+        pending = await manager.start_systask(
+            "T", (_work, [10], {}), True, 1, "obj0", "inst0"
+        )
+        await asyncio.gather(*[task.task for task in tasks])
+
+        assert [task.id_task for task in spilled] == [t.id_task for t in tasks[:2]]
+        final = await manager.find_tasks(ScheduledTaskFilter.FINAL, id_owner=1)
+        assert list(final) == [tasks[2].id_task, tasks[4].id_task]
+        running = await manager.get_tasks_by_object("obj0")
+        assert running == [pending]
+        found = await manager.get_scheduled_task(
+            ScheduledTaskFilter.ALL, "", "", "inst0"
+        )
+        assert found is pending
+
+        pending.task.cancel()
+        await asyncio.gather(pending.task, return_exceptions=True)
+        assert pending.finalized and pending.reason == "Task cancelled"
+        return manager.store.tojson()
+
+    status = asyncio.run(scenario())
+    assert status == {
+        "running": 0,
+        "finished": 3,
+        "evicted": 3,
+        "objects": 2,
+        "instances": 1,
+        "owners": 2,
+    }
+
+
+def test_listeners_see_started_and_finished_tasks():
+    """Listeners are called on start and finish until removed."""
+
+    async def scenario():
+        seen = []
+        manager = QwebTaskManager(QwebSchedulerConfig(), QwebTaskStoreConfig())
+        remove = manager.add_task_listener(lambda t: seen.append(t.running))
+        task = await manager.start_systask("T", (_work, [0], {}), True, 1)
+        await task.task
+        remove()
+        await (await manager.start_systask("T", (_work, [0], {}), True, 1)).task
+        return seen
+
+    assert asyncio.run(scenario()) == [True, False]